@@ -0,0 +1,271 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Admission control for the creation of Braket hybrid jobs and for other API calls."""
+
+import asyncio
+import contextlib
+import random
+import time
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional
+
+import botocore.exceptions
+from covalent._shared_files.logger import app_log
+
+from covalent_braket_plugin import metrics
+
+DEFAULT_SUBMIT_RATE = 1.0
+DEFAULT_SUBMIT_BURST = 5
+DEFAULT_MAX_RETRIES = 5
+
+# Error codes of throttled requests and of requests exceeding a service quota, such as the
+# number of concurrent hybrid jobs, which succeed once retried later.
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "ServiceQuotaExceededException",
+}
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Return whether an error means that a request was throttled and can be retried."""
+    return (
+        isinstance(error, botocore.exceptions.ClientError)
+        and error.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+    )
+
+
+class TokenBucket:
+    """Limit the rate of requests, allowing short bursts.
+
+    Attributes:
+        rate: Number of requests per second, or 0 for no limit.
+        burst: Maximum number of requests issued at once.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be issued. Waiters are served in order."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def drain(self) -> None:
+        """Use up the burst, e.g. after a request was throttled."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+
+
+class AdmissionController:
+    """Queue job submissions of one AWS account and region so that they stay within limits.
+
+    A semaphore bounds the number of jobs that run at once, and a token bucket the rate of
+    ``create_job`` calls. Submissions beyond the limits wait locally, in order, until a job
+    finishes or a token is available. Throttled calls and calls exceeding a service quota are
+    retried with exponential backoff and jitter, and drain the token bucket so that other
+    queued submissions slow down as well.
+
+    Attributes:
+        max_concurrent_jobs: Maximum number of jobs running at once, or 0 for no limit.
+        max_retries: Maximum number of retries of a throttled call.
+        base_delay: Delay in seconds before the first retry, doubled for every further retry.
+        max_delay: Maximum delay in seconds between retries.
+        queue_depth: Number of submissions currently waiting for a job slot or a token.
+        running: Number of job slots currently held.
+        admitted: Number of calls issued.
+        throttled: Number of throttled calls.
+        total_wait: Total time in seconds submissions spent waiting.
+        max_wait: Longest time in seconds a submission spent waiting.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_SUBMIT_RATE,
+        burst: int = DEFAULT_SUBMIT_BURST,
+        max_concurrent_jobs: int = 0,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_depth = 0
+        self.running = 0
+        self.admitted = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._bucket = TokenBucket(rate, burst)
+        self._slots = asyncio.Semaphore(max_concurrent_jobs) if max_concurrent_jobs > 0 else None
+
+    @contextlib.asynccontextmanager
+    async def _waiting(self) -> AsyncIterator[None]:
+        self.queue_depth += 1
+        start = time.monotonic()
+        try:
+            with metrics.span("admission_wait"):
+                yield
+        finally:
+            self.queue_depth -= 1
+            waited = time.monotonic() - start
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    async def acquire_slot(self) -> None:
+        """Wait for a job slot. Release it with :meth:`release_slot` once the job finished."""
+        if self._slots is not None:
+            async with self._waiting():
+                await self._slots.acquire()
+        self.running += 1
+
+    def release_slot(self) -> None:
+        """Release a job slot acquired with :meth:`acquire_slot`."""
+        self.running -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a job slot for the duration of the block."""
+        await self.acquire_slot()
+        try:
+            yield
+        finally:
+            self.release_slot()
+
+    async def call(self, function: Callable[[], Awaitable[Any]]) -> Any:
+        """Issue a rate-limited call, retrying it while it is throttled.
+
+        Args:
+            function: Coroutine function issuing the call.
+
+        Returns:
+            The call's return value.
+        """
+        attempt = 0
+        while True:
+            async with self._waiting():
+                await self._bucket.acquire()
+            self.admitted += 1
+            try:
+                return await function()
+            except botocore.exceptions.ClientError as error:
+                if not is_throttling_error(error) or attempt >= self.max_retries:
+                    raise
+                self.throttled += 1
+                metrics.increment("submit_retries", reason="throttled")
+                self._bucket.drain()
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+                app_log.debug(f"Request throttled, retrying in {delay:.1f} seconds: {error}")
+                attempt += 1
+                async with self._waiting():
+                    await asyncio.sleep(delay)
+
+    def metrics(self) -> Dict[str, float]:
+        """Return the controller's counters and gauges."""
+        return {
+            "queue_depth": self.queue_depth,
+            "running": self.running,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "total_wait": self.total_wait,
+            "max_wait": self.max_wait,
+        }
+
+
+# One registry per event loop, since the controllers' semaphores and locks belong to a loop.
+_controllers: "weakref.WeakKeyDictionary[Any, Dict[Hashable, AdmissionController]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+_budgets: "weakref.WeakKeyDictionary[Any, Dict[Hashable, TokenBucket]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_api_budget(key: Hashable, rate: float = 0.0, burst: int = 1) -> TokenBucket:
+    """Return the budget of read calls shared by the status poller and log tailers of an identity.
+
+    The limits are taken from the first executor that asks for the budget of an identity on
+    the running event loop.
+
+    Args:
+        key: Hashable identifying the AWS account and region.
+        rate: Number of status refreshes and log reads per second, or 0 for no limit.
+        burst: Maximum number of refreshes and reads issued at once.
+
+    Returns:
+        The shared token bucket.
+    """
+    budgets = _budgets.setdefault(asyncio.get_running_loop(), {})
+    budget = budgets.get(key)
+    if budget is None:
+        budget = budgets[key] = TokenBucket(rate, burst)
+    return budget
+
+
+def get_admission_controller(
+    key: Hashable,
+    rate: float = DEFAULT_SUBMIT_RATE,
+    burst: int = DEFAULT_SUBMIT_BURST,
+    max_concurrent_jobs: int = 0,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> AdmissionController:
+    """Return the admission controller shared by every executor of an AWS identity.
+
+    The limits are taken from the first executor that asks for the controller of an identity
+    on the running event loop.
+
+    Args:
+        key: Hashable identifying the AWS account and region, e.g. profile, region and
+            credentials file.
+        rate: Number of ``create_job`` calls per second, or 0 for no limit.
+        burst: Maximum number of ``create_job`` calls issued at once.
+        max_concurrent_jobs: Maximum number of jobs running at once, or 0 for no limit.
+        max_retries: Maximum number of retries of a throttled call.
+
+    Returns:
+        The shared admission controller.
+    """
+    controllers = _controllers.setdefault(asyncio.get_running_loop(), {})
+    controller: Optional[AdmissionController] = controllers.get(key)
+    if controller is None:
+        controller = controllers[key] = AdmissionController(
+            rate, burst, max_concurrent_jobs, max_retries
+        )
+    return controller
@@ -0,0 +1,126 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Collection of small tasks into batches that run on a single Braket hybrid job."""
+
+import asyncio
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+from covalent_braket_plugin import metrics
+
+RunBatch = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class _PendingBatch:
+    """Items collected for a batch that has not been started yet."""
+
+    def __init__(self, run_batch: RunBatch):
+        self.run_batch = run_batch
+        self.items: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """Group items with the same key into batches and run each batch once.
+
+    A batch starts when its window has passed since its first item arrived or when it holds
+    the maximum number of items, whichever comes first. It is run by the function given with
+    its first item, which returns one outcome per item; each caller receives the outcome of
+    its own item. If running the batch raises, every caller of the batch receives the error, and
+    if it is cancelled, so is every caller.
+
+    Attributes:
+        batches_run: Number of batches started so far.
+    """
+
+    def __init__(self):
+        self.batches_run = 0
+        self._pending: Dict[Hashable, _PendingBatch] = {}
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(
+        self, key: Hashable, item: Any, run_batch: RunBatch, window: float, max_size: int
+    ) -> Any:
+        """Add an item to the batch of its key and wait for its outcome.
+
+        Args:
+            key: Hashable identifying items that can share a batch.
+            item: The item.
+            run_batch: Coroutine function running a batch, used if the item starts a new one.
+            window: Number of seconds to wait for more items after the first item of a batch.
+            max_size: Maximum number of items in a batch.
+
+        Returns:
+            The item's outcome.
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch(run_batch)
+            batch.timer = loop.call_later(window, self._start, key, batch)
+
+        future = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= max_size:
+            self._start(key, batch)
+
+        return await future
+
+    def _start(self, key: Hashable, batch: _PendingBatch) -> None:
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+        batch.timer.cancel()
+        self.batches_run += 1
+
+        # The batch serves several electrons, so it must not carry the tags of the first one.
+        task = metrics.detached(asyncio.ensure_future, self._run(batch))
+        # Keep a reference, the event loop only holds weak ones.
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: _PendingBatch) -> None:
+        try:
+            outcomes = await batch.run_batch(batch.items)
+        except Exception as error:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        except BaseException:
+            # Cancelled, e.g. while the dispatch is cancelled, so are the electrons waiting.
+            for future in batch.futures:
+                future.cancel()
+            raise
+
+        for future, outcome in zip(batch.futures, outcomes):
+            if not future.done():
+                future.set_result(outcome)
+
+
+# One registry per event loop, since the batches' futures belong to a loop.
+_batchers: "weakref.WeakKeyDictionary[Any, MicroBatcher]" = weakref.WeakKeyDictionary()
+
+
+def get_batcher() -> MicroBatcher:
+    """Return the batcher shared by every executor on the running event loop."""
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = MicroBatcher()
+    return batcher
@@ -17,22 +17,77 @@
 """AWS Braket Hybrid Jobs executor plugin for the Covalent dispatcher."""
 
 import asyncio
+import json
 import os
 import sys
-import tempfile
+import time
+import uuid
 from functools import partial
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Tuple
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
 
-import boto3
 import botocore
-import cloudpickle as pickle
 from covalent._shared_files.config import get_config
 from covalent._shared_files.exceptions import TaskCancelledError
 from covalent._shared_files.logger import app_log
 from covalent._workflow.transport import TransportableObject
 from covalent_aws_plugins import AWSExecutor
 
+from covalent_braket_plugin import codec as payload_codec
+from covalent_braket_plugin import datasets, local, metrics, options
+from covalent_braket_plugin import result_cache as cached_results
+from covalent_braket_plugin.admission import (
+    AdmissionController,
+    TokenBucket,
+    get_admission_controller,
+    get_api_budget,
+)
+from covalent_braket_plugin.batcher import get_batcher
+from covalent_braket_plugin.clients import evict_clients, get_client, is_auth_error
+from covalent_braket_plugin.identity import DEFAULT_IDENTITY_TTL, IdentityCache, get_identity_cache
+from covalent_braket_plugin.job_logs import (
+    DEFAULT_MAX_LOG_BYTES,
+    LOG_GROUP_NAME,
+    LOG_RETRIEVAL_MODES,
+    JobLogReader,
+    LogBuffer,
+    LogTailer,
+    defer,
+    get_tailer,
+    pop_tailer,
+    start_tailer,
+    wait_for_deferred,
+)
+from covalent_braket_plugin.journal import JOURNAL_DIR, JobJournal
+from covalent_braket_plugin.object_store import OBJECT_PREFIX, ObjectStore, is_missing_object_error
+from covalent_braket_plugin.poller import JobStatusPoller, get_poller
+from covalent_braket_plugin.polling import (
+    AdaptivePollingStrategy,
+    FixedPollingStrategy,
+    PollingStrategy,
+)
+from covalent_braket_plugin.result_cache import (
+    DEFAULT_RESULT_CACHE_MAX_BYTES,
+    DEFAULT_RESULT_CACHE_TTL,
+)
+from covalent_braket_plugin.runner import parse_module_list, parse_timings
+from covalent_braket_plugin.thread_pools import BlockingCallPool, get_pool
+from covalent_braket_plugin.transfer import (
+    CHECKSUM_ALGORITHMS,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MULTIPART_THRESHOLD,
+    MIN_PART_SIZE,
+    TransferSettings,
+)
+from covalent_braket_plugin.transports import (
+    TRANSPORTS,
+    AioBotocoreTransport,
+    Boto3Transport,
+    get_aiobotocore_transport,
+)
+from covalent_braket_plugin.warm_pool import Worker, get_warm_pool
+from covalent_braket_plugin.worker import done_key, task_key
+
 _EXECUTOR_PLUGIN_DEFAULTS = {
     "credentials": "",
     "profile": "",
@@ -47,11 +102,114 @@ _EXECUTOR_PLUGIN_DEFAULTS = {
     "time_limit": 300,
     "cache_dir": "/tmp/covalent",
     "poll_freq": 10,
+    "max_pool_connections": 32,
+    "polling_strategy": "adaptive",
+    "max_polls": 0,
+    "expected_runtime": 0,
+    "stream_transfers": True,
+    "spool_threshold": 64 * 1024 * 1024,
+    "codec": "none",
+    "warm_pool": False,
+    "warm_pool_size": 10,
+    "worker_idle_timeout": 300,
+    "worker_max_tasks": 100,
+    "worker_time_limit": 3600,
+    "batch_size": 1,
+    "batch_window": 1.0,
+    "batch_parallelism": 1,
+    "submit_rate": 1.0,
+    "submit_burst": 5,
+    "max_concurrent_jobs": 0,
+    "submit_max_retries": 5,
+    "control_pool_size": 16,
+    "transfer_pool_size": 8,
+    "thread_pool_max_queue": 0,
+    "transport": "boto3",
+    "log_retrieval": "inline",
+    "log_output": "",
+    "log_max_bytes": DEFAULT_MAX_LOG_BYTES,
+    "log_max_lines": 0,
+    "tail_logs": False,
+    "log_tail_interval": 10.0,
+    "api_rate": 0.0,
+    "log_timeout": 60.0,
+    "identity_ttl": DEFAULT_IDENTITY_TTL,
+    "prefetch_modules": "",
+    "metrics_sink": "",
+    "execution_mode": "jobs",
+    "local_workers": 0,
+    "result_cache": "off",
+    "result_cache_ttl": DEFAULT_RESULT_CACHE_TTL,
+    "result_cache_max_bytes": DEFAULT_RESULT_CACHE_MAX_BYTES,
+    "reattach_jobs": True,
+    "resume_attempts": 0,
+    "cancel_timeout": 60.0,
+    "transfer_part_size": 0,
+    "transfer_max_concurrency": DEFAULT_MAX_CONCURRENCY,
+    "transfer_threshold": DEFAULT_MULTIPART_THRESHOLD,
+    "transfer_checksum": "",
+    "dataset_threshold": 0,
 }
 BRAKET_JOB_NAME = "job-{dispatch_id}-{node_id}"
+
+# Error codes of get_job for a job that does not exist.
+_MISSING_JOB_ERROR_CODES = {"ResourceNotFoundException", "ValidationException"}
+
+# Statuses of quantum tasks that can still be cancelled.
+_ACTIVE_QUANTUM_TASK_STATES = ("CREATED", "QUEUED", "RUNNING")
 executor_plugin_name = "BraketExecutor"
 
 
+class JobFailedError(Exception):
+    """A Braket hybrid job ended in the FAILED state, e.g. after reaching its time limit.
+
+    Attributes:
+        job_arn: ARN of the job.
+        failure_reason: Reason of the failure reported by Braket.
+    """
+
+    def __init__(self, job_arn: str, failure_reason: str):
+        super().__init__(failure_reason)
+        self.job_arn = job_arn
+        self.failure_reason = failure_reason
+
+
+def _job_name(image_tag: str, attempt: int = 0) -> str:
+    """Return the name of the job running a task, which must be unique for each attempt."""
+    if attempt:
+        return f"covalent-{image_tag}-resume-{attempt}"
+    return f"covalent-{image_tag}"
+
+
+def _log_line(job_name: str, line: str) -> None:
+    app_log.info(f"{job_name}: {line.rstrip()}")
+
+
+def _write_stdout(line: str) -> None:
+    # Look sys.stdout up on every write, since Covalent redirects it per electron.
+    sys.stdout.write(line)
+
+
+def _write_all(sinks: List[Callable[[str], Any]], line: str) -> None:
+    for sink in sinks:
+        sink(line)
+
+
+def _log_phase_timings(job_name: str, line: str) -> None:
+    timings = parse_timings(line)
+    if timings is not None:
+        _log_timings(job_name, timings)
+
+
+def _log_timings(name: str, timings: Dict[str, float]) -> None:
+    phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in timings.items())
+    app_log.debug(f"Phase timings of {name}: {phases}")
+    # The runtime only reports durations, so the spans are placed as if they just ended.
+    scope, now = metrics.current(), time.time()
+    for phase, seconds in timings.items():
+        metrics.record_span(scope, "runtime", now - seconds, seconds, phase=phase)
+
+
 class BraketExecutor(AWSExecutor):
     """AWS Braket Hybrid Jobs executor plugin class."""
 
@@ -70,6 +228,53 @@ class BraketExecutor(AWSExecutor):
         cache_dir: str = None,
         region: str = None,
         log_group_name: str = None,
+        max_pool_connections: int = None,
+        polling_strategy: Union[str, PollingStrategy] = None,
+        max_polls: int = None,
+        expected_runtime: float = None,
+        stream_transfers: bool = None,
+        spool_threshold: int = None,
+        codec: str = None,
+        warm_pool: bool = None,
+        warm_pool_size: int = None,
+        worker_idle_timeout: int = None,
+        worker_max_tasks: int = None,
+        worker_time_limit: int = None,
+        batch_size: int = None,
+        batch_window: float = None,
+        batch_parallelism: int = None,
+        submit_rate: float = None,
+        submit_burst: int = None,
+        max_concurrent_jobs: int = None,
+        submit_max_retries: int = None,
+        control_pool_size: int = None,
+        transfer_pool_size: int = None,
+        thread_pool_max_queue: int = None,
+        transport: str = None,
+        log_retrieval: str = None,
+        log_output: str = None,
+        log_max_bytes: int = None,
+        log_max_lines: int = None,
+        tail_logs: bool = None,
+        log_tail_interval: float = None,
+        api_rate: float = None,
+        log_timeout: float = None,
+        identity_ttl: float = None,
+        prefetch_modules: Union[str, List[str]] = None,
+        metrics_sink: Union[str, metrics.MetricsSink] = None,
+        execution_mode: str = None,
+        local_workers: int = None,
+        result_cache: str = None,
+        result_cache_ttl: float = None,
+        result_cache_max_bytes: int = None,
+        reattach_jobs: bool = None,
+        resume_attempts: int = None,
+        cancel_timeout: float = None,
+        transfer_part_size: int = None,
+        transfer_max_concurrency: int = None,
+        transfer_threshold: int = None,
+        transfer_checksum: str = None,
+        dataset_threshold: int = None,
     ):
         """
         Initialize the Braket executor plugin.
@@ -88,6 +293,120 @@ class BraketExecutor(AWSExecutor):
             cache_dir (str): The path to the cache directory to use for the Braket jobs.
             region (str): The name of the AWS region to use for the Braket jobs.
             log_group_name (str): The name of the CloudWatch log group to use for the Braket jobs.
+            max_pool_connections (int): The size of the connection pool shared by the executor's AWS clients.
+            polling_strategy (Union[str, PollingStrategy]): How often job statuses are checked, either "adaptive",
+                "fixed" (every `poll_freq` seconds) or a `PollingStrategy` instance. The adaptive strategy polls
+                quickly after submission and backs off to at most `poll_freq` seconds while a job runs.
+            max_polls (int): The maximum number of status checks per job, or 0 for no limit.
+            expected_runtime (float): The number of seconds a job is expected to run, which the adaptive
+                strategy uses to poll more often as a job nears its end, or 0 if unknown.
+            stream_transfers (bool): Whether results are unpickled straight from the S3 response stream, or from
+                a spooled buffer for results downloaded in ranges, instead of being downloaded to
+                `task_results_dir` first.
+            spool_threshold (int): The size in bytes above which pickled payloads are spooled to `cache_dir`
+                instead of being kept in memory before upload.
+            codec (str): The compression applied to payloads and results, either "none", "zstd" or "lz4".
+                Compressed codecs need the `zstandard` or `lz4` package respectively, locally and in the
+                job image.
+            warm_pool (bool): Whether tasks run on persistent worker jobs shared by every executor with the
+                same AWS identity, bucket, devices and image, instead of on a new job each, which saves the
+                job's provisioning and container start for all but the first task of a worker.
+            warm_pool_size (int): The maximum number of workers running at once for the same AWS identity, bucket,
+                devices and image. Workers run one task at a time, further tasks wait for a worker to finish.
+            worker_idle_timeout (int): The number of seconds without any task after which a worker stops.
+            worker_max_tasks (int): The number of tasks after which a worker stops, or 0 for no limit.
+            worker_time_limit (int): The time limit for worker jobs.
+            batch_size (int): The maximum number of electrons run together on one job. Electrons with the same
+                AWS identity, bucket, devices, image and time limit that arrive within `batch_window` seconds
+                of each other are uploaded as one bundle and run by a single `exec.py` invocation. Set to 1, the
+                default, to run every electron on its own. Takes precedence over `warm_pool`.
+            batch_window (float): The number of seconds to wait for more electrons after the first electron of
+                a batch.
+            batch_parallelism (int): The number of electrons of a batch run concurrently in threads, or 1 to
+                run them one after another. The time limit applies to the whole batch.
+            submit_rate (float): The maximum number of `create_job` calls per second for the AWS identity,
+                or 0 for no limit. Further submissions wait locally for their turn.
+            submit_burst (int): The maximum number of `create_job` calls issued at once.
+            max_concurrent_jobs (int): The maximum number of jobs of the AWS identity running at once, or 0
+                for no limit. Set it to the account's hybrid jobs quota to queue submissions locally instead
+                of having them rejected.
+            submit_max_retries (int): The maximum number of retries of a throttled `create_job` call.
+            control_pool_size (int): The number of threads running blocking control-plane calls such as
+                `create_job`, `get_job` and CloudWatch reads. The pool is shared by every executor with the
+                same pool settings, but not with the rest of the dispatcher.
+            transfer_pool_size (int): The number of threads running S3 uploads and downloads, or 0 to run
+                them in the control-plane pool.
+            thread_pool_max_queue (int): The maximum number of calls queued in each pool, or 0 for no limit.
+                Further calls wait on the event loop until the pool has room.
+            transport (str): How AWS calls are issued, either "boto3", which runs them on the thread pools, or
+                "aiobotocore", which issues uploads, job creation, status and result queries, log reads,
+                cancellation and the hand-off of tasks to warm-pool workers natively on the event loop. The
+                latter needs the `aiobotocore` extra, `pip install covalent-braket-plugin[aiobotocore]`.
+            log_retrieval (str): When the CloudWatch logs of a job are fetched, either "inline", before the
+                result is returned, "deferred", in the background after the result was returned, or "off".
+                Deferred logs are written to `log_output`, or to the Covalent log if it is not set.
+            log_output (str): Where log lines are written as they are read, either "stdout" or a file path,
+                which may contain `{image_tag}`. If not set, inline logs are returned as the electron's stdout.
+            log_max_bytes (int): The maximum number of bytes of log lines read per job, or 0 for no limit.
+            log_max_lines (int): The maximum number of log lines read per job, or 0 for no limit.
+            tail_logs (bool): Whether the logs of a running job are read in the background every
+                `log_tail_interval` seconds and forwarded to the Covalent log, so that only the remaining
+                lines are read once the job finished.
+            log_tail_interval (float): The number of seconds between reads of a running job's logs.
+            api_rate (float): The maximum number of status refreshes and log reads per second, shared by the
+                job status poller and the log tailers of the AWS identity, or 0 for no limit.
+            log_timeout (float): The maximum number of seconds spent reading a job's logs before the result
+                is returned without them, or 0 for no limit. Failing to read the logs never fails the task.
+            identity_ttl (float): The number of seconds the validated caller identity of the AWS identity is
+                reused by every executor in the process before the credentials are validated again, or 0 to
+                validate them for every task. It is dropped early on authentication errors and when the
+                credentials file changes.
+            prefetch_modules (Union[str, List[str]]): The modules the job imports in the background while it
+                downloads the task, as a list or a comma-separated string, e.g. "pennylane,braket.aws". The
+                time a job spends in each phase is parsed from its logs and written to the Covalent debug log.
+            metrics_sink (Union[str, MetricsSink]): Where the timings of the phases of each electron and of
+                every AWS call, and the counters of calls, retries and bytes transferred, are sent, tagged with
+                the dispatch ID, node ID and job ARN. Either "memory", "prometheus" or "opentelemetry" for the
+                process-wide sink of that kind, see `metrics.get_sink`, a `MetricsSink` instance, or empty to
+                record nothing.
+            execution_mode (str): Where electrons run. "jobs", the default, runs every electron on Braket Hybrid
+                Jobs, "local" runs every electron in a local process pool and "auto" runs electrons bound for a
+                simulator, e.g. SV1 or "local:braket/braket_sv", locally and the others on Hybrid Jobs. Local
+                electrons see the same `AMZN_BRAKET_*` environment variables as a job, with the device pointing
+                at a local simulator, and need no AWS credentials. Electrons opt out with
+                `options.electron_options(local=False)`.
+            local_workers (int): The number of processes running local electrons, or 0 for one per CPU.
+            result_cache (str): Where the outcomes of tasks are stored for reuse, either "off", the default,
+                "local" for a directory in `cache_dir`, "s3" for the S3 bucket or "both". An electron whose
+                function, arguments, devices and image match a stored task returns the stored result, stdout
+                and stderr without running. Electrons that must run every time, e.g. non-deterministic
+                sampling, opt out with `options.electron_options(result_cache=False)`.
+            result_cache_ttl (float): The number of seconds stored outcomes are reused for, or 0 for no limit.
+            result_cache_max_bytes (int): The size in bytes of the local store above which the oldest outcomes
+                are evicted, or 0 for no limit.
+            reattach_jobs (bool): Whether an electron that runs again after the dispatcher restarted waits for the
+                job submitted for it before the restart, or retrieves its result if it already finished, instead
+                of uploading and submitting the task again. Submitted jobs are recorded in `cache_dir` until their
+                result is retrieved. Tasks of warm-pool workers are always submitted again.
+            resume_attempts (int): The number of times an electron whose job failed or timed out is submitted
+                again on a new job with the same checkpoint S3 URI, or 0, the default, to fail the electron.
+                Tasks that save their state with `covalent_braket_plugin.checkpoint.save_checkpoint` resume
+                from the last saved state. Batched and warm-pool tasks are not resubmitted.
+            cancel_timeout (float): The maximum number of seconds cancelling an electron waits for its job to
+                reach the CANCELLED state, or 0 to return as soon as the cancellation was requested.
+            transfer_part_size (int): The size in bytes of the parts of multipart S3 uploads and ranged downloads of
+                payloads and results, by the executor and inside the job, or 0, the default, to adapt it to each
+                object's size so that every thread gets a few parts.
+            transfer_max_concurrency (int): The maximum number of parts of an object transferred at once.
+            transfer_threshold (int): The size in bytes from which objects are transferred in parts.
+            transfer_checksum (str): The algorithm of the checksums S3 stores with uploaded payloads and results
+                and validates downloads against, either "CRC32", "CRC32C", "SHA1" or "SHA256", or empty for the
+                S3 client's default. Needs boto3 1.21 or later in the job image. With the aiobotocore transport,
+                the executor uploads every object with a single request regardless of these settings.
+            dataset_threshold (int): The size in bytes from which numpy array and bytes arguments are passed to the
+                job as memory-mapped files, like arguments wrapped in `covalent_braket_plugin.datasets.Dataset`,
+                or 0, the default, to only pass wrapped arguments that way. Such datasets are uploaded to S3 once
+                and attached to the job as input data channels instead of being pickled with every task.
         """
 
         region = region or get_config("executors.braket.region")
@@ -118,39 +437,390 @@ class BraketExecutor(AWSExecutor):
         self.classical_device = classical_device or get_config("executors.braket.classical_device")
         self.storage = storage or get_config("executors.braket.storage")
         self.ecr_image_uri = ecr_image_uri or get_config("executors.braket.ecr_image_uri")
+        self.max_pool_connections = int(
+            max_pool_connections or get_config("executors.braket.max_pool_connections")
+        )
+        self.polling_strategy = polling_strategy or get_config("executors.braket.polling_strategy")
+        self.max_polls = int(max_polls or get_config("executors.braket.max_polls"))
+        self.expected_runtime = float(
+            expected_runtime
+            if expected_runtime is not None
+            else get_config("executors.braket.expected_runtime")
+        )
+        self.stream_transfers = (
+            stream_transfers
+            if stream_transfers is not None
+            else get_config("executors.braket.stream_transfers")
+        )
+        self.spool_threshold = int(
+            spool_threshold
+            if spool_threshold is not None
+            else get_config("executors.braket.spool_threshold")
+        )
+        self.codec = codec or get_config("executors.braket.codec")
+        if self.codec not in payload_codec.CODECS:
+            raise ValueError(f"Unknown codec: {self.codec}")
+        self.warm_pool = (
+            warm_pool if warm_pool is not None else get_config("executors.braket.warm_pool")
+        )
+        self.warm_pool_size = int(warm_pool_size or get_config("executors.braket.warm_pool_size"))
+        self.worker_idle_timeout = int(
+            worker_idle_timeout or get_config("executors.braket.worker_idle_timeout")
+        )
+        self.worker_max_tasks = int(
+            worker_max_tasks
+            if worker_max_tasks is not None
+            else get_config("executors.braket.worker_max_tasks")
+        )
+        self.worker_time_limit = int(
+            worker_time_limit or get_config("executors.braket.worker_time_limit")
+        )
+        self.batch_size = int(batch_size or get_config("executors.braket.batch_size"))
+        self.batch_window = float(
+            batch_window
+            if batch_window is not None
+            else get_config("executors.braket.batch_window")
+        )
+        self.batch_parallelism = int(
+            batch_parallelism or get_config("executors.braket.batch_parallelism")
+        )
+        self.submit_rate = float(
+            submit_rate if submit_rate is not None else get_config("executors.braket.submit_rate")
+        )
+        self.submit_burst = int(submit_burst or get_config("executors.braket.submit_burst"))
+        self.max_concurrent_jobs = int(
+            max_concurrent_jobs
+            if max_concurrent_jobs is not None
+            else get_config("executors.braket.max_concurrent_jobs")
+        )
+        self.submit_max_retries = int(
+            submit_max_retries
+            if submit_max_retries is not None
+            else get_config("executors.braket.submit_max_retries")
+        )
+        self.control_pool_size = int(
+            control_pool_size or get_config("executors.braket.control_pool_size")
+        )
+        self.transfer_pool_size = int(
+            transfer_pool_size
+            if transfer_pool_size is not None
+            else get_config("executors.braket.transfer_pool_size")
+        )
+        self.thread_pool_max_queue = int(
+            thread_pool_max_queue
+            if thread_pool_max_queue is not None
+            else get_config("executors.braket.thread_pool_max_queue")
+        )
+        self.transport = transport or get_config("executors.braket.transport")
+        if self.transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport: {self.transport}")
+        self.log_retrieval = log_retrieval or get_config("executors.braket.log_retrieval")
+        if self.log_retrieval not in LOG_RETRIEVAL_MODES:
+            raise ValueError(f"Unknown log retrieval mode: {self.log_retrieval}")
+        self.log_output = log_output or get_config("executors.braket.log_output")
+        self.log_max_bytes = int(
+            log_max_bytes
+            if log_max_bytes is not None
+            else get_config("executors.braket.log_max_bytes")
+        )
+        self.log_max_lines = int(
+            log_max_lines
+            if log_max_lines is not None
+            else get_config("executors.braket.log_max_lines")
+        )
+        self.tail_logs = (
+            tail_logs if tail_logs is not None else get_config("executors.braket.tail_logs")
+        )
+        self.log_tail_interval = float(
+            log_tail_interval or get_config("executors.braket.log_tail_interval")
+        )
+        self.api_rate = float(
+            api_rate if api_rate is not None else get_config("executors.braket.api_rate")
+        )
+        self.log_timeout = float(
+            log_timeout if log_timeout is not None else get_config("executors.braket.log_timeout")
+        )
+        self.identity_ttl = float(
+            identity_ttl
+            if identity_ttl is not None
+            else get_config("executors.braket.identity_ttl")
+        )
+        self.prefetch_modules = parse_module_list(
+            prefetch_modules or get_config("executors.braket.prefetch_modules")
+        )
+        self.metrics_sink = metrics_sink or get_config("executors.braket.metrics_sink")
+        if isinstance(self.metrics_sink, str) and self.metrics_sink not in ("",) + metrics.SINKS:
+            raise ValueError(f"Unknown metrics sink: {self.metrics_sink}")
+        self.execution_mode = execution_mode or get_config("executors.braket.execution_mode")
+        if self.execution_mode not in local.EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {self.execution_mode}")
+        self.local_workers = int(
+            local_workers
+            if local_workers is not None
+            else get_config("executors.braket.local_workers")
+        )
+        self.result_cache = result_cache or get_config("executors.braket.result_cache")
+        if self.result_cache not in cached_results.RESULT_CACHE_STORES:
+            raise ValueError(f"Unknown result cache: {self.result_cache}")
+        self.result_cache_ttl = float(
+            result_cache_ttl
+            if result_cache_ttl is not None
+            else get_config("executors.braket.result_cache_ttl")
+        )
+        self.result_cache_max_bytes = int(
+            result_cache_max_bytes
+            if result_cache_max_bytes is not None
+            else get_config("executors.braket.result_cache_max_bytes")
+        )
+        self.reattach_jobs = (
+            reattach_jobs
+            if reattach_jobs is not None
+            else get_config("executors.braket.reattach_jobs")
+        )
+        self.resume_attempts = int(
+            resume_attempts
+            if resume_attempts is not None
+            else get_config("executors.braket.resume_attempts")
+        )
+        self.cancel_timeout = float(
+            cancel_timeout
+            if cancel_timeout is not None
+            else get_config("executors.braket.cancel_timeout")
+        )
+        self.transfer_part_size = int(
+            transfer_part_size
+            if transfer_part_size is not None
+            else get_config("executors.braket.transfer_part_size")
+        )
+        if self.transfer_part_size and self.transfer_part_size < MIN_PART_SIZE:
+            raise ValueError(f"Transfer part size must be at least {MIN_PART_SIZE} bytes")
+        self.transfer_max_concurrency = int(
+            transfer_max_concurrency or get_config("executors.braket.transfer_max_concurrency")
+        )
+        self.transfer_threshold = int(
+            transfer_threshold
+            if transfer_threshold is not None
+            else get_config("executors.braket.transfer_threshold")
+        )
+        self.transfer_checksum = (
+            transfer_checksum
+            if transfer_checksum is not None
+            else get_config("executors.braket.transfer_checksum")
+        ).upper()
+        if self.transfer_checksum not in CHECKSUM_ALGORITHMS:
+            raise ValueError(f"Unknown transfer checksum algorithm: {self.transfer_checksum}")
+        self.dataset_threshold = int(
+            dataset_threshold
+            if dataset_threshold is not None
+            else get_config("executors.braket.dataset_threshold")
+        )
+
+    def _get_client(self, service: str):
+        """Return the shared, pooled boto3 client for this executor's AWS identity."""
+        return get_client(
+            service,
+            profile=self.profile,
+            region=self.region,
+            credentials_file=self.credentials_file,
+            max_pool_connections=self.max_pool_connections,
+        )
 
-    async def _execute_partial_in_threadpool(self, partial_func):
-        loop = asyncio.get_running_loop()
-        future = await loop.run_in_executor(None, partial_func)
-        return future
+    def evict_clients(self) -> int:
+        """Drop the cached boto3 clients and caller identity for this executor's AWS identity.
+
+        Returns:
+            Number of clients removed from the cache.
+        """
+        get_identity_cache().invalidate(self._identity_key())
+        return evict_clients(
+            profile=self.profile, region=self.region, credentials_file=self.credentials_file
+        )
+
+    def _identity_key(self) -> Hashable:
+        return IdentityCache.make_key(self.profile, self.region, self.credentials_file)
+
+    async def _get_identity(self) -> Dict[str, str]:
+        """Return the caller identity of this executor's credentials, validating them if needed.
+
+        The identity is cached for `identity_ttl` seconds and shared by every executor of the same
+        AWS identity in the process, and concurrent tasks share a single validation call.
+
+        Returns:
+            The caller identity, with the account ID under "Account".
+        """
+        validate = partial(self._validate_credentials, raise_exception=True)
+        if not self.identity_ttl:
+            return await self._execute_partial_in_threadpool(validate)
+        return await get_identity_cache().get(
+            self._identity_key(), validate, self._get_thread_pool().submit, self.identity_ttl
+        )
+
+    def _get_transport(self) -> Union[Boto3Transport, AioBotocoreTransport]:
+        """Return the transport issuing this executor's AWS calls."""
+        if self.transport == "aiobotocore":
+            return get_aiobotocore_transport(
+                (self.profile, self.region, self.credentials_file),
+                profile=self.profile,
+                region=self.region,
+                credentials_file=self.credentials_file,
+                max_pool_connections=self.max_pool_connections,
+                run_blocking=self._execute_partial_in_threadpool,
+                spool_threshold=self.spool_threshold,
+            )
+        return Boto3Transport(
+            self._get_client,
+            self._execute_partial_in_threadpool,
+            self._get_transfer_settings(),
+            spool_threshold=self.spool_threshold,
+            on_expired_credentials=self.evict_clients,
+        )
+
+    def _get_transfer_settings(self) -> TransferSettings:
+        """Return the settings of this executor's managed S3 transfers."""
+        return TransferSettings(
+            part_size=self.transfer_part_size,
+            max_concurrency=self.transfer_max_concurrency,
+            multipart_threshold=self.transfer_threshold,
+            checksum_algorithm=self.transfer_checksum,
+        )
+
+    def _get_poller(self) -> JobStatusPoller:
+        """Return the job status poller shared by every executor of this AWS identity."""
+        return get_poller(
+            (self.profile, self.region, self.credentials_file),
+            partial(self._get_client, "braket"),
+            budget=self._get_api_budget(),
+            call=self._get_transport().call,
+        )
+
+    def _get_api_budget(self) -> TokenBucket:
+        """Return the budget of status refreshes and log reads of this executor's AWS identity."""
+        return get_api_budget((self.profile, self.region, self.credentials_file), self.api_rate)
+
+    def _get_admission_controller(self) -> AdmissionController:
+        """Return the admission controller shared by every executor of this AWS identity."""
+        return get_admission_controller(
+            (self.profile, self.region, self.credentials_file),
+            rate=self.submit_rate,
+            burst=self.submit_burst,
+            max_concurrent_jobs=self.max_concurrent_jobs,
+            max_retries=self.submit_max_retries,
+        )
+
+    def admission_metrics(self) -> Dict[str, float]:
+        """Return the job submission metrics of this executor's AWS identity.
+
+        Must be called from the event loop the executor runs on.
+
+        Returns:
+            The queue depth, running jobs, issued and throttled `create_job` calls, and the total
+            and longest time submissions waited.
+        """
+        return self._get_admission_controller().metrics()
+
+    def _get_polling_strategy(self) -> PollingStrategy:
+        """Build the strategy deciding when the status of this executor's jobs is checked."""
+        if isinstance(self.polling_strategy, PollingStrategy):
+            return self.polling_strategy
+        if self.polling_strategy == "fixed":
+            return FixedPollingStrategy(self.poll_freq, max_polls=self.max_polls)
+        if self.polling_strategy == "adaptive":
+            return AdaptivePollingStrategy(
+                min_interval=min(1.0, self.poll_freq),
+                max_interval=self.poll_freq,
+                expected_runtime=self.expected_runtime or None,
+                max_polls=self.max_polls,
+            )
+        raise ValueError(f"Unknown polling strategy: {self.polling_strategy}")
+
+    def _get_thread_pool(self, transfer: bool = False) -> BlockingCallPool:
+        """Return the thread pool running this executor's blocking calls.
+
+        Args:
+            transfer: Whether to return the pool for S3 transfers instead of the one for
+                control-plane calls. Both are the same unless `transfer_pool_size` is set.
+        """
+        if transfer and self.transfer_pool_size:
+            return get_pool(
+                "covalent-braket-transfer", self.transfer_pool_size, self.thread_pool_max_queue
+            )
+        return get_pool(
+            "covalent-braket-control", self.control_pool_size, self.thread_pool_max_queue
+        )
+
+    def thread_pool_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Return the saturation metrics of the thread pools used by this executor.
+
+        Returns:
+            Metrics of the control-plane pool and of the transfer pool.
+        """
+        return {
+            "control": self._get_thread_pool().metrics(),
+            "transfer": self._get_thread_pool(transfer=True).metrics(),
+        }
+
+    async def _execute_partial_in_threadpool(self, partial_func, transfer: bool = False):
+        return await self._get_thread_pool(transfer).run(partial_func)
 
     def load_pickle(self, filename, remove_file):
         with open(filename, "rb") as f:
-            result = pickle.load(f)
+            result = payload_codec.load(f)
         if remove_file:
             os.remove(filename)
         return result
 
     async def _upload_task(
         self, function: Callable, args: List, kwargs: Dict, upload_metadata: Dict
-    ):
+    ) -> Dict[str, str]:
         """
         Abstract method that uploads the pickled function to the remote cache.
+
+        The function and its arguments are pickled separately and stored under content-derived
+        keys, so that a function shared by many electrons, e.g. in a parameter sweep, is only
+        uploaded once. The files of staged datasets among the arguments are uploaded the same way.
+
+        Returns:
+            Dictionary with the S3 keys of the pickled function, of its arguments and of the
+            datasets' files, if there are any.
         """
-        image_tag = upload_metadata["image_tag"]
-        func_filename = f"func-{image_tag}.pkl"
+        store = ObjectStore(
+            self._get_client("s3"),
+            self.s3_bucket_name,
+            os.path.join(self.cache_dir, OBJECT_PREFIX),
+            spool_threshold=self.spool_threshold,
+            spool_dir=self.cache_dir,
+            codec=self.codec,
+            transfer=self._get_transfer_settings(),
+        )
 
-        s3 = boto3.Session(**self.boto_session_options()).client("s3")
+        transport = self._get_transport()
+        func_filename = await transport.put_object(store, function)
+        args_filename = await transport.put_object(store, (args, kwargs))
+        dataset_keys = await self._upload_datasets(store, datasets.find_refs(args, kwargs))
 
-        with tempfile.NamedTemporaryFile(dir=self.cache_dir) as function_file:
-            # Write serialized function to file
-            pickle.dump((function, args, kwargs), function_file)
-            function_file.flush()
+        payload_keys = {"func_filename": func_filename, "args_filename": args_filename}
+        if dataset_keys:
+            payload_keys["datasets"] = dataset_keys
+        return payload_keys
 
-            # Upload pickled function to S3
-            await self._execute_partial_in_threadpool(
-                partial(s3.upload_file, function_file.name, self.s3_bucket_name, func_filename)
+    async def _upload_datasets(
+        self, store: ObjectStore, refs: List[datasets.DatasetRef]
+    ) -> List[str]:
+        """Upload the files of staged datasets, skipping those the bucket already holds.
+
+        Returns:
+            S3 keys of the datasets' files.
+        """
+        return list(
+            await asyncio.gather(
+                *(
+                    self._execute_partial_in_threadpool(
+                        partial(store.put_file, ref.path, ref.key), transfer=True
+                    )
+                    for ref in refs
+                )
             )
+        )
 
     async def submit_task(self, submit_metadata: Dict) -> Any:
         """
@@ -162,21 +832,64 @@ class BraketExecutor(AWSExecutor):
         Return:
             task_uuid: Task UUID defined on the remote backend.
         """
-        braket = boto3.Session(**self.boto_session_options()).client("braket")
-
         image_tag = submit_metadata["image_tag"]
         result_filename = submit_metadata["result_filename"]
         account = submit_metadata["account"]
+        payload_keys = submit_metadata.get("payload_keys") or {
+            "func_filename": f"func-{image_tag}.pkl"
+        }
+
+        hyperparameters = {
+            "COVALENT_TASK_FUNC_FILENAME": payload_keys["func_filename"],
+            "RESULT_FILENAME": result_filename,
+            "S3_BUCKET_NAME": self.s3_bucket_name,
+            "COVALENT_RESULT_CODEC": self.codec,
+        }
+        if "args_filename" in payload_keys:
+            hyperparameters["COVALENT_TASK_ARGS_FILENAME"] = payload_keys["args_filename"]
+
+        return await self._create_job(
+            image_tag,
+            hyperparameters,
+            account,
+            self.time_limit,
+            job_name=_job_name(image_tag, submit_metadata.get("attempt", 0)),
+            input_data=datasets.input_data_config(
+                self.s3_bucket_name, payload_keys.get("datasets", [])
+            ),
+        )
+
+    async def _create_job(
+        self,
+        image_tag: str,
+        hyperparameters: Dict[str, str],
+        account: str,
+        time_limit: int,
+        job_name: Optional[str] = None,
+        input_data: Optional[List[Dict[str, Any]]] = None,
+    ) -> str:
+        """Create a Braket hybrid job running the executor's container image.
 
-        func_filename = f"func-{image_tag}.pkl"
+        Args:
+            image_tag: Unique tag of the job, used in its name and S3 paths.
+            hyperparameters: Hyperparameters passed to the job's `exec.py`.
+            account: AWS account ID owning the job's execution role.
+            time_limit: Maximum runtime of the job in seconds.
+            job_name: Name of the job, by default derived from `image_tag`.
+            input_data: Input data channels of the job, e.g. attaching datasets.
 
+        Returns:
+            ARN of the created job.
+        """
         app_log.debug(f"Using ECR Image URI: {self.ecr_image_uri}")
+        hyperparameters = {**hyperparameters, **self._get_transfer_settings().to_hyperparameters()}
+        if self.prefetch_modules:
+            hyperparameters = {
+                **hyperparameters,
+                "COVALENT_PREFETCH_MODULES": ",".join(self.prefetch_modules),
+            }
         args = {
-            "hyperParameters": {
-                "COVALENT_TASK_FUNC_FILENAME": func_filename,
-                "RESULT_FILENAME": result_filename,
-                "S3_BUCKET_NAME": self.s3_bucket_name,
-            },
+            "hyperParameters": hyperparameters,
             "algorithmSpecification": {
                 "containerImage": {
                     "uri": self.ecr_image_uri,
@@ -192,24 +905,31 @@ class BraketExecutor(AWSExecutor):
                 "instanceType": self.classical_device,
                 "volumeSizeInGb": self.storage,
             },
-            "jobName": f"covalent-{image_tag}",
+            "jobName": job_name or f"covalent-{image_tag}",
             "outputDataConfig": {
                 "s3Path": f"s3://{self.s3_bucket_name}/braket/{image_tag}",
             },
             "roleArn": f"arn:aws:iam::{account}:role/{self.execution_role}",
             "stoppingCondition": {
-                "maxRuntimeInSeconds": self.time_limit,
+                "maxRuntimeInSeconds": time_limit,
             },
         }
 
+        if input_data:
+            args["inputDataConfig"] = input_data
+
         try:
             app_log.debug("Submitting Braket Job:")
             app_log.debug(args)
 
-            job = await self._execute_partial_in_threadpool(partial(braket.create_job, **args))
+            job = await self._get_admission_controller().call(
+                partial(self._get_transport().call, "braket", "create_job", **args)
+            )
 
         except botocore.exceptions.ClientError as error:
             app_log.debug(error.response)
+            if is_auth_error(error):
+                self.evict_clients()
             raise error
 
         return job["jobArn"]
@@ -218,78 +938,219 @@ class BraketExecutor(AWSExecutor):
         """
         Abstract method that polls the remote backend until the status of a workflow's execution
         is either COMPLETED or FAILED.
+
+        The job is handed to the poller shared by all executors of the same AWS identity, which
+        refreshes every outstanding job in bulk. The metadata may hold the job's creation time
+        under "created_at", e.g. for a job submitted before the dispatcher restarted.
         """
-        braket = boto3.Session(**self.boto_session_options()).client("braket")
         job_arn = poll_metadata["job_arn"]
 
-        status = await self.get_status(braket, job_arn)
-
-        while status not in ["COMPLETED", "FAILED", "CANCELLED"]:
-            await asyncio.sleep(self.poll_freq)
-            status = await self.get_status(braket, job_arn)
+        poller = self._get_poller()
+        try:
+            status = await poller.wait(
+                job_arn, self._get_polling_strategy(), poll_metadata.get("created_at")
+            )
+        except asyncio.CancelledError:
+            poller.unwatch(job_arn)
+            raise
 
         if status == "FAILED":
-            job = await self._execute_partial_in_threadpool(
-                partial(braket.get_job, jobArn=job_arn)
-            )
-            failure_reason = job["failureReason"]
-            raise Exception(failure_reason)
+            job = await self._get_transport().call("braket", "get_job", jobArn=job_arn)
+            raise JobFailedError(job_arn, job["failureReason"])
+        if status == "CANCELLED":
+            raise TaskCancelledError(f"Braket job {job_arn} was cancelled")
 
     async def query_result(self, query_metadata: Dict) -> Any:
         """
         Abstract method that retrieves the pickled result from the remote cache.
-        """
 
-        s3 = boto3.Session(**self.boto_session_options()).client("s3")
-        logs = boto3.Session(**self.boto_session_options()).client("logs")
+        The result is downloaded while the job's logs are read. A failure or timeout of the
+        log retrieval does not affect the result, the logs are empty instead.
+        """
+        # Both run as tasks of their own, which inherit the electron's metrics scope.
+        result, log_events = await asyncio.gather(
+            self._load_result(
+                query_metadata["result_filename"], query_metadata["task_results_dir"]
+            ),
+            self._fetch_logs_isolated(
+                query_metadata["image_tag"], query_metadata.get("attempt", 0)
+            ),
+        )
 
-        result_filename = query_metadata["result_filename"]
-        task_results_dir = query_metadata["task_results_dir"]
-        image_tag = query_metadata["image_tag"]
+        # output, stdout, stderr
+        return result, log_events, ""
 
-        local_result_filename = os.path.join(task_results_dir, result_filename)
+    async def _load_result(self, result_filename: str, task_results_dir: str) -> Any:
+        """Download and decode a task's result.
 
-        await self._execute_partial_in_threadpool(
-            partial(s3.download_file, self.s3_bucket_name, result_filename, local_result_filename)
-        )
+        Args:
+            result_filename: S3 key of the result.
+            task_results_dir: Directory the result is downloaded to unless `stream_transfers`
+                is set.
 
-        result = await self._execute_partial_in_threadpool(
-            partial(self.load_pickle, local_result_filename, True)
-        )
+        Returns:
+            The decoded result.
+        """
+        transport = self._get_transport()
+        with metrics.span("result_download"):
+            if self.stream_transfers:
+                return await transport.load_object(self.s3_bucket_name, result_filename)
+
+            local_result_filename = os.path.join(task_results_dir, result_filename)
+            await transport.download_file(
+                self.s3_bucket_name, result_filename, local_result_filename
+            )
+            return await self._execute_partial_in_threadpool(
+                partial(self.load_pickle, local_result_filename, True), transfer=True
+            )
 
-        log_group_name = "/aws/braket/jobs"
-        log_stream_prefix = f"covalent-{image_tag}"
+    async def _fetch_logs_isolated(self, image_tag: str, attempt: int = 0) -> str:
+        """Fetch the logs of a job within `log_timeout` seconds, logging instead of raising errors.
 
-        log_stream_describe = await self._execute_partial_in_threadpool(
-            partial(
-                logs.describe_log_streams,
-                logGroupName=log_group_name,
-                logStreamNamePrefix=log_stream_prefix,
+        Returns:
+            The job's logs, or an empty string if they could not be fetched in time.
+        """
+        try:
+            with metrics.span("logs"):
+                return await asyncio.wait_for(
+                    self._fetch_logs(image_tag, attempt), self.log_timeout or None
+                )
+        except asyncio.TimeoutError:
+            app_log.warning(
+                f"Timed out fetching the logs of Braket job covalent-{image_tag} "
+                f"after {self.log_timeout} seconds"
             )
-        )
-        log_stream_name = log_stream_describe["logStreams"][0]["logStreamName"]
-
-        # TODO: This should be paginated, but the command doesn't support boto3 pagination
-        # Up to 10000 log events can be returned from a single call to get_log_events()
-        all_log_events = await self._execute_partial_in_threadpool(
-            partial(
-                logs.get_log_events,
-                logGroupName=log_group_name,
-                logStreamName=log_stream_name,
+        except Exception as error:
+            app_log.warning(
+                f"Failed to fetch the logs of Braket job covalent-{image_tag}: {error}"
             )
+        return ""
+
+    async def _fetch_logs(self, image_tag: str, attempt: int = 0) -> str:
+        """Fetch the CloudWatch logs of a job as configured by `log_retrieval` and `log_output`.
+
+        If the job's logs were tailed while it ran, only the remaining lines are read.
+
+        Args:
+            image_tag: Unique tag of the job.
+            attempt: Number of the task's last attempt. The logs of every attempt are read.
+
+        Returns:
+            The job's logs, or an empty string if they are not fetched, deferred or written to
+            `log_output`.
+        """
+        if self.log_retrieval == "off":
+            return ""
+
+        tailer = pop_tailer(_job_name(image_tag))
+        if tailer is not None:
+            reader = await tailer.stop()
+            for previous in range(1, attempt + 1):
+                reader.add_job(_job_name(image_tag, previous))
+        else:
+            reader = self._open_log_reader(image_tag, forward=False, attempt=attempt)
+
+        fetch = self._finish_logs(reader)
+        if self.log_retrieval == "deferred":
+            defer(fetch, f"Braket job {_job_name(image_tag)}")
+            return ""
+        return await fetch
+
+    def _open_log_reader(self, image_tag: str, forward: bool, attempt: int = 0) -> JobLogReader:
+        """Create the reader of a job's logs, writing the lines to `log_output` as they arrive.
+
+        The lines are kept to be returned as the electron's stdout unless the logs are deferred
+        or written to `log_output`. Deferred lines that are not written to `log_output` go to
+        the Covalent log.
+
+        Args:
+            image_tag: Unique tag of the job.
+            forward: Whether to forward the lines to the Covalent log as well.
+            attempt: Number of the task's last attempt. The logs of every attempt are read.
+
+        Returns:
+            The reader.
+        """
+        job_name = _job_name(image_tag)
+        keep = not (self.log_retrieval == "deferred" or self.log_output)
+
+        # The runtime reports its phase timings at the end, so they are lost if the logs are cut.
+        sinks = [partial(_log_phase_timings, job_name)]
+        log_file = None
+        if self.log_output == "stdout":
+            sinks.append(_write_stdout)
+        elif self.log_output:
+            path = self.log_output.format(image_tag=image_tag)
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            log_file = open(path, "a")
+            sinks.append(log_file.write)
+        if forward or not (keep or self.log_output):
+            sinks.append(partial(_log_line, job_name))
+
+        buffer = LogBuffer(
+            self.log_max_bytes,
+            self.log_max_lines,
+            sink=partial(_write_all, sinks),
+            keep=keep,
+        )
+        return JobLogReader(
+            self._get_transport().call,
+            [_job_name(image_tag, previous) for previous in range(attempt + 1)],
+            buffer,
+            self.log_group_name or LOG_GROUP_NAME,
+            on_close=log_file.close if log_file is not None else None,
         )
-        events = all_log_events["events"]
 
-        log_events = ""
-        for event in events:
-            log_events += event["message"] + "\n"
+    async def _finish_logs(self, reader: JobLogReader) -> str:
+        """Read the remaining lines of a job's logs and release the reader.
 
-        # output, stdout, stderr
-        return result, log_events, ""
+        Returns:
+            The lines kept by the reader.
+        """
+        try:
+            await reader.read()
+        finally:
+            reader.close()
+
+        buffer = reader.buffer
+        if buffer.truncated:
+            app_log.warning(
+                f"Logs of Braket job {reader.job_names[0]} truncated after "
+                f"{buffer.lines} lines"
+            )
+        return buffer.getvalue()
+
+    def _start_log_tailer(self, image_tag: str) -> None:
+        """Start reading the logs of a running job in the background if `tail_logs` is set."""
+        if not self.tail_logs or self.log_retrieval == "off":
+            return
+        reader = self._open_log_reader(image_tag, forward=True)
+        tailer = LogTailer(reader, self.log_tail_interval, self._get_api_budget())
+        start_tailer(_job_name(image_tag), tailer)
+
+    def _tail_resumed_job(self, image_tag: str, attempt: int) -> None:
+        """Add the job of a resumed task to the logs being tailed, if they are."""
+        tailer = get_tailer(_job_name(image_tag))
+        if tailer is not None:
+            tailer.reader.add_job(_job_name(image_tag, attempt))
+
+    async def _stop_log_tailer(self, image_tag: str) -> None:
+        """Stop reading the logs of a job whose result is not queried, e.g. because it failed."""
+        tailer = pop_tailer(_job_name(image_tag))
+        if tailer is not None:
+            reader = await tailer.stop()
+            reader.close()
+
+    async def wait_for_logs(self) -> None:
+        """Wait until the deferred log fetches of the running event loop have finished."""
+        await wait_for_deferred()
 
     async def cancel(self, task_metadata: Dict, job_handle: str) -> bool:
         """
-        Cancel the quantum task
+        Cancel the Braket hybrid job of a task and the quantum tasks the job created.
+
+        The quantum tasks are cancelled while the executor waits up to `cancel_timeout` seconds
+        for the job to reach the CANCELLED state.
 
         Args:
             task_metadata: Dictionary with the task's dispatch_id and node id.
@@ -298,20 +1159,223 @@ class BraketExecutor(AWSExecutor):
         Returns:
             If the job was cancelled or not
         """
+        return await self._cancel_job(task_metadata, job_handle)
+
+    async def _cancel_job(
+        self, task_metadata: Dict, job_handle: str, created_at: Optional[float] = None
+    ) -> bool:
+        """Cancel a job, see `cancel`.
+
+        Args:
+            task_metadata: Dictionary with the task's dispatch_id and node id.
+            job_handle: ARN of the Braket hybrid job.
+            created_at: Time the job was created, if known, which bounds the search for its
+                status.
+        """
         try:
-            braket = boto3.Session(**self.boto_session_options()).client("braket")
-            partial_func = partial(braket.cancel_quantum_task, quantumTaskArn=job_handle)
-            await self._execute_partial_in_threadpool(partial_func)
-            return True
+            await self._get_transport().call("braket", "cancel_job", jobArn=job_handle)
         except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as error:
             app_log.debug(
-                f"Failed to cancel Braket quantum task with task metadata: \
-                          {task_metadata} and error:{error}"
+                f"Failed to cancel Braket job {job_handle} with task metadata: "
+                f"{task_metadata} and error: {error}"
             )
             return False
 
+        _, status = await asyncio.gather(
+            self._cancel_quantum_tasks(job_handle),
+            self._wait_for_cancellation(job_handle, created_at),
+        )
+        metrics.increment("jobs_cancelled", status=status or "unconfirmed")
+        if not self.cancel_timeout:
+            return True
+        if status != "CANCELLED":
+            app_log.warning(f"Braket job {job_handle} was not cancelled, its status is {status}")
+        return status == "CANCELLED"
+
+    async def _cancel_quantum_tasks(self, job_arn: str) -> int:
+        """Cancel the quantum tasks of a job that have not finished, all at once.
+
+        Failures are logged, since the job's own cancellation does not depend on them.
+
+        Returns:
+            Number of quantum tasks cancelled.
+        """
+        transport = self._get_transport()
+        task_arns = []
+        next_token = None
+        try:
+            while True:
+                kwargs = {
+                    "filters": [{"name": "jobArn", "operator": "EQUAL", "values": [job_arn]}]
+                }
+                if next_token:
+                    kwargs["nextToken"] = next_token
+                response = await transport.call("braket", "search_quantum_tasks", **kwargs)
+                task_arns.extend(
+                    task["quantumTaskArn"]
+                    for task in response.get("quantumTasks", [])
+                    if task.get("status") in _ACTIVE_QUANTUM_TASK_STATES
+                )
+                next_token = response.get("nextToken")
+                if not next_token:
+                    break
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as error:
+            app_log.warning(f"Failed to find the quantum tasks of Braket job {job_arn}: {error}")
+            return 0
+
+        outcomes = await asyncio.gather(
+            *(
+                transport.call(
+                    "braket",
+                    "cancel_quantum_task",
+                    quantumTaskArn=task_arn,
+                    clientToken=str(uuid.uuid4()),
+                )
+                for task_arn in task_arns
+            ),
+            return_exceptions=True,
+        )
+        cancelled = 0
+        for task_arn, outcome in zip(task_arns, outcomes):
+            if isinstance(outcome, BaseException):
+                app_log.debug(f"Failed to cancel Braket quantum task {task_arn}: {outcome}")
+            else:
+                cancelled += 1
+        metrics.increment("quantum_tasks_cancelled", cancelled)
+        return cancelled
+
+    async def _wait_for_cancellation(
+        self, job_arn: str, created_at: Optional[float] = None
+    ) -> Optional[str]:
+        """Wait up to `cancel_timeout` seconds for a job to reach a terminal state.
+
+        Returns:
+            The job's terminal status, or None if it did not reach one in time.
+        """
+        if not self.cancel_timeout:
+            return None
+        poller = self._get_poller()
+        # The electron may be waiting for the job as well, its wait must not be cut short.
+        watched = job_arn in poller
+        try:
+            return await asyncio.wait_for(
+                poller.wait(job_arn, self._get_polling_strategy(), created_at),
+                self.cancel_timeout,
+            )
+        except (asyncio.TimeoutError, TimeoutError):
+            if not watched:
+                poller.unwatch(job_arn)
+            return None
+
+    async def cancel_dispatch(self, dispatch_id: str) -> Dict[str, bool]:
+        """Cancel every job of a dispatch in parallel, e.g. to abort a large lattice.
+
+        The jobs are found in the journal of submitted jobs in `cache_dir` without any API call,
+        including jobs submitted before the dispatcher restarted. Jobs of batches and warm-pool
+        workers, which may serve other dispatches, keep running.
+
+        Args:
+            dispatch_id: ID of the dispatch.
+
+        Returns:
+            Whether each job was cancelled, keyed by job ARN.
+        """
+        account = None
+        job_arns = []
+        created_at = []
+        for job_name, entry in self._get_journal().entries(_job_name(f"{dispatch_id}-")).items():
+            job_arn = entry.get("job_arn")
+            if job_arn is None:
+                # The dispatcher stopped while the job was being created.
+                if account is None:
+                    account = (await self._get_identity()).get("Account")
+                job_arn = self._job_arn(job_name, account)
+            if job_arn is not None:
+                job_arns.append(job_arn)
+                created_at.append(entry.get("created_at"))
+
+        app_log.info(f"Cancelling {len(job_arns)} Braket jobs of dispatch {dispatch_id}")
+        outcomes = await asyncio.gather(
+            *(
+                self._cancel_job({"dispatch_id": dispatch_id}, job_arn, created)
+                for job_arn, created in zip(job_arns, created_at)
+            )
+        )
+        return dict(zip(job_arns, outcomes))
+
     async def run(self, function: Callable, args: List, kwargs: Dict, task_metadata: Dict):
+        """Run an electron, recording the timings of its phases into `metrics_sink`."""
+        with metrics.instrument(
+            metrics.get_sink(self.metrics_sink),
+            dispatch_id=task_metadata["dispatch_id"],
+            node_id=task_metadata["node_id"],
+        ), metrics.span("run"):
+            return await self._run(function, args, kwargs, task_metadata)
+
+    async def _run(self, function: Callable, args: List, kwargs: Dict, task_metadata: Dict):
+        """Run an electron, reusing the stored outcome of an identical task if there is one."""
+        args, kwargs = datasets.wrap_large_arguments(args, kwargs, self.dataset_threshold)
+        if datasets.has_datasets(args, kwargs):
+            # Staged first, so that the cache key covers the datasets' digests.
+            with metrics.span("datasets"):
+                args, kwargs = await self._execute_partial_in_threadpool(
+                    partial(
+                        datasets.stage_arguments,
+                        args,
+                        kwargs,
+                        os.path.join(self.cache_dir, datasets.DATASET_PREFIX),
+                    ),
+                    transfer=True,
+                )
+
+        electron_options = options.get_options(function)
+        key = entry = None
+        if self.result_cache != "off" and electron_options["result_cache"]:
+            with metrics.span("result_cache"):
+                key = await self._execute_partial_in_threadpool(
+                    partial(
+                        cached_results.cache_key,
+                        function,
+                        args,
+                        kwargs,
+                        quantum_device=self.quantum_device,
+                        classical_device=self.classical_device,
+                        image=self.ecr_image_uri,
+                    ),
+                    transfer=True,
+                )
+                entry = await self._get_cached_result(key)
+
+        if entry is not None:
+            app_log.debug(f"Reusing the cached result {key}")
+            output, stdout, stderr = entry
+        else:
+            output, stdout, stderr = await self._execute_task(
+                function, args, kwargs, task_metadata, electron_options["local"]
+            )
+            if key is not None:
+                await self._cache_result(key, (output, stdout, stderr))
 
+        print(stdout, end="", file=sys.stdout)
+        print(stderr, end="", file=sys.stderr)
+        return output
+
+    async def _execute_task(
+        self,
+        function: Callable,
+        args: List,
+        kwargs: Dict,
+        task_metadata: Dict,
+        allow_local: bool = True,
+    ) -> Tuple[Any, str, str]:
+        """Run a task locally, in a batch, on a warm-pool worker or on a job of its own.
+
+        Args:
+            allow_local: Whether the task may run locally, False if its electron opted out.
+
+        Returns:
+            The task's result, stdout and stderr.
+        """
         dispatch_id = task_metadata["dispatch_id"]
         node_id = task_metadata["node_id"]
         results_dir = task_metadata["results_dir"]
@@ -321,11 +1385,18 @@ class BraketExecutor(AWSExecutor):
         image_tag = f"{dispatch_id}-{node_id}"
         batch_job_name = BRAKET_JOB_NAME.format(dispatch_id=dispatch_id, node_id=node_id)
 
+        if allow_local and local.runs_locally(self.execution_mode, self.quantum_device):
+            if await self.get_cancel_requested():
+                raise TaskCancelledError(f"Batch job {batch_job_name} requested to be cancelled")
+            with metrics.span("local"):
+                return await self._run_locally(
+                    function, args, kwargs, batch_job_name, task_results_dir
+                )
+
         app_log.debug("Validating credentials...")
         # AWS Account Retrieval
-        identity = await self._execute_partial_in_threadpool(
-            partial(self._validate_credentials, raise_exception=True)
-        )
+        with metrics.span("credentials"):
+            identity = await self._get_identity()
         account = identity.get("Account")
 
         # TODO: Move this to BaseExecutor
@@ -337,13 +1408,42 @@ class BraketExecutor(AWSExecutor):
 
         if await self.get_cancel_requested():
             raise TaskCancelledError(f"Batch job {batch_job_name} requested to be cancelled")
-        await self._upload_task(function, args, kwargs, upload_task_metadata)
+
+        if self.batch_size > 1:
+            with metrics.span("batch"):
+                return await self._run_in_batch(function, args, kwargs, account)
+
+        if self.reattach_jobs and not self.warm_pool:
+            job_name = _job_name(image_tag)
+            job_arn = await self._find_previous_job(job_name, account)
+            if job_arn is not None:
+                # A resumed job needs the task's payload, which entries written by older
+                # versions do not point to. Its keys are content-derived, so uploading it
+                # again yields the same keys and skips what the bucket holds.
+                payload_keys = (self._get_journal().get(job_name) or {}).get("payload_keys")
+                if payload_keys is None:
+                    with metrics.span("upload"):
+                        payload_keys = await self._upload_task(
+                            function, args, kwargs, upload_task_metadata
+                        )
+                submit_metadata = {
+                    "image_tag": image_tag,
+                    "account": account,
+                    "task_results_dir": task_results_dir,
+                    "result_filename": result_filename,
+                    "payload_keys": payload_keys,
+                }
+                return await self._run_job(submit_metadata, job_arn)
+
+        with metrics.span("upload"):
+            payload_keys = await self._upload_task(function, args, kwargs, upload_task_metadata)
 
         submit_metadata = {
             "image_tag": image_tag,
             "account": account,
             "task_results_dir": task_results_dir,
             "result_filename": result_filename,
+            "payload_keys": payload_keys,
         }
 
         app_log.debug("Submit metadata:")
@@ -351,40 +1451,465 @@ class BraketExecutor(AWSExecutor):
 
         if await self.get_cancel_requested():
             raise TaskCancelledError(f"Batch job {batch_job_name} requested to be cancelled")
-        job_arn = await self.submit_task(submit_metadata)
 
-        poll_metadata = {"job_arn": job_arn}
+        if self.warm_pool:
+            with metrics.span("worker"):
+                return await self._run_on_worker(submit_metadata)
+        return await self._run_job(submit_metadata)
 
-        await self.set_job_handle(handle=job_arn)
+    def _get_local_result_store(self) -> cached_results.LocalResultStore:
+        return cached_results.LocalResultStore(
+            os.path.join(self.cache_dir, cached_results.RESULT_PREFIX),
+            self.result_cache_ttl,
+            self.result_cache_max_bytes,
+        )
+
+    async def _get_cached_result(self, key: str) -> Optional[Tuple[Any, str, str]]:
+        """Return the stored outcome of a task, or None on a miss or if the lookup fails."""
+        try:
+            if self.result_cache in ("local", "both"):
+                entry = await self._execute_partial_in_threadpool(
+                    partial(self._get_local_result_store().get, key), transfer=True
+                )
+                if entry is not None:
+                    metrics.increment("result_cache_hits", store="local")
+                    return entry
+            if self.result_cache in ("s3", "both"):
+                entry = await cached_results.get_s3_entry(
+                    self._get_transport(), self.s3_bucket_name, key, self.result_cache_ttl
+                )
+                if entry is not None:
+                    metrics.increment("result_cache_hits", store="s3")
+                    if self.result_cache == "both":
+                        await self._execute_partial_in_threadpool(
+                            partial(self._get_local_result_store().put, key, entry), transfer=True
+                        )
+                    return entry
+        except Exception as error:
+            app_log.warning(f"Failed to look up the cached result {key}: {error}")
+        metrics.increment("result_cache_misses")
+        return None
+
+    async def _cache_result(self, key: str, entry: Tuple[Any, str, str]) -> None:
+        """Store the outcome of a task. Failures are logged, since the task itself succeeded."""
+        try:
+            if self.result_cache in ("local", "both"):
+                await self._execute_partial_in_threadpool(
+                    partial(self._get_local_result_store().put, key, entry), transfer=True
+                )
+            if self.result_cache in ("s3", "both"):
+                await cached_results.put_s3_entry(
+                    self._get_transport(), self.s3_bucket_name, key, entry
+                )
+        except Exception as error:
+            app_log.warning(f"Failed to cache the result {key}: {error}")
+
+    async def _run_locally(
+        self, function: Callable, args: List, kwargs: Dict, job_name: str, results_dir: str
+    ) -> Tuple[Any, str, str]:
+        """Run a task in the local process pool instead of on a job.
 
-        await self._poll_task(poll_metadata)
+        Args:
+            function: The task's function.
+            args: Positional arguments of the function.
+            kwargs: Keyword arguments of the function.
+            job_name: Name of the job the task would have run on.
+            results_dir: Directory under which the task's job results directory is created.
+
+        Returns:
+            The task's result, stdout and stderr.
+        """
+        app_log.debug(
+            f"Running {job_name} locally on {local.local_simulator(self.quantum_device)}"
+        )
+        payload = await self._execute_partial_in_threadpool(
+            partial(payload_codec.dumps, (function, args, kwargs)), transfer=True
+        )
+        environment = local.job_environment(
+            self.quantum_device,
+            self.s3_bucket_name,
+            job_name,
+            os.path.join(results_dir, job_name),
+        )
+        data = await asyncio.get_running_loop().run_in_executor(
+            local.get_process_pool(self.local_workers), local.run_task, payload, environment
+        )
+        outcome, result = await self._execute_partial_in_threadpool(
+            partial(local.decode_outcome, data), transfer=True
+        )
+        if outcome["status"] == "FAILED":
+            raise Exception(outcome["error"])
+        return result, outcome["stdout"], outcome["stderr"]
+
+    def _get_journal(self) -> JobJournal:
+        return JobJournal(os.path.join(self.cache_dir, JOURNAL_DIR))
+
+    def _job_arn(self, job_name: str, account: str) -> Optional[str]:
+        """Return the ARN of a job of this executor's account and region, or None."""
+        region = self.region or getattr(
+            getattr(self._get_client("braket"), "meta", None), "region_name", None
+        )
+        if not region or not account:
+            return None
+        return f"arn:aws:braket:{region}:{account}:job/{job_name}"
+
+    async def _find_previous_job(self, job_name: str, account: str) -> Optional[str]:
+        """Return the ARN of a job submitted for a task before the dispatcher restarted.
+
+        Only jobs recorded in the journal are looked up, so a normal run costs no API call. If
+        the dispatcher stopped while the job was being created, its ARN is derived from its
+        name.
+
+        Returns:
+            The ARN of the job, or None if the task has no job yet.
+        """
+        entry = self._get_journal().get(job_name)
+        if entry is None:
+            return None
+        job_arn = entry.get("job_arn") or self._job_arn(job_name, account)
+        if job_arn is None:
+            return None
+        try:
+            status = await self.get_status(None, job_arn)
+        except botocore.exceptions.ClientError as error:
+            if error.response.get("Error", {}).get("Code") not in _MISSING_JOB_ERROR_CODES:
+                raise
+            self._get_journal().remove(job_name)
+            return None
+        app_log.info(f"Reattaching to Braket job {job_arn}, which is {status}")
+        metrics.increment("jobs_reattached", status=status)
+        return job_arn
+
+    async def _run_job(
+        self, submit_metadata: Dict, job_arn: Optional[str] = None
+    ) -> Tuple[Any, str, str]:
+        """Run an uploaded task on a job of its own.
+
+        Args:
+            submit_metadata: Metadata of the task, see `submit_task`.
+            job_arn: ARN of the job already running the task, e.g. one submitted before the
+                dispatcher restarted, or None to submit a new one.
+
+        Returns:
+            The task's result, stdout and stderr.
+        """
+        job_name = _job_name(submit_metadata["image_tag"])
+        payload_keys = submit_metadata.get("payload_keys")
+        attempt = 0
+        created_at = None
+        async with self._get_admission_controller().slot():
+            if job_arn is None:
+                # Recorded before the job exists, so that a crash during submission is noticed.
+                self._record_job(job_name, payload_keys=payload_keys)
+                submitted_at = time.time()
+                with metrics.span("submit"):
+                    try:
+                        job_arn = await self.submit_task(submit_metadata)
+                    except Exception:
+                        self._get_journal().remove(job_name)
+                        raise
+                self._record_job(
+                    job_name, job_arn=job_arn, created_at=submitted_at, payload_keys=payload_keys
+                )
+            else:
+                entry = self._get_journal().get(job_name) or {}
+                attempt = entry.get("attempt", 0)
+                created_at = entry.get("created_at")
+            metrics.tag(job_arn=job_arn)
+
+            await self.set_job_handle(handle=job_arn)
+            self._start_log_tailer(submit_metadata["image_tag"])
+
+            try:
+                while True:
+                    try:
+                        with metrics.span("poll"):
+                            await self._poll_task({"job_arn": job_arn, "created_at": created_at})
+                        break
+                    except JobFailedError as error:
+                        if attempt >= self.resume_attempts:
+                            raise
+                        attempt += 1
+                        job_arn = await self._resubmit_job(submit_metadata, attempt, error)
+                        created_at = None
+                        self._tail_resumed_job(submit_metadata["image_tag"], attempt)
+            except BaseException as error:
+                await self._stop_log_tailer(submit_metadata["image_tag"])
+                # Only an interrupted dispatcher keeps the entry, to reattach after restarting.
+                if isinstance(error, Exception):
+                    self._get_journal().remove(job_name)
+                raise
 
         query_metadata = {
-            "result_filename": result_filename,
-            "task_results_dir": task_results_dir,
+            "result_filename": submit_metadata["result_filename"],
+            "task_results_dir": submit_metadata["task_results_dir"],
             "job_arn": job_arn,
-            "image_tag": image_tag,
+            "image_tag": submit_metadata["image_tag"],
+            "attempt": attempt,
         }
 
-        output, stdout, stderr = await self.query_result(query_metadata)
+        try:
+            with metrics.span("result"):
+                outcome = await self.query_result(query_metadata)
+        except Exception:
+            self._get_journal().remove(job_name)
+            raise
+        self._get_journal().remove(job_name)
+        return outcome
+
+    async def _resubmit_job(
+        self, submit_metadata: Dict, attempt: int, error: JobFailedError
+    ) -> str:
+        """Submit a task whose job failed again, on a job sharing the failed job's checkpoints.
 
-        print(stdout, end="", file=sys.stdout)
-        print(stderr, end="", file=sys.stderr)
+        Args:
+            submit_metadata: Metadata of the task, see `submit_task`.
+            attempt: Number of the attempt, which makes the new job's name unique.
+            error: Failure of the previous job.
 
-        return output
+        Returns:
+            ARN of the new job.
+        """
+        app_log.warning(
+            f"Braket job {error.job_arn} failed ({error.failure_reason}), resuming it from its "
+            f"last checkpoint, attempt {attempt} of {self.resume_attempts}"
+        )
+        metrics.increment("job_resumes")
+        submitted_at = time.time()
+        with metrics.span("submit"):
+            job_arn = await self.submit_task({**submit_metadata, "attempt": attempt})
+        self._record_job(
+            _job_name(submit_metadata["image_tag"]),
+            job_arn=job_arn,
+            attempt=attempt,
+            created_at=submitted_at,
+            payload_keys=submit_metadata.get("payload_keys"),
+        )
+        metrics.tag(job_arn=job_arn)
+        await self.set_job_handle(handle=job_arn)
+        return job_arn
+
+    def _record_job(self, job_name: str, **fields) -> None:
+        """Write the journal entry of a job. Failures are logged, since the journal is optional."""
+        try:
+            self._get_journal().record(job_name, **fields)
+        except (OSError, TypeError, ValueError) as error:
+            app_log.warning(f"Failed to record Braket job {job_name} in the journal: {error}")
+
+    def _worker_key(self) -> Tuple:
+        """Return the key of the persistent workers able to run this executor's tasks."""
+        return (
+            self.profile,
+            self.region,
+            self.credentials_file,
+            self.s3_bucket_name,
+            self.execution_role,
+            self.quantum_device,
+            self.classical_device,
+            self.storage,
+            self.ecr_image_uri,
+        )
+
+    async def _launch_worker(self, account: str) -> Worker:
+        """Create a persistent worker job and start tracking its status."""
+        image_tag = f"worker-{uuid.uuid4().hex[:16]}"
+        prefix = f"workers/{image_tag}"
+        hyperparameters = {
+            "COVALENT_WORKER_PREFIX": prefix,
+            "COVALENT_WORKER_IDLE_TIMEOUT": str(self.worker_idle_timeout),
+            "COVALENT_WORKER_MAX_TASKS": str(self.worker_max_tasks),
+            "S3_BUCKET_NAME": self.s3_bucket_name,
+        }
+        controller = self._get_admission_controller()
+        await controller.acquire_slot()
+        try:
+            job_arn = await self._create_job(
+                image_tag, hyperparameters, account, self.worker_time_limit
+            )
+        except BaseException:
+            controller.release_slot()
+            raise
+        app_log.debug(f"Launched Braket worker job {job_arn}")
+
+        future = self._get_poller().watch(job_arn, self._get_polling_strategy())
+        # The worker holds its job slot for as long as it runs.
+        future.add_done_callback(lambda _: controller.release_slot())
+        return Worker(
+            job_arn, prefix, future, self.worker_idle_timeout, max_tasks=self.worker_max_tasks
+        )
+
+    async def _run_on_worker(self, submit_metadata: Dict) -> Tuple[Any, str, str]:
+        """Run an uploaded task on a persistent worker job.
+
+        If the worker stops before running the task, e.g. because it timed out just as the task
+        was submitted, the task runs on a job of its own instead.
+
+        Returns:
+            The task's result, stdout and stderr.
+        """
+        pool = get_warm_pool()
+        worker = await pool.acquire(
+            self._worker_key(),
+            partial(self._launch_worker, submit_metadata["account"]),
+            self.warm_pool_size,
+        )
+        try:
+            record = await self._wait_for_worker(worker, submit_metadata)
+        finally:
+            worker.release()
+
+        if record is None:
+            app_log.warning(
+                f"Braket worker job {worker.job_arn} stopped before running task "
+                f"{submit_metadata['image_tag']}, running it on a job of its own"
+            )
+            pool.retire(worker)
+            return await self._run_job(submit_metadata)
+
+        if record.get("timings"):
+            _log_timings(f"Braket task {submit_metadata['image_tag']}", record["timings"])
+        if record["status"] == "FAILED":
+            raise Exception(record["error"])
+
+        result = await self._get_transport().load_object(
+            self.s3_bucket_name, submit_metadata["result_filename"]
+        )
+        return result, record["stdout"], record["stderr"]
+
+    async def _wait_for_worker(self, worker: Worker, submit_metadata: Dict) -> Optional[Dict]:
+        """Submit a task to a worker and wait for its outcome.
+
+        Returns:
+            The task's outcome, or None if the worker job stopped without running the task.
+        """
+        transport = self._get_transport()
+        # Unique even if the same node is run again on the same worker.
+        task_id = f"{submit_metadata['image_tag']}-{uuid.uuid4().hex[:8]}"
+        payload_keys = submit_metadata["payload_keys"]
+        task = {
+            "func_filename": payload_keys["func_filename"],
+            "args_filename": payload_keys.get("args_filename"),
+            "result_filename": submit_metadata["result_filename"],
+            "codec": self.codec,
+        }
+        await transport.call(
+            "s3",
+            "put_object",
+            Bucket=self.s3_bucket_name,
+            Key=task_key(worker.prefix, task_id),
+            Body=json.dumps(task).encode(),
+        )
+
+        record_key = done_key(worker.prefix, task_id)
+        strategy = self._get_polling_strategy()
+        started = time.monotonic()
+        polls = 0
+        while True:
+            stopped = worker.future.done()
+            try:
+                record = json.loads(await transport.read_object(self.s3_bucket_name, record_key))
+            except botocore.exceptions.ClientError as error:
+                if not is_missing_object_error(error):
+                    raise
+                record = None
+            if record is not None:
+                await transport.call(
+                    "s3", "delete_object", Bucket=self.s3_bucket_name, Key=record_key
+                )
+                return record
+            if stopped:
+                return None
+
+            interval = strategy.next_interval("RUNNING", time.monotonic() - started, polls)
+            polls += 1
+            # Wake up early if the worker job stops.
+            await asyncio.wait([worker.future], timeout=interval)
+
+    async def _run_in_batch(
+        self, function: Callable, args: List, kwargs: Dict, account: str
+    ) -> Tuple[Any, str, str]:
+        """Run a task as part of a batch of tasks sharing one job.
+
+        Returns:
+            The task's result, stdout and stderr.
+        """
+        outcome = await get_batcher().submit(
+            self._worker_key() + (self.time_limit, self.codec, self.batch_parallelism),
+            (function, args, kwargs),
+            partial(self._run_batch, account),
+            self.batch_window,
+            self.batch_size,
+        )
+        if outcome["status"] == "FAILED":
+            raise Exception(outcome["error"])
+        return outcome["result"], outcome["stdout"], outcome["stderr"]
+
+    async def _run_batch(self, account: str, tasks: List[Tuple]) -> List[Dict]:
+        """Upload a bundle of tasks, run it on one job and download the tasks' outcomes.
+
+        Args:
+            account: AWS account ID owning the job's execution role.
+            tasks: List of (function, args, kwargs) tuples.
+
+        Returns:
+            One outcome per task, with its status, its result or error traceback, and its
+            captured stdout and stderr.
+        """
+        image_tag = f"batch-{uuid.uuid4().hex[:16]}"
+        result_filename = f"result-{image_tag}.pkl"
+        app_log.debug(f"Running a batch of {len(tasks)} tasks as {image_tag}")
+
+        store = ObjectStore(
+            self._get_client("s3"),
+            self.s3_bucket_name,
+            os.path.join(self.cache_dir, OBJECT_PREFIX),
+            spool_threshold=self.spool_threshold,
+            spool_dir=self.cache_dir,
+            codec=self.codec,
+            transfer=self._get_transfer_settings(),
+        )
+        bundle_filename = await self._get_transport().put_object(store, tasks)
+        refs = dict.fromkeys(
+            ref for _, args, kwargs in tasks for ref in datasets.find_refs(args, kwargs)
+        )
+        dataset_keys = await self._upload_datasets(store, list(refs))
+
+        hyperparameters = {
+            "COVALENT_BATCH_FILENAME": bundle_filename,
+            "COVALENT_BATCH_PARALLELISM": str(self.batch_parallelism),
+            "RESULT_FILENAME": result_filename,
+            "S3_BUCKET_NAME": self.s3_bucket_name,
+            "COVALENT_RESULT_CODEC": self.codec,
+        }
+        async with self._get_admission_controller().slot():
+            job_arn = await self._create_job(
+                image_tag,
+                hyperparameters,
+                account,
+                self.time_limit,
+                input_data=datasets.input_data_config(self.s3_bucket_name, dataset_keys),
+            )
+            await self._poll_task({"job_arn": job_arn})
+
+        return await self._get_transport().load_object(self.s3_bucket_name, result_filename)
 
     async def get_status(self, braket, job_arn: str) -> str:
         """Query the status of a previously submitted Braket hybrid job.
 
         Args:
-            braket: Braket client object.
+            braket: Braket client object, or None to use the executor's transport.
             job_arn: ARN used to identify a Braket hybrid job.
 
         Returns:
             status: String describing the job status.
         """
         app_log.debug(f"Getting Braket Job {job_arn} status...")
-        job = await self._execute_partial_in_threadpool(partial(braket.get_job, jobArn=job_arn))
+        if braket is None:
+            job = await self._get_transport().call("braket", "get_job", jobArn=job_arn)
+        else:
+            job = await self._execute_partial_in_threadpool(
+                partial(braket.get_job, jobArn=job_arn)
+            )
         status = job["status"]
         app_log.debug(f"Braket Job {job_arn} Status: {status}")
         return status
@@ -0,0 +1,215 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Checkpoints that tasks save while they run, to resume after their job failed or timed out.
+
+A task running on a Braket hybrid job saves its state to the job's checkpoint directory,
+``AMZN_BRAKET_CHECKPOINT_DIR``, which Braket copies to the S3 URI of the job's checkpoint
+configuration. A job created with the same URI starts with the files already in place, so a
+task resubmitted by the executor's ``resume_attempts`` policy loads the last saved state
+instead of starting over::
+
+    from covalent_braket_plugin.checkpoint import load_checkpoint, save_checkpoint
+
+    state = load_checkpoint() or {"step": 0, "params": initial_params}
+    for step in range(state["step"], steps):
+        state["params"] = optimize(state["params"])
+        state["step"] = step + 1
+        save_checkpoint(state)
+
+A checkpoint is a manifest listing the entries of a mapping, each encoded with :mod:`codec`,
+compressed with the best available codec, and stored in a file named after the hash of its
+encoding. Saving only writes the entries that changed since the previous save, so that a large
+state with a small moving part, e.g. a dataset next to the parameters of an optimizer, is
+cheap to save and to copy to S3. The manifest is written to a temporary file and renamed, so
+a job stopped while saving leaves the previous checkpoint intact.
+
+This module runs inside the Hybrid Jobs container as well, so it must only depend on the
+standard library and :mod:`codec`.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Mapping, Optional
+
+from covalent_braket_plugin import codec as payload_codec
+
+CHECKPOINT_DIR_VARIABLE = "AMZN_BRAKET_CHECKPOINT_DIR"
+DEFAULT_CHECKPOINT_NAME = "checkpoint"
+MANIFEST_VERSION = 1
+
+# Codecs in order of preference, the first one installed compresses checkpoints by default.
+_PREFERRED_CODECS = ("zstd", "lz4", "none")
+
+
+def default_codec() -> str:
+    """Return the best compression codec installed."""
+    available = payload_codec.available_codecs()
+    return next(codec for codec in _PREFERRED_CODECS if codec in available)
+
+
+class Checkpointer:
+    """Save and load the state of a task incrementally.
+
+    A state that is a mapping with string keys is stored entry by entry, any other state as a
+    single entry.
+
+    Attributes:
+        directory: Directory holding the checkpoint.
+        name: Name of the checkpoint, to keep several checkpoints in one directory.
+        codec: Compression codec of newly written entries, one of :data:`codec.CODECS`.
+        entries_written: Number of entries written by the last save.
+        entries_reused: Number of unchanged entries skipped by the last save.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        name: str = DEFAULT_CHECKPOINT_NAME,
+        codec: Optional[str] = None,
+    ):
+        """
+        Args:
+            directory: Directory holding the checkpoint, by default the job's checkpoint
+                directory given by ``AMZN_BRAKET_CHECKPOINT_DIR``.
+            name: Name of the checkpoint.
+            codec: Compression codec of newly written entries, by default the best installed.
+        """
+        directory = directory or os.environ.get(CHECKPOINT_DIR_VARIABLE)
+        if not directory:
+            raise RuntimeError(
+                f"No checkpoint directory given and {CHECKPOINT_DIR_VARIABLE} is not set"
+            )
+        self.directory = directory
+        self.name = name
+        self.codec = codec or default_codec()
+        self.entries_written = 0
+        self.entries_reused = 0
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}.json")
+
+    @property
+    def _objects_dir(self) -> str:
+        return os.path.join(self.directory, f"{self.name}.objects")
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._manifest_path) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        return manifest
+
+    def _write_entry(self, value: Any) -> str:
+        data = payload_codec.dumps(value, self.codec)
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self._objects_dir, digest)
+        if os.path.exists(path):
+            self.entries_reused += 1
+            return digest
+
+        with tempfile.NamedTemporaryFile(dir=self._objects_dir, suffix=".tmp", delete=False) as f:
+            try:
+                f.write(data)
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, path)
+        self.entries_written += 1
+        return digest
+
+    def save(self, state: Any) -> None:
+        """Save a state, writing only the entries that changed since the previous save.
+
+        Args:
+            state: State of the task, preferably a mapping with string keys.
+        """
+        os.makedirs(self._objects_dir, exist_ok=True)
+        self.entries_written = 0
+        self.entries_reused = 0
+
+        is_mapping = isinstance(state, Mapping) and all(isinstance(key, str) for key in state)
+        values = state if is_mapping else {"": state}
+        entries = {key: self._write_entry(value) for key, value in values.items()}
+
+        manifest = {"version": MANIFEST_VERSION, "mapping": is_mapping, "entries": entries}
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.directory, suffix=".tmp", delete=False
+        ) as f:
+            try:
+                json.dump(manifest, f)
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, self._manifest_path)
+
+        # Entries of earlier saves are only removed once the new manifest is in place.
+        referenced = set(entries.values())
+        for filename in os.listdir(self._objects_dir):
+            if filename not in referenced:
+                try:
+                    os.remove(os.path.join(self._objects_dir, filename))
+                except FileNotFoundError:
+                    pass
+
+    def load(self) -> Any:
+        """Load the last saved state.
+
+        Returns:
+            The state, or None if no checkpoint was saved yet.
+        """
+        manifest = self._read_manifest()
+        if manifest is None:
+            return None
+
+        state = {}
+        for key, digest in manifest["entries"].items():
+            with open(os.path.join(self._objects_dir, digest), "rb") as f:
+                state[key] = payload_codec.load(f)
+        return state if manifest["mapping"] else state[""]
+
+    def clear(self) -> None:
+        """Remove the checkpoint."""
+        try:
+            os.remove(self._manifest_path)
+        except FileNotFoundError:
+            pass
+        if os.path.isdir(self._objects_dir):
+            for filename in os.listdir(self._objects_dir):
+                os.remove(os.path.join(self._objects_dir, filename))
+            os.rmdir(self._objects_dir)
+
+
+def save_checkpoint(state: Any, name: str = DEFAULT_CHECKPOINT_NAME) -> None:
+    """Save a state to the checkpoint directory of the running job, see :class:`Checkpointer`."""
+    Checkpointer(name=name).save(state)
+
+
+def load_checkpoint(name: str = DEFAULT_CHECKPOINT_NAME) -> Any:
+    """Load the last state saved in the checkpoint directory of the running job.
+
+    Returns:
+        The state, or None if no checkpoint was saved yet.
+    """
+    return Checkpointer(name=name).load()
@@ -0,0 +1,290 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Process-wide cache of pooled boto3 clients shared by Braket executors."""
+
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+import botocore.exceptions
+import botocore.session
+from botocore.config import Config
+
+from covalent_braket_plugin.metrics import install_hooks
+
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+
+# Error codes returned by AWS when the credentials a client was built with are no longer valid.
+EXPIRED_CREDENTIALS_ERROR_CODES = {
+    "ExpiredToken",
+    "ExpiredTokenException",
+    "RequestExpired",
+}
+
+# Error codes returned by AWS when a request was made with invalid or expired credentials.
+AUTH_ERROR_CODES = EXPIRED_CREDENTIALS_ERROR_CODES | {
+    "InvalidClientTokenId",
+    "UnrecognizedClientException",
+    "InvalidAccessKeyId",
+    "SignatureDoesNotMatch",
+}
+
+ClientKey = Tuple[Optional[str], Optional[str], Optional[str], str]
+
+
+class _CachedClient:
+    """A boto3 client together with the session and settings it was built from."""
+
+    def __init__(
+        self,
+        session: Any,
+        client: Any,
+        max_pool_connections: int,
+        credentials_mtime: Optional[float],
+    ):
+        self.session = session
+        self.client = client
+        self.max_pool_connections = max_pool_connections
+        self.credentials_mtime = credentials_mtime
+
+
+def credentials_mtime(credentials_file: Optional[str]) -> Optional[float]:
+    """Return the modification time of a credentials file, or None if there is none."""
+    if not credentials_file:
+        return None
+    try:
+        return os.path.getmtime(os.path.expanduser(credentials_file))
+    except OSError:
+        return None
+
+
+def is_expired_credentials_error(error: Exception) -> bool:
+    """Check whether an AWS error was caused by expired credentials.
+
+    Args:
+        error: Exception raised by a boto3 client call.
+
+    Returns:
+        True if the cached client that raised the error should be rebuilt.
+    """
+    if not isinstance(error, botocore.exceptions.ClientError):
+        return False
+    return error.response.get("Error", {}).get("Code") in EXPIRED_CREDENTIALS_ERROR_CODES
+
+
+def is_auth_error(error: Exception) -> bool:
+    """Check whether an AWS error was caused by invalid or expired credentials.
+
+    Args:
+        error: Exception raised by a boto3 client call.
+
+    Returns:
+        True if the cached clients and caller identity of the credentials should be dropped.
+    """
+    if not isinstance(error, botocore.exceptions.ClientError):
+        return False
+    return error.response.get("Error", {}).get("Code") in AUTH_ERROR_CODES
+
+
+class ClientCache:
+    """Thread-safe cache of boto3 clients keyed by profile, region, credentials file and service.
+
+    Creating a boto3 session resolves credentials and loads endpoint data, and every new client
+    opens its own connection pool. Clients are thread-safe, so a single client per key is
+    shared by every executor and thread in the process. A cached client is rebuilt when its
+    credentials file changes on disk, when a larger connection pool is requested, or when the
+    entry is evicted explicitly.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[ClientKey, _CachedClient] = {}
+
+    @staticmethod
+    def make_key(
+        service: str,
+        profile: Optional[str] = None,
+        region: Optional[str] = None,
+        credentials_file: Optional[str] = None,
+    ) -> ClientKey:
+        """Build the cache key for a client.
+
+        Args:
+            service: Name of the AWS service, e.g. "s3" or "braket".
+            profile: Named AWS profile.
+            region: AWS region name.
+            credentials_file: Path to the AWS shared credentials file.
+
+        Returns:
+            Tuple uniquely identifying the client in the cache.
+        """
+        return (profile or None, region or None, credentials_file or None, service)
+
+    def get_client(
+        self,
+        service: str,
+        profile: Optional[str] = None,
+        region: Optional[str] = None,
+        credentials_file: Optional[str] = None,
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    ) -> Any:
+        """Return a cached client for the service, creating it if needed.
+
+        Args:
+            service: Name of the AWS service, e.g. "s3" or "braket".
+            profile: Named AWS profile.
+            region: AWS region name.
+            credentials_file: Path to the AWS shared credentials file.
+            max_pool_connections: Minimum size of the client's HTTP connection pool.
+
+        Returns:
+            A boto3 client.
+        """
+        key = self.make_key(service, profile, region, credentials_file)
+        file_mtime = credentials_mtime(credentials_file)
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if (
+                entry is None
+                or entry.credentials_mtime != file_mtime
+                or entry.max_pool_connections < max_pool_connections
+            ):
+                entry = self._create_client(key, max_pool_connections, file_mtime)
+                self._clients[key] = entry
+            return entry.client
+
+    def evict(
+        self,
+        service: Optional[str] = None,
+        profile: Optional[str] = None,
+        region: Optional[str] = None,
+        credentials_file: Optional[str] = None,
+    ) -> int:
+        """Drop cached clients for an identity.
+
+        Args:
+            service: Name of the AWS service to evict. All services are evicted if not given.
+            profile: Named AWS profile.
+            region: AWS region name.
+            credentials_file: Path to the AWS shared credentials file.
+
+        Returns:
+            Number of clients removed from the cache.
+        """
+        identity = self.make_key("", profile, region, credentials_file)[:3]
+        with self._lock:
+            keys = [
+                key
+                for key in self._clients
+                if key[:3] == identity and (service is None or key[3] == service)
+            ]
+            for key in keys:
+                del self._clients[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop every cached client."""
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @staticmethod
+    def _create_client(
+        key: ClientKey, max_pool_connections: int, credentials_mtime: Optional[float]
+    ) -> _CachedClient:
+        profile, region, credentials_file, service = key
+
+        botocore_session = botocore.session.Session()
+        if credentials_file:
+            # Pin the file on the session itself rather than relying on the
+            # process-wide AWS_SHARED_CREDENTIALS_FILE environment variable.
+            botocore_session.set_config_variable(
+                "credentials_file", os.path.expanduser(credentials_file)
+            )
+
+        session_options = {"botocore_session": botocore_session}
+        if profile:
+            session_options["profile_name"] = profile
+        if region:
+            session_options["region_name"] = region
+
+        session = boto3.Session(**session_options)
+        client = session.client(service, config=Config(max_pool_connections=max_pool_connections))
+        install_hooks(client)
+        return _CachedClient(session, client, max_pool_connections, credentials_mtime)
+
+
+_client_cache = ClientCache()
+
+
+def get_client(
+    service: str,
+    profile: Optional[str] = None,
+    region: Optional[str] = None,
+    credentials_file: Optional[str] = None,
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+) -> Any:
+    """Return a client from the process-wide cache.
+
+    Args:
+        service: Name of the AWS service, e.g. "s3" or "braket".
+        profile: Named AWS profile.
+        region: AWS region name.
+        credentials_file: Path to the AWS shared credentials file.
+        max_pool_connections: Minimum size of the client's HTTP connection pool.
+
+    Returns:
+        A boto3 client shared by every caller with the same identity.
+    """
+    return _client_cache.get_client(
+        service,
+        profile=profile,
+        region=region,
+        credentials_file=credentials_file,
+        max_pool_connections=max_pool_connections,
+    )
+
+
+def evict_clients(
+    service: Optional[str] = None,
+    profile: Optional[str] = None,
+    region: Optional[str] = None,
+    credentials_file: Optional[str] = None,
+) -> int:
+    """Drop clients from the process-wide cache.
+
+    Args:
+        service: Name of the AWS service to evict. All services are evicted if not given.
+        profile: Named AWS profile.
+        region: AWS region name.
+        credentials_file: Path to the AWS shared credentials file.
+
+    Returns:
+        Number of clients removed from the cache.
+    """
+    return _client_cache.evict(
+        service, profile=profile, region=region, credentials_file=credentials_file
+    )
+
+
+def clear_clients() -> None:
+    """Drop every client from the process-wide cache."""
+    _client_cache.clear()
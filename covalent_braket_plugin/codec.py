@@ -0,0 +1,207 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Encoding of task payloads and results shared by the executor and the job runtime.
+
+This module runs inside the Hybrid Jobs container as well, so it must only depend on the
+standard library, cloudpickle and the optional compression packages.
+
+An encoded object starts with a small header naming the codec, followed by the pickle stream
+and then the pickle protocol 5 out-of-band buffers, such as the memory of numpy arrays. Each
+section is written as a sequence of length-prefixed, individually compressed frames ending
+with an empty frame, so that objects can be encoded straight into a file without building the
+whole encoding in memory and buffers are never copied into the pickle stream. Data without
+the header is decoded as a plain pickle, which keeps results written by older job containers
+readable.
+"""
+
+import io
+import struct
+from typing import IO, Any, Callable, List, Optional, Tuple
+
+import cloudpickle as pickle
+
+MAGIC = b"\x89CVB"
+FORMAT_VERSION = 1
+FRAME_SIZE = 4 * 1024 * 1024
+
+CODECS = ("none", "zstd", "lz4")
+
+_HEADER = struct.Struct("<4sBB")
+_FRAME_LENGTH = struct.Struct("<Q")
+_BUFFER_COUNT = struct.Struct("<I")
+
+
+def _codec_functions(codec: str) -> Tuple[Optional[Callable], Optional[Callable]]:
+    if codec == "none":
+        return None, None
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+    if codec == "lz4":
+        import lz4.frame
+
+        return lz4.frame.compress, lz4.frame.decompress
+    raise ValueError(f"Unknown codec {codec!r}, expected one of {', '.join(CODECS)}")
+
+
+def available_codecs() -> List[str]:
+    """Return the codecs whose compression packages are installed.
+
+    Returns:
+        Names of the usable codecs.
+    """
+    codecs = []
+    for codec in CODECS:
+        try:
+            _codec_functions(codec)
+            codecs.append(codec)
+        except ImportError:
+            pass
+    return codecs
+
+
+class _FrameWriter:
+    """File-like object writing everything it receives as compressed, length-prefixed frames."""
+
+    def __init__(self, fileobj: IO[bytes], compress: Optional[Callable]):
+        self._fileobj = fileobj
+        self._compress = compress
+        self._pending = bytearray()
+
+    def write(self, data) -> int:
+        view = memoryview(data).cast("B")
+        if len(self._pending) + len(view) < FRAME_SIZE:
+            self._pending += view
+            return len(view)
+
+        self.flush()
+        for start in range(0, len(view), FRAME_SIZE):
+            self._write_frame(view[start : start + FRAME_SIZE])
+        return len(view)
+
+    def flush(self) -> None:
+        if self._pending:
+            self._write_frame(self._pending)
+            self._pending = bytearray()
+
+    def close(self) -> None:
+        self.flush()
+        self._fileobj.write(_FRAME_LENGTH.pack(0))
+
+    def _write_frame(self, frame) -> None:
+        if self._compress is not None:
+            frame = self._compress(frame)
+        self._fileobj.write(_FRAME_LENGTH.pack(len(frame)))
+        self._fileobj.write(frame)
+
+
+def _read_exact(fileobj: IO[bytes], size: int) -> bytes:
+    data = fileobj.read(size)
+    while len(data) < size:
+        chunk = fileobj.read(size - len(data))
+        if not chunk:
+            raise EOFError("Encoded object is truncated")
+        data += chunk
+    return data
+
+
+def _read_section(fileobj: IO[bytes], decompress: Optional[Callable]) -> bytearray:
+    section = bytearray()
+    while True:
+        (length,) = _FRAME_LENGTH.unpack(_read_exact(fileobj, _FRAME_LENGTH.size))
+        if length == 0:
+            return section
+        frame = _read_exact(fileobj, length)
+        section += decompress(frame) if decompress is not None else frame
+
+
+def dump(obj: Any, fileobj: IO[bytes], codec: str = "none") -> None:
+    """Encode an object into a file.
+
+    Args:
+        obj: Object to encode.
+        fileobj: Binary file-like object to write to.
+        codec: Name of the compression codec, one of :data:`CODECS`.
+    """
+    compress, _ = _codec_functions(codec)
+    fileobj.write(_HEADER.pack(MAGIC, FORMAT_VERSION, CODECS.index(codec)))
+
+    buffers = []
+    writer = _FrameWriter(fileobj, compress)
+    pickle.dump(obj, writer, protocol=5, buffer_callback=buffers.append)
+    writer.close()
+
+    fileobj.write(_BUFFER_COUNT.pack(len(buffers)))
+    for buffer in buffers:
+        writer = _FrameWriter(fileobj, compress)
+        with buffer.raw() as view:
+            writer.write(view)
+        writer.close()
+
+
+def dumps(obj: Any, codec: str = "none") -> bytes:
+    """Encode an object into bytes.
+
+    Args:
+        obj: Object to encode.
+        codec: Name of the compression codec, one of :data:`CODECS`.
+
+    Returns:
+        The encoded object.
+    """
+    f = io.BytesIO()
+    dump(obj, f, codec)
+    return f.getvalue()
+
+
+def load(fileobj: IO[bytes]) -> Any:
+    """Decode an object from a file, accepting plain pickles as well.
+
+    Args:
+        fileobj: Binary file-like object to read from.
+
+    Returns:
+        The decoded object.
+    """
+    header = fileobj.read(_HEADER.size)
+    if not header.startswith(MAGIC):
+        # Plain pickle written before the codec header was introduced.
+        return pickle.loads(header + fileobj.read())
+
+    _, version, codec_id = _HEADER.unpack(header)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported encoding version {version}")
+    _, decompress = _codec_functions(CODECS[codec_id])
+
+    data = _read_section(fileobj, decompress)
+    (count,) = _BUFFER_COUNT.unpack(_read_exact(fileobj, _BUFFER_COUNT.size))
+    buffers = [_read_section(fileobj, decompress) for _ in range(count)]
+
+    return pickle.loads(data, buffers=buffers)
+
+
+def loads(data: bytes) -> Any:
+    """Decode an object from bytes, accepting plain pickles as well.
+
+    Args:
+        data: The encoded object.
+
+    Returns:
+        The decoded object.
+    """
+    return load(io.BytesIO(data))
@@ -0,0 +1,432 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Large task arguments passed to jobs as files instead of inside the pickled arguments.
+
+An argument wrapped in :class:`Dataset`, or any array or bytes argument of at least the
+executor's ``dataset_threshold`` bytes, is written once to a file in the executor's cache
+directory and uploaded once to S3, both under the SHA-256 digest of its contents. The task's
+pickled arguments only hold a small :class:`DatasetRef` in its place, so a dataset shared by
+many electrons is neither pickled nor uploaded again::
+
+    from covalent_braket_plugin.datasets import Dataset
+
+    @ct.electron(executor=braket_executor)
+    def train(samples, step):
+        return samples[step::100].mean()
+
+    results = [train(Dataset(samples), step) for step in range(100)]
+
+A job running a single task gets its datasets through input data channels of ``create_job``,
+which Braket downloads to ``AMZN_BRAKET_INPUT_DIR`` before the task starts. Warm-pool and
+batch jobs have no channels for the tasks they pick up, so they download missing datasets
+into their working directory, once per job. Either way the function receives a read-only,
+memory-mapped handle instead of the data: a ``numpy.memmap`` for arrays and ``.npy`` files,
+and an ``mmap.mmap`` for bytes and other files. Only the pages the task reads are loaded.
+
+This module runs inside the Hybrid Jobs container as well, so it must only depend on the
+standard library and :mod:`transfer`. numpy is imported when an array is written or mapped.
+"""
+
+import hashlib
+import mmap
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from covalent_braket_plugin.transfer import TransferSettings
+
+DATASET_PREFIX = "datasets"
+INPUT_DIR_VARIABLE = "AMZN_BRAKET_INPUT_DIR"
+
+# Formats of dataset files, keyed to the name of the file under the dataset's digest.
+FORMATS = {"npy": "data.npy", "bytes": "data.bin"}
+
+_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Digests of dataset files keyed by path, size and modification time, so that a file passed
+# to many electrons is only read once.
+_file_digests: Dict[Tuple[str, int, int], str] = {}
+_file_locks: Dict[Tuple[str, int, int], threading.Lock] = {}
+_digests_lock = threading.Lock()
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError(
+            "Array datasets require the numpy package, install it with `pip install numpy`."
+        ) from error
+    return numpy
+
+
+def is_array(value: Any) -> bool:
+    """Return whether a value is a numpy array, without importing numpy."""
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+
+class Dataset:
+    """Mark a task argument to be passed to the job as a memory-mapped file.
+
+    Attributes:
+        data: The array or bytes, or None for a file.
+        path: Path of a local file, or None for in-memory data.
+        format: "npy" for arrays and ``.npy`` files, which are mapped as arrays, "bytes"
+            otherwise.
+    """
+
+    def __init__(self, data: Any = None, path: Optional[str] = None):
+        """
+        Args:
+            data: A numpy array, or bytes, bytearray or memoryview.
+            path: Path of a local file to pass instead, which is read by the dispatcher but
+                never pickled.
+        """
+        if (data is None) == (path is None):
+            raise ValueError("Pass either the data or the path of a dataset")
+        if path is not None:
+            self.format = "npy" if path.endswith(".npy") else "bytes"
+        elif is_array(data):
+            self.format = "npy"
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            self.format = "bytes"
+        else:
+            raise TypeError(f"Unsupported dataset type: {type(data).__name__}")
+        self.data = data
+        self.path = path
+
+    def __repr__(self) -> str:
+        source = repr(self.path) if self.path is not None else type(self.data).__name__
+        return f"Dataset({source})"
+
+
+def channel_name(digest: str) -> str:
+    """Return the name of the input data channel of a dataset."""
+    return f"dataset-{digest[:32]}"
+
+
+class DatasetRef:
+    """Reference to a staged dataset, which takes its place in the arguments of a task.
+
+    Attributes:
+        digest: Hexadecimal SHA-256 digest of the dataset's file.
+        format: One of :data:`FORMATS`.
+        size: Size of the file in bytes.
+        path: Path of the file on the dispatcher's machine.
+    """
+
+    def __init__(self, digest: str, format: str, size: int, path: str):
+        self.digest = digest
+        self.format = format
+        self.size = size
+        self.path = path
+
+    @property
+    def filename(self) -> str:
+        """Name of the dataset's file."""
+        return FORMATS[self.format]
+
+    @property
+    def key(self) -> str:
+        """S3 key of the dataset's file."""
+        return f"{DATASET_PREFIX}/{self.digest}/{self.filename}"
+
+    @property
+    def channel(self) -> str:
+        """Name of the dataset's input data channel."""
+        return channel_name(self.digest)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, DatasetRef) and (self.digest, self.format) == (
+            other.digest,
+            other.format,
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.digest, self.format))
+
+    def __repr__(self) -> str:
+        return f"DatasetRef({self.digest[:12]}, {self.format}, {self.size} bytes)"
+
+
+class _HashingFile:
+    """File-like object that hashes and counts what is written to it and optionally stores it."""
+
+    def __init__(self, f: Any = None):
+        self._f = f
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.hash.update(data)
+        self.size += memoryview(data).nbytes
+        if self._f is not None:
+            self._f.write(data)
+        return memoryview(data).nbytes
+
+
+def _write(data: Any, format: str, f: Any) -> None:
+    if format == "npy":
+        # Not a real file, so numpy writes the array in chunks instead of copying it at once.
+        _numpy().save(f, data, allow_pickle=False)
+    else:
+        f.write(memoryview(data).cast("B"))
+
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """Return the SHA-256 digest of a file, reading it only if it changed since the last call."""
+    status = os.stat(path)
+    key = (os.path.realpath(path), status.st_size, status.st_mtime_ns)
+    with _digests_lock:
+        digest = _file_digests.get(key)
+        if digest is not None:
+            return digest
+        lock = _file_locks.setdefault(key, threading.Lock())
+    # Concurrent electrons passing the same file wait for one of them to read it.
+    with lock:
+        digest = _file_digests.get(key)
+        if digest is None:
+            digest = _hash_file(path)
+            with _digests_lock:
+                _file_digests[key] = digest
+                _file_locks.pop(key, None)
+    return digest
+
+
+def stage(dataset: Dataset, staging_dir: str) -> DatasetRef:
+    """Write a dataset to a file named after its digest, unless the file already exists.
+
+    The data is hashed before it is written, so a dataset staged before, e.g. by another
+    electron, is not written again. Files given by path are hashed in place.
+
+    Args:
+        dataset: The dataset.
+        staging_dir: Directory holding the staged files.
+
+    Returns:
+        The reference to the staged file.
+    """
+    if dataset.path is not None:
+        path = os.path.abspath(dataset.path)
+        return DatasetRef(file_digest(path), dataset.format, os.path.getsize(path), path)
+
+    hasher = _HashingFile()
+    _write(dataset.data, dataset.format, hasher)
+    ref = DatasetRef(hasher.hash.hexdigest(), dataset.format, hasher.size, "")
+    ref.path = os.path.join(staging_dir, ref.digest, ref.filename)
+    if not os.path.exists(ref.path):
+        os.makedirs(os.path.dirname(ref.path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(ref.path), delete=False) as f:
+            try:
+                _write(dataset.data, dataset.format, f)
+            except BaseException:
+                os.remove(f.name)
+                raise
+        os.replace(f.name, ref.path)
+    return ref
+
+
+def wrap_large_arguments(args: List, kwargs: Dict, threshold: int) -> Tuple[List, Dict]:
+    """Wrap the array and bytes arguments of at least `threshold` bytes in :class:`Dataset`.
+
+    Args:
+        args: Positional arguments of a task.
+        kwargs: Keyword arguments of a task.
+        threshold: Size in bytes from which arguments are wrapped, or 0 to wrap none.
+
+    Returns:
+        The arguments, with the large ones wrapped.
+    """
+    if threshold <= 0:
+        return args, kwargs
+
+    def wrap(value):
+        if is_array(value) and not value.dtype.hasobject and value.nbytes >= threshold:
+            return Dataset(value)
+        if isinstance(value, (bytes, bytearray)) and len(value) >= threshold:
+            return Dataset(value)
+        return value
+
+    return [wrap(value) for value in args], {name: wrap(value) for name, value in kwargs.items()}
+
+
+def _replace(
+    args: List, kwargs: Dict, kind: type, replace: Callable[[Any], Any]
+) -> Tuple[List, Dict]:
+    def replace_value(value):
+        return replace(value) if isinstance(value, kind) else value
+
+    return (
+        [replace_value(value) for value in args],
+        {name: replace_value(value) for name, value in kwargs.items()},
+    )
+
+
+def has_datasets(args: List, kwargs: Dict) -> bool:
+    """Return whether any argument of a task is a :class:`Dataset`."""
+    return any(isinstance(value, Dataset) for value in [*args, *kwargs.values()])
+
+
+def stage_arguments(args: List, kwargs: Dict, staging_dir: str) -> Tuple[List, Dict]:
+    """Stage the datasets among the arguments of a task, see :func:`stage`.
+
+    Only the arguments themselves are checked, not the contents of lists or dictionaries.
+
+    Returns:
+        The arguments, with every dataset replaced by its reference.
+    """
+    return _replace(args, kwargs, Dataset, lambda dataset: stage(dataset, staging_dir))
+
+
+def find_refs(args: List, kwargs: Dict) -> List[DatasetRef]:
+    """Return the distinct dataset references among the arguments of a task, in order."""
+    refs: Dict[DatasetRef, None] = {}
+    for value in [*args, *kwargs.values()]:
+        if isinstance(value, DatasetRef):
+            refs.setdefault(value)
+    return list(refs)
+
+
+def input_data_config(bucket: str, keys: List[str]) -> List[Dict[str, Any]]:
+    """Return the input data channels of ``create_job`` attaching datasets to a job.
+
+    Args:
+        bucket: Name of the S3 bucket holding the datasets.
+        keys: S3 keys of the datasets' files, see :attr:`DatasetRef.key`.
+
+    Returns:
+        One channel per dataset, named after its digest.
+    """
+    return [
+        {
+            "channelName": channel_name(key.split("/")[1]),
+            "dataSource": {"s3DataSource": {"s3Uri": f"s3://{bucket}/{key}"}},
+        }
+        for key in keys
+    ]
+
+
+def open_dataset(path: str, format: str) -> Any:
+    """Map a dataset's file into memory, read-only.
+
+    Args:
+        path: Path of the file.
+        format: One of :data:`FORMATS`.
+
+    Returns:
+        A ``numpy.memmap`` for the "npy" format, an ``mmap.mmap`` otherwise, or ``b""`` for an
+        empty file, which cannot be mapped.
+    """
+    if format == "npy":
+        return _numpy().load(path, mmap_mode="r")
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        # The mapping stays valid after the file is closed.
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def resolve_arguments(
+    args: List, kwargs: Dict, locate: Callable[[DatasetRef], str]
+) -> Tuple[List, Dict]:
+    """Replace the dataset references among the arguments of a task by mapped handles.
+
+    Args:
+        args: Positional arguments of a task.
+        kwargs: Keyword arguments of a task.
+        locate: Callable returning the local path of a dataset's file.
+
+    Returns:
+        The arguments, with every reference replaced by the handle of :func:`open_dataset`.
+        References to the same dataset share one handle.
+    """
+    handles: Dict[DatasetRef, Any] = {}
+
+    def resolve(ref):
+        if ref not in handles:
+            handles[ref] = open_dataset(locate(ref), ref.format)
+        return handles[ref]
+
+    return _replace(args, kwargs, DatasetRef, resolve)
+
+
+def local_path(ref: DatasetRef) -> str:
+    """Return the path of a dataset on the dispatcher's machine, for tasks running locally."""
+    return ref.path
+
+
+class DatasetLocator:
+    """Find the files of datasets inside a job, downloading those without an input channel.
+
+    Attributes:
+        bucket: Name of the S3 bucket holding the datasets.
+        work_dir: Directory datasets are downloaded to, under their digest, so that every
+            task of a job reuses them.
+        input_dir: Directory holding the job's input data channels.
+        downloads: Number of datasets downloaded.
+    """
+
+    def __init__(
+        self,
+        s3: Any,
+        bucket: str,
+        work_dir: str,
+        input_dir: Optional[str] = None,
+        transfer: Optional[TransferSettings] = None,
+    ):
+        """
+        Args:
+            s3: S3 client.
+            bucket: Name of the S3 bucket holding the datasets.
+            work_dir: Directory datasets are downloaded to.
+            input_dir: Directory holding the job's input data channels, by default
+                ``AMZN_BRAKET_INPUT_DIR``.
+            transfer: Settings of the managed downloads. The defaults are used if not given.
+        """
+        self._s3 = s3
+        self.bucket = bucket
+        self.work_dir = work_dir
+        self.input_dir = input_dir or os.environ.get(INPUT_DIR_VARIABLE)
+        self._transfer = transfer or TransferSettings()
+        self.downloads = 0
+
+    def __call__(self, ref: DatasetRef) -> str:
+        """Return the local path of a dataset's file."""
+        if self.input_dir:
+            path = os.path.join(self.input_dir, ref.channel, ref.filename)
+            if os.path.exists(path):
+                return path
+
+        path = os.path.join(self.work_dir, DATASET_PREFIX, ref.digest, ref.filename)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            partial_path = f"{path}.partial"
+            self._transfer.download_file(self._s3, self.bucket, ref.key, partial_path, ref.size)
+            os.replace(partial_path, path)
+            self.downloads += 1
+        return path
@@ -0,0 +1,157 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Process-wide cache of the AWS caller identities validated by Braket executors."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from covalent_braket_plugin.clients import credentials_mtime
+
+DEFAULT_IDENTITY_TTL = 900
+
+
+class _CachedIdentity:
+    """A caller identity together with its expiry and the credentials it was validated with."""
+
+    def __init__(self, identity: Dict[str, str], expires_at: float, file_mtime: Optional[float]):
+        self.identity = identity
+        self.expires_at = expires_at
+        self.file_mtime = file_mtime
+
+
+class IdentityCache:
+    """Thread-safe cache of STS caller identities keyed by profile, region and credentials file.
+
+    Every electron needs the account ID of its executor's credentials, which costs an STS
+    ``GetCallerIdentity`` round trip. The identity is cached for a while instead, and dropped
+    early when the credentials file changes on disk or when a call fails with an
+    authentication error. Concurrent lookups of an identity that is not cached share a single
+    in-flight request. Failed lookups are not cached.
+
+    Attributes:
+        hits: Number of lookups answered from the cache, including those that joined an
+            in-flight request.
+        misses: Number of requests issued.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._identities: Dict[Hashable, _CachedIdentity] = {}
+        self._in_flight: Dict[Hashable, Future] = {}
+
+    @staticmethod
+    def make_key(
+        profile: Optional[str] = None,
+        region: Optional[str] = None,
+        credentials_file: Optional[str] = None,
+    ) -> Hashable:
+        """Build the cache key of an identity."""
+        return (profile or None, region or None, credentials_file or None)
+
+    async def get(
+        self,
+        key: Hashable,
+        validate: Callable[[], Dict[str, str]],
+        submit: Callable[[Callable[[], Any]], Future],
+        ttl: float = DEFAULT_IDENTITY_TTL,
+    ) -> Dict[str, str]:
+        """Return the identity of a key, validating the credentials if it is not cached.
+
+        Args:
+            key: Key built with :meth:`make_key`.
+            validate: Blocking callable returning the caller identity, or raising if the
+                credentials are invalid.
+            submit: Callable running a blocking callable on a thread pool and returning a
+                concurrent future, e.g. :meth:`~.BlockingCallPool.submit`.
+            ttl: Number of seconds the identity is cached for.
+
+        Returns:
+            The caller identity, with the account ID under "Account".
+        """
+        file_mtime = credentials_mtime(key[2])
+        with self._lock:
+            cached = self._identities.get(key)
+            if (
+                cached is not None
+                and cached.file_mtime == file_mtime
+                and time.monotonic() < cached.expires_at
+            ):
+                self.hits += 1
+                return cached.identity
+
+            future = self._in_flight.get(key)
+            started = future is None
+            if started:
+                self.misses += 1
+                future = self._in_flight[key] = submit(validate)
+            else:
+                self.hits += 1
+
+        if started:
+            # Outside the lock, since the callback runs right away if the call already finished.
+            future.add_done_callback(partial(self._store, key, ttl, file_mtime))
+
+        # Shielded, so that a cancelled caller does not cancel the request for the others.
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _store(
+        self, key: Hashable, ttl: float, file_mtime: Optional[float], future: Future
+    ) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._identities[key] = _CachedIdentity(
+                future.result(), time.monotonic() + ttl, file_mtime
+            )
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop the cached identity of a key, e.g. after an authentication error.
+
+        Returns:
+            Whether an identity was cached.
+        """
+        with self._lock:
+            return self._identities.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Drop every cached identity."""
+        with self._lock:
+            self._identities.clear()
+
+    def __len__(self) -> int:
+        return len(self._identities)
+
+
+_identity_cache = IdentityCache()
+
+
+def get_identity_cache() -> IdentityCache:
+    """Return the process-wide identity cache."""
+    return _identity_cache
+
+
+def clear_identities() -> None:
+    """Drop every identity from the process-wide cache."""
+    _identity_cache.clear()
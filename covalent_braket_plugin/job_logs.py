@@ -0,0 +1,352 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Retrieval of the CloudWatch logs of Braket hybrid jobs."""
+
+import asyncio
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+from covalent._shared_files.logger import app_log
+
+LOG_GROUP_NAME = "/aws/braket/jobs"
+
+LOG_RETRIEVAL_MODES = ("inline", "deferred", "off")
+
+# Logs beyond this size are dropped, so that a chatty job cannot exhaust the dispatcher's memory.
+DEFAULT_MAX_LOG_BYTES = 10 * 1024 * 1024
+
+# Issues an AWS call, see :meth:`transports.Boto3Transport.call`.
+Call = Callable[..., Awaitable[Any]]
+
+
+class LogBuffer:
+    """Collect log lines up to a size limit, forwarding every line to a sink as it arrives.
+
+    Lines are kept in a list and joined once, instead of being concatenated one by one. Once a
+    limit is reached, further lines are dropped and a notice is appended.
+
+    Attributes:
+        max_bytes: Maximum number of bytes collected, or 0 for no limit.
+        max_lines: Maximum number of lines collected, or 0 for no limit.
+        lines: Number of lines collected.
+        bytes: Number of bytes collected.
+        truncated: Whether lines were dropped.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 0,
+        max_lines: int = 0,
+        sink: Optional[Callable[[str], Any]] = None,
+        keep: bool = True,
+    ):
+        """
+        Args:
+            max_bytes: Maximum number of bytes collected, or 0 for no limit.
+            max_lines: Maximum number of lines collected, or 0 for no limit.
+            sink: Callable receiving every line, including its newline, as it arrives.
+            keep: Whether to keep the lines in memory for :meth:`getvalue`.
+        """
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self.lines = 0
+        self.bytes = 0
+        self.truncated = False
+        self._sink = sink
+        self._keep = keep
+        self._parts: List[str] = []
+
+    def _emit(self, line: str) -> None:
+        if self._sink is not None:
+            self._sink(line)
+        if self._keep:
+            self._parts.append(line)
+
+    def write(self, message: str) -> bool:
+        """Add a log message as a line.
+
+        Returns:
+            Whether the line was collected, i.e. False once a limit is reached.
+        """
+        if self.truncated:
+            return False
+
+        line = message + "\n"
+        size = len(line.encode())
+        if (self.max_lines and self.lines >= self.max_lines) or (
+            self.max_bytes and self.bytes + size > self.max_bytes
+        ):
+            self.truncated = True
+            self._emit(f"[log truncated after {self.lines} lines and {self.bytes} bytes]\n")
+            return False
+
+        self.lines += 1
+        self.bytes += size
+        self._emit(line)
+        return True
+
+    def getvalue(self) -> str:
+        """Return the collected lines."""
+        return "".join(self._parts)
+
+
+async def list_log_streams(call: Call, log_group_name: str, prefix: str) -> List[str]:
+    """Return the names of every log stream of a group with a prefix, across all pages."""
+    names = []
+    next_token = None
+    while True:
+        kwargs = {"logGroupName": log_group_name, "logStreamNamePrefix": prefix}
+        if next_token:
+            kwargs["nextToken"] = next_token
+        response = await call("logs", "describe_log_streams", **kwargs)
+        names.extend(stream["logStreamName"] for stream in response.get("logStreams", []))
+        next_token = response.get("nextToken")
+        if not next_token:
+            return names
+
+
+async def read_log_stream(
+    call: Call,
+    log_group_name: str,
+    log_stream_name: str,
+    buffer: LogBuffer,
+    next_token: Optional[str] = None,
+) -> Optional[str]:
+    """Read the events of a log stream page by page into a buffer.
+
+    Args:
+        call: Coroutine function issuing an AWS call.
+        log_group_name: Name of the log group.
+        log_stream_name: Name of the log stream.
+        buffer: Buffer receiving the messages.
+        next_token: Forward token to resume from, or None to read from the start.
+
+    Returns:
+        The forward token to resume from later. CloudWatch returns the token it was passed once
+        the end of the stream is reached.
+    """
+    while not buffer.truncated:
+        kwargs = {
+            "logGroupName": log_group_name,
+            "logStreamName": log_stream_name,
+            "startFromHead": True,
+        }
+        if next_token:
+            kwargs["nextToken"] = next_token
+        response = await call("logs", "get_log_events", **kwargs)
+
+        for event in response.get("events", []):
+            if not buffer.write(event["message"]):
+                break
+
+        forward_token = response.get("nextForwardToken")
+        if forward_token is None or forward_token == next_token:
+            break
+        next_token = forward_token
+
+    return next_token
+
+
+async def fetch_job_logs(
+    call: Call,
+    job_names: Sequence[str],
+    buffer: LogBuffer,
+    log_group_name: str = LOG_GROUP_NAME,
+    tokens: Optional[Dict[str, Optional[str]]] = None,
+) -> Dict[str, Optional[str]]:
+    """Read every log stream of some jobs into a buffer, one stream after another.
+
+    Braket names the log streams of a job ``<job name>/algo-<n>``, so the streams are listed
+    with the job's name and a slash as prefix, which no other job's streams share.
+
+    Args:
+        call: Coroutine function issuing an AWS call.
+        job_names: Names of the jobs, e.g. every attempt of a resumed task, read in order.
+        buffer: Buffer receiving the messages.
+        log_group_name: Name of the log group.
+        tokens: Forward tokens to resume from, keyed by log stream name.
+
+    Returns:
+        The forward tokens to resume from later, keyed by log stream name.
+    """
+    tokens = dict(tokens or {})
+    for job_name in job_names:
+        for name in await list_log_streams(call, log_group_name, f"{job_name}/"):
+            tokens[name] = await read_log_stream(
+                call, log_group_name, name, buffer, tokens.get(name)
+            )
+            if buffer.truncated:
+                return tokens
+    return tokens
+
+
+class JobLogReader:
+    """Read the logs of a job incrementally, every read resuming where the previous one stopped.
+
+    Reads are serialized, so that a final read never overlaps a read of a :class:`LogTailer`.
+
+    Attributes:
+        job_names: Names of the jobs whose logs are read, e.g. every attempt of a resumed task.
+        buffer: Buffer receiving the messages.
+        log_group_name: Name of the log group.
+        tokens: Forward tokens to resume from, keyed by log stream name.
+        reads: Number of reads so far.
+    """
+
+    def __init__(
+        self,
+        call: Call,
+        job_names: Sequence[str],
+        buffer: LogBuffer,
+        log_group_name: str = LOG_GROUP_NAME,
+        on_close: Optional[Callable[[], Any]] = None,
+    ):
+        self._call = call
+        self.job_names = list(job_names)
+        self.buffer = buffer
+        self.log_group_name = log_group_name
+        self.tokens: Dict[str, Optional[str]] = {}
+        self.reads = 0
+        self._on_close = on_close
+        self._lock = asyncio.Lock()
+
+    def add_job(self, job_name: str) -> None:
+        """Read the logs of another job as well, e.g. the next attempt of a resumed task."""
+        if job_name not in self.job_names:
+            self.job_names.append(job_name)
+
+    async def read(self) -> None:
+        """Read the events logged since the previous read."""
+        async with self._lock:
+            self.tokens = await fetch_job_logs(
+                self._call, self.job_names, self.buffer, self.log_group_name, self.tokens
+            )
+            self.reads += 1
+
+    def close(self) -> None:
+        """Release the reader's sink, e.g. close its log file."""
+        if self._on_close is not None:
+            self._on_close()
+
+
+class LogTailer:
+    """Read the logs of a running job in the background at a fixed interval.
+
+    Every read takes a token from a budget shared with the job status poller, so tailing never
+    pushes the AWS identity over its API rate. Read errors are logged and the next read retries.
+
+    Attributes:
+        reader: Reader of the job's logs.
+        interval: Number of seconds between reads.
+        budget: Token bucket limiting the rate of reads, or None for no limit.
+    """
+
+    def __init__(self, reader: JobLogReader, interval: float, budget: Any = None):
+        self.reader = reader
+        self.interval = interval
+        self.budget = budget
+        self._stopped = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start tailing."""
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stopped.wait(), self.interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            if self.budget is not None:
+                await self.budget.acquire()
+            try:
+                await self.reader.read()
+            except Exception as error:
+                app_log.debug(f"Failed to tail the logs of {self.reader.job_names[-1]}: {error}")
+
+    async def stop(self) -> JobLogReader:
+        """Stop tailing, letting a read in progress finish.
+
+        Returns:
+            The reader, to read the remaining events with.
+        """
+        self._stopped.set()
+        if self._task is not None:
+            await self._task
+        return self.reader
+
+
+# Tailers of running jobs, one registry per event loop since their tasks belong to a loop.
+_tailers: "weakref.WeakKeyDictionary[Any, Dict[str, LogTailer]]" = weakref.WeakKeyDictionary()
+
+
+def start_tailer(job_name: str, tailer: LogTailer) -> None:
+    """Start a tailer and register it under the name of its job."""
+    _tailers.setdefault(asyncio.get_running_loop(), {})[job_name] = tailer
+    tailer.start()
+
+
+def get_tailer(job_name: str) -> Optional[LogTailer]:
+    """Return the tailer registered under the name of a job, or None if there is none."""
+    return _tailers.get(asyncio.get_running_loop(), {}).get(job_name)
+
+
+def pop_tailer(job_name: str) -> Optional[LogTailer]:
+    """Unregister the tailer of a job.
+
+    Returns:
+        The tailer, or None if the job's logs are not being tailed.
+    """
+    return _tailers.get(asyncio.get_running_loop(), {}).pop(job_name, None)
+
+
+# Deferred log fetches, one set per event loop since tasks belong to a loop. The event loop
+# only keeps weak references to tasks.
+_deferred: "weakref.WeakKeyDictionary[Any, Set[asyncio.Task]]" = weakref.WeakKeyDictionary()
+
+
+def defer(fetch: Awaitable[Any], description: str) -> asyncio.Task:
+    """Run a log fetch in the background. Errors are logged instead of raised.
+
+    Args:
+        fetch: Awaitable fetching the logs.
+        description: Description of the logs used in the error message.
+
+    Returns:
+        The background task.
+    """
+
+    async def run():
+        try:
+            await fetch
+        except Exception as error:
+            app_log.warning(f"Failed to fetch the logs of {description}: {error}")
+
+    task = asyncio.ensure_future(run())
+    tasks = _deferred.setdefault(asyncio.get_running_loop(), set())
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+    return task
+
+
+async def wait_for_deferred() -> None:
+    """Wait for the deferred log fetches of the running event loop to finish."""
+    tasks = _deferred.get(asyncio.get_running_loop())
+    while tasks:
+        await asyncio.gather(*list(tasks))
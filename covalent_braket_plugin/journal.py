@@ -0,0 +1,93 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local record of submitted Braket hybrid jobs, for reattaching to them after a restart.
+
+Before a job is created, an entry named after the job and holding the S3 keys of the task's
+payload is written to the journal, and the job's ARN and creation time are added once
+``create_job`` returns. The entry is removed once the job's result has been retrieved. If the
+dispatcher restarts in between, the electron finds the entry when it runs again and waits for
+the job that is already running instead of uploading and submitting the task a second time, and
+resumes it from the recorded payload if it failed.
+
+Entries are small JSON files written to a temporary file and renamed into place, so a crash
+never leaves a partial entry behind.
+"""
+
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+JOURNAL_DIR = "jobs"
+
+
+class JobJournal:
+    """Entries describing submitted jobs, keyed by job name.
+
+    Attributes:
+        directory: Directory holding the entries.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, job_name: str) -> str:
+        return os.path.join(self.directory, f"{job_name}.json")
+
+    def record(self, job_name: str, **fields: Any) -> None:
+        """Write the entry of a job, replacing any previous one."""
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.directory, suffix=".tmp", delete=False
+        ) as f:
+            try:
+                json.dump(fields, f)
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, self._path(job_name))
+
+    def get(self, job_name: str) -> Optional[Dict[str, Any]]:
+        """Return the entry of a job, or None if there is none."""
+        try:
+            with open(self._path(job_name)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def entries(self, prefix: str = "") -> Dict[str, Dict[str, Any]]:
+        """Return the entries of the jobs whose names start with a prefix, keyed by job name."""
+        try:
+            filenames = os.listdir(self.directory)
+        except FileNotFoundError:
+            return {}
+        entries = {}
+        for filename in filenames:
+            job_name, extension = os.path.splitext(filename)
+            if extension == ".json" and job_name.startswith(prefix):
+                entry = self.get(job_name)
+                if entry is not None:
+                    entries[job_name] = entry
+        return entries
+
+    def remove(self, job_name: str) -> None:
+        """Remove the entry of a job, if any."""
+        try:
+            os.remove(self._path(job_name))
+        except FileNotFoundError:
+            pass
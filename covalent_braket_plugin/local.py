@@ -0,0 +1,178 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local execution of electrons bound for simulator devices, without Braket Hybrid Jobs.
+
+Electrons run in a process pool on the dispatcher's machine instead of in a job container,
+with the ``AMZN_BRAKET_*`` environment variables a job would see, pointing at a local
+simulator, which electrons open with the ``braket.local.qubit`` PennyLane device rather than
+``braket.aws.qubit``. This skips the S3 transfers, the job's startup and the polling, so development and
+CI loops take seconds instead of minutes.
+
+The pool's processes are spawned rather than forked, since the dispatcher runs threads.
+Tasks are encoded with :mod:`codec`, so that functions defined interactively or as lambdas
+can be sent to them. Datasets among their arguments are mapped straight from the files the
+dispatcher staged, see :mod:`datasets`.
+"""
+
+import contextlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, Tuple
+
+from covalent_braket_plugin import codec, datasets, worker
+
+EXECUTION_MODES = ("jobs", "auto", "local")
+
+DEFAULT_LOCAL_SIMULATOR = "local:braket/braket_sv"
+
+# Local simulators standing in for the managed ones, keyed by the name ending their ARN.
+_LOCAL_SIMULATORS = {
+    "sv1": "local:braket/braket_sv",
+    "dm1": "local:braket/braket_dm",
+}
+
+
+def is_simulator(device: str) -> bool:
+    """Return whether a device is a managed simulator, e.g. SV1, or a local simulator."""
+    return device.startswith("local:") or "/quantum-simulator/" in device
+
+
+def local_simulator(device: str) -> str:
+    """Return the local simulator standing in for a simulator device.
+
+    Args:
+        device: ARN of a managed simulator, or name of a local simulator, which is returned
+            as is.
+
+    Returns:
+        The name of the local simulator, e.g. "local:braket/braket_dm" for DM1. Simulators
+        without a local counterpart, such as TN1, are replaced by the state vector simulator.
+    """
+    if device.startswith("local:"):
+        return device
+    return _LOCAL_SIMULATORS.get(device.rsplit("/", 1)[-1], DEFAULT_LOCAL_SIMULATOR)
+
+
+def runs_locally(mode: str, device: str) -> bool:
+    """Return whether electrons bound for a device run locally in an execution mode.
+
+    Args:
+        mode: One of :data:`EXECUTION_MODES`. "auto" runs electrons bound for simulators
+            locally and the others on Hybrid Jobs.
+        device: The quantum device.
+    """
+    return mode == "local" or (mode == "auto" and is_simulator(device))
+
+
+def job_environment(device: str, bucket: str, job_name: str, results_dir: str) -> Dict[str, str]:
+    """Return the ``AMZN_BRAKET_*`` environment variables of a local job.
+
+    Args:
+        device: The quantum device, replaced by its local simulator.
+        bucket: Name of the S3 bucket the job's results would be written to.
+        job_name: Name of the job.
+        results_dir: Local directory for the job's results and checkpoints.
+
+    Returns:
+        The environment variables.
+    """
+    return {
+        "AMZN_BRAKET_DEVICE_ARN": local_simulator(device),
+        "AMZN_BRAKET_JOB_NAME": job_name,
+        "AMZN_BRAKET_OUT_S3_BUCKET": bucket,
+        "AMZN_BRAKET_TASK_RESULTS_S3_URI": f"s3://{bucket}/jobs/{job_name}/tasks",
+        "AMZN_BRAKET_JOB_RESULTS_DIR": os.path.join(results_dir, "results"),
+        "AMZN_BRAKET_CHECKPOINT_DIR": os.path.join(results_dir, "checkpoints"),
+    }
+
+
+@contextlib.contextmanager
+def _environment(variables: Dict[str, str]) -> Iterator[None]:
+    previous = {name: os.environ.get(name) for name in variables}
+    os.environ.update(variables)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def run_task(payload: bytes, environment: Dict[str, str]) -> bytes:
+    """Run an encoded task in a pool process.
+
+    Args:
+        payload: The (function, args, kwargs) tuple encoded with :mod:`codec`.
+        environment: Environment variables set while the task runs.
+
+    Returns:
+        The task's outcome, i.e. its status, the error traceback if it failed and its captured
+        stdout and stderr, together with its result, encoded with :mod:`codec`.
+    """
+    function, args, kwargs = codec.loads(payload)
+    args, kwargs = datasets.resolve_arguments(args, kwargs, datasets.local_path)
+    for name in ("AMZN_BRAKET_JOB_RESULTS_DIR", "AMZN_BRAKET_CHECKPOINT_DIR"):
+        os.makedirs(environment[name], exist_ok=True)
+    with _environment(environment):
+        record, result = worker.run_captured(function, *args, **kwargs)
+    try:
+        return codec.dumps((record, result))
+    except Exception as error:
+        record = dict(record, status="FAILED", error=f"Failed to encode the result: {error!r}")
+        return codec.dumps((record, None))
+
+
+def decode_outcome(data: bytes) -> Tuple[Dict, Any]:
+    """Decode the outcome returned by :func:`run_task`."""
+    return codec.loads(data)
+
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_process_pool(max_workers: int = 0) -> ProcessPoolExecutor:
+    """Return the process-wide pool of a size, creating it if needed.
+
+    Args:
+        max_workers: Number of processes, or 0 for one per CPU.
+
+    Returns:
+        The shared pool.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        # A pool whose process died, e.g. in a crashing simulator, accepts no more tasks.
+        if pool is None or getattr(pool, "_broken", False):
+            pool = _pools[max_workers] = ProcessPoolExecutor(
+                max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return pool
+
+
+def shutdown_process_pools(wait: bool = True) -> None:
+    """Shut down every process pool. Pools requested afterwards are created anew."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
@@ -0,0 +1,543 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Span timing and counters of the Braket executor, exported through pluggable sinks.
+
+The executor opens a scope with :func:`instrument` for every electron, tagged with its
+dispatch ID and node ID, and adds the job ARN with :func:`tag` once the job exists. Spans
+(:func:`span`) and counters (:func:`increment`) recorded while the scope is active, including
+from tasks started inside it and from calls run on the executor's thread pools, carry these
+tags and go to the scope's sink. Without a scope, recording is a no-op.
+
+Every AWS call made with a client on which :func:`install_hooks` was called is recorded as an
+``aws_call`` span, with counters of calls, retries, errors and bytes transferred. Calls made
+outside any scope, such as those of S3 managed transfers, which run on threads of their own,
+are not recorded; transfers are recorded as a whole by the transports instead.
+
+Sinks:
+
+- :class:`InMemorySink` keeps spans and counters in memory, e.g. for tests.
+- :class:`PrometheusSink` aggregates them into histograms and counters rendered in the
+  Prometheus text format. Only low-cardinality attributes become labels.
+- :class:`OpenTelemetrySink` forwards spans to an OpenTelemetry tracer and counters to a meter,
+  which needs the ``opentelemetry-api`` package.
+"""
+
+import collections
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+SINKS = ("memory", "prometheus", "opentelemetry")
+
+# Attributes kept as Prometheus labels; job ARNs and node IDs would create a series per job.
+DEFAULT_PROMETHEUS_LABELS = (
+    "span",
+    "phase",
+    "service",
+    "operation",
+    "status",
+    "error",
+    "reason",
+    "direction",
+)
+
+# Upper bounds in seconds of the buckets of the Prometheus span histogram.
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+_Attributes = Tuple[Tuple[str, Any], ...]
+
+
+class Span:
+    """A timed operation.
+
+    Attributes:
+        name: Name of the operation, e.g. "upload" or "aws_call".
+        start: Wall-clock time the operation started at, in seconds since the epoch.
+        duration: Duration of the operation in seconds.
+        attributes: Tags of the operation, e.g. its dispatch ID, node ID and job ARN.
+        error: Name of the exception that ended the operation, or None if it succeeded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        start: float,
+        duration: float,
+        attributes: Dict[str, Any],
+        error: Optional[str] = None,
+    ):
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.attributes = attributes
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"Span({self.name!r}, duration={self.duration:.6f}, attributes={self.attributes})"
+
+
+class MetricsSink:
+    """Destination of the spans and counters recorded by the executor.
+
+    Sinks are called from the event loop and from thread pools, so they must be thread-safe.
+    """
+
+    def record_span(self, span: Span) -> None:
+        """Record a finished span."""
+        raise NotImplementedError
+
+    def increment(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        """Add a value to a counter."""
+        raise NotImplementedError
+
+
+class InMemorySink(MetricsSink):
+    """Keep spans and counters in memory.
+
+    Attributes:
+        spans: The most recent spans, at most ``max_spans`` of them.
+        counters: Counter values keyed by name and sorted attributes.
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        self.spans: Deque[Span] = collections.deque(maxlen=max_spans)
+        self.counters: Dict[Tuple[str, _Attributes], float] = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def record_span(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def increment(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        with self._lock:
+            self.counters[name, tuple(sorted(attributes.items()))] += value
+
+    def find_spans(self, name: str, **attributes) -> List[Span]:
+        """Return the spans of a name whose attributes include the given ones."""
+        with self._lock:
+            spans = list(self.spans)
+        return [
+            span
+            for span in spans
+            if span.name == name
+            and all(span.attributes.get(key) == value for key, value in attributes.items())
+        ]
+
+    def counter(self, name: str, **attributes) -> float:
+        """Return the total of a counter over the series whose attributes include the given ones."""
+        with self._lock:
+            counters = list(self.counters.items())
+        return sum(
+            value
+            for (counter, series), value in counters
+            if counter == name and set(attributes.items()) <= set(series)
+        )
+
+    def clear(self) -> None:
+        """Drop every span and counter."""
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: _Attributes, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs) + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+
+class PrometheusSink(MetricsSink):
+    """Aggregate spans into a duration histogram and counters into totals, for Prometheus.
+
+    Args:
+        namespace: Prefix of the metric names.
+        labels: Attributes kept as labels. Other attributes are dropped, since a label per job
+            would create a series per job.
+        buckets: Upper bounds in seconds of the histogram buckets.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "covalent_braket",
+        labels: Sequence[str] = DEFAULT_PROMETHEUS_LABELS,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.namespace = namespace
+        self.labels = frozenset(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[_Attributes, _Histogram] = {}
+        self._counters: Dict[Tuple[str, _Attributes], float] = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def _series(self, attributes: Dict[str, Any]) -> _Attributes:
+        return tuple(sorted((k, v) for k, v in attributes.items() if k in self.labels))
+
+    def record_span(self, span: Span) -> None:
+        attributes = dict(span.attributes, span=span.name)
+        if span.error:
+            attributes["error"] = span.error
+        series = self._series(attributes)
+        with self._lock:
+            histogram = self._histograms.get(series)
+            if histogram is None:
+                histogram = self._histograms[series] = _Histogram(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if span.duration <= bound:
+                    histogram.counts[i] += 1
+            histogram.total += span.duration
+            histogram.count += 1
+
+    def increment(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        with self._lock:
+            self._counters[name, self._series(attributes)] += value
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        lines = []
+        if histograms:
+            metric = f"{self.namespace}_span_duration_seconds"
+            lines.append(f"# HELP {metric} Duration of the executor's operations.")
+            lines.append(f"# TYPE {metric} histogram")
+            for series, histogram in histograms:
+                for bound, count in zip(self.buckets, histogram.counts):
+                    labels = _format_labels(series, [("le", repr(float(bound)))])
+                    lines.append(f"{metric}_bucket{labels} {count}")
+                labels = _format_labels(series, [("le", "+Inf")])
+                lines.append(f"{metric}_bucket{labels} {histogram.count}")
+                lines.append(f"{metric}_sum{_format_labels(series)} {histogram.total}")
+                lines.append(f"{metric}_count{_format_labels(series)} {histogram.count}")
+
+        names = sorted({name for (name, _), _ in counters})
+        for name in names:
+            metric = f"{self.namespace}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter, series), value in counters:
+                if counter == name:
+                    lines.append(f"{metric}{_format_labels(series)} {value}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+class OpenTelemetrySink(MetricsSink):
+    """Forward spans to an OpenTelemetry tracer and counters to an OpenTelemetry meter.
+
+    Args:
+        tracer: Tracer creating the spans. The global tracer provider's is used if not given.
+        meter: Meter creating the counters. The global meter provider's is used if not given.
+        prefix: Prefix of the counter names.
+    """
+
+    def __init__(self, tracer: Any = None, meter: Any = None, prefix: str = "covalent_braket."):
+        if tracer is None or meter is None:
+            try:
+                from opentelemetry import metrics, trace
+            except ImportError as error:
+                raise ImportError(
+                    "The OpenTelemetry metrics sink requires the opentelemetry-api package, "
+                    "install it with `pip install opentelemetry-api`."
+                ) from error
+            tracer = tracer or trace.get_tracer("covalent_braket_plugin")
+            meter = meter or metrics.get_meter("covalent_braket_plugin")
+        self.tracer = tracer
+        self.meter = meter
+        self.prefix = prefix
+        self._counters: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def record_span(self, span: Span) -> None:
+        attributes = {key: _otel_value(value) for key, value in span.attributes.items()}
+        if span.error:
+            attributes["error.type"] = span.error
+        start = int(span.start * 1e9)
+        otel_span = self.tracer.start_span(span.name, attributes=attributes, start_time=start)
+        otel_span.end(end_time=start + int(span.duration * 1e9))
+
+    def increment(self, name: str, value: float, attributes: Dict[str, Any]) -> None:
+        with self._lock:
+            counter = self._counters.get(name)
+            if counter is None:
+                counter = self._counters[name] = self.meter.create_counter(self.prefix + name)
+        counter.add(value, {key: _otel_value(value) for key, value in attributes.items()})
+
+
+def _otel_value(value: Any) -> Any:
+    # OpenTelemetry only accepts primitive attribute values.
+    return value if isinstance(value, (str, bool, int, float)) else str(value)
+
+
+_sinks: Dict[str, MetricsSink] = {}
+_sinks_lock = threading.Lock()
+
+_SINK_FACTORIES: Dict[str, Callable[[], MetricsSink]] = {
+    "memory": InMemorySink,
+    "prometheus": PrometheusSink,
+    "opentelemetry": OpenTelemetrySink,
+}
+
+
+def get_sink(sink: Union[str, MetricsSink, None]) -> Optional[MetricsSink]:
+    """Return the process-wide sink of a name, creating it if needed.
+
+    Args:
+        sink: One of :data:`SINKS`, a sink instance, which is returned as is, or an empty string
+            or None for no sink.
+
+    Returns:
+        The sink, or None.
+    """
+    if not sink:
+        return None
+    if isinstance(sink, MetricsSink):
+        return sink
+    if sink not in _SINK_FACTORIES:
+        raise ValueError(f"Unknown metrics sink: {sink}")
+    with _sinks_lock:
+        instance = _sinks.get(sink)
+        if instance is None:
+            instance = _sinks[sink] = _SINK_FACTORIES[sink]()
+        return instance
+
+
+class Scope:
+    """A sink together with the attributes tagging everything recorded in it."""
+
+    __slots__ = ("sink", "attributes")
+
+    def __init__(self, sink: MetricsSink, attributes: Dict[str, Any]):
+        self.sink = sink
+        self.attributes = attributes
+
+
+_scope: "contextvars.ContextVar[Optional[Scope]]" = contextvars.ContextVar(
+    "covalent_braket_metrics", default=None
+)
+
+
+def current() -> Optional[Scope]:
+    """Return the active scope, or None if nothing is recorded."""
+    return _scope.get()
+
+
+@contextlib.contextmanager
+def instrument(sink: Optional[MetricsSink], **attributes) -> Iterator[None]:
+    """Record the spans and counters of the block into a sink, tagged with attributes.
+
+    Args:
+        sink: The sink, or None to leave the active scope unchanged.
+        attributes: Tags of everything recorded in the block.
+    """
+    if sink is None:
+        yield
+        return
+    token = _scope.set(Scope(sink, attributes))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def tag(**attributes) -> None:
+    """Add tags to everything recorded from now on in the current context."""
+    scope = _scope.get()
+    if scope is not None:
+        _scope.set(Scope(scope.sink, {**scope.attributes, **attributes}))
+
+
+def detached(function: Callable[..., Any], *args) -> Any:
+    """Call a function in a scope with the active sink but without its tags.
+
+    Used to start background tasks shared by several electrons, which would otherwise inherit
+    the tags of the electron that happened to start them.
+    """
+
+    def run():
+        scope = _scope.get()
+        if scope is not None:
+            _scope.set(Scope(scope.sink, {}))
+        return function(*args)
+
+    return contextvars.copy_context().run(run)
+
+
+def record_span(
+    scope: Optional[Scope],
+    name: str,
+    start: float,
+    duration: float,
+    error: Optional[str] = None,
+    **attributes,
+) -> None:
+    """Record a span measured elsewhere in a scope, e.g. one captured earlier with :func:`current`.
+
+    Args:
+        scope: The scope, or None to do nothing.
+        name: Name of the operation.
+        start: Wall-clock time the operation started at, in seconds since the epoch.
+        duration: Duration of the operation in seconds.
+        error: Name of the exception that ended the operation, if any.
+        attributes: Tags of the span besides those of the scope.
+    """
+    if scope is None:
+        return
+    scope.sink.record_span(
+        Span(name, start, max(0.0, duration), {**scope.attributes, **attributes}, error)
+    )
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes) -> Iterator[None]:
+    """Time the block as a span of the active scope.
+
+    Args:
+        name: Name of the operation.
+        attributes: Tags of the span besides those of the scope.
+    """
+    scope = _scope.get()
+    if scope is None:
+        yield
+        return
+    start, started = time.time(), time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as exception:
+        error = type(exception).__name__
+        raise
+    finally:
+        record_span(scope, name, start, time.perf_counter() - started, error, **attributes)
+
+
+def increment(name: str, value: float = 1, **attributes) -> None:
+    """Add a value to a counter of the active scope.
+
+    Args:
+        name: Name of the counter, e.g. "aws_calls".
+        value: Value added.
+        attributes: Tags of the counter besides those of the scope.
+    """
+    scope = _scope.get()
+    if scope is not None and value:
+        scope.sink.increment(name, value, {**scope.attributes, **attributes})
+
+
+def remaining_size(fileobj: Any) -> int:
+    """Return the number of bytes between the position of a file object and its end, or 0."""
+    try:
+        position = fileobj.tell()
+        size = fileobj.seek(0, 2)
+        fileobj.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return 0
+    return max(0, size - position)
+
+
+def _body_size(body: Any) -> int:
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode())
+    return remaining_size(body)
+
+
+def _before_call(model: Any, params: Dict, context: Dict, **kwargs) -> None:
+    if _scope.get() is None:
+        return
+    context["covalent_metrics"] = (
+        time.time(),
+        time.perf_counter(),
+        _body_size(params.get("body")),
+    )
+
+
+def _after_call_error(model: Any, exception: Exception, context: Dict, **kwargs) -> None:
+    started = context.pop("covalent_metrics", None)
+    scope = _scope.get()
+    if started is None or scope is None:
+        return
+    service, operation = model.service_model.service_name, model.name
+    error = type(exception).__name__
+    record_span(
+        scope,
+        "aws_call",
+        started[0],
+        time.perf_counter() - started[1],
+        error,
+        service=service,
+        operation=operation,
+    )
+    increment("aws_calls", service=service, operation=operation)
+    increment("aws_errors", error=error, service=service, operation=operation)
+
+
+def _after_call(http_response: Any, parsed: Dict, model: Any, context: Dict, **kwargs) -> None:
+    started = context.pop("covalent_metrics", None)
+    scope = _scope.get()
+    if started is None or scope is None:
+        return
+    start, perf_start, sent = started
+    service = model.service_model.service_name
+    operation = model.name
+    status = getattr(http_response, "status_code", 0)
+    error = parsed.get("Error", {}).get("Code") if status >= 300 else None
+    record_span(
+        scope,
+        "aws_call",
+        start,
+        time.perf_counter() - perf_start,
+        error,
+        service=service,
+        operation=operation,
+    )
+
+    tags = {"service": service, "operation": operation}
+    increment("aws_calls", **tags)
+    increment("aws_retries", parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0), **tags)
+    if error:
+        increment("aws_errors", error=error, **tags)
+    increment("bytes_transferred", sent, direction="sent", service=service)
+    received = getattr(http_response, "headers", {}).get("content-length")
+    if received:
+        increment("bytes_transferred", int(received), direction="received", service=service)
+
+
+def install_hooks(client: Any) -> None:
+    """Record the calls of a botocore or aiobotocore client in the scope they are made in."""
+    events = getattr(getattr(client, "meta", None), "events", None)
+    if events is None:
+        return
+    # First, so that handlers answering the call themselves, e.g. stubs, do not skip it.
+    events.register_first("before-call.*.*", _before_call)
+    events.register("after-call.*.*", _after_call)
+    events.register("after-call-error.*.*", _after_call_error)
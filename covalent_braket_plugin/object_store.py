@@ -0,0 +1,296 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content-addressed storage of task payloads in S3."""
+
+import hashlib
+import io
+import os
+import tempfile
+from functools import partial
+from typing import IO, Any, Optional, Tuple
+
+import botocore.exceptions
+
+from covalent_braket_plugin import codec as _codec
+from covalent_braket_plugin import metrics
+from covalent_braket_plugin.transfer import TransferSettings
+
+OBJECT_PREFIX = "objects"
+
+# Serialized objects up to this size are kept in memory; larger ones spill to disk.
+DEFAULT_SPOOL_THRESHOLD = 64 * 1024 * 1024
+
+# Error codes returned by head_object for a key that does not exist.
+_MISSING_OBJECT_ERROR_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+def object_key(data: bytes) -> str:
+    """Return the S3 key under which a serialized object is stored.
+
+    Args:
+        data: Serialized object.
+
+    Returns:
+        Key derived from the SHA-256 digest of the data.
+    """
+    return _digest_key(hashlib.sha256(data).hexdigest())
+
+
+def is_missing_object_error(error: botocore.exceptions.ClientError) -> bool:
+    """Return whether an S3 error means that the requested key does not exist."""
+    return error.response.get("Error", {}).get("Code") in _MISSING_OBJECT_ERROR_CODES
+
+
+def _digest_key(digest: str) -> str:
+    return f"{OBJECT_PREFIX}/{digest}.pkl"
+
+
+class _HashingWriter:
+    """File-like wrapper that hashes and counts everything written to a spooled file."""
+
+    def __init__(self, spool: tempfile.SpooledTemporaryFile, spool_threshold: int):
+        self._spool = spool
+        self._spool_threshold = spool_threshold
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.hash.update(data)
+        self.size += memoryview(data).nbytes
+        if self.size > self._spool_threshold:
+            # Spill before writing, otherwise a single large buffer is first copied in memory.
+            self._spool.rollover()
+        return self._spool.write(data)
+
+
+class ObjectStore:
+    """Upload serialized objects to S3 under content-derived keys, skipping existing ones.
+
+    Identical objects, such as the function of a parameter sweep, are uploaded only once. A
+    local index of marker files records the keys known to exist in the bucket, so repeated
+    uploads cost no API calls at all; keys missing from the index are checked with a HEAD
+    request before uploading.
+
+    Objects are encoded straight into a spooled buffer that only spills to disk above
+    ``spool_threshold`` bytes, and are streamed to S3 from there, so small payloads never touch
+    the disk and large ones are never held in memory twice. The key is derived from the encoded
+    bytes, so the same object stored with different codecs is stored twice.
+
+    Attributes:
+        s3: boto3 S3 client the objects are uploaded with.
+        bucket: Name of the S3 bucket.
+        index_dir: Directory holding the local index.
+        spool_threshold: Size in bytes above which serialized objects are spooled to disk.
+        spool_dir: Directory for spooled objects.
+        codec: Compression codec objects are encoded with, see :mod:`codec`.
+        transfer: Settings of the managed uploads, see :mod:`transfer`.
+        puts: Number of objects uploaded.
+        heads: Number of HEAD requests issued.
+        bytes_uploaded: Number of bytes uploaded.
+    """
+
+    def __init__(
+        self,
+        s3: Any,
+        bucket: str,
+        index_dir: str,
+        spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+        spool_dir: str = None,
+        codec: str = "none",
+        transfer: Optional[TransferSettings] = None,
+    ):
+        self.s3 = s3
+        self.bucket = bucket
+        self.index_dir = index_dir
+        self.spool_threshold = spool_threshold
+        self.spool_dir = spool_dir
+        self.codec = codec
+        self.transfer = transfer or TransferSettings()
+        self.puts = 0
+        self.heads = 0
+        self.bytes_uploaded = 0
+
+    def put(self, data: bytes) -> str:
+        """Store a serialized object unless the bucket already holds it.
+
+        Args:
+            data: Serialized object.
+
+        Returns:
+            S3 key of the object.
+        """
+        return self._put(io.BytesIO(data), object_key(data), len(data))
+
+    def put_object(self, obj: Any) -> str:
+        """Encode an object and store it unless the bucket already holds it.
+
+        Args:
+            obj: Object to encode.
+
+        Returns:
+            S3 key of the encoded object.
+        """
+        fileobj, key, size = self.encode(obj)
+        with fileobj:
+            return self._put(fileobj, key, size)
+
+    def put_file(self, path: str, key: str) -> str:
+        """Store a local file under a given key unless the bucket already holds it.
+
+        Args:
+            path: Path of the file.
+            key: S3 key derived from the file's contents, e.g. a dataset's digest.
+
+        Returns:
+            S3 key of the file.
+        """
+        with open(path, "rb") as f:
+            return self._put(f, key, os.path.getsize(path))
+
+    async def put_object_async(self, obj: Any, transport: Any) -> str:
+        """Encode an object and store it through an async transport, see :mod:`transports`.
+
+        Encoding runs on the transport's blocking-call pool; the HEAD and upload requests are
+        issued by the transport.
+
+        Args:
+            obj: Object to encode.
+            transport: Transport providing ``run_blocking``, ``call`` and ``upload_fileobj``.
+
+        Returns:
+            S3 key of the encoded object.
+        """
+        fileobj, key, size = await transport.run_blocking(partial(self.encode, obj), True)
+        with fileobj:
+            if self._is_indexed(key):
+                return key
+
+            self.heads += 1
+            try:
+                await transport.call("s3", "head_object", Bucket=self.bucket, Key=key)
+                exists = True
+            except botocore.exceptions.ClientError as error:
+                if not is_missing_object_error(error):
+                    raise
+                exists = False
+
+            if not exists:
+                await transport.upload_fileobj(fileobj, self.bucket, key)
+                self.puts += 1
+                self.bytes_uploaded += size
+
+        self._add_to_index(key)
+        return key
+
+    def encode(self, obj: Any) -> Tuple[IO[bytes], str, int]:
+        """Encode an object into a spooled buffer.
+
+        Args:
+            obj: Object to encode.
+
+        Returns:
+            The buffer, positioned at its start, which the caller must close, the S3 key of the
+            encoded object and its size in bytes.
+        """
+        f = tempfile.SpooledTemporaryFile(max_size=self.spool_threshold, dir=self.spool_dir)
+        try:
+            writer = _HashingWriter(f, self.spool_threshold)
+            _codec.dump(obj, writer, self.codec)
+            f.seek(0)
+        except BaseException:
+            f.close()
+            raise
+        return f, _digest_key(writer.hash.hexdigest()), writer.size
+
+    def _put(self, fileobj: IO[bytes], key: str, size: int) -> str:
+        if self._is_indexed(key):
+            return key
+
+        if not self._exists(key):
+            # Managed transfers run on threads of their own, so their calls are recorded here.
+            with metrics.span("aws_call", service="s3", operation="UploadFileobj"):
+                self.transfer.upload_fileobj(self.s3, fileobj, self.bucket, key, size)
+            metrics.increment("bytes_transferred", size, direction="sent", service="s3")
+            self.puts += 1
+            self.bytes_uploaded += size
+
+        self._add_to_index(key)
+        return key
+
+    def _index_path(self, key: str) -> str:
+        return os.path.join(self.index_dir, self.bucket, key)
+
+    def _is_indexed(self, key: str) -> bool:
+        return os.path.exists(self._index_path(key))
+
+    def _add_to_index(self, key: str) -> None:
+        path = self._index_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a"):
+            pass
+
+    def _exists(self, key: str) -> bool:
+        self.heads += 1
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except botocore.exceptions.ClientError as error:
+            if is_missing_object_error(error):
+                return False
+            raise
+
+
+def load_object(
+    s3: Any,
+    bucket: str,
+    key: str,
+    transfer: Optional[TransferSettings] = None,
+    spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+) -> Any:
+    """Decode an object straight from the S3 response stream, without a local copy.
+
+    Objects of at least the transfer's multipart threshold are downloaded in byte ranges, several
+    at once, into a buffer that spills to disk above ``spool_threshold`` bytes instead, and are
+    decoded from there.
+
+    Args:
+        s3: S3 client.
+        bucket: Name of the S3 bucket.
+        key: S3 key of the encoded object, or of a plain pickle.
+        transfer: Settings of the managed downloads, see :mod:`transfer`.
+        spool_threshold: Size in bytes above which downloads in ranges spill to disk.
+
+    Returns:
+        The decoded object.
+    """
+    transfer = transfer or TransferSettings()
+    response = s3.get_object(Bucket=bucket, Key=key, **(transfer.download_args() or {}))
+    size = response.get("ContentLength")
+    body = response["Body"]
+    try:
+        if not size or size < transfer.multipart_threshold:
+            return _codec.load(body)
+    finally:
+        # Unread, the stream of a large object is dropped without downloading it.
+        body.close()
+
+    with tempfile.SpooledTemporaryFile(max_size=spool_threshold) as f:
+        with metrics.span("aws_call", service="s3", operation="DownloadFileobj"):
+            transfer.download_fileobj(s3, bucket, key, f, size)
+        metrics.increment("bytes_transferred", size, direction="received", service="s3")
+        f.seek(0)
+        return _codec.load(f)
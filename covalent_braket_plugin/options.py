@@ -0,0 +1,90 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Options of individual electrons overriding the settings of their Braket executor.
+
+Covalent passes executors no settings of the electron they run, so the options are attached
+to the electron's function, below ``@ct.electron``::
+
+    from covalent_braket_plugin.options import electron_options
+
+    @ct.electron(executor=executor)
+    @electron_options(result_cache=False, local=False)
+    def sample(shots):
+        ...
+
+Covalent hands executors the function wrapped together with its serialized form, which is
+deserialized to read the options.
+"""
+
+from functools import partial
+from typing import Any, Callable, Dict, TypeVar
+
+from covalent._shared_files.logger import app_log
+
+F = TypeVar("F", bound=Callable)
+
+DEFAULT_OPTIONS = {"result_cache": True, "local": True}
+
+# Attribute of the functions holding their options.
+_OPTIONS_ATTRIBUTE = "__covalent_braket_options__"
+
+
+def electron_options(result_cache: bool = True, local: bool = True) -> Callable[[F], F]:
+    """Return a decorator setting the options of an electron's function.
+
+    Args:
+        result_cache: Whether the electron's outcome may be stored and reused, see
+            `BraketExecutor.result_cache`. Electrons that sample at random opt out.
+        local: Whether the electron may run in a local process pool when its executor's
+            `execution_mode` asks for it. Electrons opting out always run on Hybrid Jobs.
+
+    Returns:
+        The decorator, which returns the function itself.
+    """
+
+    def decorate(function: F) -> F:
+        setattr(function, _OPTIONS_ATTRIBUTE, {"result_cache": result_cache, "local": local})
+        return function
+
+    return decorate
+
+
+def get_options(function: Callable) -> Dict[str, bool]:
+    """Return the options of an electron's function.
+
+    Args:
+        function: The function passed to the executor, either the electron's function or
+            Covalent's wrapper around its serialized form.
+
+    Returns:
+        The options, which are the defaults unless set with :func:`electron_options`.
+    """
+    options = getattr(_unwrap(function), _OPTIONS_ATTRIBUTE, {})
+    return {**DEFAULT_OPTIONS, **options}
+
+
+def _unwrap(function: Callable) -> Any:
+    if not (isinstance(function, partial) and function.args):
+        return function
+    serialized = function.args[0]
+    if not hasattr(serialized, "get_deserialized"):
+        return function
+    try:
+        return serialized.get_deserialized()
+    except Exception as error:
+        app_log.debug(f"Failed to read the options of an electron, using the defaults: {error}")
+        return function
@@ -0,0 +1,479 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shared background poller for the status of outstanding Braket hybrid jobs."""
+
+import asyncio
+import random
+import time
+import weakref
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+import botocore.exceptions
+from covalent._shared_files.logger import app_log
+
+from covalent_braket_plugin import metrics
+from covalent_braket_plugin.admission import is_throttling_error
+from covalent_braket_plugin.polling import AdaptivePollingStrategy, PollingStrategy
+
+TERMINAL_STATES = ("COMPLETED", "FAILED", "CANCELLED")
+DEFAULT_MAX_GET_JOB_CALLS = 10
+
+# Statuses requested from search_jobs. Jobs that are not found in any of them, e.g. because
+# they are being cancelled, are checked with get_job.
+_SEARCHED_STATES = TERMINAL_STATES + ("RUNNING", "QUEUED")
+
+# Search a little further back than the oldest job was created, so that clock skew never
+# hides a job from the search.
+_CREATED_AT_MARGIN = 300
+
+# Delay before checking a job again after a throttled or failed get_job call, in seconds,
+# doubled after every further failure up to the maximum.
+_RETRY_BACKOFF = 1.0
+_MAX_RETRY_BACKOFF = 60.0
+
+# Timestamps of finished jobs reported by Braket, used to time their phases.
+_TIMESTAMP_FIELDS = ("createdAt", "startedAt", "endedAt")
+
+
+def _epoch(value: Any) -> Optional[float]:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+# Errors that mean search_jobs cannot be used with this account or botocore version, as
+# opposed to transient errors such as throttling.
+_SEARCH_UNSUPPORTED_ERROR_CODES = {"ValidationException", "AccessDeniedException"}
+
+# Issues an AWS call, see :meth:`transports.Boto3Transport.call`.
+Call = Callable[..., Awaitable[Any]]
+
+
+class _TrackedJob:
+    """Bookkeeping for a single job owned by the poller."""
+
+    def __init__(
+        self,
+        future: asyncio.Future,
+        strategy: PollingStrategy,
+        scope: Optional[metrics.Scope] = None,
+        created_at: Optional[float] = None,
+    ):
+        self.future = future
+        self.strategy = strategy
+        self.scope = scope
+        self.registered_at = time.time()
+        self.created_at = created_at if created_at is not None else self.registered_at
+        self.observed_at: Dict[str, float] = {}
+        self.status = None
+        self.status_since = time.monotonic()
+        self.polls = 0
+        self.polls_in_status = 0
+        self.failures = 0
+        self.next_poll_at = 0.0
+        self.schedule()
+
+    def schedule(self) -> None:
+        now = time.monotonic()
+        interval = self.strategy.next_interval(
+            self.status, now - self.status_since, self.polls_in_status
+        )
+        self.next_poll_at = now + interval
+
+    def back_off(self) -> None:
+        self.failures += 1
+        delay = min(_MAX_RETRY_BACKOFF, _RETRY_BACKOFF * 2 ** (self.failures - 1))
+        self.next_poll_at = time.monotonic() + random.uniform(delay / 2, delay)
+
+    def update(self, status: str, polled: bool) -> None:
+        changed = status != self.status
+        if changed:
+            self.status = status
+            self.observed_at.setdefault(status, time.time())
+            self.status_since = time.monotonic()
+            self.polls_in_status = 0
+        if polled:
+            self.failures = 0
+            self.polls += 1
+            self.polls_in_status += 1
+        if changed or polled:
+            self.schedule()
+
+
+class JobStatusPoller:
+    """Poll the status of every outstanding Braket job of one AWS identity in bulk.
+
+    Each job is checked according to its own :class:`~.PollingStrategy`, and a refresh happens
+    whenever any job is due. A refresh pages through ``search_jobs`` once per searched state and
+    updates every tracked job at once, so the number of API calls grows with the polling
+    interval rather than with the number of jobs in flight. Jobs the search does not return are
+    checked with ``get_job``, like in fallback mode. If ``search_jobs`` is not available,
+    the poller falls back to ``get_job`` calls for the jobs that are due, of which at most
+    ``max_get_job_calls`` are issued per refresh. A job whose ``get_job`` call is throttled or
+    fails on the server side is checked again after an exponential backoff, while any other
+    error, e.g. a missing job or expired credentials, is raised to those waiting for the job.
+
+    When a job finishes, the time it spent queued and running and the delay until the poller
+    noticed that it ended are recorded as spans in the metrics scope of the caller that started
+    watching it, see :mod:`metrics`. Braket's own timestamps are used where it reports them.
+
+    Attributes:
+        call: Coroutine function issuing the Braket calls, e.g. that of the executor's
+            transport, or None to issue them with the client of ``get_client`` on ``executor``.
+        executor: Pool running the blocking Braket calls without ``call``, or None for the event
+            loop's default executor. Anything with a ``submit`` method returning a concurrent
+            future works.
+        max_get_job_calls: Maximum number of ``get_job`` calls per refresh in fallback mode.
+        budget: Token bucket shared with other readers of the AWS identity, e.g. log tailers,
+            of which every background refresh takes a token, or None for no limit.
+        use_search: Whether statuses are refreshed with ``search_jobs``.
+        api_calls: Number of Braket API calls issued so far.
+    """
+
+    def __init__(
+        self,
+        get_client: Callable[[], Any],
+        max_get_job_calls: int = DEFAULT_MAX_GET_JOB_CALLS,
+        executor: Any = None,
+        budget: Any = None,
+        call: Optional[Call] = None,
+    ):
+        self._get_client = get_client
+        self.call = call
+        self.executor = executor
+        self.budget = budget
+        self.max_get_job_calls = max_get_job_calls
+        self.use_search = True
+        self.api_calls = 0
+        self._jobs: Dict[str, _TrackedJob] = {}
+        self._timestamps: Dict[str, Dict[str, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __contains__(self, job_arn: str) -> bool:
+        return job_arn in self._jobs
+
+    def watch(
+        self, job_arn: str, strategy: PollingStrategy = None, created_at: Optional[float] = None
+    ) -> asyncio.Future:
+        """Start tracking a job.
+
+        Args:
+            job_arn: ARN of the Braket hybrid job.
+            strategy: Strategy deciding when the job is checked. Defaults to
+                :class:`~.AdaptivePollingStrategy`.
+            created_at: Time the job was created, in seconds since the epoch, which bounds the
+                search for its status. Defaults to now, for jobs that were just created.
+
+        Returns:
+            Future resolving to the job's terminal status.
+        """
+        job = self._jobs.get(job_arn)
+        if job is None:
+            future = asyncio.get_running_loop().create_future()
+            job = self._jobs[job_arn] = _TrackedJob(
+                future, strategy or AdaptivePollingStrategy(), metrics.current(), created_at
+            )
+            # Let the background task recompute how long to sleep.
+            self._wakeup.set()
+
+        if self._task is None or self._task.done():
+            # The task serves every job, so it must not carry the tags of this caller.
+            self._task = metrics.detached(asyncio.ensure_future, self._run())
+
+        return job.future
+
+    def unwatch(self, job_arn: str) -> None:
+        """Stop tracking a job and cancel anyone still waiting for it.
+
+        Args:
+            job_arn: ARN of the Braket hybrid job.
+        """
+        job = self._jobs.pop(job_arn, None)
+        if job is not None and not job.future.done():
+            job.future.cancel()
+
+    async def wait(
+        self, job_arn: str, strategy: PollingStrategy = None, created_at: Optional[float] = None
+    ) -> str:
+        """Wait until a job reaches a terminal state.
+
+        Cancelling the caller does not cancel the job's future for other waiters.
+
+        Args:
+            job_arn: ARN of the Braket hybrid job.
+            strategy: Strategy deciding when the job is checked.
+            created_at: Time the job was created, see `watch`.
+
+        Returns:
+            The job's terminal status.
+
+        Raises:
+            TimeoutError: If the strategy's maximum number of status checks was reached.
+            botocore.exceptions.ClientError: If checking the job failed with an error that is not
+                retried.
+        """
+        return await asyncio.shield(self.watch(job_arn, strategy, created_at))
+
+    def status(self, job_arn: str) -> Optional[str]:
+        """Return the last known status of a tracked job.
+
+        Args:
+            job_arn: ARN of the Braket hybrid job.
+
+        Returns:
+            The job status, or None if the job is unknown or has not been checked yet.
+        """
+        job = self._jobs.get(job_arn)
+        return job.status if job is not None else None
+
+    async def refresh(self, due_only: bool = False) -> Dict[str, str]:
+        """Refresh the status of the tracked jobs and resolve those that have finished.
+
+        Args:
+            due_only: Only count the check against jobs whose strategy asked for one. In
+                fallback mode, only those jobs are checked.
+
+        Returns:
+            Dictionary mapping job ARNs to the statuses learned during this refresh.
+        """
+        now = time.monotonic()
+        due = {
+            job_arn
+            for job_arn, job in self._jobs.items()
+            if not due_only or job.next_poll_at <= now
+        }
+        if not due:
+            return {}
+
+        statuses = None
+        if self.use_search:
+            statuses = await self._search_statuses(due)
+        if statuses is None:
+            statuses = await self._get_job_statuses(due)
+
+        for job_arn, status in statuses.items():
+            job = self._jobs.get(job_arn)
+            if job is None:
+                continue
+            job.update(status, polled=job_arn in due)
+            if status in TERMINAL_STATES:
+                self._resolve(job_arn, status)
+            elif job.strategy.max_polls and job.polls >= job.strategy.max_polls:
+                self._resolve(
+                    job_arn,
+                    error=TimeoutError(
+                        f"Stopped polling Braket job {job_arn} after {job.polls} status checks"
+                    ),
+                )
+
+        return statuses
+
+    def _record_phases(self, job_arn: str, job: _TrackedJob) -> None:
+        timestamps = self._timestamps.pop(job_arn, {})
+        if job.scope is None:
+            return
+        now = time.time()
+        created = timestamps.get("createdAt", job.created_at)
+        started = timestamps.get("startedAt", job.observed_at.get("RUNNING"))
+        ended = timestamps.get("endedAt")
+        if started is not None:
+            metrics.record_span(job.scope, "job_queue", created, started - created)
+            metrics.record_span(
+                job.scope, "job_runtime", started, (ended or now) - started, status=job.status
+            )
+        if ended is not None:
+            metrics.record_span(job.scope, "job_poll_lag", ended, now - ended)
+
+    def _resolve(self, job_arn: str, status: str = None, error: Exception = None) -> None:
+        job = self._jobs.pop(job_arn)
+        if status is not None:
+            self._record_phases(job_arn, job)
+        self._timestamps.pop(job_arn, None)
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(status)
+
+    async def _run(self) -> None:
+        while self._jobs:
+            self._wakeup.clear()
+            delay = min(job.next_poll_at for job in self._jobs.values()) - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+            if self.budget is not None:
+                await self.budget.acquire()
+            try:
+                await self.refresh(due_only=True)
+            except Exception as error:
+                app_log.debug(f"Failed to refresh Braket job statuses: {error}")
+                for job in self._jobs.values():
+                    job.schedule()
+
+    async def _run_blocking(self, function: Callable[[], Any]) -> Any:
+        if self.executor is None:
+            return await asyncio.get_running_loop().run_in_executor(None, function)
+        return await asyncio.wrap_future(self.executor.submit(function))
+
+    async def _call(self, operation: str, **kwargs) -> Any:
+        self.api_calls += 1
+        if self.call is not None:
+            return await self.call("braket", operation, **kwargs)
+        return await self._run_blocking(lambda: getattr(self._get_client(), operation)(**kwargs))
+
+    async def _search_statuses(self, due: Set[str]) -> Optional[Dict[str, str]]:
+        since = min(job.created_at for job in self._jobs.values()) - _CREATED_AT_MARGIN
+        try:
+            found = await self._search_jobs(since)
+        except botocore.exceptions.ClientError as error:
+            if error.response.get("Error", {}).get("Code") not in _SEARCH_UNSUPPORTED_ERROR_CODES:
+                raise
+            app_log.debug(f"search_jobs unavailable, falling back to get_job: {error}")
+            self.use_search = False
+            return None
+        except (AttributeError, botocore.exceptions.ParamValidationError) as error:
+            # Clients of botocore versions without the operation do not have the method.
+            app_log.debug(f"search_jobs unavailable, falling back to get_job: {error}")
+            self.use_search = False
+            return None
+
+        missing = {job_arn for job_arn in due if job_arn not in found}
+        if missing:
+            found.update(await self._get_job_statuses(missing))
+        return found
+
+    async def _search_jobs(self, since: float) -> Dict[str, str]:
+        created_after = datetime.fromtimestamp(since, tz=timezone.utc).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        )
+
+        statuses = {}
+        for status in _SEARCHED_STATES:
+            filters = [
+                {"name": "status", "operator": "EQUAL", "values": [status]},
+                {"name": "createdAt", "operator": "GTE", "values": [created_after]},
+            ]
+            next_token = None
+            while True:
+                kwargs = {"filters": filters}
+                if next_token:
+                    kwargs["nextToken"] = next_token
+                page = await self._call("search_jobs", **kwargs)
+                for job in page.get("jobs", []):
+                    statuses[job["jobArn"]] = job["status"]
+                    self._keep_timestamps(job)
+                next_token = page.get("nextToken")
+                if not next_token:
+                    break
+        return statuses
+
+    def _keep_timestamps(self, job: Dict[str, Any]) -> None:
+        if job["jobArn"] not in self._jobs or job["status"] not in TERMINAL_STATES:
+            return
+        timestamps = {field: _epoch(job.get(field)) for field in _TIMESTAMP_FIELDS}
+        self._timestamps[job["jobArn"]] = {
+            field: value for field, value in timestamps.items() if value is not None
+        }
+
+    async def _get_job_statuses(self, due: Set[str]) -> Dict[str, str]:
+        jobs = sorted(due, key=lambda job_arn: self._jobs[job_arn].next_poll_at)
+        job_arns = jobs[: self.max_get_job_calls]
+        responses = await asyncio.gather(
+            *(self._call("get_job", jobArn=job_arn) for job_arn in job_arns),
+            return_exceptions=True,
+        )
+
+        statuses = {}
+        for job_arn, job in zip(job_arns, responses):
+            if isinstance(job, botocore.exceptions.ClientError):
+                self._handle_error(job_arn, job)
+                continue
+            if isinstance(job, BaseException):
+                raise job
+            statuses[job_arn] = job["status"]
+            self._keep_timestamps(dict(job, jobArn=job_arn))
+        return statuses
+
+    def _handle_error(self, job_arn: str, error: botocore.exceptions.ClientError) -> None:
+        job = self._jobs.get(job_arn)
+        if job is None:
+            return
+        status_code = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        if is_throttling_error(error) or status_code >= 500:
+            app_log.debug(f"Failed to get status of Braket job {job_arn}, retrying: {error}")
+            job.back_off()
+        else:
+            self._resolve(job_arn, error=error)
+
+
+# One registry per event loop, since the pollers' futures and tasks belong to a loop.
+_pollers: "weakref.WeakKeyDictionary[Any, Dict[Hashable, JobStatusPoller]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_poller(
+    key: Hashable,
+    get_client: Callable[[], Any],
+    max_get_job_calls: int = DEFAULT_MAX_GET_JOB_CALLS,
+    executor: Any = None,
+    budget: Any = None,
+    call: Optional[Call] = None,
+) -> JobStatusPoller:
+    """Return the poller shared by every executor of an AWS identity on the running event loop.
+
+    Args:
+        key: Hashable identifying the AWS account and region, e.g. profile, region and
+            credentials file.
+        get_client: Callable returning a Braket client for that identity.
+        max_get_job_calls: Maximum number of ``get_job`` calls per refresh in fallback mode.
+        executor: Pool running the blocking Braket calls. Replaces the poller's current pool if
+            given.
+        budget: Token bucket of API calls shared with log tailers. Replaces the poller's
+            current budget if given.
+        call: Coroutine function issuing the Braket calls, e.g. that of the executor's
+            transport. Replaces the poller's current one if given.
+
+    Returns:
+        The shared job status poller.
+    """
+    pollers = _pollers.setdefault(asyncio.get_running_loop(), {})
+    poller = pollers.get(key)
+    if poller is None:
+        poller = pollers[key] = JobStatusPoller(
+            get_client, max_get_job_calls, executor, budget, call
+        )
+    else:
+        if executor is not None:
+            poller.executor = executor
+        if budget is not None:
+            poller.budget = budget
+        if call is not None:
+            poller.call = call
+    return poller
@@ -0,0 +1,119 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Strategies deciding how often the status of a Braket hybrid job is checked."""
+
+import random
+from typing import Optional
+
+
+class PollingStrategy:
+    """Base class for polling strategies.
+
+    Attributes:
+        max_polls: Maximum number of status checks per job; zero means unlimited.
+    """
+
+    def __init__(self, max_polls: int = 0):
+        self.max_polls = max_polls
+
+    def next_interval(self, status: Optional[str], elapsed_in_status: float, polls: int) -> float:
+        """Return the number of seconds to wait before checking a job's status again.
+
+        Args:
+            status: Last known job status, or None if the job has not been checked yet.
+            elapsed_in_status: Seconds since the job was first seen in that status.
+            polls: Number of status checks made since the job entered that status.
+
+        Returns:
+            Seconds until the next status check.
+        """
+        raise NotImplementedError
+
+
+class FixedPollingStrategy(PollingStrategy):
+    """Check the job status at a fixed interval.
+
+    Attributes:
+        interval: Seconds between two status checks.
+    """
+
+    def __init__(self, interval: float, max_polls: int = 0):
+        super().__init__(max_polls)
+        self.interval = interval
+
+    def next_interval(self, status: Optional[str], elapsed_in_status: float, polls: int) -> float:
+        return self.interval
+
+
+class AdaptivePollingStrategy(PollingStrategy):
+    """Poll quickly after submission and back off exponentially while nothing changes.
+
+    A job that has just been created is checked after ``min_interval`` seconds, and the interval
+    grows by ``backoff`` with every check that finds it in the same state. Queued jobs, which
+    may wait hours for a QPU, back off up to ``queued_max_interval``. Running jobs back off up
+    to ``max_interval``; if ``expected_runtime`` is known the interval shrinks again as that
+    runtime approaches so that completion is detected quickly. Every interval is randomized by
+    ``jitter`` so that jobs submitted together do not poll in lockstep.
+
+    Attributes:
+        min_interval: Shortest interval between two status checks.
+        max_interval: Longest interval between two status checks of a job that is not queued.
+        queued_max_interval: Longest interval between two status checks of a queued job.
+        backoff: Factor by which the interval grows after each unchanged status check.
+        jitter: Relative amount of random variation applied to every interval.
+        expected_runtime: Expected seconds a job spends in the RUNNING state, if known.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 10.0,
+        queued_max_interval: float = 60.0,
+        backoff: float = 2.0,
+        jitter: float = 0.1,
+        expected_runtime: Optional[float] = None,
+        max_polls: int = 0,
+    ):
+        super().__init__(max_polls)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.queued_max_interval = queued_max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.expected_runtime = expected_runtime
+
+    def next_interval(self, status: Optional[str], elapsed_in_status: float, polls: int) -> float:
+        if status == "QUEUED":
+            interval = self._clamp(self._backoff(polls), self.queued_max_interval)
+        elif status == "RUNNING" and self.expected_runtime:
+            remaining = self.expected_runtime - elapsed_in_status
+            if remaining > 0:
+                # Halve the distance to the expected end of the job with every check.
+                interval = self._clamp(remaining / 2, self.max_interval)
+            else:
+                interval = self._clamp(self._backoff(polls), self.max_interval)
+        else:
+            interval = self._clamp(self._backoff(polls), self.max_interval)
+
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _backoff(self, polls: int) -> float:
+        # Cap the exponent to avoid overflowing for jobs that are polled for days.
+        return self.min_interval * self.backoff ** min(polls, 64)
+
+    def _clamp(self, interval: float, upper: float) -> float:
+        return min(upper, max(self.min_interval, interval))
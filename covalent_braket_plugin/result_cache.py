@@ -0,0 +1,203 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Reuse of the results of identical tasks across dispatches.
+
+A task's cache key is the SHA-256 digest of its encoded function, arguments and keyword
+arguments together with the devices and image it runs on, so re-running a lattice with the
+same parameters returns the stored results instead of submitting the same jobs again.
+
+Entries hold a task's result, stdout and stderr, encoded with :mod:`codec`, and are kept in a
+local directory, in the S3 bucket, or both. Entries older than the time to live are ignored.
+The local store also evicts the oldest entries once it grows beyond its size limit; entries in
+S3 are best expired with a lifecycle rule on :data:`RESULT_PREFIX`.
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import botocore.exceptions
+
+from covalent_braket_plugin import codec
+from covalent_braket_plugin.object_store import is_missing_object_error
+
+RESULT_CACHE_STORES = ("off", "local", "s3", "both")
+
+RESULT_PREFIX = "results"
+
+DEFAULT_RESULT_CACHE_TTL = 7 * 24 * 3600
+DEFAULT_RESULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# A task's result, stdout and stderr.
+Entry = Tuple[Any, str, str]
+
+
+class _Hasher:
+    """File-like object hashing everything written to it."""
+
+    def __init__(self):
+        self.hash = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self.hash.update(data)
+        return memoryview(data).nbytes
+
+
+def cache_key(function: Callable, args: List, kwargs: Dict, **context) -> str:
+    """Return the cache key of a task.
+
+    Args:
+        function: The task's function.
+        args: Positional arguments of the function.
+        kwargs: Keyword arguments of the function.
+        context: JSON-serializable settings the result depends on, e.g. the devices.
+
+    Returns:
+        Hexadecimal SHA-256 digest.
+    """
+    hasher = _Hasher()
+    codec.dump((function, args, kwargs), hasher)
+    hasher.hash.update(json.dumps(context, sort_keys=True, default=str).encode())
+    return hasher.hash.hexdigest()
+
+
+def s3_key(key: str) -> str:
+    """Return the S3 key of a cache entry."""
+    return f"{RESULT_PREFIX}/{key}.pkl"
+
+
+class LocalResultStore:
+    """Cache entries stored as files in a local directory.
+
+    Entries are written to a temporary file and renamed into place, so concurrent readers never
+    see a partial entry.
+
+    Attributes:
+        directory: Directory holding the entries.
+        ttl: Number of seconds an entry is reused for, or 0 for no limit.
+        max_bytes: Total size in bytes above which the oldest entries are evicted, or 0 for no
+            limit.
+    """
+
+    def __init__(self, directory: str, ttl: float = 0, max_bytes: int = 0):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _expired(self, written_at: float, now: float) -> bool:
+        return bool(self.ttl) and now - written_at > self.ttl
+
+    def get(self, key: str) -> Optional[Entry]:
+        """Return the entry of a key, or None if there is none or it expired."""
+        path = self._path(key)
+        try:
+            if self._expired(os.path.getmtime(path), time.time()):
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return codec.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, entry: Entry) -> None:
+        """Store the entry of a key, then evict entries beyond the size limit."""
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as f:
+            try:
+                codec.dump(entry, f)
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, self._path(key))
+        self.evict()
+
+    def evict(self) -> int:
+        """Remove the expired entries, then the oldest ones until the store fits its size limit.
+
+        Returns:
+            Number of entries removed.
+        """
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        for written_at, size, path in sorted(entries):
+            if not self._expired(written_at, now) and (
+                not self.max_bytes or total <= self.max_bytes
+            ):
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
+
+
+async def get_s3_entry(transport: Any, bucket: str, key: str, ttl: float = 0) -> Optional[Entry]:
+    """Return the entry of a key stored in S3, or None if there is none or it expired.
+
+    Args:
+        transport: Transport issuing the calls, see :mod:`transports`.
+        bucket: Name of the S3 bucket.
+        key: Cache key.
+        ttl: Number of seconds an entry is reused for, or 0 for no limit.
+    """
+    try:
+        head = await transport.call("s3", "head_object", Bucket=bucket, Key=s3_key(key))
+    except botocore.exceptions.ClientError as error:
+        if is_missing_object_error(error):
+            return None
+        raise
+    written_at = head.get("LastModified")
+    if ttl and isinstance(written_at, datetime):
+        if datetime.now(timezone.utc) - written_at.astimezone(timezone.utc) > timedelta(
+            seconds=ttl
+        ):
+            return None
+    return await transport.load_object(bucket, s3_key(key))
+
+
+async def put_s3_entry(transport: Any, bucket: str, key: str, entry: Entry) -> None:
+    """Store the entry of a key in S3.
+
+    Args:
+        transport: Transport issuing the calls, see :mod:`transports`.
+        bucket: Name of the S3 bucket.
+        key: Cache key.
+        entry: The task's result, stdout and stderr.
+    """
+    data = await transport.run_blocking(lambda: codec.dumps(entry), True)
+    await transport.upload_fileobj(io.BytesIO(data), bucket, s3_key(key))
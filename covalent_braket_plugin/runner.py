@@ -0,0 +1,242 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cold-start optimized entry point of the Braket Hybrid Jobs container.
+
+Only the standard library is imported when the job starts. boto3 and the job runtime are
+imported on demand, and the modules named in the ``COVALENT_PREFETCH_MODULES`` hyperparameter,
+e.g. pennylane, are imported in a background thread while the payloads are downloaded, so
+that unpickling the task does not pay for them afterwards. Payloads are downloaded into memory
+instead of to files.
+
+The time spent in each phase of the job is printed as a single log line starting with
+:data:`TIMINGS_MARKER` and followed by a JSON object, which the executor parses back from the
+job's logs with :func:`parse_timings`:
+
+- ``import``: importing boto3 and the job runtime and creating the S3 client.
+- ``download``: downloading the payloads.
+- ``warm_up``: waiting for the background imports after the download finished.
+- ``unpickle``: decoding the payloads.
+- ``datasets``: mapping the task's datasets, downloading those without an input channel.
+- ``execute``: running the task.
+- ``upload``: encoding and uploading the result.
+
+This module is imported by the executor as well, so it must only depend on the standard
+library at import time.
+"""
+
+import contextlib
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import IO, Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+TIMINGS_MARKER = "COVALENT_PHASE_TIMINGS "
+
+
+class PhaseTimer:
+    """Measure the time spent in the phases of a job.
+
+    Attributes:
+        timings: Number of seconds spent in each phase, keyed by phase name.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the duration of the block to a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self, stream: Optional[IO[str]] = None) -> None:
+        """Print the timings as a line that :func:`parse_timings` reads back."""
+        print(format_timings(self.timings), file=stream or sys.stdout, flush=True)
+
+
+def format_timings(timings: Mapping[str, float]) -> str:
+    """Format phase timings as a log line."""
+    return TIMINGS_MARKER + json.dumps({name: round(value, 6) for name, value in timings.items()})
+
+
+def parse_timings(line: str) -> Optional[Dict[str, float]]:
+    """Parse a log line written by :meth:`PhaseTimer.report`.
+
+    Args:
+        line: A line of a job's logs.
+
+    Returns:
+        The phase timings, or None if the line does not report any.
+    """
+    if not line.startswith(TIMINGS_MARKER):
+        return None
+    try:
+        timings = json.loads(line[len(TIMINGS_MARKER) :])
+        return {str(name): float(value) for name, value in timings.items()}
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def parse_module_list(modules: Any) -> List[str]:
+    """Return the module names of a comma-separated string or of an iterable of names."""
+    if not modules:
+        return []
+    if isinstance(modules, str):
+        modules = modules.split(",")
+    return [name.strip() for name in modules if name.strip()]
+
+
+class WarmUp:
+    """Import modules in a background thread.
+
+    Modules that fail to import are reported once :meth:`wait` returns, and are imported again,
+    raising the error, if the task needs them.
+
+    Attributes:
+        modules: Names of the modules to import.
+        errors: Import errors keyed by module name.
+    """
+
+    def __init__(self, modules: Iterable[str]):
+        self.modules = list(modules)
+        self.errors: Dict[str, str] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "WarmUp":
+        """Start importing the modules, if there are any."""
+        if self.modules:
+            self._thread = threading.Thread(target=self._run, name="covalent-warm-up", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        for name in self.modules:
+            try:
+                importlib.import_module(name)
+            except Exception as error:
+                self.errors[name] = repr(error)
+
+    def wait(self) -> None:
+        """Wait until every module has been imported."""
+        if self._thread is None:
+            return
+        self._thread.join()
+        self._thread = None
+        for name, error in self.errors.items():
+            print(f"Failed to pre-import {name}: {error}", file=sys.stderr)
+
+
+def main(environ: Optional[Mapping[str, str]] = None, s3: Any = None) -> PhaseTimer:
+    """Run the job described by the hyperparameters in the environment.
+
+    Args:
+        environ: Environment holding the job's hyperparameters, by default ``os.environ``.
+        s3: S3 client, created with boto3 if not given.
+
+    Returns:
+        The timer holding the timings of the job's phases.
+    """
+    environ = os.environ if environ is None else environ
+
+    def hyperparameter(name: str, default: Optional[str] = None) -> Optional[str]:
+        return environ.get(f"SM_HP_{name}", default)
+
+    timer = PhaseTimer()
+    warm_up = WarmUp(parse_module_list(hyperparameter("COVALENT_PREFETCH_MODULES"))).start()
+
+    with timer.phase("import"):
+        from covalent_braket_plugin import worker
+        from covalent_braket_plugin.datasets import INPUT_DIR_VARIABLE
+        from covalent_braket_plugin.transfer import TransferSettings
+
+        if s3 is None:
+            import boto3
+
+            s3 = boto3.client("s3")
+
+    s3_bucket_name = hyperparameter("S3_BUCKET_NAME")
+    result_filename = hyperparameter("RESULT_FILENAME")
+    result_codec = hyperparameter("COVALENT_RESULT_CODEC", "none")
+    worker_prefix = hyperparameter("COVALENT_WORKER_PREFIX")
+    batch_filename = hyperparameter("COVALENT_BATCH_FILENAME")
+    work_dir = hyperparameter("WORKDIR", "/opt/ml/code")
+    transfer = TransferSettings.from_hyperparameters(hyperparameter)
+    input_dir = environ.get(INPUT_DIR_VARIABLE)
+
+    print(f"Covalent artifact s3 bucket: {s3_bucket_name}")
+
+    if worker_prefix:
+        # Persistent worker serving the tasks submitted under its prefix. The timings of each
+        # task are recorded in its outcome.
+        print(f"Worker prefix: {worker_prefix}")
+        worker.serve(
+            s3,
+            s3_bucket_name,
+            worker_prefix,
+            work_dir,
+            idle_timeout=float(
+                hyperparameter("COVALENT_WORKER_IDLE_TIMEOUT", worker.DEFAULT_IDLE_TIMEOUT)
+            ),
+            max_tasks=int(hyperparameter("COVALENT_WORKER_MAX_TASKS", 0)),
+            wait_for_warm_up=warm_up.wait,
+            transfer=transfer,
+        )
+    elif batch_filename:
+        # Bundle of small tasks run by this single job.
+        print(f"Batch filename: {batch_filename}")
+        print(f"Result filename: {result_filename}")
+        worker.run_batch(
+            s3,
+            s3_bucket_name,
+            work_dir,
+            batch_filename,
+            result_filename,
+            result_codec,
+            parallelism=int(hyperparameter("COVALENT_BATCH_PARALLELISM", 1)),
+            timer=timer,
+            wait_for_warm_up=warm_up.wait,
+            transfer=transfer,
+            input_dir=input_dir,
+        )
+    else:
+        func_filename = hyperparameter("COVALENT_TASK_FUNC_FILENAME")
+        args_filename = hyperparameter("COVALENT_TASK_ARGS_FILENAME")
+        print(f"Result filename: {result_filename}")
+        print(f"Function filename: {func_filename}")
+        print(f"Arguments filename: {args_filename}")
+        worker.run_task(
+            s3,
+            s3_bucket_name,
+            work_dir,
+            func_filename,
+            args_filename,
+            result_filename,
+            result_codec,
+            timer=timer,
+            wait_for_warm_up=warm_up.wait,
+            transfer=transfer,
+            input_dir=input_dir,
+        )
+
+    timer.report()
+    return timer
@@ -0,0 +1,227 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Dedicated thread pools for the blocking boto3 calls of the Braket executor."""
+
+import asyncio
+import contextvars
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Set
+
+DEFAULT_CONTROL_POOL_SIZE = 16
+DEFAULT_TRANSFER_POOL_SIZE = 8
+
+
+class BlockingCallPool:
+    """Bounded, named thread pool running blocking calls for coroutines and measuring saturation.
+
+    Calls that arrive while every thread is busy queue inside the pool. If ``max_queue`` is
+    set, callers beyond the pool size plus ``max_queue`` wait on the event loop instead, so that
+    a burst of calls cannot pile up an unbounded backlog of payloads in the pool's queue.
+
+    Attributes:
+        name: Prefix of the names of the pool's threads.
+        max_workers: Number of threads.
+        max_queue: Maximum number of calls queued in the pool, or 0 for no limit.
+        submitted: Number of calls submitted.
+        saturated: Number of calls submitted while every thread was busy.
+        active: Number of calls running.
+        queued: Number of calls waiting for a thread.
+        peak_active: Highest number of calls running at once.
+        peak_queued: Highest number of calls waiting for a thread at once.
+        total_queue_wait: Total time in seconds calls waited for a thread or for room in the
+            queue.
+        max_queue_wait: Longest time in seconds a call waited.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int = 0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.submitted = 0
+        self.saturated = 0
+        self.active = 0
+        self.queued = 0
+        self.peak_active = 0
+        self.peak_queued = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending: Set[Future] = set()
+        # Limits on calls in the pool, one per event loop since semaphores belong to a loop.
+        self._limits: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._shutdown = False
+
+    @property
+    def is_shutdown(self) -> bool:
+        """Whether the pool has been shut down."""
+        return self._shutdown
+
+    def _record_wait(self, waited: float) -> None:
+        self.total_queue_wait += waited
+        self.max_queue_wait = max(self.max_queue_wait, waited)
+
+    def _wrap(self, function: Callable[[], Any], submitted_at: float) -> Callable[[], Any]:
+        def run():
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.peak_active = max(self.peak_active, self.active)
+                self._record_wait(time.monotonic() - submitted_at)
+            try:
+                return function()
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+        return run
+
+    def submit(self, function: Callable[[], Any]) -> Future:
+        """Submit a blocking call to the pool. It runs in a copy of the caller's context.
+
+        Args:
+            function: Callable without arguments.
+
+        Returns:
+            Future of the call's return value.
+        """
+        with self._lock:
+            self.submitted += 1
+            if self.active + self.queued >= self.max_workers:
+                self.saturated += 1
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+
+        try:
+            future = self._executor.submit(
+                contextvars.copy_context().run, self._wrap(function, time.monotonic())
+            )
+        except RuntimeError:
+            with self._lock:
+                self.queued -= 1
+            raise
+
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+            if future.cancelled():
+                self.queued -= 1
+
+    async def run(self, function: Callable[[], Any]) -> Any:
+        """Run a blocking call in the pool and wait for its return value.
+
+        Args:
+            function: Callable without arguments.
+
+        Returns:
+            The call's return value.
+        """
+        if not self.max_queue:
+            return await asyncio.wrap_future(self.submit(function))
+
+        limit = self._limits.get(asyncio.get_running_loop())
+        if limit is None:
+            limit = self._limits[asyncio.get_running_loop()] = asyncio.Semaphore(
+                self.max_workers + self.max_queue
+            )
+        if limit.locked():
+            start = time.monotonic()
+            await limit.acquire()
+            self._record_wait(time.monotonic() - start)
+        else:
+            await limit.acquire()
+        try:
+            return await asyncio.wrap_future(self.submit(function))
+        finally:
+            limit.release()
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        """Shut the pool down.
+
+        Args:
+            wait: Whether to wait for the running calls to finish.
+            cancel_pending: Whether to cancel the calls that have not started yet.
+        """
+        self._shutdown = True
+        if cancel_pending:
+            with self._lock:
+                pending = list(self._pending)
+            for future in pending:
+                future.cancel()
+        self._executor.shutdown(wait=wait)
+
+    def metrics(self) -> Dict[str, float]:
+        """Return the pool's counters and gauges."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "submitted": self.submitted,
+                "saturated": self.saturated,
+                "active": self.active,
+                "queued": self.queued,
+                "peak_active": self.peak_active,
+                "peak_queued": self.peak_queued,
+                "total_queue_wait": self.total_queue_wait,
+                "max_queue_wait": self.max_queue_wait,
+            }
+
+
+_pools: Dict[Hashable, BlockingCallPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str, max_workers: int, max_queue: int = 0) -> BlockingCallPool:
+    """Return the process-wide pool of a name and size, creating it if needed.
+
+    Args:
+        name: Prefix of the names of the pool's threads.
+        max_workers: Number of threads.
+        max_queue: Maximum number of calls queued in the pool, or 0 for no limit.
+
+    Returns:
+        The shared pool.
+    """
+    key = (name, max_workers, max_queue)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.is_shutdown:
+            pool = _pools[key] = BlockingCallPool(name, max_workers, max_queue)
+        return pool
+
+
+def shutdown_pools(wait: bool = True, cancel_pending: bool = False) -> None:
+    """Shut down every pool. Pools requested afterwards are created anew.
+
+    Args:
+        wait: Whether to wait for the running calls to finish.
+        cancel_pending: Whether to cancel the calls that have not started yet.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait, cancel_pending=cancel_pending)
@@ -0,0 +1,208 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Settings of the managed S3 transfers of payloads and results.
+
+Objects above the multipart threshold are uploaded in parts and downloaded in byte ranges,
+several at once. Unless a part size is set, it adapts to the size of each object: small
+objects get few, small parts and no more threads than parts, and large objects get parts
+large enough to keep every thread busy without exceeding the limit of 10,000 parts per
+upload.
+
+The executor passes its settings to the job as hyperparameters, see
+:meth:`TransferSettings.to_hyperparameters`, so that the job runtime transfers payloads and
+results the same way.
+
+This module runs inside the Hybrid Jobs container as well, so it must only depend on the
+standard library and boto3, which is imported on demand.
+"""
+
+import math
+from typing import IO, Any, Callable, Dict, Optional
+
+MIB = 1024 * 1024
+
+DEFAULT_MULTIPART_THRESHOLD = 8 * MIB
+DEFAULT_MAX_CONCURRENCY = 10
+
+# Limits of S3 multipart uploads.
+MIN_PART_SIZE = 5 * MIB
+MAX_PART_SIZE = 5 * 1024 * MIB
+MAX_PARTS = 10000
+
+# Smallest part chosen by the adaptive part size; smaller parts cost more requests than they
+# gain in parallelism.
+ADAPTIVE_MIN_PART_SIZE = 8 * MIB
+
+# Number of parts per thread the adaptive part size aims for, so that a slow part does not
+# leave the other threads idle at the end of a transfer.
+_PARTS_PER_THREAD = 4
+
+CHECKSUM_ALGORITHMS = ("", "CRC32", "CRC32C", "SHA1", "SHA256")
+
+_HYPERPARAMETERS = {
+    "part_size": "COVALENT_TRANSFER_PART_SIZE",
+    "max_concurrency": "COVALENT_TRANSFER_MAX_CONCURRENCY",
+    "multipart_threshold": "COVALENT_TRANSFER_THRESHOLD",
+    "checksum_algorithm": "COVALENT_TRANSFER_CHECKSUM",
+}
+
+
+class TransferSettings:
+    """Part size, concurrency, threshold and checksum of managed S3 transfers.
+
+    Attributes:
+        part_size: Size in bytes of the parts of multipart transfers, or 0 to adapt it to the
+            size of each object.
+        max_concurrency: Maximum number of parts transferred at once per object.
+        multipart_threshold: Size in bytes from which objects are transferred in parts.
+        checksum_algorithm: Algorithm of the checksums S3 stores with uploaded objects and
+            validates downloads against, one of :data:`CHECKSUM_ALGORITHMS`, or empty for the
+            S3 client's default.
+    """
+
+    def __init__(
+        self,
+        part_size: int = 0,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+        checksum_algorithm: str = "",
+    ):
+        if part_size and part_size < MIN_PART_SIZE:
+            raise ValueError(f"Transfer part size must be at least {MIN_PART_SIZE} bytes")
+        if checksum_algorithm.upper() not in CHECKSUM_ALGORITHMS:
+            raise ValueError(f"Unknown transfer checksum algorithm: {checksum_algorithm}")
+        self.part_size = part_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.multipart_threshold = multipart_threshold
+        self.checksum_algorithm = checksum_algorithm.upper()
+
+    def part_size_for(self, size: Optional[int]) -> int:
+        """Return the part size of an object.
+
+        Args:
+            size: Size of the object in bytes, or None if it is unknown.
+
+        Returns:
+            The configured part size, or for an adaptive one, the size that splits the object
+            into a few parts per thread, rounded up to whole MiB. Either is raised if the
+            object would otherwise have more than 10,000 parts.
+        """
+        if not size:
+            return self.part_size or ADAPTIVE_MIN_PART_SIZE
+        part_size = self.part_size or max(
+            ADAPTIVE_MIN_PART_SIZE,
+            math.ceil(size / (self.max_concurrency * _PARTS_PER_THREAD) / MIB) * MIB,
+        )
+        part_size = max(part_size, math.ceil(size / MAX_PARTS / MIB) * MIB)
+        return min(part_size, MAX_PART_SIZE)
+
+    def config_for(self, size: Optional[int] = None) -> Any:
+        """Return the boto3 transfer configuration of an object.
+
+        Args:
+            size: Size of the object in bytes, or None if it is unknown.
+
+        Returns:
+            A ``boto3.s3.transfer.TransferConfig``.
+        """
+        from boto3.s3.transfer import TransferConfig
+
+        part_size = self.part_size_for(size)
+        max_concurrency = self.max_concurrency
+        if size:
+            max_concurrency = max(1, min(max_concurrency, math.ceil(size / part_size)))
+        return TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=part_size,
+            max_concurrency=max_concurrency,
+        )
+
+    def upload_args(self) -> Optional[Dict[str, str]]:
+        """Return the extra arguments of uploads, or None if there are none."""
+        if self.checksum_algorithm:
+            return {"ChecksumAlgorithm": self.checksum_algorithm}
+        return None
+
+    def download_args(self) -> Optional[Dict[str, str]]:
+        """Return the extra arguments of downloads, or None if there are none."""
+        if self.checksum_algorithm:
+            return {"ChecksumMode": "ENABLED"}
+        return None
+
+    def upload_fileobj(
+        self, s3: Any, fileobj: IO[bytes], bucket: str, key: str, size: Optional[int] = None
+    ) -> None:
+        """Upload a file object with a managed transfer.
+
+        Args:
+            s3: S3 client.
+            fileobj: Binary file-like object positioned at the start of the data.
+            bucket: Name of the S3 bucket.
+            key: S3 key of the object.
+            size: Size of the data in bytes, or None if it is unknown.
+        """
+        s3.upload_fileobj(
+            fileobj, bucket, key, ExtraArgs=self.upload_args(), Config=self.config_for(size)
+        )
+
+    def download_fileobj(
+        self, s3: Any, bucket: str, key: str, fileobj: IO[bytes], size: Optional[int] = None
+    ) -> None:
+        """Download an object into a file object with a managed transfer.
+
+        Args:
+            s3: S3 client.
+            bucket: Name of the S3 bucket.
+            key: S3 key of the object.
+            fileobj: Binary file-like object to write to.
+            size: Size of the object in bytes, or None if it is unknown.
+        """
+        s3.download_fileobj(
+            bucket, key, fileobj, ExtraArgs=self.download_args(), Config=self.config_for(size)
+        )
+
+    def download_file(
+        self, s3: Any, bucket: str, key: str, filename: str, size: Optional[int] = None
+    ) -> None:
+        """Download an object to a local file with a managed transfer, see `download_fileobj`."""
+        s3.download_file(
+            bucket, key, filename, ExtraArgs=self.download_args(), Config=self.config_for(size)
+        )
+
+    def to_hyperparameters(self) -> Dict[str, str]:
+        """Return the settings as job hyperparameters."""
+        return {
+            name: str(getattr(self, attribute))
+            for attribute, name in _HYPERPARAMETERS.items()
+            if getattr(self, attribute) != ""
+        }
+
+    @classmethod
+    def from_hyperparameters(
+        cls, hyperparameter: Callable[[str], Optional[str]]
+    ) -> "TransferSettings":
+        """Build the settings passed to a job, falling back to the defaults for missing ones.
+
+        Args:
+            hyperparameter: Callable returning the value of a hyperparameter, or None.
+        """
+        kwargs: Dict[str, Any] = {}
+        for attribute, name in _HYPERPARAMETERS.items():
+            value = hyperparameter(name)
+            if value is not None:
+                kwargs[attribute] = value if attribute == "checksum_algorithm" else int(value)
+        return cls(**kwargs)
@@ -0,0 +1,443 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Transports issuing the AWS calls of the Braket executor.
+
+The default transport runs blocking boto3 calls on the executor's thread pools. The aiobotocore
+transport issues them natively on the event loop, so that a request in flight costs no thread;
+only encoding and decoding still run on the pools.
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import weakref
+from functools import partial
+from typing import IO, Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import botocore.exceptions
+from covalent._shared_files.logger import app_log
+
+from covalent_braket_plugin import codec, metrics
+from covalent_braket_plugin.clients import is_expired_credentials_error
+from covalent_braket_plugin.object_store import DEFAULT_SPOOL_THRESHOLD, ObjectStore, load_object
+from covalent_braket_plugin.transfer import TransferSettings
+
+TRANSPORTS = ("boto3", "aiobotocore")
+
+# Size of the chunks read from S3 response streams.
+CHUNK_SIZE = 1024 * 1024
+
+# Runs a callable without arguments on a thread pool; the flag selects the transfer pool.
+RunBlocking = Callable[[Callable[[], Any], bool], Awaitable[Any]]
+
+
+class Boto3Transport:
+    """Issue AWS calls with boto3 clients on the executor's thread pools.
+
+    A call failing because the credentials of the cached clients expired is issued once more
+    with new clients, after ``on_expired_credentials`` dropped the cached ones.
+
+    Args:
+        get_client: Callable returning the boto3 client of a service.
+        run_blocking: Coroutine function running a blocking call on a thread pool.
+        transfer: Settings of the managed uploads and downloads, see :mod:`transfer`.
+        spool_threshold: Size in bytes above which objects downloaded in ranges spill to disk.
+        on_expired_credentials: Callable evicting the cached clients of ``get_client``, or None
+            to raise errors caused by expired credentials.
+    """
+
+    name = "boto3"
+
+    def __init__(
+        self,
+        get_client: Callable[[str], Any],
+        run_blocking: RunBlocking,
+        transfer: Optional[TransferSettings] = None,
+        spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+        on_expired_credentials: Optional[Callable[[], Any]] = None,
+    ):
+        self._get_client = get_client
+        self.run_blocking = run_blocking
+        self.transfer = transfer or TransferSettings()
+        self.spool_threshold = spool_threshold
+        self.on_expired_credentials = on_expired_credentials
+
+    async def _with_fresh_clients(
+        self,
+        function: Callable[[], Awaitable[Any]],
+        retry: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Any:
+        try:
+            return await function()
+        except botocore.exceptions.ClientError as error:
+            if self.on_expired_credentials is None or not is_expired_credentials_error(error):
+                raise
+            app_log.debug(f"AWS credentials expired, retrying with new clients: {error}")
+            self.on_expired_credentials()
+        return await (retry or function)()
+
+    async def call(self, service: str, operation: str, **kwargs) -> Any:
+        """Call an operation of a service.
+
+        Args:
+            service: Name of the AWS service, e.g. "braket".
+            operation: Name of the client method, e.g. "create_job".
+            kwargs: Parameters of the operation.
+
+        Returns:
+            The operation's response.
+        """
+
+        def call() -> Awaitable[Any]:
+            client = self._get_client(service)
+            return self.run_blocking(partial(getattr(client, operation), **kwargs), False)
+
+        return await self._with_fresh_clients(call)
+
+    async def upload_fileobj(self, fileobj: IO[bytes], bucket: str, key: str) -> None:
+        """Upload a file object with a managed, possibly multipart, transfer."""
+        size = metrics.remaining_size(fileobj)
+        start = fileobj.tell()
+
+        def upload() -> Awaitable[Any]:
+            s3 = self._get_client("s3")
+            return self.run_blocking(
+                partial(self.transfer.upload_fileobj, s3, fileobj, bucket, key, size), True
+            )
+
+        def upload_again() -> Awaitable[Any]:
+            fileobj.seek(start)
+            return upload()
+
+        # Managed transfers run on threads of their own, so their calls are recorded here.
+        with metrics.span("aws_call", service="s3", operation="UploadFileobj"):
+            await self._with_fresh_clients(upload, upload_again)
+        metrics.increment("bytes_transferred", size, direction="sent", service="s3")
+
+    async def download_file(self, bucket: str, key: str, filename: str) -> None:
+        """Download an object to a local file."""
+
+        def download() -> Awaitable[Any]:
+            s3 = self._get_client("s3")
+            return self.run_blocking(
+                partial(self.transfer.download_file, s3, bucket, key, filename), True
+            )
+
+        with metrics.span("aws_call", service="s3", operation="DownloadFile"):
+            await self._with_fresh_clients(download)
+        size = os.path.getsize(filename)
+        metrics.increment("bytes_transferred", size, direction="received", service="s3")
+
+    async def put_object(self, store: ObjectStore, obj: Any) -> str:
+        """Encode an object and store it in a content-addressed object store.
+
+        Returns:
+            S3 key of the encoded object.
+        """
+
+        def put() -> Awaitable[str]:
+            return self.run_blocking(partial(store.put_object, obj), True)
+
+        def put_with_new_client() -> Awaitable[str]:
+            store.s3 = self._get_client("s3")
+            return put()
+
+        return await self._with_fresh_clients(put, put_with_new_client)
+
+    async def load_object(self, bucket: str, key: str) -> Any:
+        """Decode an object from the S3 response stream, or from a managed ranged download."""
+
+        def load() -> Awaitable[Any]:
+            s3 = self._get_client("s3")
+            return self.run_blocking(
+                partial(load_object, s3, bucket, key, self.transfer, self.spool_threshold), True
+            )
+
+        return await self._with_fresh_clients(load)
+
+    async def read_object(self, bucket: str, key: str) -> bytes:
+        """Read a small object, e.g. a JSON document, into memory."""
+
+        def read() -> Awaitable[bytes]:
+            s3 = self._get_client("s3")
+            return self.run_blocking(partial(_read_object, s3, bucket, key), False)
+
+        return await self._with_fresh_clients(read)
+
+    async def close(self) -> None:
+        """Release the transport's resources. The boto3 clients are shared, so this is a no-op."""
+
+
+class AioBotocoreTransport:
+    """Issue AWS calls natively on the event loop with aiobotocore clients.
+
+    Clients are created on first use, one per service, and share the transport's session. They
+    belong to the event loop they were created on, see :func:`get_aiobotocore_transport`. A call
+    failing because the credentials expired is issued once more with clients of a new session.
+
+    aiobotocore has no managed transfers, so objects larger than a part are uploaded one part
+    after the other, and downloads are single requests. Downloads are read in chunks into a
+    buffer that spills to disk above ``spool_threshold`` bytes and are decoded on a thread pool.
+
+    Args:
+        profile: Named AWS profile.
+        region: AWS region name.
+        credentials_file: Path to the AWS shared credentials file.
+        max_pool_connections: Size of each client's HTTP connection pool.
+        run_blocking: Coroutine function running a blocking call on a thread pool.
+        spool_threshold: Size in bytes above which downloads spill to disk.
+        endpoint_url: Endpoint of a local stand-in for the AWS services, e.g. for testing. S3
+            requests to it use path-style addressing.
+        session: aiobotocore session to create clients with. A new session is created if not
+            given.
+    """
+
+    name = "aiobotocore"
+
+    def __init__(
+        self,
+        profile: Optional[str] = None,
+        region: Optional[str] = None,
+        credentials_file: Optional[str] = None,
+        max_pool_connections: int = 32,
+        run_blocking: Optional[RunBlocking] = None,
+        spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+        endpoint_url: Optional[str] = None,
+        session: Any = None,
+    ):
+        self.profile = profile
+        self.region = region
+        self.credentials_file = credentials_file
+        self.max_pool_connections = max_pool_connections
+        self.run_blocking = run_blocking or _run_in_default_executor
+        self.spool_threshold = spool_threshold
+        self.endpoint_url = endpoint_url
+        self._session = self._injected_session = session
+        self._clients: Dict[str, Any] = {}
+        self._lock = asyncio.Lock()
+        self._exit_stack = contextlib.AsyncExitStack()
+
+    def _client_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {}
+        if self.region:
+            options["region_name"] = self.region
+        if self.endpoint_url:
+            options["endpoint_url"] = self.endpoint_url
+        try:
+            from aiobotocore.config import AioConfig
+        except ImportError:
+            # An injected session that does not come from aiobotocore.
+            return options
+        config = {"max_pool_connections": self.max_pool_connections}
+        if self.endpoint_url:
+            config["s3"] = {"addressing_style": "path"}
+        options["config"] = AioConfig(**config)
+        return options
+
+    def _create_session(self) -> Any:
+        try:
+            from aiobotocore.session import get_session
+        except ImportError as error:
+            raise ImportError(
+                "The aiobotocore transport requires the aiobotocore package, "
+                "install it with `pip install covalent-braket-plugin[aiobotocore]`."
+            ) from error
+
+        session = get_session()
+        if self.credentials_file:
+            session.set_config_variable(
+                "credentials_file", os.path.expanduser(self.credentials_file)
+            )
+        if self.profile:
+            session.set_config_variable("profile", self.profile)
+        return session
+
+    async def _get_client(self, service: str) -> Any:
+        client = self._clients.get(service)
+        if client is not None:
+            return client
+
+        async with self._lock:
+            client = self._clients.get(service)
+            if client is None:
+                if self._session is None:
+                    self._session = self._create_session()
+                client = await self._exit_stack.enter_async_context(
+                    self._session.create_client(service, **self._client_options())
+                )
+                metrics.install_hooks(client)
+                self._clients[service] = client
+            return client
+
+    async def call(self, service: str, operation: str, **kwargs) -> Any:
+        """Call an operation of a service.
+
+        Args:
+            service: Name of the AWS service, e.g. "braket".
+            operation: Name of the client method, e.g. "create_job".
+            kwargs: Parameters of the operation.
+
+        Returns:
+            The operation's response.
+        """
+        client = await self._get_client(service)
+        try:
+            return await getattr(client, operation)(**kwargs)
+        except botocore.exceptions.ClientError as error:
+            if not is_expired_credentials_error(error):
+                raise
+            app_log.debug(f"AWS credentials expired, retrying with new clients: {error}")
+            # Calls in flight may still use the old clients, which are closed with the transport.
+            if self._clients.get(service) is client:
+                self._clients.clear()
+                self._session = self._injected_session
+        client = await self._get_client(service)
+        return await getattr(client, operation)(**kwargs)
+
+    async def upload_fileobj(self, fileobj: IO[bytes], bucket: str, key: str) -> None:
+        """Upload a file object, in parts if it is larger than one.
+
+        The file object is read on the thread pool, one part at a time, so that large payloads
+        neither block the event loop nor are held in memory at once.
+        """
+        part_size = TransferSettings().part_size_for(metrics.remaining_size(fileobj))
+        part = await self.run_blocking(partial(fileobj.read, part_size), True)
+        if len(part) < part_size:
+            await self.call("s3", "put_object", Bucket=bucket, Key=key, Body=part)
+            return
+
+        upload = await self.call("s3", "create_multipart_upload", Bucket=bucket, Key=key)
+        upload_id = upload["UploadId"]
+        parts = []
+        try:
+            while part:
+                response = await self.call(
+                    "s3",
+                    "upload_part",
+                    Bucket=bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=len(parts) + 1,
+                    Body=part,
+                )
+                parts.append({"ETag": response["ETag"], "PartNumber": len(parts) + 1})
+                part = await self.run_blocking(partial(fileobj.read, part_size), True)
+            await self.call(
+                "s3",
+                "complete_multipart_upload",
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            with contextlib.suppress(Exception):
+                await self.call(
+                    "s3", "abort_multipart_upload", Bucket=bucket, Key=key, UploadId=upload_id
+                )
+            raise
+
+    async def _read_into(self, bucket: str, key: str, fileobj: IO[bytes]) -> None:
+        response = await self.call("s3", "get_object", Bucket=bucket, Key=key)
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await body.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                fileobj.write(chunk)
+        finally:
+            body.close()
+
+    async def download_file(self, bucket: str, key: str, filename: str) -> None:
+        """Download an object to a local file."""
+        with open(filename, "wb") as f:
+            await self._read_into(bucket, key, f)
+
+    async def put_object(self, store: ObjectStore, obj: Any) -> str:
+        """Encode an object and store it in a content-addressed object store.
+
+        Returns:
+            S3 key of the encoded object.
+        """
+        return await store.put_object_async(obj, self)
+
+    async def read_object(self, bucket: str, key: str) -> bytes:
+        """Read a small object, e.g. a JSON document, into memory."""
+        buffer = io.BytesIO()
+        await self._read_into(bucket, key, buffer)
+        return buffer.getvalue()
+
+    async def load_object(self, bucket: str, key: str) -> Any:
+        """Download an object into a spooled buffer and decode it."""
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_threshold) as f:
+            await self._read_into(bucket, key, f)
+            f.seek(0)
+            return await self.run_blocking(partial(codec.load, f), True)
+
+    async def close(self) -> None:
+        """Close the transport's clients and their connection pools."""
+        self._clients.clear()
+        await self._exit_stack.aclose()
+        self._exit_stack = contextlib.AsyncExitStack()
+
+
+def _read_object(s3: Any, bucket: str, key: str) -> bytes:
+    body = s3.get_object(Bucket=bucket, Key=key)["Body"]
+    try:
+        return body.read()
+    finally:
+        body.close()
+
+
+async def _run_in_default_executor(function: Callable[[], Any], transfer: bool = False) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(None, function)
+
+
+# One registry per event loop, since aiobotocore clients belong to the loop they were created on.
+_transports: "weakref.WeakKeyDictionary[Any, Dict[Hashable, AioBotocoreTransport]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_aiobotocore_transport(key: Hashable, **kwargs) -> AioBotocoreTransport:
+    """Return the aiobotocore transport shared by every executor of an AWS identity.
+
+    The settings are taken from the first executor that asks for the transport of an identity
+    on the running event loop.
+
+    Args:
+        key: Hashable identifying the AWS identity, e.g. profile, region and credentials file.
+        kwargs: Arguments of :class:`AioBotocoreTransport`.
+
+    Returns:
+        The shared transport.
+    """
+    transports = _transports.setdefault(asyncio.get_running_loop(), {})
+    transport = transports.get(key)
+    if transport is None:
+        transport = transports[key] = AioBotocoreTransport(**kwargs)
+    return transport
+
+
+async def close_transports() -> None:
+    """Close the aiobotocore transports of the running event loop."""
+    transports = _transports.pop(asyncio.get_running_loop(), {})
+    for transport in transports.values():
+        await transport.close()
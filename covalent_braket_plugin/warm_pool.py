@@ -0,0 +1,204 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Registry of persistent worker jobs that run many tasks each, see :mod:`worker`."""
+
+import asyncio
+import time
+import weakref
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from covalent_braket_plugin import metrics
+
+# Stop routing tasks to an idle worker this many seconds before it would time out, so that
+# it does not exit while a task is being submitted to it.
+IDLE_MARGIN = 30
+
+
+class Worker:
+    """A persistent worker job as seen by the executor.
+
+    Attributes:
+        job_arn: ARN of the worker's Braket hybrid job.
+        prefix: S3 prefix tasks are submitted under.
+        future: Future resolving to the job's terminal status.
+        idle_timeout: Number of seconds without any task after which the worker stops.
+        max_tasks: Number of tasks after which the worker stops, or 0 for no limit.
+        tasks_assigned: Number of tasks assigned to the worker so far.
+        in_flight: Number of assigned tasks that have not finished yet.
+        retired: Whether the worker must not receive any more tasks.
+        on_release: Called whenever the worker finishes a task or is retired, e.g. to hand it
+            to a task waiting for a worker.
+    """
+
+    def __init__(
+        self,
+        job_arn: str,
+        prefix: str,
+        future: asyncio.Future,
+        idle_timeout: float,
+        max_tasks: int = 0,
+    ):
+        self.job_arn = job_arn
+        self.prefix = prefix
+        self.future = future
+        self.idle_timeout = idle_timeout
+        self.max_tasks = max_tasks
+        self.tasks_assigned = 0
+        self.in_flight = 0
+        self.retired = False
+        self.on_release: Optional[Callable[[], Any]] = None
+        self._last_active = time.monotonic()
+
+    def accepts_tasks(self) -> bool:
+        """Return whether a new task can be assigned to the worker.
+
+        Workers run their tasks one after another, so a worker with a task in flight does not
+        accept another one.
+        """
+        if self.retired or self.future.done() or self.in_flight or self.exhausted:
+            return False
+        idle_limit = max(self.idle_timeout - IDLE_MARGIN, self.idle_timeout / 2)
+        return time.monotonic() - self._last_active < idle_limit
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the worker was assigned its maximum number of tasks and stops after them."""
+        return bool(self.max_tasks) and self.tasks_assigned >= self.max_tasks
+
+    def assign(self) -> None:
+        """Record that a task was assigned to the worker."""
+        self.tasks_assigned += 1
+        self.in_flight += 1
+
+    def release(self) -> None:
+        """Record that an assigned task finished."""
+        self.in_flight -= 1
+        self._last_active = time.monotonic()
+        if self.on_release is not None:
+            self.on_release()
+
+
+class WarmPool:
+    """Hand out persistent workers, launching a new one only when no running worker is idle.
+
+    Workers are grouped by a key such as the AWS identity, devices and container image, and
+    every task is assigned to an idle worker of its key. While every worker is busy, another
+    one is launched unless the key already has as many workers running or launching as the
+    pool's size allows, in which case the task waits until a worker finishes its task.
+    """
+
+    def __init__(self):
+        self._workers: Dict[Hashable, List[Worker]] = {}
+        self._launching: Dict[Hashable, int] = {}
+        self._changed: Dict[Hashable, asyncio.Future] = {}
+
+    def workers(self, key: Hashable) -> List[Worker]:
+        """Return the workers of a key that have not been retired or stopped."""
+        workers = [
+            worker
+            for worker in self._workers.get(key, [])
+            if not worker.retired and not worker.future.done()
+        ]
+        self._workers[key] = workers
+        return workers
+
+    async def acquire(
+        self, key: Hashable, launch: Callable[[], Awaitable[Worker]], size: int = 1
+    ) -> Worker:
+        """Assign a task to a worker of a key.
+
+        Args:
+            key: Hashable identifying interchangeable workers.
+            launch: Coroutine function launching a new worker for the key.
+            size: Maximum number of workers of the key running or launching at once.
+
+        Returns:
+            The worker the task was assigned to. Call :meth:`Worker.release` once the task
+            finished.
+        """
+        while True:
+            workers = self.workers(key)
+            for worker in workers:
+                if worker.accepts_tasks():
+                    worker.assign()
+                    return worker
+
+            # Workers that ran their last task are about to stop and leave room for new ones.
+            running = sum(1 for worker in workers if worker.in_flight or not worker.exhausted)
+            if running + self._launching.get(key, 0) < max(size, 1):
+                self._launching[key] = self._launching.get(key, 0) + 1
+                # The worker serves several electrons, so it must not carry this caller's tags.
+                launching = metrics.detached(asyncio.ensure_future, self._launch(key, launch))
+                await asyncio.shield(launching)
+            else:
+                await asyncio.shield(self._next_change(key))
+
+    def retire(self, worker: Worker) -> None:
+        """Stop assigning tasks to a worker, e.g. because it stopped unexpectedly."""
+        worker.retired = True
+        if worker.on_release is not None:
+            worker.on_release()
+
+    def _next_change(self, key: Hashable) -> asyncio.Future:
+        """Return a future resolved once a worker of a key is launched, released or stopped."""
+        changed = self._changed.get(key)
+        if changed is None:
+            changed = self._changed[key] = asyncio.get_running_loop().create_future()
+        return changed
+
+    def _notify(self, key: Hashable, error: Optional[BaseException] = None) -> None:
+        changed = self._changed.pop(key, None)
+        if changed is None or changed.done():
+            return
+        if error is not None:
+            changed.set_exception(error)
+            # Retrieved by the waiters, if there are any left.
+            changed.exception()
+        else:
+            changed.set_result(None)
+
+    async def _launch(self, key: Hashable, launch: Callable[[], Awaitable[Worker]]) -> None:
+        try:
+            worker = await launch()
+        except Exception as error:
+            self._launching[key] -= 1
+            # Tasks waiting for a worker see the error instead of waiting for another launch.
+            self._notify(key, error)
+            raise
+        except BaseException:
+            self._launching[key] -= 1
+            self._notify(key)
+            raise
+        self._launching[key] -= 1
+        worker.on_release = partial(self._notify, key)
+        worker.future.add_done_callback(lambda _: self._notify(key))
+        self._workers.setdefault(key, []).append(worker)
+        self._notify(key)
+
+
+# One registry per event loop, since the workers' futures belong to a loop.
+_pools: "weakref.WeakKeyDictionary[Any, WarmPool]" = weakref.WeakKeyDictionary()
+
+
+def get_warm_pool() -> WarmPool:
+    """Return the warm pool shared by every executor on the running event loop."""
+    loop = asyncio.get_running_loop()
+    pool: Optional[WarmPool] = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = WarmPool()
+    return pool
@@ -0,0 +1,509 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Task execution inside the Braket Hybrid Jobs container.
+
+A job either runs a single task, runs a bundle of small tasks, or serves as a persistent
+worker that runs every task submitted under its S3 prefix until it has been idle for a while
+or has run enough tasks. Workers exchange small JSON documents with the executor:
+
+- ``<prefix>/tasks/<task_id>.json`` describes a submitted task, i.e. the keys of its function,
+  arguments and result and the codec of the result. The worker deletes it when it picks the
+  task up.
+- ``<prefix>/done/<task_id>.json`` records the outcome of a task, i.e. its status, the error
+  traceback of a failed task, its captured stdout and stderr and the timings of its phases.
+
+Payloads are downloaded into memory, spilling to disk only above :data:`SPOOL_THRESHOLD`
+bytes, and results are encoded the same way before they are uploaded.
+
+Payloads and results above the multipart threshold are transferred in parts, several at
+once, with the settings the executor passed to the job, see :mod:`transfer`.
+
+Datasets among the arguments of a task are mapped from the job's input data channels, or
+downloaded once per job if the job has no channel for them, see :mod:`datasets`.
+
+This module runs inside the job container as well, so it must only depend on the standard
+library, boto3, :mod:`codec`, :mod:`datasets`, :mod:`runner` and :mod:`transfer`.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from covalent_braket_plugin import codec, datasets
+from covalent_braket_plugin.runner import PhaseTimer
+from covalent_braket_plugin.transfer import TransferSettings
+
+TASKS_DIR = "tasks"
+DONE_DIR = "done"
+
+DEFAULT_IDLE_TIMEOUT = 300
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Size in bytes above which downloaded payloads and encoded results spill to disk.
+SPOOL_THRESHOLD = 64 * 1024 * 1024
+
+# Error codes returned for a key that does not exist.
+_MISSING_OBJECT_ERROR_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+def task_key(prefix: str, task_id: str) -> str:
+    """Return the S3 key of a submitted task."""
+    return f"{prefix}/{TASKS_DIR}/{task_id}.json"
+
+
+def done_key(prefix: str, task_id: str) -> str:
+    """Return the S3 key of a task's outcome."""
+    return f"{prefix}/{DONE_DIR}/{task_id}.json"
+
+
+def put_document(s3: Any, bucket: str, key: str, document: Dict) -> None:
+    """Store a JSON document in S3.
+
+    Args:
+        s3: S3 client.
+        bucket: Name of the S3 bucket.
+        key: S3 key of the document.
+        document: JSON-serializable document.
+    """
+    s3.put_object(Bucket=bucket, Key=key, Body=json.dumps(document).encode())
+
+
+def get_document(s3: Any, bucket: str, key: str) -> Optional[Dict]:
+    """Read a JSON document from S3.
+
+    Args:
+        s3: S3 client.
+        bucket: Name of the S3 bucket.
+        key: S3 key of the document.
+
+    Returns:
+        The document, or None if it does not exist.
+    """
+    try:
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"]
+    except Exception as error:
+        # botocore is not imported here, so recognize its ClientError by its response.
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        if code in _MISSING_OBJECT_ERROR_CODES:
+            return None
+        raise
+    try:
+        return json.load(body)
+    finally:
+        body.close()
+
+
+def fetch_objects(
+    s3: Any,
+    bucket: str,
+    keys: List[str],
+    spool_dir: str,
+    transfer: Optional[TransferSettings] = None,
+) -> List[IO[bytes]]:
+    """Download objects concurrently into buffers that spill to disk above SPOOL_THRESHOLD bytes.
+
+    With an adaptive part size, the size of each object is looked up first, so that large
+    objects are downloaded in parts sized for them.
+
+    Args:
+        s3: S3 client.
+        bucket: Name of the S3 bucket.
+        keys: S3 keys of the objects.
+        spool_dir: Directory for the objects that spill to disk.
+        transfer: Settings of the managed downloads. The defaults are used if not given.
+
+    Returns:
+        One buffer per key, positioned at its start. The caller closes them.
+    """
+
+    transfer = transfer or TransferSettings()
+
+    def fetch(key):
+        size = None
+        if not transfer.part_size:
+            size = s3.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        f = tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD, dir=spool_dir)
+        try:
+            transfer.download_fileobj(s3, bucket, key, f, size)
+        except BaseException:
+            f.close()
+            raise
+        f.seek(0)
+        return f
+
+    if len(keys) == 1:
+        return [fetch(keys[0])]
+
+    with ThreadPoolExecutor(len(keys)) as pool:
+        futures = [pool.submit(fetch, key) for key in keys]
+    try:
+        return [future.result() for future in futures]
+    except BaseException:
+        for future in futures:
+            if future.exception() is None:
+                future.result().close()
+        raise
+
+
+def upload_result(
+    s3: Any,
+    bucket: str,
+    key: str,
+    result: Any,
+    result_codec: str,
+    spool_dir: str,
+    transfer: Optional[TransferSettings] = None,
+) -> None:
+    """Encode a result into a buffer that spills to disk above SPOOL_THRESHOLD bytes and upload it.
+
+    Args:
+        s3: S3 client.
+        bucket: Name of the S3 bucket.
+        key: S3 key of the result.
+        result: The result.
+        result_codec: Codec the result is encoded with.
+        spool_dir: Directory for a result that spills to disk.
+        transfer: Settings of the managed upload. The defaults are used if not given.
+    """
+    transfer = transfer or TransferSettings()
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD, dir=spool_dir) as f:
+        codec.dump(result, f, result_codec)
+        size = f.tell()
+        f.seek(0)
+        transfer.upload_fileobj(s3, f, bucket, key, size)
+
+
+def run_task(
+    s3: Any,
+    bucket: str,
+    work_dir: str,
+    func_filename: str,
+    args_filename: Optional[str],
+    result_filename: str,
+    result_codec: str = "none",
+    timer: Optional[PhaseTimer] = None,
+    wait_for_warm_up: Optional[Callable[[], Any]] = None,
+    transfer: Optional[TransferSettings] = None,
+    input_dir: Optional[str] = None,
+) -> PhaseTimer:
+    """Download a task, run it and upload its result.
+
+    Args:
+        s3: S3 client.
+        bucket: Name of the S3 bucket.
+        work_dir: Directory for payloads and results that spill to disk.
+        func_filename: S3 key of the function, or of the legacy (function, args, kwargs) pickle.
+        args_filename: S3 key of the (args, kwargs) pair, or None for the legacy format.
+        result_filename: S3 key of the result.
+        result_codec: Codec the result is encoded with.
+        timer: Timer recording the phases of the task. A new one is used if not given.
+        wait_for_warm_up: Callable waiting for modules imported in the background, called
+            once the payloads are downloaded.
+        transfer: Settings of the payload downloads and the result upload.
+        input_dir: Directory holding the job's input data channels, by default
+            ``AMZN_BRAKET_INPUT_DIR``.
+
+    Returns:
+        The timer.
+    """
+    timer = timer or PhaseTimer()
+
+    # Newer executors upload the function and its arguments as separate content-addressed
+    # objects; older ones upload a single (function, args, kwargs) pickle.
+    keys = [func_filename, args_filename] if args_filename else [func_filename]
+    with timer.phase("download"):
+        payloads = fetch_objects(s3, bucket, keys, work_dir, transfer)
+
+    try:
+        if wait_for_warm_up is not None:
+            with timer.phase("warm_up"):
+                wait_for_warm_up()
+
+        with timer.phase("unpickle"):
+            if args_filename:
+                function = codec.load(payloads[0])
+                args, kwargs = codec.load(payloads[1])
+            else:
+                function, args, kwargs = codec.load(payloads[0])
+    finally:
+        for payload in payloads:
+            payload.close()
+
+    if datasets.find_refs(args, kwargs):
+        with timer.phase("datasets"):
+            locate = datasets.DatasetLocator(s3, bucket, work_dir, input_dir, transfer)
+            args, kwargs = datasets.resolve_arguments(args, kwargs, locate)
+
+    with timer.phase("execute"):
+        result = function(*args, **kwargs)
+
+    with timer.phase("upload"):
+        upload_result(s3, bucket, result_filename, result, result_codec, work_dir, transfer)
+
+    return timer
+
+
+class _ThreadOutput:
+    """Stream wrapper sending the writes of threads that capture their output to their buffer."""
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self._local = threading.local()
+
+    def capture(self, buffer: Optional[IO[str]]) -> None:
+        self._local.buffer = buffer
+
+    def _target(self) -> IO[str]:
+        return getattr(self._local, "buffer", None) or self.stream
+
+    def write(self, data: str) -> int:
+        return self._target().write(data)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+
+@contextlib.contextmanager
+def routed_output() -> Iterator[Tuple[_ThreadOutput, _ThreadOutput]]:
+    """Let threads capture their own stdout and stderr with :func:`run_captured`.
+
+    Yields:
+        The stdout and stderr wrappers.
+    """
+    if isinstance(sys.stdout, _ThreadOutput) and isinstance(sys.stderr, _ThreadOutput):
+        yield sys.stdout, sys.stderr
+        return
+
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _ThreadOutput(stdout), _ThreadOutput(stderr)
+    try:
+        yield sys.stdout, sys.stderr
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+def run_captured(function: Callable, *args, **kwargs) -> Tuple[Dict, Any]:
+    """Call a function, capturing its output and any exception it raises.
+
+    The output is captured per thread, so tasks can run concurrently in threads inside
+    :func:`routed_output`. It is echoed to the job's own log once the function returns.
+
+    Returns:
+        The outcome of the call, i.e. its status, the error traceback if it raised and its
+        captured stdout and stderr, and the function's return value.
+    """
+    with routed_output() as (stdout, stderr):
+        stdout_buffer, stderr_buffer = io.StringIO(), io.StringIO()
+        stdout.capture(stdout_buffer)
+        stderr.capture(stderr_buffer)
+        result = None
+        try:
+            result = function(*args, **kwargs)
+            record = {"status": "COMPLETED"}
+        except Exception:
+            record = {"status": "FAILED", "error": traceback.format_exc()}
+        finally:
+            stdout.capture(None)
+            stderr.capture(None)
+
+        record["stdout"] = stdout_buffer.getvalue()
+        record["stderr"] = stderr_buffer.getvalue()
+        # Keep the task's output in the job's own log as well.
+        stdout.stream.write(record["stdout"])
+        stderr.stream.write(record["stderr"])
+        if record["status"] == "FAILED":
+            stderr.stream.write(record["error"])
+
+    return record, result
+
+
+def run_batch(
+    s3: Any,
+    bucket: str,
+    work_dir: str,
+    bundle_filename: str,
+    result_filename: str,
+    result_codec: str = "none",
+    parallelism: int = 1,
+    timer: Optional[PhaseTimer] = None,
+    wait_for_warm_up: Optional[Callable[[], Any]] = None,
+    transfer: Optional[TransferSettings] = None,
+    input_dir: Optional[str] = None,
+) -> PhaseTimer:
+    """Run a bundle of tasks and upload all their outcomes as one object.
+
+    A task that raises does not affect the others; its traceback is recorded in its outcome.
+
+    Args:
+        s3: S3 client.
+        bucket: Name of the S3 bucket.
+        work_dir: Directory for a bundle and outcomes that spill to disk.
+        bundle_filename: S3 key of the list of (function, args, kwargs) tuples.
+        result_filename: S3 key of the list of outcomes.
+        result_codec: Codec the outcomes are encoded with.
+        parallelism: Number of tasks run concurrently in threads, or 1 to run them one after
+            another.
+        timer: Timer recording the phases of the batch. A new one is used if not given.
+        wait_for_warm_up: Callable waiting for modules imported in the background, called
+            once the bundle is downloaded.
+        transfer: Settings of the bundle download and the outcomes upload.
+        input_dir: Directory holding the job's input data channels, by default
+            ``AMZN_BRAKET_INPUT_DIR``.
+
+    Returns:
+        The timer.
+    """
+    timer = timer or PhaseTimer()
+    with timer.phase("download"):
+        (bundle,) = fetch_objects(s3, bucket, [bundle_filename], work_dir, transfer)
+    with bundle:
+        if wait_for_warm_up is not None:
+            with timer.phase("warm_up"):
+                wait_for_warm_up()
+        with timer.phase("unpickle"):
+            tasks = codec.load(bundle)
+    if any(datasets.find_refs(args, kwargs) for _, args, kwargs in tasks):
+        with timer.phase("datasets"):
+            locate = datasets.DatasetLocator(s3, bucket, work_dir, input_dir, transfer)
+            tasks = [
+                (function, *datasets.resolve_arguments(args, kwargs, locate))
+                for function, args, kwargs in tasks
+            ]
+    print(f"Running {len(tasks)} tasks with parallelism {parallelism}")
+
+    def run(task):
+        function, args, kwargs = task
+        record, result = run_captured(function, *args, **kwargs)
+        if record["status"] == "COMPLETED":
+            record["result"] = result
+        return record
+
+    with timer.phase("execute"), routed_output():
+        if parallelism > 1:
+            with ThreadPoolExecutor(parallelism) as pool:
+                outcomes = list(pool.map(run, tasks))
+        else:
+            outcomes = [run(task) for task in tasks]
+
+    with timer.phase("upload"):
+        upload_result(s3, bucket, result_filename, outcomes, result_codec, work_dir, transfer)
+
+    return timer
+
+
+def _list_tasks(s3: Any, bucket: str, prefix: str) -> List[str]:
+    response = s3.list_objects_v2(Bucket=bucket, Prefix=f"{prefix}/{TASKS_DIR}/")
+    return sorted(item["Key"] for item in response.get("Contents", []))
+
+
+def _serve_task(
+    s3: Any,
+    bucket: str,
+    prefix: str,
+    work_dir: str,
+    key: str,
+    wait_for_warm_up: Optional[Callable[[], Any]] = None,
+    transfer: Optional[TransferSettings] = None,
+) -> bool:
+    task = get_document(s3, bucket, key)
+    if task is None:
+        # Withdrawn by the executor.
+        return False
+    s3.delete_object(Bucket=bucket, Key=key)
+
+    task_id = os.path.basename(key)[: -len(".json")]
+    print(f"Running task {task_id}")
+
+    timer = PhaseTimer()
+    record, _ = run_captured(
+        run_task,
+        s3,
+        bucket,
+        work_dir,
+        task["func_filename"],
+        task.get("args_filename"),
+        task["result_filename"],
+        task.get("codec", "none"),
+        timer=timer,
+        wait_for_warm_up=wait_for_warm_up,
+        transfer=transfer,
+    )
+    record["timings"] = timer.timings
+    put_document(s3, bucket, done_key(prefix, task_id), record)
+    return True
+
+
+def serve(
+    s3: Any,
+    bucket: str,
+    prefix: str,
+    work_dir: str,
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    max_tasks: int = 0,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    wait_for_warm_up: Optional[Callable[[], Any]] = None,
+    transfer: Optional[TransferSettings] = None,
+) -> int:
+    """Run the tasks submitted under a prefix, one at a time, in submission order.
+
+    A task that raises does not stop the worker; its traceback is recorded in its outcome.
+
+    Args:
+        s3: S3 client.
+        bucket: Name of the S3 bucket.
+        prefix: S3 prefix the executor submits tasks under.
+        work_dir: Directory for downloaded payloads and results.
+        idle_timeout: Number of seconds without any task after which the worker stops.
+        max_tasks: Number of tasks after which the worker stops, or 0 for no limit.
+        poll_interval: Number of seconds between checks for new tasks.
+        wait_for_warm_up: Callable waiting for modules imported in the background, called
+            once the payloads of a task are downloaded.
+        transfer: Settings of the payload downloads and result uploads of the tasks.
+
+    Returns:
+        Number of tasks run.
+    """
+    tasks_run = 0
+    idle_since = time.monotonic()
+
+    while True:
+        keys = _list_tasks(s3, bucket, prefix)
+        if not keys:
+            if time.monotonic() - idle_since >= idle_timeout:
+                print(f"No task for {idle_timeout} seconds, stopping after {tasks_run} tasks")
+                return tasks_run
+            time.sleep(poll_interval)
+            continue
+
+        for key in keys:
+            if _serve_task(s3, bucket, prefix, work_dir, key, wait_for_warm_up, transfer):
+                tasks_run += 1
+            if max_tasks and tasks_run >= max_tasks:
+                print(f"Stopping after {tasks_run} tasks")
+                return tasks_run
+        idle_since = time.monotonic()
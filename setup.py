@@ -51,6 +51,7 @@ setup_info = {
     "long_description_content_type": "text/markdown",
     "include_package_data": True,
     "install_requires": required,
+    "extras_require": {"aiobotocore": ["aiobotocore>=2.4.0,<2.5"]},
     "classifiers": [
         "Development Status :: 4 - Beta",
         "Environment :: Console",
@@ -0,0 +1,95 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark the per-task cost of building boto3 clients against the shared client cache."""
+
+import argparse
+import os
+import time
+
+import boto3
+from botocore.stub import Stubber
+
+from covalent_braket_plugin.clients import ClientCache
+
+# Clients requested by a single BraketExecutor.run() before the cache was introduced:
+# _upload_task, submit_task, _poll_task, and two sessions in query_result.
+TASK_SERVICES = ["s3", "braket", "braket", "s3", "logs"]
+JOB_ARN = "arn:aws:braket:us-east-1:123456789012:job/covalent-benchmark"
+
+
+def _stubbed_get_job(braket) -> None:
+    with Stubber(braket) as stubber:
+        stubber.add_response("get_job", _get_job_response(), {"jobArn": JOB_ARN})
+        braket.get_job(jobArn=JOB_ARN)
+
+
+def _get_job_response():
+    return {
+        "status": "COMPLETED",
+        "jobArn": JOB_ARN,
+        "roleArn": "arn:aws:iam::123456789012:role/benchmark",
+        "jobName": "covalent-benchmark",
+        "outputDataConfig": {"s3Path": "s3://bucket/braket"},
+        "stoppingCondition": {"maxRuntimeInSeconds": 300},
+        "algorithmSpecification": {"containerImage": {"uri": "image"}},
+        "instanceConfig": {"instanceType": "ml.m5.large", "volumeSizeInGb": 30},
+        "createdAt": "2022-01-01T00:00:00Z",
+    }
+
+
+def run_uncached(num_tasks: int, region: str) -> float:
+    start = time.perf_counter()
+    for _ in range(num_tasks):
+        for service in TASK_SERVICES:
+            client = boto3.Session(region_name=region).client(service)
+            if service == "braket":
+                _stubbed_get_job(client)
+    return time.perf_counter() - start
+
+
+def run_cached(num_tasks: int, region: str) -> float:
+    cache = ClientCache()
+    start = time.perf_counter()
+    for _ in range(num_tasks):
+        for service in TASK_SERVICES:
+            client = cache.get_client(service, region=region)
+            if service == "braket":
+                _stubbed_get_job(client)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=50, help="Number of simulated electrons.")
+    parser.add_argument("--region", default="us-east-1", help="Region for the stubbed clients.")
+    options = parser.parse_args()
+
+    # Stubbed clients never reach AWS but still need credentials to sign requests.
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+
+    uncached = run_uncached(options.tasks, options.region)
+    cached = run_cached(options.tasks, options.region)
+
+    print(f"tasks: {options.tasks}")
+    print(f"uncached: {1000 * uncached / options.tasks:.2f} ms/task")
+    print(f"cached:   {1000 * cached / options.tasks:.2f} ms/task")
+    print(f"speedup:  {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
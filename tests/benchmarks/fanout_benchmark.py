@@ -0,0 +1,180 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark fan-outs of electrons through ``BraketExecutor.run`` against in-process fakes.
+
+Every electron runs end to end: credentials, upload, ``create_job``, polling, result and logs.
+The fake S3, Braket and CloudWatch Logs clients delay every call by a fixed latency, Braket
+throttles ``create_job`` beyond a rate and runs each job through the job container's entry
+point after a fixed startup time, with a bounded number of jobs running at once.
+
+Each fan-out runs in a fresh process and reports its throughput, the p50 and p99 latency of
+an electron, the AWS calls made and the peak RSS, so that regressions can be tracked.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict
+from unittest import mock
+
+from covalent_braket_plugin.braket import _EXECUTOR_PLUGIN_DEFAULTS, BraketExecutor
+from covalent_braket_plugin.polling import FixedPollingStrategy
+from tests.benchmarks.transfer_benchmark import _peak_rss_mb
+from tests.fake_aws import FakeBraket, FakeLogs, FakeS3
+
+BUCKET = "benchmark"
+
+
+def make_executor(clients: Dict[str, object], options: argparse.Namespace, work_dir: str):
+    with mock.patch(
+        "covalent_braket_plugin.braket.get_config",
+        side_effect=lambda key: _EXECUTOR_PLUGIN_DEFAULTS[key.rsplit(".", 1)[-1]],
+    ):
+        executor = BraketExecutor(
+            s3_bucket_name=BUCKET,
+            cache_dir=work_dir,
+            submit_rate=options.submit_rate,
+            batch_size=options.batch_size,
+            batch_window=options.batch_window,
+        )
+    executor._get_client = clients.__getitem__
+    executor._validate_credentials = lambda **kwargs: {"Account": "000000000000"}
+    executor.polling_strategy = FixedPollingStrategy(options.poll_interval)
+    executor.get_cancel_requested = mock.AsyncMock(return_value=False)
+    executor.set_job_handle = mock.AsyncMock()
+    return executor
+
+
+async def run_fanout(executor: BraketExecutor, electrons: int):
+    latencies = []
+
+    async def electron(node_id: int):
+        start = time.perf_counter()
+        await executor.run(
+            abs,
+            [-node_id],
+            {},
+            {"dispatch_id": "benchmark", "node_id": node_id, "results_dir": executor.cache_dir},
+        )
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(electron(node_id) for node_id in range(electrons)))
+    return time.perf_counter() - start, latencies
+
+
+def _measure(electrons: int, options: argparse.Namespace, queue) -> None:
+    # Jobs print their progress like in the container, which would drown the report.
+    sys.stdout = open(os.devnull, "w")
+
+    with tempfile.TemporaryDirectory() as root:
+        s3 = FakeS3(latency=options.latency)
+        logs = FakeLogs(latency=options.latency)
+        braket = FakeBraket(
+            s3,
+            os.path.join(root, "jobs"),
+            logs,
+            latency=options.latency,
+            job_duration=options.job_duration,
+            create_job_rate=options.create_job_rate,
+            job_slots=options.job_slots,
+            run_entry_point=True,
+        )
+        executor = make_executor({"s3": s3, "braket": braket, "logs": logs}, options, root)
+
+        baseline = _peak_rss_mb()
+        try:
+            elapsed, latencies = asyncio.run(run_fanout(executor, electrons))
+        except Exception as error:
+            queue.put(error)
+            raise
+        calls = Counter()
+        for client in (s3, braket, logs):
+            calls.update(client.calls)
+        queue.put((elapsed, latencies, dict(calls), _peak_rss_mb() - baseline))
+
+
+def run_case(electrons: int, options: argparse.Namespace):
+    # Each fan-out runs in a fresh process so that peak RSS is not inherited from earlier ones.
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(electrons, options, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--electrons",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100, 1000],
+        help="Fan-out sizes, e.g. --electrons 1 100 10000.",
+    )
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per AWS call.")
+    parser.add_argument(
+        "--job-duration", type=float, default=0.5, help="Startup time of a job in seconds."
+    )
+    parser.add_argument(
+        "--job-slots", type=int, default=100, help="Number of jobs running at once."
+    )
+    parser.add_argument(
+        "--create-job-rate",
+        type=float,
+        default=50.0,
+        help="create_job calls per second accepted before throttling, or 0 for no limit.",
+    )
+    parser.add_argument(
+        "--submit-rate",
+        type=float,
+        default=0.0,
+        help="Executor's create_job rate limit, or 0 to rely on retries of throttled calls.",
+    )
+    parser.add_argument("--batch-size", type=int, default=1, help="Electrons per job.")
+    parser.add_argument("--batch-window", type=float, default=0.1, help="Batching window.")
+    parser.add_argument(
+        "--poll-interval", type=float, default=0.1, help="Seconds between status refreshes."
+    )
+    options = parser.parse_args()
+
+    print(
+        f"{'electrons':>10}{'time (s)':>10}{'tasks/s':>10}{'p50 (s)':>10}{'p99 (s)':>10}"
+        f"{'peak RSS (MB)':>15}  AWS calls"
+    )
+    for electrons in options.electrons:
+        elapsed, latencies, calls, peak_rss = run_case(electrons, options)
+        p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+        calls = ", ".join(f"{name} {count}" for name, count in sorted(calls.items()))
+        print(
+            f"{electrons:>10}{elapsed:>10.2f}{electrons / elapsed:>10.1f}"
+            f"{statistics.median(latencies):>10.3f}{p99:>10.3f}{peak_rss:>15.1f}  {calls}"
+        )
+
+
+if __name__ == "__main__":
+    main()
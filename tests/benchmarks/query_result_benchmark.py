@@ -0,0 +1,121 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark the latency from job completion to result with sequential and concurrent fetches.
+
+Every S3 and CloudWatch Logs call of the in-process fakes is delayed to model a round trip.
+The sequential case downloads the result and then reads the logs, like ``query_result`` used
+to; the concurrent case calls ``query_result``, which does both at once.
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from typing import List
+from unittest import mock
+
+from covalent_braket_plugin import codec
+from covalent_braket_plugin.braket import _EXECUTOR_PLUGIN_DEFAULTS, BraketExecutor
+from tests.fake_aws import FakeLogs, FakeS3
+
+BUCKET = "benchmark"
+
+
+class Delayed:
+    """Wrapper delaying every method call of a client by a fixed time."""
+
+    def __init__(self, client, delay: float):
+        self._client = client
+        self._delay = delay
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def call(*args, **kwargs):
+            time.sleep(self._delay)
+            return method(*args, **kwargs)
+
+        return call
+
+
+def make_executor(s3, logs, work_dir: str) -> BraketExecutor:
+    with mock.patch(
+        "covalent_braket_plugin.braket.get_config",
+        side_effect=lambda key: _EXECUTOR_PLUGIN_DEFAULTS[key.rsplit(".", 1)[-1]],
+    ):
+        executor = BraketExecutor(s3_bucket_name=BUCKET, cache_dir=work_dir)
+    clients = {"s3": s3, "logs": logs}
+    executor._get_client = clients.__getitem__
+    return executor
+
+
+async def measure(case: str, electrons: int, delay: float, log_lines: int) -> List[float]:
+    s3, logs = FakeS3(), FakeLogs()
+    for i in range(electrons):
+        s3.objects[(BUCKET, f"result-{i}.pkl")] = codec.dumps(list(range(1000)))
+        for line in range(log_lines):
+            logs.log(f"covalent-{i}/algo-1", f"line {line}")
+
+    latencies = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        executor = make_executor(Delayed(s3, delay), Delayed(logs, delay), work_dir)
+        for i in range(electrons):
+            start = time.perf_counter()
+            if case == "sequential":
+                await executor._load_result(f"result-{i}.pkl", work_dir)
+                await executor._fetch_logs(str(i))
+            else:
+                await executor.query_result(
+                    {
+                        "result_filename": f"result-{i}.pkl",
+                        "task_results_dir": work_dir,
+                        "image_tag": str(i),
+                    }
+                )
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--electrons", type=int, default=20, help="Number of results queried.")
+    parser.add_argument(
+        "--delays",
+        type=float,
+        nargs="+",
+        default=[0.01, 0.05, 0.1],
+        help="Delays of every AWS call in seconds.",
+    )
+    parser.add_argument("--log-lines", type=int, default=100, help="Log lines per job.")
+    options = parser.parse_args()
+
+    print(f"{'case':<12}{'delay (s)':>10}{'p50 (s)':>10}{'p99 (s)':>10}{'mean (s)':>10}")
+    for delay in options.delays:
+        for case in ("sequential", "concurrent"):
+            latencies = asyncio.run(measure(case, options.electrons, delay, options.log_lines))
+            p99 = (
+                statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+            )
+            print(
+                f"{case:<12}{delay:>10.3f}{statistics.median(latencies):>10.3f}"
+                f"{p99:>10.3f}{statistics.mean(latencies):>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark the throughput of managed S3 transfers for a range of object sizes.
+
+Objects are uploaded and downloaded with boto3's default transfer settings and with the
+settings of :mod:`covalent_braket_plugin.transfer`, adaptive or with a fixed part size, against
+a local S3 stand-in that supports multipart uploads and ranged downloads. Every request to the
+stand-in takes a fixed latency and streams its body at a limited bandwidth, like a single
+connection to S3, so that the effect of part size and concurrency is visible on localhost.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import boto3
+from aiohttp import web
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+from covalent_braket_plugin.transfer import MIB, TransferSettings
+from tests.benchmarks.transport_benchmark import _decode_aws_chunked
+
+BUCKET = "benchmark"
+REGION = "us-east-1"
+
+
+class MultipartStandIn:
+    """Local HTTP stand-in for the S3 calls of managed transfers."""
+
+    def __init__(self, latency: float, stream_bandwidth: float):
+        self.latency = latency
+        self.stream_bandwidth = stream_bandwidth
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.uploads: Dict[str, Dict[int, bytes]] = {}
+        self.requests = 0
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=8 * 1024**3)
+        app.router.add_route("HEAD", "/{bucket}/{key:.*}", self.head_object)
+        app.router.add_put("/{bucket}/{key:.*}", self.put)
+        app.router.add_post("/{bucket}/{key:.*}", self.post)
+        app.router.add_get("/{bucket}/{key:.*}", self.get_object, allow_head=False)
+        return app
+
+    async def _transfer(self, size: int) -> None:
+        self.requests += 1
+        delay = self.latency
+        if self.stream_bandwidth:
+            delay += size / self.stream_bandwidth
+        await asyncio.sleep(delay)
+
+    @staticmethod
+    def _key(request: web.Request) -> Tuple[str, str]:
+        return request.match_info["bucket"], request.match_info["key"]
+
+    async def _body(self, request: web.Request) -> bytes:
+        data = await request.read()
+        if "aws-chunked" in request.headers.get("Content-Encoding", ""):
+            data = _decode_aws_chunked(data)
+        await self._transfer(len(data))
+        return data
+
+    async def head_object(self, request: web.Request) -> web.Response:
+        await self._transfer(0)
+        data = self.objects.get(self._key(request))
+        if data is None:
+            return web.Response(status=404)
+        return web.Response(headers={"Content-Length": str(len(data)), "ETag": '"0"'})
+
+    async def put(self, request: web.Request) -> web.Response:
+        data = await self._body(request)
+        upload_id = request.query.get("uploadId")
+        if upload_id is None:
+            self.objects[self._key(request)] = data
+        else:
+            self.uploads[upload_id][int(request.query["partNumber"])] = data
+        return web.Response(headers={"ETag": '"0"'})
+
+    async def post(self, request: web.Request) -> web.Response:
+        await self._body(request)
+        bucket, key = self._key(request)
+        if "uploads" in request.query:
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = {}
+            body = (
+                "<InitiateMultipartUploadResult>"
+                f"<Bucket>{bucket}</Bucket><Key>{key}</Key><UploadId>{upload_id}</UploadId>"
+                "</InitiateMultipartUploadResult>"
+            )
+        else:
+            parts = self.uploads.pop(request.query["uploadId"])
+            self.objects[(bucket, key)] = b"".join(parts[number] for number in sorted(parts))
+            body = (
+                "<CompleteMultipartUploadResult>"
+                f'<Bucket>{bucket}</Bucket><Key>{key}</Key><ETag>"0"</ETag>'
+                "</CompleteMultipartUploadResult>"
+            )
+        return web.Response(text=body, content_type="application/xml")
+
+    async def get_object(self, request: web.Request) -> web.Response:
+        data = self.objects.get(self._key(request))
+        if data is None:
+            await self._transfer(0)
+            body = "<Error><Code>NoSuchKey</Code><Message>Not Found</Message></Error>"
+            return web.Response(status=404, text=body, content_type="application/xml")
+
+        byte_range = request.headers.get("Range")
+        if byte_range is None:
+            await self._transfer(len(data))
+            return web.Response(body=data, headers={"ETag": '"0"'})
+        first, last = byte_range[len("bytes=") :].split("-")
+        first, last = int(first), min(int(last or len(data) - 1), len(data) - 1)
+        await self._transfer(last - first + 1)
+        return web.Response(
+            status=206,
+            body=data[first : last + 1],
+            headers={"Content-Range": f"bytes {first}-{last}/{len(data)}", "ETag": '"0"'},
+        )
+
+
+class _Server:
+    """Run the stand-in on an event loop in a background thread."""
+
+    def __init__(self, stand_in: MultipartStandIn):
+        self._stand_in = stand_in
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._runner: Optional[web.AppRunner] = None
+        self.port = 0
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._start())
+        self._started.set()
+        self._loop.run_forever()
+
+    async def _start(self) -> None:
+        self._runner = web.AppRunner(self._stand_in.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def __enter__(self) -> "_Server":
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def _boto3_default(s3, fileobj, key, size, download_to=None):
+    if download_to is None:
+        s3.upload_fileobj(fileobj, BUCKET, key, Config=TransferConfig())
+    else:
+        s3.download_fileobj(BUCKET, key, download_to, Config=TransferConfig())
+
+
+def _make_settings_case(settings: TransferSettings):
+    def case(s3, fileobj, key, size, download_to=None):
+        if download_to is None:
+            settings.upload_fileobj(s3, fileobj, BUCKET, key, size)
+        else:
+            settings.download_fileobj(s3, BUCKET, key, download_to, size)
+
+    return case
+
+
+def run_case(case, s3, payload: bytes, work_dir: str) -> Tuple[float, float]:
+    """Upload and download a payload once.
+
+    Returns:
+        The upload and download throughput in MB/s.
+    """
+    key = f"objects/{uuid.uuid4().hex}"
+    size = len(payload)
+    path = os.path.join(work_dir, "payload")
+    with open(path, "wb") as f:
+        f.write(payload)
+
+    with open(path, "rb") as f:
+        start = time.perf_counter()
+        case(s3, f, key, size)
+        upload = time.perf_counter() - start
+
+    with open(path, "wb") as f:
+        start = time.perf_counter()
+        case(s3, None, key, size, download_to=f)
+        download = time.perf_counter() - start
+    assert os.path.getsize(path) == size
+
+    return size / MIB / upload, size / MIB / download
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes-mb", type=int, nargs="+", default=[1, 16, 128, 512], help="Object sizes in MB."
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="Delay of every request in seconds."
+    )
+    parser.add_argument(
+        "--stream-mbps",
+        type=float,
+        default=100.0,
+        help="Bandwidth of a single request in MB/s, or 0 for no limit.",
+    )
+    parser.add_argument("--part-mb", type=int, default=64, help="Part size of the fixed case.")
+    parser.add_argument("--concurrency", type=int, default=10, help="Parts transferred at once.")
+    options = parser.parse_args()
+
+    # The stand-in does not check signatures, but botocore needs credentials to sign with.
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+
+    cases: List = [
+        ("boto3 default", _boto3_default),
+        (
+            "adaptive",
+            _make_settings_case(TransferSettings(max_concurrency=options.concurrency)),
+        ),
+        (
+            f"fixed {options.part_mb} MB",
+            _make_settings_case(
+                TransferSettings(
+                    part_size=options.part_mb * MIB, max_concurrency=options.concurrency
+                )
+            ),
+        ),
+    ]
+
+    stand_in = MultipartStandIn(options.latency, options.stream_mbps * MIB)
+    with _Server(stand_in) as server, tempfile.TemporaryDirectory() as work_dir:
+        config = Config(
+            max_pool_connections=64,
+            s3={"addressing_style": "path"},
+            request_checksum_calculation="when_required",
+        )
+        s3 = boto3.Session(region_name=REGION).client(
+            "s3", endpoint_url=f"http://127.0.0.1:{server.port}", config=config
+        )
+
+        print(f"{'settings':<16}{'size (MB)':>10}{'upload MB/s':>13}{'download MB/s':>15}")
+        for size_mb in options.sizes_mb:
+            payload = os.urandom(size_mb * MIB)
+            for name, case in cases:
+                upload, download = run_case(case, s3, payload, work_dir)
+                stand_in.objects.clear()
+                print(f"{name:<16}{size_mb:>10}{upload:>13.1f}{download:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
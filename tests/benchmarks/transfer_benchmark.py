@@ -0,0 +1,172 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark peak memory and wall time of temp-file and streamed payload transfers."""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import cloudpickle as pickle
+from botocore.exceptions import ClientError
+
+from covalent_braket_plugin.object_store import DEFAULT_SPOOL_THRESHOLD, ObjectStore, load_object
+
+BUCKET = "benchmark"
+MB = 1024 * 1024
+
+
+class DiskBackedS3:
+    """S3 stand-in that keeps objects on disk so that they do not count towards peak memory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def upload_file(self, Filename, Bucket, Key):
+        shutil.copyfile(Filename, self._path(Key))
+
+    def upload_fileobj(self, Fileobj, Bucket, Key):
+        with open(self._path(Key), "wb") as f:
+            shutil.copyfileobj(Fileobj, f, MB)
+
+    def download_file(self, Bucket, Key, Filename):
+        shutil.copyfile(self._path(Key), Filename)
+
+    def get_object(self, Bucket, Key):
+        return {"Body": open(self._path(Key), "rb")}
+
+    def head_object(self, Bucket, Key):
+        if not os.path.exists(self._path(Key)):
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {}
+
+
+def make_payload(size: int) -> bytes:
+    chunk = os.urandom(min(size, MB))
+    return chunk * (size // len(chunk))
+
+
+def upload_tempfile(s3, work_dir, payload):
+    with tempfile.NamedTemporaryFile(dir=work_dir) as f:
+        pickle.dump(payload, f)
+        f.flush()
+        s3.upload_file(f.name, BUCKET, "payload.pkl")
+
+
+def upload_streamed(s3, work_dir, payload):
+    store = ObjectStore(
+        s3,
+        BUCKET,
+        os.path.join(work_dir, "index"),
+        spool_threshold=DEFAULT_SPOOL_THRESHOLD,
+        spool_dir=work_dir,
+    )
+    store.put_object(payload)
+
+
+def download_tempfile(s3, work_dir):
+    filename = os.path.join(work_dir, "result.pkl")
+    s3.download_file(BUCKET, "result.pkl", filename)
+    with open(filename, "rb") as f:
+        result = pickle.load(f)
+    os.remove(filename)
+    return result
+
+
+def download_streamed(s3, work_dir):
+    return load_object(s3, BUCKET, "result.pkl")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss survives exec on Linux and would include the parent's peak, so prefer the
+    # high-water mark of this process's own address space.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(case: str, size: int, root: str, queue) -> None:
+    s3 = DiskBackedS3(os.path.join(root, "bucket"))
+    work_dir = os.path.join(root, "work")
+    os.makedirs(work_dir, exist_ok=True)
+
+    payload = make_payload(size) if case.startswith("upload") else None
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+
+    if case == "upload/tempfile":
+        upload_tempfile(s3, work_dir, payload)
+    elif case == "upload/streamed":
+        upload_streamed(s3, work_dir, payload)
+    elif case == "download/tempfile":
+        download_tempfile(s3, work_dir)
+    else:
+        download_streamed(s3, work_dir)
+
+    queue.put((time.perf_counter() - start, _peak_rss_mb() - baseline))
+
+
+def run_case(case: str, size: int, root: str):
+    # Each case runs in a fresh process so that peak RSS is not inherited from earlier cases.
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(case, size, root, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1, 16, 256],
+        help="Payload sizes in MB, e.g. --sizes 1 64 512 2048.",
+    )
+    options = parser.parse_args()
+
+    cases = ["upload/tempfile", "upload/streamed", "download/tempfile", "download/streamed"]
+    print(f"{'case':<20}{'size (MB)':>10}{'time (s)':>10}{'peak RSS (MB)':>15}")
+    for size_mb in options.sizes:
+        with tempfile.TemporaryDirectory() as root:
+            s3 = DiskBackedS3(os.path.join(root, "bucket"))
+            with open(s3._path("result.pkl"), "wb") as f:
+                pickle.dump(make_payload(size_mb * MB), f)
+
+            for case in cases:
+                elapsed, peak_rss = run_case(case, size_mb * MB, root)
+                print(f"{case:<20}{size_mb:>10}{elapsed:>10.3f}{peak_rss:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
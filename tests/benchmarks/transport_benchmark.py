@@ -0,0 +1,244 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark the boto3 and aiobotocore transports against a local S3 and Braket stand-in.
+
+Every task uploads a payload through the content-addressed object store, creates a job, checks
+its status and downloads its result, like an electron run by the executor. The stand-in is an
+HTTP server on localhost that answers each request after a configurable delay.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Tuple
+
+import boto3
+from aiohttp import web
+from botocore.config import Config
+
+from covalent_braket_plugin.object_store import ObjectStore
+from covalent_braket_plugin.thread_pools import (
+    DEFAULT_CONTROL_POOL_SIZE,
+    DEFAULT_TRANSFER_POOL_SIZE,
+    BlockingCallPool,
+)
+from covalent_braket_plugin.transports import AioBotocoreTransport, Boto3Transport
+
+BUCKET = "benchmark"
+REGION = "us-east-1"
+
+
+def _decode_aws_chunked(data: bytes) -> bytes:
+    decoded = bytearray()
+    position = 0
+    while True:
+        end = data.index(b"\r\n", position)
+        size = int(data[position:end].split(b";")[0], 16)
+        position = end + 2
+        if size == 0:
+            return bytes(decoded)
+        decoded += data[position : position + size]
+        position += size + 2
+
+
+class StandIn:
+    """Local HTTP stand-in for the S3 and Braket calls made per task."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.requests = 0
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=1024**3)
+        app.router.add_post("/job", self.create_job)
+        app.router.add_get("/job/{arn:.*}", self.get_job)
+        app.router.add_route("HEAD", "/{bucket}/{key:.*}", self.head_object)
+        app.router.add_put("/{bucket}/{key:.*}", self.put_object)
+        app.router.add_get("/{bucket}/{key:.*}", self.get_object, allow_head=False)
+        return app
+
+    async def _delay(self) -> None:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+
+    async def create_job(self, request: web.Request) -> web.Response:
+        await self._delay()
+        job = await request.json()
+        arn = f"arn:aws:braket:{REGION}:000000000000:job/{job['jobName']}"
+        return web.json_response({"jobArn": arn})
+
+    async def get_job(self, request: web.Request) -> web.Response:
+        await self._delay()
+        return web.json_response({"jobArn": request.match_info["arn"], "status": "COMPLETED"})
+
+    async def head_object(self, request: web.Request) -> web.Response:
+        await self._delay()
+        data = self.objects.get((request.match_info["bucket"], request.match_info["key"]))
+        if data is None:
+            return web.Response(status=404)
+        return web.Response(headers={"Content-Length": str(len(data))})
+
+    async def put_object(self, request: web.Request) -> web.Response:
+        await self._delay()
+        data = await request.read()
+        if "aws-chunked" in request.headers.get("Content-Encoding", ""):
+            data = _decode_aws_chunked(data)
+        self.objects[(request.match_info["bucket"], request.match_info["key"])] = data
+        return web.Response(headers={"ETag": '"0"'})
+
+    async def get_object(self, request: web.Request) -> web.Response:
+        await self._delay()
+        data = self.objects.get((request.match_info["bucket"], request.match_info["key"]))
+        if data is None:
+            body = "<Error><Code>NoSuchKey</Code><Message>Not Found</Message></Error>"
+            return web.Response(status=404, text=body, content_type="application/xml")
+        return web.Response(body=data)
+
+
+def make_run_blocking():
+    control = BlockingCallPool("benchmark-control", DEFAULT_CONTROL_POOL_SIZE)
+    transfer = BlockingCallPool("benchmark-transfer", DEFAULT_TRANSFER_POOL_SIZE)
+
+    async def run_blocking(function, transfer_call=False):
+        return await (transfer if transfer_call else control).run(function)
+
+    return run_blocking, (control, transfer)
+
+
+def make_transport(name: str, endpoint_url: str, run_blocking):
+    """Return the transport and the boto3 S3 client of the object store, if it needs one."""
+    if name == "aiobotocore":
+        transport = AioBotocoreTransport(
+            region=REGION, run_blocking=run_blocking, endpoint_url=endpoint_url
+        )
+        return transport, None
+
+    config = Config(
+        max_pool_connections=64,
+        s3={"addressing_style": "path"},
+        request_checksum_calculation="when_required",
+    )
+    session = boto3.Session(region_name=REGION)
+    clients = {
+        service: session.client(service, endpoint_url=endpoint_url, config=config)
+        for service in ("s3", "braket")
+    }
+    return Boto3Transport(clients.__getitem__, run_blocking), clients["s3"]
+
+
+async def run_task(transport, store: ObjectStore, index: int, payload: bytes) -> None:
+    key = await transport.put_object(store, (index, payload))
+    job = await transport.call(
+        "braket",
+        "create_job",
+        jobName=f"covalent-benchmark-{index}",
+        roleArn="arn:aws:iam::000000000000:role/benchmark",
+        algorithmSpecification={"containerImage": {"uri": "benchmark"}},
+        instanceConfig={"instanceType": "ml.m5.large", "volumeSizeInGb": 30},
+        outputDataConfig={"s3Path": f"s3://{BUCKET}/braket/{index}"},
+        deviceConfig={"device": "benchmark"},
+    )
+    status = await transport.call("braket", "get_job", jobArn=job["jobArn"])
+    assert status["status"] == "COMPLETED"
+    result = await transport.load_object(BUCKET, key)
+    assert result[0] == index
+
+
+async def run_case(name: str, tasks: int, latency: float, payload_size: int) -> Dict:
+    stand_in = StandIn(latency)
+    runner = web.AppRunner(stand_in.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    run_blocking, pools = make_run_blocking()
+    transport, s3 = make_transport(name, f"http://127.0.0.1:{port}", run_blocking)
+    payload = os.urandom(payload_size)
+
+    peak_threads = threading.active_count()
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while True:
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.ensure_future(sample_threads())
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            store = ObjectStore(s3, BUCKET, os.path.join(work_dir, "index"), spool_dir=work_dir)
+            start = time.perf_counter()
+            await asyncio.gather(*(run_task(transport, store, i, payload) for i in range(tasks)))
+            elapsed = time.perf_counter() - start
+    finally:
+        sampler.cancel()
+        await transport.close()
+        await runner.cleanup()
+        for pool in pools:
+            pool.shutdown()
+
+    return {
+        "elapsed": elapsed,
+        "requests": stand_in.requests,
+        "peak_threads": peak_threads,
+        "peak_pool_queue": max(pool.peak_queued for pool in pools),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Delay of every request in seconds."
+    )
+    parser.add_argument("--payload-kb", type=int, default=16, help="Payload size in KB.")
+    options = parser.parse_args()
+
+    # The stand-in does not check signatures, but botocore needs credentials to sign with.
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+
+    try:
+        import aiobotocore  # noqa: F401
+
+        transports = ["boto3", "aiobotocore"]
+    except ImportError:
+        print("aiobotocore is not installed, only the boto3 transport is measured")
+        transports = ["boto3"]
+
+    print(
+        f"{'transport':<14}{'tasks':>7}{'time (s)':>10}{'tasks/s':>10}"
+        f"{'requests':>10}{'threads':>9}{'pool queue':>12}"
+    )
+    for tasks in options.tasks:
+        for name in transports:
+            result = asyncio.run(run_case(name, tasks, options.latency, options.payload_kb * 1024))
+            print(
+                f"{name:<14}{tasks:>7}{result['elapsed']:>10.3f}"
+                f"{tasks / result['elapsed']:>10.1f}{result['requests']:>10}"
+                f"{result['peak_threads']:>9}{result['peak_pool_queue']:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the admission control of job submissions."""
+
+import asyncio
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from covalent_braket_plugin.admission import (
+    AdmissionController,
+    TokenBucket,
+    get_admission_controller,
+    is_throttling_error,
+)
+
+
+def throttling_error():
+    return ClientError({"Error": {"Code": "ThrottlingException"}}, "CreateJob")
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    """Test that requests beyond the burst are spread out at the configured rate."""
+    bucket = TokenBucket(rate=50, burst=2)
+
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(7)))
+
+    assert time.monotonic() - start >= 5 / 50
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_without_limit():
+    """Test that a rate of 0 never waits."""
+    bucket = TokenBucket(rate=0)
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(1000)))
+    assert time.monotonic() - start < 0.1
+
+
+@pytest.mark.asyncio
+async def test_slots_limit_concurrent_jobs():
+    """Test that jobs beyond the limit queue until a running job finishes."""
+    controller = AdmissionController(rate=0, max_concurrent_jobs=2)
+    running = []
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        async with controller.slot():
+            running.append(1)
+            peak = max(peak, len(running))
+            await asyncio.sleep(0.02)
+            running.pop()
+
+    tasks = [asyncio.ensure_future(job()) for _ in range(6)]
+    await asyncio.sleep(0.01)
+    assert controller.metrics()["queue_depth"] == 4
+    assert controller.metrics()["running"] == 2
+
+    await asyncio.gather(*tasks)
+
+    assert peak == 2
+    metrics = controller.metrics()
+    assert metrics["queue_depth"] == 0
+    assert metrics["running"] == 0
+    assert metrics["max_wait"] >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    """Test that a submission cancelled while queued frees its place."""
+    controller = AdmissionController(rate=0, max_concurrent_jobs=1)
+    await controller.acquire_slot()
+
+    waiter = asyncio.ensure_future(controller.acquire_slot())
+    await asyncio.sleep(0)
+    assert controller.queue_depth == 1
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert controller.queue_depth == 0
+    controller.release_slot()
+    await asyncio.wait_for(controller.acquire_slot(), 1)
+
+
+@pytest.mark.asyncio
+async def test_throttled_calls_are_retried():
+    """Test that throttled calls are retried with backoff until they succeed."""
+    controller = AdmissionController(rate=0, base_delay=0.01)
+    attempts = 0
+
+    async def create_job():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise throttling_error()
+        return {"jobArn": "arn"}
+
+    assert await controller.call(create_job) == {"jobArn": "arn"}
+    assert attempts == 3
+    assert controller.metrics()["throttled"] == 2
+    assert controller.metrics()["admitted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded():
+    """Test that a call throttled too often raises the throttling error."""
+    controller = AdmissionController(rate=0, max_retries=2, base_delay=0.001)
+
+    async def create_job():
+        raise throttling_error()
+
+    with pytest.raises(ClientError):
+        await controller.call(create_job)
+    assert controller.admitted == 3
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried():
+    """Test that errors other than throttling are raised right away."""
+    controller = AdmissionController(rate=0)
+
+    async def create_job():
+        raise ClientError({"Error": {"Code": "ValidationException"}}, "CreateJob")
+
+    with pytest.raises(ClientError):
+        await controller.call(create_job)
+    assert controller.admitted == 1
+    assert controller.throttled == 0
+
+
+def test_is_throttling_error():
+    """Test that throttling and quota errors are told apart from other errors."""
+    assert is_throttling_error(throttling_error())
+    assert is_throttling_error(
+        ClientError({"Error": {"Code": "ServiceQuotaExceededException"}}, "CreateJob")
+    )
+    assert not is_throttling_error(ClientError({"Error": {"Code": "403"}}, "CreateJob"))
+    assert not is_throttling_error(RuntimeError())
+
+
+@pytest.mark.asyncio
+async def test_get_admission_controller_is_shared_per_identity():
+    """Test that executors of the same identity share a controller."""
+    assert get_admission_controller("a") is get_admission_controller("a")
+    assert get_admission_controller("a") is not get_admission_controller("b")
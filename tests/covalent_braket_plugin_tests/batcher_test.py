@@ -0,0 +1,123 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the batching of small tasks."""
+
+import asyncio
+import time
+
+import pytest
+
+from covalent_braket_plugin.batcher import MicroBatcher, get_batcher
+
+
+class Runner:
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(0)
+        return [item * 10 for item in items]
+
+
+@pytest.mark.asyncio
+async def test_batch_starts_at_max_size():
+    """Test that a full batch starts without waiting for its window."""
+    batcher = MicroBatcher()
+    run = Runner()
+
+    futures = [asyncio.ensure_future(batcher.submit("key", i, run, 0.1, 3)) for i in range(7)]
+
+    assert await asyncio.gather(*futures[:6]) == [i * 10 for i in range(6)]
+    assert run.batches == [[0, 1, 2], [3, 4, 5]]
+    # The last, partial batch still waits for its window.
+    assert not futures[6].done()
+    assert await futures[6] == 60
+    assert batcher.batches_run == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_starts_after_window():
+    """Test that a partial batch starts once its window has passed."""
+    batcher = MicroBatcher()
+    run = Runner()
+
+    start = time.monotonic()
+    first = asyncio.ensure_future(batcher.submit("key", 1, run, 0.05, 10))
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(batcher.submit("key", 2, run, 0.05, 10))
+
+    assert await asyncio.gather(first, second) == [10, 20]
+    assert run.batches == [[1, 2]]
+    assert time.monotonic() - start >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_keys_are_batched_separately():
+    """Test that only items with the same key share a batch."""
+    batcher = MicroBatcher()
+    run = Runner()
+
+    outcomes = await asyncio.gather(
+        batcher.submit("sv1", 1, run, 0.01, 10),
+        batcher.submit("tn1", 2, run, 0.01, 10),
+        batcher.submit("sv1", 3, run, 0.01, 10),
+    )
+
+    assert outcomes == [10, 20, 30]
+    assert sorted(run.batches) == [[1, 3], [2]]
+
+
+@pytest.mark.asyncio
+async def test_batch_error_reaches_every_caller():
+    """Test that every caller of a batch receives the error of running it."""
+    batcher = MicroBatcher()
+
+    async def fail(items):
+        raise RuntimeError("create_job failed")
+
+    results = await asyncio.gather(
+        *(batcher.submit("key", i, fail, 0.01, 10) for i in range(3)), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["create_job failed"] * 3
+
+
+@pytest.mark.asyncio
+async def test_batch_cancellation_reaches_every_caller():
+    """Test that the callers of a batch that is cancelled while running are cancelled too."""
+    batcher = MicroBatcher()
+    started = asyncio.Event()
+
+    async def hang(items):
+        started.set()
+        await asyncio.Event().wait()
+
+    callers = [asyncio.ensure_future(batcher.submit("key", i, hang, 0.01, 10)) for i in range(3)]
+    await started.wait()
+    (task,) = batcher._running
+    task.cancel()
+
+    results = await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 1)
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert not batcher._running
+
+
+@pytest.mark.asyncio
+async def test_get_batcher_is_shared():
+    """Test that executors on the same event loop share a batcher."""
+    assert get_batcher() is get_batcher()
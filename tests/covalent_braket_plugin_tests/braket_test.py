@@ -18,7 +18,10 @@
 
 import asyncio
 import os
+import threading
+import time
 from base64 import b64encode
+from datetime import timedelta
 from typing import Dict, List
 from unittest.mock import AsyncMock, MagicMock
 
@@ -27,7 +30,24 @@ import pytest
 from botocore.exceptions import ClientError
 from covalent._shared_files.exceptions import TaskCancelledError
 
-from covalent_braket_plugin.braket import BRAKET_JOB_NAME, BraketExecutor
+from covalent_braket_plugin import codec
+from covalent_braket_plugin.braket import (
+    _EXECUTOR_PLUGIN_DEFAULTS,
+    BRAKET_JOB_NAME,
+    BraketExecutor,
+)
+from covalent_braket_plugin.clients import clear_clients
+from covalent_braket_plugin.datasets import Dataset
+from covalent_braket_plugin.identity import clear_identities
+from covalent_braket_plugin.job_logs import pop_tailer
+from covalent_braket_plugin.local import shutdown_process_pools
+from covalent_braket_plugin.metrics import InMemorySink
+from covalent_braket_plugin.options import electron_options
+from covalent_braket_plugin.polling import AdaptivePollingStrategy, FixedPollingStrategy
+from covalent_braket_plugin.result_cache import RESULT_PREFIX
+from covalent_braket_plugin.runner import format_timings
+from covalent_braket_plugin.transports import close_transports, get_aiobotocore_transport
+from tests.fake_aws import FakeAioSession, FakeBraket, FakeLogs, FakeS3
 
 MOCK_CREDENTIALS = "mock_credentials"
 MOCK_PROFILE = "mock_profile"
@@ -40,10 +60,23 @@ MOCK_TIME_LIMIT = 1
 MOCK_POLL_FREQ = 1
 
 
+@pytest.fixture(autouse=True)
+def clear_client_cache():
+    """Make sure mocked boto3 clients and caller identities do not leak between tests."""
+    clear_clients()
+    clear_identities()
+    yield
+    clear_clients()
+    clear_identities()
+
+
+def mock_get_config(key):
+    return _EXECUTOR_PLUGIN_DEFAULTS.get(key.rsplit(".", 1)[-1], "default")
+
+
 @pytest.fixture
 def braket_executor(mocker):
-    config_mock = mocker.patch("covalent_braket_plugin.braket.get_config")
-    config_mock.return_value = "default"
+    mocker.patch("covalent_braket_plugin.braket.get_config", side_effect=mock_get_config)
     return BraketExecutor(
         credentials=MOCK_CREDENTIALS,
         profile=MOCK_PROFILE,
@@ -81,7 +114,7 @@ async def test_run(braket_executor, mocker):
 
     task_metadata = {"dispatch_id": "mock_dispatch_id", "node_id": 1, "results_dir": "/tmp"}
 
-    mocker.patch("covalent_braket_plugin.braket.boto3")
+    mocker.patch("covalent_braket_plugin.clients.boto3")
     validate_creds_mock = mocker.patch(
         "covalent_braket_plugin.braket.BraketExecutor._validate_credentials"
     )
@@ -154,7 +187,7 @@ async def test_run_cancel_before_submit_task(braket_executor, mocker):
     task_metadata = {"dispatch_id": dispatch_id, "node_id": node_id, "results_dir": results_dir}
     MOCK_BRAKET_JOB_NAME = BRAKET_JOB_NAME.format(dispatch_id=dispatch_id, node_id=node_id)
 
-    mocker.patch("covalent_braket_plugin.braket.boto3")
+    mocker.patch("covalent_braket_plugin.clients.boto3")
     validate_creds_mock = mocker.patch(
         "covalent_braket_plugin.braket.BraketExecutor._validate_credentials"
     )
@@ -176,9 +209,681 @@ async def test_run_cancel_before_submit_task(braket_executor, mocker):
     assert braket_executor.get_cancel_requested.call_count == 2
 
 
+@pytest.fixture
+def fake_aws(braket_executor, mocker, tmp_path):
+    """Route the executor's AWS calls to in-process fakes whose jobs run in threads."""
+    s3, logs = FakeS3(), FakeLogs()
+    braket = FakeBraket(s3, str(tmp_path / "jobs"), logs)
+    mocker.patch.object(
+        braket_executor,
+        "_get_client",
+        side_effect=lambda service: {"s3": s3, "braket": braket, "logs": logs}[service],
+    )
+    mocker.patch.object(braket_executor, "_validate_credentials", return_value={"Account": "0"})
+    braket_executor.get_cancel_requested = AsyncMock(return_value=False)
+    braket_executor.set_job_handle = AsyncMock()
+    braket_executor.cache_dir = str(tmp_path / "cache")
+    braket_executor.polling_strategy = FixedPollingStrategy(0.01)
+    braket_executor.warm_pool = True
+    braket_executor.worker_idle_timeout = 0.5
+    return s3, braket
+
+
+def _run_electrons(executor, function, args_list):
+    return asyncio.gather(
+        *(
+            executor.run(
+                function,
+                args,
+                {},
+                {"dispatch_id": "dispatch", "node_id": node_id, "results_dir": "/tmp"},
+            )
+            for node_id, args in enumerate(args_list)
+        ),
+        return_exceptions=True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_warm_pool(braket_executor, fake_aws):
+    """Test that concurrent electrons run on persistent worker jobs, up to the pool size."""
+    _, braket = fake_aws
+    braket_executor.warm_pool_size = 2
+
+    results = await _run_electrons(braket_executor, lambda x: x * x, [[i] for i in range(6)])
+
+    assert results == [i * i for i in range(6)]
+    assert braket.calls["create_job"] == 2
+    assert all(job["jobName"].startswith("covalent-worker-") for job in braket.jobs.values())
+
+    # A later electron reuses a worker while it is still warm.
+    assert await _run_electrons(braket_executor, abs, [[-7]]) == [7]
+    assert braket.calls["create_job"] == 2
+
+
+@pytest.mark.asyncio
+async def test_run_reuses_caller_identity(braket_executor, fake_aws):
+    """Test that concurrent and later electrons share one validation of the credentials."""
+    assert await _run_electrons(braket_executor, abs, [[-i] for i in range(4)]) == [0, 1, 2, 3]
+    assert await _run_electrons(braket_executor, abs, [[-4]]) == [4]
+    braket_executor._validate_credentials.assert_called_once()
+
+    # Authentication errors drop the identity, so the next electron validates the credentials.
+    braket_executor.evict_clients()
+    assert await _run_electrons(braket_executor, abs, [[-5]]) == [5]
+    assert braket_executor._validate_credentials.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_run_warm_pool_max_tasks(braket_executor, fake_aws):
+    """Test that workers are replaced once they ran their maximum number of tasks."""
+    _, braket = fake_aws
+    braket_executor.warm_pool_size = 1
+    braket_executor.worker_max_tasks = 2
+
+    results = await _run_electrons(braket_executor, abs, [[-i] for i in range(5)])
+
+    assert results == list(range(5))
+    assert braket.calls["create_job"] == 3
+
+
+@pytest.mark.asyncio
+async def test_run_warm_pool_isolates_failures(braket_executor, fake_aws):
+    """Test that a failing electron does not affect the others on the same worker."""
+    results = await _run_electrons(braket_executor, lambda x: 1 / x, [[1], [0], [4]])
+
+    assert results[0] == 1
+    assert isinstance(results[1], Exception)
+    assert "ZeroDivisionError" in str(results[1])
+    assert results[2] == 0.25
+
+
+@pytest.mark.asyncio
+async def test_run_warm_pool_falls_back_to_dedicated_job(braket_executor, fake_aws, mocker):
+    """Test that a task runs on a job of its own if its worker stops without running it."""
+    _, braket = fake_aws
+    mocker.patch("covalent_braket_plugin.worker.serve", return_value=0)
+
+    assert await _run_electrons(braket_executor, abs, [[-3]]) == [3]
+    assert braket.calls["create_job"] == 2
+    assert [job["jobName"].startswith("covalent-worker-") for job in braket.jobs.values()] == [
+        True,
+        False,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_batched(braket_executor, fake_aws, capsys):
+    """Test that small electrons are bundled into few jobs and get their own outcome back."""
+    s3, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket_executor.batch_size = 4
+    braket_executor.batch_window = 0.05
+
+    def task(x):
+        print(f"electron {x}")
+        return 12 / x
+
+    results = await _run_electrons(braket_executor, task, [[x] for x in [1, 2, 0, 3, 4, 6]])
+
+    assert results[:2] == [12, 6] and results[3:] == [4, 3, 2]
+    assert isinstance(results[2], Exception)
+    assert "ZeroDivisionError" in str(results[2])
+    assert braket.calls["create_job"] == 2
+    # One bundle uploaded by the executor and one result uploaded by each job.
+    assert s3.calls["upload_fileobj"] == 4
+    assert s3.calls["get_object"] == 2
+    stdout = capsys.readouterr().out
+    assert all(f"electron {x}\n" in stdout for x in [1, 2, 3, 4, 6])
+
+
+@pytest.mark.asyncio
+async def test_run_batched_apart_by_settings(braket_executor, mocker):
+    """Test that electrons are only batched with those of executors running jobs alike."""
+    batcher = mocker.patch("covalent_braket_plugin.braket.get_batcher").return_value
+    batcher.submit = AsyncMock(
+        return_value={"status": "COMPLETED", "result": 1, "stdout": "", "stderr": ""}
+    )
+
+    keys = []
+    for setting, value in [("codec", "lz4"), ("batch_parallelism", 8)]:
+        await braket_executor._run_in_batch(abs, [-1], {}, "0")
+        keys.append(batcher.submit.call_args.args[0])
+        setattr(braket_executor, setting, value)
+    await braket_executor._run_in_batch(abs, [-1], {}, "0")
+    keys.append(batcher.submit.call_args.args[0])
+
+    assert len(set(keys)) == 3
+
+
+def _describe_dataset(data, offset):
+    return type(data).__name__, bytes(data[offset : offset + 4])
+
+
+@pytest.mark.asyncio
+async def test_run_with_datasets(braket_executor, fake_aws):
+    """Test that a dataset shared by electrons is uploaded once and attached to every job."""
+    s3, braket = fake_aws
+    braket_executor.warm_pool = False
+    data = os.urandom(1024 * 1024)
+    metadata = {"dispatch_id": "dispatch", "node_id": 1, "results_dir": "/tmp"}
+
+    assert await _run_electrons(braket_executor, _describe_dataset, [[Dataset(data), 0]]) == [
+        ("mmap", data[:4])
+    ]
+    result = await braket_executor.run(_describe_dataset, [Dataset(data), 8], {}, metadata)
+    assert result == ("mmap", data[8:12])
+
+    (key,) = [key for _, key in s3.objects if key.startswith("datasets/")]
+    # The pickled arguments only hold a reference to the dataset.
+    assert s3.bytes_uploaded < 1.1 * len(data)
+    for job in braket.jobs.values():
+        (channel,) = job["inputDataConfig"]
+        assert channel["dataSource"]["s3DataSource"]["s3Uri"] == (
+            f"s3://{braket_executor.s3_bucket_name}/{key}"
+        )
+        # Mapped from the channel instead of downloaded by the job.
+        assert not os.path.exists(os.path.join(braket.work_dir, job["jobName"], "datasets"))
+
+
+@pytest.mark.asyncio
+async def test_run_warm_pool_with_dataset_threshold(braket_executor, fake_aws):
+    """Test that large arguments become datasets, which a worker downloads once for its tasks."""
+    _, braket = fake_aws
+    braket_executor.warm_pool_size = 1
+    braket_executor.dataset_threshold = 1024
+    data = os.urandom(4096)
+
+    results = await _run_electrons(braket_executor, _describe_dataset, [[data, 0], [data, 4]])
+
+    assert results == [("mmap", data[:4]), ("mmap", data[4:8])]
+    (job,) = braket.jobs.values()
+    assert job["inputDataConfig"] == []
+    assert len(os.listdir(os.path.join(braket.work_dir, job["jobName"], "datasets"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_batched_with_datasets(braket_executor, fake_aws):
+    """Test that the datasets of a batch are attached to its job."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket_executor.batch_size = 2
+    braket_executor.batch_window = 0.05
+
+    results = await _run_electrons(
+        braket_executor, _describe_dataset, [[Dataset(b"first"), 1], [Dataset(b"second"), 1]]
+    )
+
+    assert results == [("mmap", b"irst"), ("mmap", b"econ")]
+    (job,) = braket.jobs.values()
+    assert len(job["inputDataConfig"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_run_through_entry_point(braket_executor, fake_aws, mocker, tmp_path):
+    """Test electrons whose jobs run the container's entry point and queue for job slots."""
+    s3, _ = fake_aws
+    braket_executor.warm_pool = False
+    logs = FakeLogs()
+    braket = FakeBraket(s3, str(tmp_path / "slots"), logs, job_slots=1, run_entry_point=True)
+    mocker.patch.object(
+        braket_executor,
+        "_get_client",
+        side_effect=lambda service: {"s3": s3, "braket": braket, "logs": logs}[service],
+    )
+
+    assert await _run_electrons(braket_executor, abs, [[-1], [-2], [-3]]) == [1, 2, 3]
+    assert braket.max_running == 1
+    assert braket.calls["create_job"] == 3
+
+
+@pytest.mark.asyncio
+async def test_run_admission_control(braket_executor, fake_aws):
+    """Test that jobs beyond the concurrency limit queue and throttled submissions are retried."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket_executor.max_concurrent_jobs = 2
+    braket_executor.submit_rate = 0
+    braket.throttle_create_job = 2
+    controller = braket_executor._get_admission_controller()
+    controller.base_delay = 0.01
+
+    results = await _run_electrons(braket_executor, abs, [[-i] for i in range(6)])
+
+    assert results == list(range(6))
+    assert braket.max_running <= 2
+    assert braket.calls["create_job"] == 6 + 2
+    metrics = braket_executor.admission_metrics()
+    assert metrics["throttled"] == 2
+    assert metrics["running"] == 0
+    assert metrics["queue_depth"] == 0
+    assert metrics["max_wait"] > 0
+
+
+@pytest.mark.asyncio
+async def test_thread_pools(braket_executor):
+    """Test that blocking calls run on the executor's own pools instead of the loop's default."""
+
+    def thread_name():
+        return threading.current_thread().name
+
+    braket_executor.transfer_pool_size = 2
+    control = await braket_executor._execute_partial_in_threadpool(thread_name)
+    transfer = await braket_executor._execute_partial_in_threadpool(thread_name, transfer=True)
+
+    assert control.startswith("covalent-braket-control")
+    assert transfer.startswith("covalent-braket-transfer")
+    metrics = braket_executor.thread_pool_metrics()
+    assert metrics["control"]["max_workers"] == braket_executor.control_pool_size
+    assert metrics["transfer"]["max_workers"] == 2
+
+    # Without a transfer pool, transfers share the control-plane pool.
+    braket_executor.transfer_pool_size = 0
+    transfer = await braket_executor._execute_partial_in_threadpool(thread_name, transfer=True)
+    assert transfer.startswith("covalent-braket-control")
+
+
+@pytest.mark.asyncio
+async def test_run_aiobotocore_transport(braket_executor, fake_aws):
+    """Test that an electron runs end to end with its AWS calls issued natively async."""
+    braket_executor.warm_pool = False
+    braket_executor.transport = "aiobotocore"
+    session = FakeAioSession(
+        {service: braket_executor._get_client(service) for service in ("s3", "braket", "logs")}
+    )
+    # The executor picks up the transport registered for its identity.
+    get_aiobotocore_transport(
+        (braket_executor.profile, braket_executor.region, braket_executor.credentials_file),
+        session=session,
+        run_blocking=braket_executor._execute_partial_in_threadpool,
+    )
+
+    try:
+        results = await _run_electrons(braket_executor, lambda x: x * x, [[3]])
+    finally:
+        await close_transports()
+
+    assert results == [9]
+    assert session.calls["create_job"] == 1
+    assert session.calls["put_object"] == 2
+    assert session.calls["get_object"] == 1
+    # Job statuses are refreshed through the transport as well.
+    assert session.calls["search_jobs"] >= 1
+    # The second page returns the token it was passed, marking the end of the stream.
+    assert session.calls["get_log_events"] == 2
+    assert session.clients_closed == session.clients_created == 3
+
+
+@pytest.mark.asyncio
+async def test_run_warm_pool_aiobotocore_transport(braket_executor, fake_aws):
+    """Test that tasks are handed to workers and their outcomes read through the transport."""
+    s3, _ = fake_aws
+    braket_executor.transport = "aiobotocore"
+    session = FakeAioSession(
+        {service: braket_executor._get_client(service) for service in ("s3", "braket", "logs")}
+    )
+    get_aiobotocore_transport(
+        (braket_executor.profile, braket_executor.region, braket_executor.credentials_file),
+        session=session,
+        run_blocking=braket_executor._execute_partial_in_threadpool,
+    )
+
+    try:
+        results = await _run_electrons(braket_executor, lambda x: x * x, [[3]])
+    finally:
+        await close_transports()
+
+    assert results == [9]
+    # The payloads and the task document, then the outcome record and the result.
+    assert session.calls["put_object"] == 3
+    assert session.calls["get_object"] >= 2
+    assert session.calls["delete_object"] == 1
+    # Only the worker, which runs in the job, stores its record without the transport.
+    assert s3.calls["put_object"] == session.calls["put_object"] + 1
+
+
+@pytest.mark.asyncio
+async def test_run_records_metrics(braket_executor, fake_aws):
+    """Test that the phases of an electron and its AWS calls are recorded with its tags."""
+    braket_executor.warm_pool = False
+    sink = InMemorySink()
+    braket_executor.metrics_sink = sink
+
+    assert await _run_electrons(braket_executor, abs, [[-2]]) == [2]
+
+    tags = {"dispatch_id": "dispatch", "node_id": 0}
+    for name in ("run", "credentials", "upload", "submit", "poll", "result"):
+        (span,) = sink.find_spans(name, **tags)
+        assert span.error is None
+    (poll,) = sink.find_spans("poll")
+    assert poll.attributes["job_arn"].startswith("arn:")
+    # Uploads run on a pool thread, which records into the electron's scope.
+    assert sink.find_spans("aws_call", operation="UploadFileobj", **tags)
+    assert sink.counter("bytes_transferred", direction="sent", **tags) > 0
+
+
+@pytest.mark.asyncio
+async def test_run_locally(braket_executor, mocker, tmp_path):
+    """Test that electrons bound for a simulator run in local processes without touching AWS."""
+    braket_executor.execution_mode = "auto"
+    braket_executor.quantum_device = "arn:aws:braket:::device/quantum-simulator/amazon/sv1"
+    braket_executor.local_workers = 2
+    braket_executor.get_cancel_requested = AsyncMock(return_value=False)
+    get_identity = mocker.patch.object(braket_executor, "_get_identity")
+    get_client = mocker.patch.object(braket_executor, "_get_client")
+
+    def task(x):
+        if x < 0:
+            raise ValueError("negative")
+        return x, os.environ["AMZN_BRAKET_DEVICE_ARN"], os.getpid()
+
+    try:
+        results = await _run_electrons(braket_executor, task, [[1], [-1]])
+    finally:
+        shutdown_process_pools()
+
+    assert results[0][:2] == (1, "local:braket/braket_sv")
+    assert results[0][2] != os.getpid()
+    assert isinstance(results[1], Exception) and "ValueError: negative" in str(results[1])
+    get_identity.assert_not_called()
+    get_client.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_electron_opting_out_of_local_execution(braket_executor, fake_aws):
+    """Test that an electron opting out of local execution runs on a job in any mode."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket_executor.execution_mode = "local"
+
+    @electron_options(local=False)
+    def task(x):
+        return x * 3
+
+    assert await _run_electrons(braket_executor, task, [[1]]) == [3]
+    assert braket.calls["create_job"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_locally_with_dataset(braket_executor, mocker, tmp_path):
+    """Test that local electrons map datasets straight from the dispatcher's files."""
+    braket_executor.execution_mode = "local"
+    braket_executor.cache_dir = str(tmp_path / "cache")
+    braket_executor.get_cancel_requested = AsyncMock(return_value=False)
+    get_client = mocker.patch.object(braket_executor, "_get_client")
+    path = tmp_path / "samples.bin"
+    path.write_bytes(b"local data")
+
+    def task(data, offset):
+        return type(data).__name__, bytes(data[offset:])
+
+    try:
+        results = await _run_electrons(braket_executor, task, [[Dataset(path=str(path)), 6]])
+    finally:
+        shutdown_process_pools()
+
+    assert results == [("mmap", b"data")]
+    get_client.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("store", ["local", "s3", "both"])
+async def test_run_reuses_cached_results(braket_executor, fake_aws, capsys, store):
+    """Test that identical electrons reuse a stored outcome instead of submitting a job."""
+    s3, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket_executor.result_cache = store
+
+    def task(x):
+        return x * 2
+
+    assert await _run_electrons(braket_executor, task, [[1]]) == [2]
+    assert await _run_electrons(braket_executor, task, [[1], [3]]) == [2, 6]
+
+    assert braket.calls["create_job"] == 2
+    # The cached electron replays the logs of its job.
+    assert capsys.readouterr().out.count("Job COMPLETED\n") == 3
+    assert any(key.startswith("results/") for _, key in s3.objects) == (store != "local")
+
+    braket_executor.result_cache = "off"
+    assert await _run_electrons(braket_executor, task, [[1]]) == [2]
+    assert braket.calls["create_job"] == 3
+
+
+@pytest.mark.asyncio
+async def test_run_electron_opting_out_of_result_cache(braket_executor, fake_aws):
+    """Test that an electron opting out of the result cache runs every time."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket_executor.result_cache = "local"
+
+    @electron_options(result_cache=False)
+    def task(x):
+        return x * 2
+
+    for _ in range(2):
+        assert await _run_electrons(braket_executor, task, [[1]]) == [2]
+    assert braket.calls["create_job"] == 2
+    assert not os.path.exists(os.path.join(braket_executor.cache_dir, RESULT_PREFIX))
+
+
+@pytest.mark.asyncio
+async def test_run_does_not_cache_failures(braket_executor, fake_aws):
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket_executor.result_cache = "local"
+
+    for _ in range(2):
+        (result,) = await _run_electrons(braket_executor, lambda x: 1 / x, [[0]])
+        assert isinstance(result, Exception)
+    assert braket.calls["create_job"] == 2
+
+
+@pytest.mark.asyncio
+async def test_run_reattaches_after_restart(braket_executor, fake_aws, mocker):
+    """Test that an electron interrupted while polling waits for its job when it runs again."""
+    s3, braket = fake_aws
+    braket_executor.warm_pool = False
+    poll_task = braket_executor._poll_task
+    mocker.patch.object(braket_executor, "_poll_task", side_effect=asyncio.CancelledError)
+
+    with pytest.raises(asyncio.CancelledError):
+        await braket_executor.run(
+            abs, [-5], {}, {"dispatch_id": "dispatch", "node_id": 0, "results_dir": "/tmp"}
+        )
+    (job_arn,) = braket.jobs
+    entry = braket_executor._get_journal().get("covalent-dispatch-0")
+    assert entry == {
+        "job_arn": job_arn,
+        "created_at": pytest.approx(time.time(), abs=60),
+        "payload_keys": {"func_filename": mocker.ANY, "args_filename": mocker.ANY},
+    }
+
+    braket_executor._poll_task = poll_task
+    # The interrupted job keeps running and uploads its result.
+    while braket.jobs[job_arn]["status"] == "RUNNING":
+        await asyncio.sleep(0.01)
+    uploads = s3.calls["upload_fileobj"]
+    assert await _run_electrons(braket_executor, abs, [[-5]]) == [5]
+
+    assert braket.calls["create_job"] == 1
+    assert s3.calls["upload_fileobj"] == uploads
+    assert braket_executor._get_journal().get("covalent-dispatch-0") is None
+
+
+@pytest.mark.asyncio
+async def test_run_reattaches_to_old_job(braket_executor, fake_aws, mocker):
+    """Test that a job created long before the dispatcher restarted is found by the search."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    poll_task = braket_executor._poll_task
+    mocker.patch.object(braket_executor, "_poll_task", side_effect=asyncio.CancelledError)
+
+    with pytest.raises(asyncio.CancelledError):
+        await braket_executor.run(
+            abs, [-5], {}, {"dispatch_id": "dispatch", "node_id": 0, "results_dir": "/tmp"}
+        )
+    (job_arn,) = braket.jobs
+    while braket.jobs[job_arn]["status"] == "RUNNING":
+        await asyncio.sleep(0.01)
+    # Created an hour before the restart, as recorded by Braket and in the journal.
+    braket.jobs[job_arn]["createdAt"] -= timedelta(hours=1)
+    journal = braket_executor._get_journal()
+    entry = journal.get("covalent-dispatch-0")
+    journal.record("covalent-dispatch-0", **dict(entry, created_at=entry["created_at"] - 3600))
+
+    braket_executor._poll_task = poll_task
+    assert await _run_electrons(braket_executor, abs, [[-5]]) == [5]
+
+    assert braket.calls["create_job"] == 1
+    # Only the lookup of the journaled job, the search found it afterwards.
+    assert braket.calls["get_job"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_submits_when_recorded_job_is_missing(braket_executor, fake_aws):
+    """Test that a job whose creation was interrupted before it existed is submitted again."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket_executor.region = "us-east-1"
+    braket_executor._get_journal().record("covalent-dispatch-0")
+
+    assert await _run_electrons(braket_executor, abs, [[-5]]) == [5]
+
+    assert braket.calls["get_job"] == 1
+    assert braket.calls["create_job"] == 1
+    assert braket_executor._get_journal().get("covalent-dispatch-0") is None
+
+
+def _resumable_task(steps):
+    """Count to `steps`, failing once after the second step unless resumed from a checkpoint."""
+    from covalent_braket_plugin.checkpoint import load_checkpoint, save_checkpoint
+
+    state = load_checkpoint()
+    resumed = state is not None
+    state = state or {"step": 0, "done": []}
+    for step in range(state["step"], steps):
+        state["done"].append(step)
+        state["step"] = step + 1
+        save_checkpoint(state)
+        if step == 1 and not resumed:
+            raise RuntimeError("preempted")
+    return state["done"], resumed
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("resume_attempts", [0, 1])
+async def test_run_resumes_failed_job(
+    braket_executor, fake_aws, monkeypatch, tmp_path, resume_attempts
+):
+    """Test that a failed job is submitted again with the same checkpoints if resuming is enabled."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket_executor.resume_attempts = resume_attempts
+    # Braket syncs the checkpoint directory of every job with the same S3 URI.
+    monkeypatch.setenv("AMZN_BRAKET_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+
+    (outcome,) = await _run_electrons(braket_executor, _resumable_task, [[4]])
+
+    if not resume_attempts:
+        assert "preempted" in str(outcome)
+        assert braket.calls["create_job"] == 1
+        return
+    assert outcome == ([0, 1, 2, 3], True)
+    assert sorted(job["jobName"] for job in braket.jobs.values()) == [
+        "covalent-dispatch-0",
+        "covalent-dispatch-0-resume-1",
+    ]
+    assert len({job["checkpointConfig"]["s3Uri"] for job in braket.jobs.values()}) == 1
+    assert braket_executor._get_journal().get("covalent-dispatch-0") is None
+
+
+@pytest.mark.asyncio
+async def test_run_resumes_reattached_job(
+    braket_executor, fake_aws, mocker, monkeypatch, tmp_path
+):
+    """Test that a job that failed while the dispatcher was down is resumed from its payload."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket_executor.resume_attempts = 1
+    monkeypatch.setenv("AMZN_BRAKET_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    poll_task = braket_executor._poll_task
+    mocker.patch.object(braket_executor, "_poll_task", side_effect=asyncio.CancelledError)
+    metadata = {"dispatch_id": "dispatch", "node_id": 0, "results_dir": "/tmp"}
+
+    with pytest.raises(asyncio.CancelledError):
+        await braket_executor.run(_resumable_task, [4], {}, metadata)
+    (job_arn,) = braket.jobs
+    while braket.jobs[job_arn]["status"] == "RUNNING":
+        await asyncio.sleep(0.01)
+    assert braket.jobs[job_arn]["status"] == "FAILED"
+
+    braket_executor._poll_task = poll_task
+    find_previous_job = mocker.spy(braket_executor, "_find_previous_job")
+    upload_task = mocker.spy(braket_executor, "_upload_task")
+    assert await braket_executor.run(_resumable_task, [4], {}, metadata) == ([0, 1, 2, 3], True)
+
+    assert find_previous_job.spy_return == job_arn
+    upload_task.assert_not_called()
+    assert sorted(job["jobName"] for job in braket.jobs.values()) == [
+        "covalent-dispatch-0",
+        "covalent-dispatch-0-resume-1",
+    ]
+    assert braket_executor._get_journal().get("covalent-dispatch-0") is None
+
+
+def test_job_arn(braket_executor):
+    braket_executor.region = "eu-west-2"
+    assert braket_executor._job_arn("covalent-d-1", "123") == (
+        "arn:aws:braket:eu-west-2:123:job/covalent-d-1"
+    )
+    assert braket_executor._job_arn("covalent-d-1", None) is None
+
+
+def test_unknown_execution_mode(mocker):
+    mocker.patch("covalent_braket_plugin.braket.get_config", side_effect=mock_get_config)
+    with pytest.raises(ValueError, match="Unknown execution mode"):
+        BraketExecutor(execution_mode="remote")
+
+
+def test_unknown_transfer_checksum(mocker):
+    mocker.patch("covalent_braket_plugin.braket.get_config", side_effect=mock_get_config)
+    with pytest.raises(ValueError, match="Unknown transfer checksum"):
+        BraketExecutor(transfer_checksum="md5")
+
+
+def test_unknown_metrics_sink(mocker):
+    """Test that an unknown metrics sink is rejected when the executor is created."""
+    mocker.patch("covalent_braket_plugin.braket.get_config", side_effect=mock_get_config)
+    with pytest.raises(ValueError, match="Unknown metrics sink"):
+        BraketExecutor(metrics_sink="statsd")
+
+
+def test_unknown_transport(mocker):
+    """Test that an unknown transport is rejected when the executor is created."""
+    mocker.patch("covalent_braket_plugin.braket.get_config", side_effect=mock_get_config)
+    with pytest.raises(ValueError, match="Unknown transport"):
+        BraketExecutor(transport="curl")
+
+
+@pytest.mark.asyncio
+async def test_expired_credentials_evict_clients(braket_executor, mocker):
+    """Test that a call failing with expired credentials is retried on new clients."""
+    braket = MagicMock()
+    braket.get_job.side_effect = [
+        ClientError({"Error": {"Code": "ExpiredTokenException"}}, "GetJob"),
+        {"status": "RUNNING"},
+    ]
+    mocker.patch.object(braket_executor, "_get_client", return_value=braket)
+    evict_clients = mocker.patch.object(braket_executor, "evict_clients")
+
+    assert await braket_executor.get_status(None, "arn") == "RUNNING"
+    evict_clients.assert_called_once()
+
+
 @pytest.mark.asyncio
 async def test_submit_task(braket_executor, mocker):
-    boto3_mock = mocker.patch("covalent_braket_plugin.braket.boto3")
+    boto3_mock = mocker.patch("covalent_braket_plugin.clients.boto3")
 
     submit_metadata = {
         "image_tag": "mock-image-tag",
@@ -188,21 +893,113 @@ async def test_submit_task(braket_executor, mocker):
     await braket_executor.submit_task(submit_metadata)
 
     boto3_mock.Session().client().create_job.assert_called_once()
+    hyperparameters = boto3_mock.Session().client().create_job.call_args.kwargs["hyperParameters"]
+    assert hyperparameters["COVALENT_TASK_FUNC_FILENAME"] == "func-mock-image-tag.pkl"
+    assert hyperparameters["COVALENT_RESULT_CODEC"] == "none"
+    assert "COVALENT_TASK_ARGS_FILENAME" not in hyperparameters
+    assert hyperparameters["COVALENT_TRANSFER_MAX_CONCURRENCY"] == "10"
+
+
+@pytest.mark.asyncio
+async def test_submit_task_with_payload_keys(braket_executor, mocker):
+    """Test that separately uploaded function and arguments are passed to the job."""
+    boto3_mock = mocker.patch("covalent_braket_plugin.clients.boto3")
+
+    submit_metadata = {
+        "image_tag": "mock-image-tag",
+        "result_filename": "mock_filename.pkl",
+        "account": 122388,
+        "payload_keys": {"func_filename": "objects/a.pkl", "args_filename": "objects/b.pkl"},
+    }
+    await braket_executor.submit_task(submit_metadata)
+
+    hyperparameters = boto3_mock.Session().client().create_job.call_args.kwargs["hyperParameters"]
+    assert hyperparameters["COVALENT_TASK_FUNC_FILENAME"] == "objects/a.pkl"
+    assert hyperparameters["COVALENT_TASK_ARGS_FILENAME"] == "objects/b.pkl"
+    assert "COVALENT_PREFETCH_MODULES" not in hyperparameters
 
 
 @pytest.mark.asyncio
-async def test_upload_task(braket_executor, mocker):
+async def test_submit_task_with_prefetch_modules(braket_executor, mocker):
+    """Test that the modules to import while the task downloads are passed to the job."""
+    boto3_mock = mocker.patch("covalent_braket_plugin.clients.boto3")
+    braket_executor.prefetch_modules = ["pennylane", "braket.aws"]
 
+    submit_metadata = {
+        "image_tag": "mock-image-tag",
+        "result_filename": "mock_filename.pkl",
+        "account": 122388,
+    }
+    await braket_executor.submit_task(submit_metadata)
+
+    hyperparameters = boto3_mock.Session().client().create_job.call_args.kwargs["hyperParameters"]
+    assert hyperparameters["COVALENT_PREFETCH_MODULES"] == "pennylane,braket.aws"
+
+
+@pytest.mark.asyncio
+async def test_upload_task(braket_executor, mocker, tmp_path):
     """Test the package and upload method."""
-    boto3_mock = mocker.patch("covalent_braket_plugin.braket.boto3")
+    s3 = FakeS3()
+    mocker.patch.object(braket_executor, "_get_client", return_value=s3)
+    braket_executor.cache_dir = str(tmp_path)
 
-    await braket_executor._upload_task(
+    payload_keys = await braket_executor._upload_task(
         "mock_transportable_object",
-        [],
-        {},
+        [1],
+        {"x": 2},
         {"image_tag": "mock_image_tag"},
     )
-    boto3_mock.Session().client().upload_file.assert_called_once()
+
+    function = s3.objects[(MOCK_S3_BUCKET_NAME, payload_keys["func_filename"])]
+    args = s3.objects[(MOCK_S3_BUCKET_NAME, payload_keys["args_filename"])]
+    assert codec.loads(function) == "mock_transportable_object"
+    assert codec.loads(args) == ([1], {"x": 2})
+
+
+@pytest.mark.asyncio
+async def test_upload_task_compressed(braket_executor, mocker, tmp_path):
+    """Test that payloads are compressed with the configured codec."""
+    pytest.importorskip("zstandard")
+    s3 = FakeS3()
+    mocker.patch.object(braket_executor, "_get_client", return_value=s3)
+    braket_executor.cache_dir = str(tmp_path)
+    braket_executor.codec = "zstd"
+    args = [b"0" * 1_000_000]
+
+    payload_keys = await braket_executor._upload_task("function", args, {}, {})
+
+    encoded_args = s3.objects[(MOCK_S3_BUCKET_NAME, payload_keys["args_filename"])]
+    assert len(encoded_args) < 10_000
+    assert codec.loads(encoded_args) == (args, {})
+
+
+def test_unknown_codec(mocker):
+    """Test that an unknown codec is rejected when the executor is created."""
+    mocker.patch("covalent_braket_plugin.braket.get_config", side_effect=mock_get_config)
+    with pytest.raises(ValueError, match="Unknown codec"):
+        BraketExecutor(codec="gzip")
+
+
+@pytest.mark.asyncio
+async def test_upload_task_sweep(braket_executor, mocker, tmp_path):
+    """Test that a parameter sweep uploads the shared function only once."""
+    s3 = FakeS3()
+    mocker.patch.object(braket_executor, "_get_client", return_value=s3)
+    braket_executor.cache_dir = str(tmp_path)
+    coefficients = list(range(100_000))
+
+    def circuit(theta):
+        return sum(coefficients) * theta
+
+    for theta in range(50):
+        await braket_executor._upload_task(circuit, [theta], {}, {"image_tag": f"sweep-{theta}"})
+    await braket_executor._upload_task(circuit, [0], {}, {"image_tag": "sweep-repeat"})
+
+    single_payload_size = len(cloudpickle.dumps((circuit, [0], {})))
+    assert s3.calls["upload_fileobj"] == 1 + 50
+    assert s3.bytes_uploaded < 2 * single_payload_size
+    # Only objects missing from the local index are checked with a HEAD request.
+    assert s3.calls["head_object"] == 1 + 50
 
 
 @pytest.mark.asyncio
@@ -227,23 +1024,39 @@ async def test_get_status(braket_executor):
 async def test_poll_braket_job(braket_executor, mocker):
     """Test the method to poll the batch job."""
 
-    async_mock = AsyncMock(side_effect=["QUEUED", "FAILED"])
-    boto3_mock = mocker.patch("covalent_braket_plugin.braket.boto3")
-    get_status_mock = mocker.patch(
-        "covalent_braket_plugin.braket.BraketExecutor.get_status", side_effect=async_mock
-    )
+    boto3_mock = mocker.patch("covalent_braket_plugin.clients.boto3")
+    boto3_client_mock = boto3_mock.Session().client()
+    boto3_client_mock.search_jobs.return_value = {"jobs": [{"jobArn": "1", "status": "FAILED"}]}
+    boto3_client_mock.get_job.return_value = {"failureReason": "error"}
+    braket_executor.poll_freq = 0.01
+
+    with pytest.raises(Exception, match="error"):
+        await braket_executor._poll_task({"job_arn": "1"})
+    boto3_client_mock.get_job.assert_called_once_with(jobArn="1")
+
+
+@pytest.mark.asyncio
+async def test_poll_braket_job_shares_poller(braket_executor, mocker):
+    """Test that concurrent polls are served by a single bulk status refresh."""
+
+    boto3_mock = mocker.patch("covalent_braket_plugin.clients.boto3")
+    boto3_client_mock = boto3_mock.Session().client()
+    boto3_client_mock.search_jobs.return_value = {
+        "jobs": [{"jobArn": str(i), "status": "COMPLETED"} for i in range(20)]
+    }
+    braket_executor.poll_freq = 0.01
+
+    await asyncio.gather(*(braket_executor._poll_task({"job_arn": str(i)}) for i in range(20)))
 
-    boto3_mock.Session().client().get_job.return_value = {"failureReason": "error"}
-    with pytest.raises(Exception):
-        await braket_executor._poll_task({"job_arn": 1})
-    get_status_mock.assert_awaited()
+    assert braket_executor._get_poller().api_calls == 5
+    boto3_client_mock.get_job.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_query_result(braket_executor, mocker):
     """Test the method to query the results."""
 
-    def download_file(filename, bucket_name, func_filename):
+    def download_file(filename, bucket_name, func_filename, **kwargs):
         return filename
 
     def describe_log_streams(logGroupName, logStreamNamePrefix):
@@ -252,10 +1065,12 @@ async def test_query_result(braket_executor, mocker):
         print(logStreamNamePrefix)
         return {"logStreams": [{"logStreamName": f"{logStreamNamePrefix}-mock-name"}]}
 
-    def get_log_events(logGroupName, logStreamName):
-        return {"events": [{"message": "mock_logs"}]}
+    def get_log_events(logGroupName, logStreamName, startFromHead, nextToken=None):
+        if nextToken:
+            return {"events": [], "nextForwardToken": nextToken}
+        return {"events": [{"message": "mock_logs"}], "nextForwardToken": "f/1"}
 
-    boto3_mock = mocker.patch("covalent_braket_plugin.braket.boto3")
+    boto3_mock = mocker.patch("covalent_braket_plugin.clients.boto3")
     boto3_client_mock = boto3_mock.Session().client()
 
     boto3_client_mock.download_file.side_effect = download_file
@@ -272,58 +1087,361 @@ async def test_query_result(braket_executor, mocker):
         "task_results_dir": task_results_dir,
         "image_tag": "1",
     }
+    braket_executor.stream_transfers = False
     assert await braket_executor.query_result(query_metadata) == (
         "hello world",
         "mock_logs\n",
         "",
     )
+    assert not os.path.exists(local_result_filename)
 
 
 @pytest.mark.asyncio
-async def test_cancel_braket_task(braket_executor, mocker):
-    boto3_mock = mocker.patch("covalent_braket_plugin.braket.boto3")
-    boto3_client_mock = boto3_mock.Session().client()
-    boto3_client_mock.cancel_quantum_task.return_value = {"status": "CANCELLED"}
-    mock_arn = (
-        "arn:aws:braket:us-west-2:123456789012:quantum-task/01234567-89ab-cdef-0123-456789abcdef"
+async def test_query_result_streamed(braket_executor, mocker, tmp_path):
+    """Test that results are unpickled from the S3 stream without touching the disk."""
+    s3 = FakeS3()
+    s3.objects[(MOCK_S3_BUCKET_NAME, "result.pkl")] = cloudpickle.dumps("hello world")
+    logs = MagicMock()
+    logs.describe_log_streams.return_value = {"logStreams": [{"logStreamName": "stream"}]}
+    logs.get_log_events.return_value = {"events": [{"message": "mock_logs"}]}
+    mocker.patch.object(
+        braket_executor, "_get_client", side_effect=lambda service: s3 if service == "s3" else logs
     )
-    mock_dispatch_id = "abcdef"
-    mock_node_id = 0
-    mock_task_metadata = {"dispatch_id": mock_dispatch_id, "node_id": mock_node_id}
+
+    query_metadata = {
+        "result_filename": "result.pkl",
+        "task_results_dir": str(tmp_path),
+        "image_tag": "1",
+    }
+    assert await braket_executor.query_result(query_metadata) == ("hello world", "mock_logs\n", "")
+    assert s3.calls == {"get_object": 1}
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def logged_result(braket_executor, mocker, tmp_path):
+    """Store a result and the paginated logs of two streams of its job."""
+    s3, logs = FakeS3(), FakeLogs(page_size=2)
+    s3.objects[(MOCK_S3_BUCKET_NAME, "result.pkl")] = codec.dumps("hello world")
+    for i in range(3):
+        logs.log("covalent-1/algo-1", f"line {i}")
+    logs.log("covalent-1/algo-2", "line 3")
+    mocker.patch.object(
+        braket_executor, "_get_client", side_effect=lambda service: s3 if service == "s3" else logs
+    )
+    query_metadata = {
+        "result_filename": "result.pkl",
+        "task_results_dir": str(tmp_path),
+        "image_tag": "1",
+    }
+    return query_metadata, logs
+
+
+@pytest.mark.asyncio
+async def test_query_result_paginated_logs(braket_executor, logged_result):
+    """Test that the logs of every stream and page are returned, up to the cap."""
+    query_metadata, _ = logged_result
+
+    result, stdout, _ = await braket_executor.query_result(query_metadata)
+    assert result == "hello world"
+    assert stdout == "line 0\nline 1\nline 2\nline 3\n"
+
+    braket_executor.log_max_lines = 2
+    _, stdout, _ = await braket_executor.query_result(query_metadata)
+    assert stdout.startswith("line 0\nline 1\n[log truncated after 2 lines")
+
+
+@pytest.mark.asyncio
+async def test_query_result_logs_of_resumed_job(braket_executor, logged_result):
+    """Test that the logs of every attempt are read, and none of other nodes' jobs."""
+    query_metadata, logs = logged_result
+    logs.log("covalent-10/algo-1", "other node")
+    logs.log("covalent-1-resume-1/algo-1", "line 4")
+
+    _, stdout, _ = await braket_executor.query_result(query_metadata)
+    assert stdout == "line 0\nline 1\nline 2\nline 3\n"
+
+    _, stdout, _ = await braket_executor.query_result(dict(query_metadata, attempt=1))
+    assert stdout == "line 0\nline 1\nline 2\nline 3\nline 4\n"
+
+
+@pytest.mark.asyncio
+async def test_query_result_parses_phase_timings(braket_executor, logged_result, mocker):
+    """Test that the phase timings reported by the job runtime are parsed from its logs."""
+    query_metadata, logs = logged_result
+    logs.log("covalent-1/algo-2", format_timings({"import": 0.5, "download": 0.25}))
+    app_log_mock = mocker.patch("covalent_braket_plugin.braket.app_log")
+
+    await braket_executor.query_result(query_metadata)
+
+    app_log_mock.debug.assert_any_call(
+        "Phase timings of covalent-1: import 0.500s, download 0.250s"
+    )
+
+
+@pytest.mark.asyncio
+async def test_query_result_logs_to_file(braket_executor, logged_result, tmp_path):
+    """Test that logs written to a file are not returned as stdout."""
+    query_metadata, _ = logged_result
+    braket_executor.log_output = str(tmp_path / "logs" / "{image_tag}.log")
+
+    assert await braket_executor.query_result(query_metadata) == ("hello world", "", "")
+    assert (tmp_path / "logs" / "1.log").read_text() == "line 0\nline 1\nline 2\nline 3\n"
+
+
+@pytest.mark.asyncio
+async def test_query_result_deferred_logs(braket_executor, logged_result, tmp_path):
+    """Test that deferred logs are fetched after the result was returned."""
+    query_metadata, _ = logged_result
+    braket_executor.log_retrieval = "deferred"
+    braket_executor.log_output = str(tmp_path / "job.log")
+
+    assert await braket_executor.query_result(query_metadata) == ("hello world", "", "")
+
+    await braket_executor.wait_for_logs()
+    assert (tmp_path / "job.log").read_text() == "line 0\nline 1\nline 2\nline 3\n"
+
+
+@pytest.mark.asyncio
+async def test_query_result_deferred_logs_to_covalent_log(braket_executor, logged_result, mocker):
+    """Test that deferred logs go to the Covalent log if they are not written elsewhere."""
+    query_metadata, _ = logged_result
+    braket_executor.log_retrieval = "deferred"
+    info = mocker.patch("covalent_braket_plugin.braket.app_log.info")
+
+    assert await braket_executor.query_result(query_metadata) == ("hello world", "", "")
+
+    await braket_executor.wait_for_logs()
+    assert [call.args[0] for call in info.call_args_list] == [
+        f"covalent-1: line {i}" for i in range(4)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_query_result_without_logs(braket_executor, logged_result):
+    """Test that no logs are read if log retrieval is off."""
+    query_metadata, logs = logged_result
+    braket_executor.log_retrieval = "off"
+
+    assert await braket_executor.query_result(query_metadata) == ("hello world", "", "")
+    assert not logs.calls
+
+
+@pytest.mark.asyncio
+async def test_query_result_after_tailing(braket_executor, logged_result, mocker):
+    """Test that tailed lines are forwarded to the Covalent log and not read again."""
+    query_metadata, logs = logged_result
+    info = mocker.patch("covalent_braket_plugin.braket.app_log.info")
+
+    braket_executor._start_log_tailer("1")
+    assert pop_tailer("covalent-1") is None
+
+    braket_executor.tail_logs = True
+    braket_executor.log_tail_interval = 0.01
+    braket_executor._start_log_tailer("1")
+    while info.call_count < 4:
+        await asyncio.sleep(0.01)
+    logs.log("covalent-1/algo-2", "line 4")
+
+    _, stdout, _ = await braket_executor.query_result(query_metadata)
+
+    assert stdout == "line 0\nline 1\nline 2\nline 3\nline 4\n"
+    forwarded = [call.args[0] for call in info.call_args_list]
+    assert forwarded[:4] == [f"covalent-1: line {i}" for i in range(4)]
+    assert forwarded.count("covalent-1: line 0") == 1
+    assert pop_tailer("covalent-1") is None
+
+
+@pytest.mark.asyncio
+async def test_query_result_concurrent_with_logs(braket_executor, logged_result, mocker):
+    """Test that the result is downloaded while the logs are read."""
+    query_metadata, _ = logged_result
+    load_result = braket_executor._load_result
+    fetch_logs = braket_executor._fetch_logs
+    events = []
+
+    async def slow_load_result(*args):
+        events.append("result started")
+        await asyncio.sleep(0.05)
+        events.append("result done")
+        return await load_result(*args)
+
+    async def slow_fetch_logs(*args):
+        events.append("logs started")
+        await asyncio.sleep(0.05)
+        events.append("logs done")
+        return await fetch_logs(*args)
+
+    mocker.patch.object(braket_executor, "_load_result", side_effect=slow_load_result)
+    mocker.patch.object(braket_executor, "_fetch_logs", side_effect=slow_fetch_logs)
+
+    result, stdout, _ = await braket_executor.query_result(query_metadata)
+
+    assert result == "hello world"
+    assert stdout.startswith("line 0")
+    assert events[:2] == ["result started", "logs started"]
+
+
+@pytest.mark.asyncio
+async def test_query_result_despite_log_failure(braket_executor, logged_result, mocker):
+    """Test that the result is returned if the logs cannot be read or take too long."""
+    query_metadata, logs = logged_result
+    warning = mocker.patch("covalent_braket_plugin.braket.app_log.warning")
+
+    mocker.patch.object(logs, "describe_log_streams", side_effect=RuntimeError("denied"))
+    assert await braket_executor.query_result(query_metadata) == ("hello world", "", "")
+    assert "denied" in warning.call_args[0][0]
+
+    async def hang(*args):
+        await asyncio.sleep(10)
+
+    mocker.patch.object(braket_executor, "_fetch_logs", side_effect=hang)
+    braket_executor.log_timeout = 0.05
+    assert await braket_executor.query_result(query_metadata) == ("hello world", "", "")
+    assert "Timed out" in warning.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_query_result_failure_is_raised(braket_executor, logged_result):
+    """Test that a missing result still fails the task."""
+    query_metadata, _ = logged_result
+    query_metadata["result_filename"] = "missing.pkl"
+
+    with pytest.raises(ClientError):
+        await braket_executor.query_result(query_metadata)
+
+
+def test_unknown_log_retrieval_mode(mocker):
+    """Test that an unknown log retrieval mode is rejected when the executor is created."""
+    mocker.patch("covalent_braket_plugin.braket.get_config", side_effect=mock_get_config)
+    with pytest.raises(ValueError, match="Unknown log retrieval mode"):
+        BraketExecutor(log_retrieval="later")
+
+
+async def _wait_for_jobs(braket, count):
+    while len(braket.jobs) < count:
+        await asyncio.sleep(0.01)
+    return list(braket.jobs)
+
+
+@pytest.mark.asyncio
+async def test_cancel_braket_task(braket_executor, fake_aws):
+    """Test that cancelling an electron cancels its job and the job's unfinished quantum tasks."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket.job_duration = 0.5
+    run = asyncio.ensure_future(_run_electrons(braket_executor, abs, [[-5]]))
+    (job_arn,) = await _wait_for_jobs(braket, 1)
+    queued = [braket.add_quantum_task(job_arn) for _ in range(3)]
+    completed = braket.add_quantum_task(job_arn, status="COMPLETED")
+    other = braket.add_quantum_task("arn:aws:braket:us-east-1:000000000000:job/other")
 
     is_cancelled = await braket_executor.cancel(
-        task_metadata=mock_task_metadata, job_handle=mock_arn
+        task_metadata={"dispatch_id": "dispatch", "node_id": 0}, job_handle=job_arn
     )
 
     assert is_cancelled is True
-    assert boto3_client_mock.cancel_quantum_task.called_once_with(quantumTaskArn=mock_arn)
+    assert braket.jobs[job_arn]["status"] == "CANCELLED"
+    assert braket.calls["cancel_quantum_task"] == 3
+    assert {braket.quantum_tasks[arn]["status"] for arn in queued} == {"CANCELLING"}
+    assert braket.quantum_tasks[completed]["status"] == "COMPLETED"
+    assert braket.quantum_tasks[other]["status"] == "QUEUED"
+    (outcome,) = await run
+    assert isinstance(outcome, TaskCancelledError)
+
+
+@pytest.mark.asyncio
+async def test_cancel_finished_braket_job(braket_executor, fake_aws):
+    """Test that cancelling a job that completed before it was stopped reports no cancellation."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    assert await _run_electrons(braket_executor, abs, [[-5]]) == [5]
+    (job_arn,) = braket.jobs
+
+    assert await braket_executor.cancel({}, job_arn) is False
+    braket_executor.cancel_timeout = 0
+    assert await braket_executor.cancel({}, job_arn) is True
 
 
 @pytest.mark.asyncio
 async def test_cancel_failed_braket_task(braket_executor, mocker):
-    boto3_mock = mocker.patch("covalent_braket_plugin.braket.boto3")
+    boto3_mock = mocker.patch("covalent_braket_plugin.clients.boto3")
     boto3_client_mock = boto3_mock.Session().client()
-    boto3_client_mock.cancel_quantum_task.return_value = {"status": "CANCELLED"}
-    mock_arn = (
-        "arn:aws:braket:us-west-2:123456789012:quantum-task/01234567-89ab-cdef-0123-456789abcdef"
-    )
+    mock_arn = "arn:aws:braket:us-west-2:123456789012:job/covalent-abcdef-0"
     mock_dispatch_id = "abcdef"
     mock_node_id = 0
     mock_task_metadata = {"dispatch_id": mock_dispatch_id, "node_id": mock_node_id}
     mock_error = ClientError(
-        operation_name="TerminateJob",
+        operation_name="CancelJob",
         error_response={
             "Error": {
                 "Code": "UnreachableHostException",
-                "Message": 'Could not connect to the endpoint URL: "https://braket.us-east-1.amazonaws.com/v1/quantum-task"',
+                "Message": 'Could not connect to the endpoint URL: "https://braket.us-east-1.amazonaws.com/job"',
             }
         },
     )
-    boto3_client_mock.cancel_quantum_task.side_effect = mock_error
+    boto3_client_mock.cancel_job.side_effect = mock_error
 
     is_cancelled = await braket_executor.cancel(
         task_metadata=mock_task_metadata, job_handle=mock_arn
     )
 
     assert is_cancelled is False
-    assert boto3_client_mock.cancel_quantum_task.called_once_with(mock_arn)
+    boto3_client_mock.cancel_job.assert_called_once_with(jobArn=mock_arn)
+    boto3_client_mock.cancel_quantum_task.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cancel_dispatch(braket_executor, fake_aws):
+    """Test that every job of a dispatch is cancelled at once, and no job of another dispatch."""
+    _, braket = fake_aws
+    braket_executor.warm_pool = False
+    braket.job_duration = 0.5
+    run = asyncio.ensure_future(_run_electrons(braket_executor, abs, [[-i] for i in range(4)]))
+    job_arns = await _wait_for_jobs(braket, 4)
+    # Entries are recorded before their job is created and get its ARN once it exists.
+    journal = braket_executor._get_journal()
+    while sum("job_arn" in entry for entry in journal.entries().values()) < 4:
+        await asyncio.sleep(0.01)
+    braket_executor._get_journal().record("covalent-other-0", job_arn="other")
+
+    cancelled = await braket_executor.cancel_dispatch("dispatch")
+
+    assert cancelled == {job_arn: True for job_arn in job_arns}
+    assert braket.calls["cancel_job"] == 4
+    assert all(isinstance(outcome, TaskCancelledError) for outcome in await run)
+    assert list(braket_executor._get_journal().entries()) == ["covalent-other-0"]
+
+
+def test_clients_are_shared(braket_executor, mocker):
+    """Test that the executor reuses pooled clients across calls and executors."""
+    boto3_mock = mocker.patch("covalent_braket_plugin.clients.boto3")
+
+    assert braket_executor._get_client("braket") is braket_executor._get_client("braket")
+    boto3_mock.Session.assert_called_once()
+
+    assert braket_executor.evict_clients() == 1
+    braket_executor._get_client("braket")
+    assert boto3_mock.Session.call_count == 2
+
+
+def test_get_polling_strategy(braket_executor):
+    """Test that the polling strategy can be chosen by name or passed as an instance."""
+    strategy = braket_executor._get_polling_strategy()
+    assert isinstance(strategy, AdaptivePollingStrategy)
+    assert strategy.max_interval == MOCK_POLL_FREQ
+    assert strategy.expected_runtime is None
+
+    braket_executor.expected_runtime = 600.0
+    assert braket_executor._get_polling_strategy().expected_runtime == 600.0
+
+    braket_executor.polling_strategy = "fixed"
+    assert braket_executor._get_polling_strategy().interval == MOCK_POLL_FREQ
+
+    custom = FixedPollingStrategy(3, max_polls=5)
+    braket_executor.polling_strategy = custom
+    assert braket_executor._get_polling_strategy() is custom
+
+    braket_executor.polling_strategy = "unknown"
+    with pytest.raises(ValueError):
+        braket_executor._get_polling_strategy()
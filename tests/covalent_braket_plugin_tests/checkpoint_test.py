@@ -0,0 +1,82 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the checkpoints saved by tasks."""
+
+import os
+import threading
+
+import pytest
+
+from covalent_braket_plugin import codec
+from covalent_braket_plugin.checkpoint import (
+    Checkpointer,
+    default_codec,
+    load_checkpoint,
+    save_checkpoint,
+)
+
+
+@pytest.mark.parametrize("codec_name", codec.CODECS)
+def test_save_writes_changed_entries_only(tmp_path, codec_name):
+    """Test that unchanged entries are not written again and replaced ones are removed."""
+    if codec_name not in codec.available_codecs():
+        pytest.skip(f"{codec_name} is not installed")
+    checkpointer = Checkpointer(str(tmp_path), codec=codec_name)
+    objects_dir = tmp_path / "checkpoint.objects"
+
+    assert checkpointer.load() is None
+    checkpointer.save({"data": list(range(1000)), "step": 0})
+    assert (checkpointer.entries_written, checkpointer.entries_reused) == (2, 0)
+
+    checkpointer.save({"data": list(range(1000)), "step": 1})
+    assert (checkpointer.entries_written, checkpointer.entries_reused) == (1, 1)
+    assert len(os.listdir(objects_dir)) == 2
+
+    assert Checkpointer(str(tmp_path)).load() == {"data": list(range(1000)), "step": 1}
+
+
+def test_save_non_mapping_state(tmp_path):
+    checkpointer = Checkpointer(str(tmp_path), name="losses")
+    checkpointer.save([0.5, 0.25])
+    assert checkpointer.load() == [0.5, 0.25]
+    checkpointer.save({1: "not a string key"})
+    assert checkpointer.load() == {1: "not a string key"}
+
+    checkpointer.clear()
+    assert checkpointer.load() is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_save_keeps_previous_checkpoint(tmp_path):
+    checkpointer = Checkpointer(str(tmp_path))
+    checkpointer.save({"step": 1})
+
+    with pytest.raises(TypeError):
+        checkpointer.save({"step": 2, "lock": threading.Lock()})
+
+    assert checkpointer.load() == {"step": 1}
+
+
+def test_checkpoint_directory_from_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv("AMZN_BRAKET_CHECKPOINT_DIR", raising=False)
+    with pytest.raises(RuntimeError, match="AMZN_BRAKET_CHECKPOINT_DIR"):
+        load_checkpoint()
+
+    monkeypatch.setenv("AMZN_BRAKET_CHECKPOINT_DIR", str(tmp_path))
+    save_checkpoint({"step": 3})
+    assert load_checkpoint() == {"step": 3}
+    assert Checkpointer().codec == default_codec()
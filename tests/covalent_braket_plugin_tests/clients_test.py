@@ -0,0 +1,133 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the shared boto3 client cache."""
+
+import os
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from covalent_braket_plugin.clients import ClientCache, is_auth_error, is_expired_credentials_error
+
+
+@pytest.fixture
+def boto3_mock(mocker):
+    boto3_mock = mocker.patch("covalent_braket_plugin.clients.boto3")
+    # Hand out a distinct client for every session so that cache hits can be told apart.
+    boto3_mock.Session.side_effect = lambda **kwargs: MagicMock()
+    return boto3_mock
+
+
+def test_get_client_is_cached(boto3_mock):
+    """Test that the same client is returned for the same identity and service."""
+    cache = ClientCache()
+
+    s3 = cache.get_client("s3", profile="p", region="us-east-1")
+    assert cache.get_client("s3", profile="p", region="us-east-1") is s3
+    assert boto3_mock.Session.call_count == 1
+
+    assert cache.get_client("braket", profile="p", region="us-east-1") is not s3
+    assert cache.get_client("s3", profile="p", region="us-west-2") is not s3
+    assert boto3_mock.Session.call_count == 3
+    assert len(cache) == 3
+
+
+def test_get_client_grows_pool(boto3_mock, mocker):
+    """Test that a client is rebuilt when a larger connection pool is requested."""
+    config_mock = mocker.patch("covalent_braket_plugin.clients.Config")
+    cache = ClientCache()
+
+    small = cache.get_client("s3", max_pool_connections=10)
+    assert cache.get_client("s3", max_pool_connections=5) is small
+    large = cache.get_client("s3", max_pool_connections=50)
+
+    assert large is not small
+    config_mock.assert_called_with(max_pool_connections=50)
+
+
+def test_get_client_refreshes_on_credentials_change(boto3_mock, tmp_path):
+    """Test that a client is rebuilt when its credentials file is rewritten."""
+    credentials_file = tmp_path / "credentials"
+    credentials_file.write_text("[default]\n")
+    cache = ClientCache()
+
+    client = cache.get_client("braket", credentials_file=str(credentials_file))
+    assert cache.get_client("braket", credentials_file=str(credentials_file)) is client
+
+    stat = os.stat(credentials_file)
+    os.utime(credentials_file, (stat.st_atime, stat.st_mtime + 10))
+    assert cache.get_client("braket", credentials_file=str(credentials_file)) is not client
+
+
+def test_evict(boto3_mock):
+    """Test that evicting an identity only drops that identity's clients."""
+    cache = ClientCache()
+    s3 = cache.get_client("s3", profile="a")
+    braket = cache.get_client("braket", profile="a")
+    other = cache.get_client("s3", profile="b")
+
+    assert cache.evict(service="s3", profile="a") == 1
+    assert cache.get_client("braket", profile="a") is braket
+    assert cache.get_client("s3", profile="a") is not s3
+
+    assert cache.evict(profile="a") == 2
+    assert cache.get_client("s3", profile="b") is other
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_get_client_thread_safe(boto3_mock):
+    """Test that concurrent callers share a single client."""
+    cache = ClientCache()
+    clients = []
+
+    def worker():
+        clients.append(cache.get_client("s3", profile="p"))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
+    assert boto3_mock.Session.call_count == 1
+
+
+def test_is_expired_credentials_error():
+    """Test detection of expired credential errors."""
+    expired = ClientError({"Error": {"Code": "ExpiredTokenException"}}, "GetJob")
+    throttled = ClientError({"Error": {"Code": "ThrottlingException"}}, "GetJob")
+
+    assert is_expired_credentials_error(expired)
+    assert not is_expired_credentials_error(throttled)
+    assert not is_expired_credentials_error(ValueError())
+
+
+def test_is_auth_error():
+    """Test detection of errors caused by invalid or expired credentials."""
+    expired = ClientError({"Error": {"Code": "ExpiredTokenException"}}, "GetJob")
+    invalid = ClientError({"Error": {"Code": "InvalidClientTokenId"}}, "GetCallerIdentity")
+    throttled = ClientError({"Error": {"Code": "ThrottlingException"}}, "GetJob")
+
+    assert is_auth_error(expired)
+    assert is_auth_error(invalid)
+    assert not is_auth_error(throttled)
+    assert not is_auth_error(ValueError())
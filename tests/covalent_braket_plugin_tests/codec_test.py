@@ -0,0 +1,96 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the payload and result codec."""
+
+import io
+import pickle
+
+import cloudpickle
+import pytest
+
+from covalent_braket_plugin import codec
+
+
+def _require(name):
+    if name not in codec.available_codecs():
+        pytest.skip(f"codec {name} is not installed")
+
+
+@pytest.mark.parametrize("name", codec.CODECS)
+def test_round_trip(name):
+    """Test that objects, including closures, survive encoding with every codec."""
+    _require(name)
+    offset = 3
+
+    def add(x):
+        return x + offset
+
+    function, values = codec.loads(codec.dumps((add, list(range(1000))), name))
+    assert function(1) == 4
+    assert values == list(range(1000))
+
+
+@pytest.mark.parametrize("name", codec.CODECS)
+def test_out_of_band_buffers(name, monkeypatch):
+    """Test that protocol 5 buffers are written outside the pickle stream and split into frames."""
+    _require(name)
+    monkeypatch.setattr(codec, "FRAME_SIZE", 1000)
+    buffer = bytearray(range(256)) * 20
+
+    data = codec.dumps({"buffer": pickle.PickleBuffer(buffer)}, name)
+    decoded = codec.loads(data)["buffer"]
+
+    assert decoded == buffer
+    # Decoded buffers are mutable so that, e.g., numpy arrays stay writable.
+    assert isinstance(decoded, bytearray)
+
+    # The pickle stream only references the buffer, which follows it as a separate section.
+    f = io.BytesIO(data[codec._HEADER.size :])
+    _, decompress = codec._codec_functions(name)
+    assert len(codec._read_section(f, decompress)) < 100
+    assert f.read(codec._BUFFER_COUNT.size) == codec._BUFFER_COUNT.pack(1)
+
+
+def test_compression_reduces_size():
+    """Test that a compressing codec shrinks redundant payloads."""
+    compressed = [name for name in codec.available_codecs() if name != "none"]
+    if not compressed:
+        pytest.skip("no compressing codec is installed")
+    payload = b"0" * 1_000_000
+    assert len(codec.dumps(payload, compressed[0])) < len(codec.dumps(payload)) / 100
+
+
+def test_load_legacy_pickle():
+    """Test that plain pickles written by older executors and job containers are decoded."""
+    assert codec.load(io.BytesIO(cloudpickle.dumps(("function", [1], {})))) == (
+        "function",
+        [1],
+        {},
+    )
+
+
+def test_load_truncated():
+    """Test that truncated data is reported instead of being decoded partially."""
+    data = codec.dumps(list(range(1000)))
+    with pytest.raises(EOFError):
+        codec.loads(data[:-10])
+
+
+def test_unknown_codec():
+    """Test that unknown codecs are rejected."""
+    with pytest.raises(ValueError, match="Unknown codec"):
+        codec.dumps("data", "gzip")
@@ -0,0 +1,158 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the datasets passed to jobs as memory-mapped files."""
+
+import hashlib
+import mmap
+import os
+
+import pytest
+
+from covalent_braket_plugin import datasets
+from covalent_braket_plugin.datasets import (
+    Dataset,
+    DatasetLocator,
+    DatasetRef,
+    find_refs,
+    input_data_config,
+    resolve_arguments,
+    stage,
+    stage_arguments,
+    wrap_large_arguments,
+)
+from tests.fake_aws import FakeS3
+
+
+def test_dataset_validation(tmp_path):
+    assert Dataset(b"data").format == "bytes"
+    assert Dataset(path=str(tmp_path / "samples.npy")).format == "npy"
+    with pytest.raises(ValueError):
+        Dataset()
+    with pytest.raises(ValueError):
+        Dataset(b"data", path="data.bin")
+    with pytest.raises(TypeError):
+        Dataset({"not": "bytes"})
+
+
+def test_stage_is_content_addressed(tmp_path, mocker):
+    """Test that equal datasets are written once, under the digest of their contents."""
+    write = mocker.spy(datasets, "_write")
+    data = os.urandom(1000)
+
+    ref = stage(Dataset(data), str(tmp_path))
+    assert ref.digest == hashlib.sha256(data).hexdigest()
+    assert ref.key == f"datasets/{ref.digest}/data.bin"
+    assert ref.size == 1000
+    with open(ref.path, "rb") as f:
+        assert f.read() == data
+
+    # Hashed again, but not written again.
+    assert stage(Dataset(bytearray(data)), str(tmp_path)) == ref
+    assert write.call_count == 3
+    assert os.listdir(tmp_path) == [ref.digest]
+
+
+def test_stage_file_hashes_changed_files_only(tmp_path, mocker):
+    """Test that a file passed by path is staged in place and only hashed again once changed."""
+    hash_file = mocker.spy(datasets, "_hash_file")
+    path = tmp_path / "samples.bin"
+    path.write_bytes(b"first")
+
+    ref = stage(Dataset(path=str(path)), str(tmp_path / "staging"))
+    assert ref.path == str(path)
+    assert stage(Dataset(path=str(path)), str(tmp_path / "staging")) == ref
+    assert hash_file.call_count == 1
+    assert not os.path.exists(tmp_path / "staging")
+
+    path.write_bytes(b"second")
+    assert stage(Dataset(path=str(path)), str(tmp_path / "staging")).digest == (
+        hashlib.sha256(b"second").hexdigest()
+    )
+    assert hash_file.call_count == 2
+
+
+def test_wrap_and_stage_arguments(tmp_path):
+    args, kwargs = wrap_large_arguments([b"x" * 100, b"small", 3], {"data": b"y" * 100}, 100)
+    assert [type(value) for value in args] == [Dataset, bytes, int]
+    assert isinstance(kwargs["data"], Dataset)
+    assert wrap_large_arguments(args[1:], {}, 0) == (args[1:], {})
+
+    args, kwargs = stage_arguments(args + [args[0]], kwargs, str(tmp_path))
+    assert isinstance(args[0], DatasetRef) and args[1:3] == [b"small", 3]
+    # Equal datasets are referenced once.
+    assert find_refs(args, kwargs) == [args[0], kwargs["data"]]
+
+
+def test_input_data_config():
+    ref = DatasetRef("ab" * 32, "npy", 10, "")
+    assert input_data_config("bucket", [ref.key]) == [
+        {
+            "channelName": ref.channel,
+            "dataSource": {
+                "s3DataSource": {"s3Uri": f"s3://bucket/datasets/{ref.digest}/data.npy"}
+            },
+        }
+    ]
+    assert len(ref.channel) <= 64
+
+
+def test_resolve_arguments_maps_files(tmp_path):
+    """Test that references are replaced by read-only mappings, one per dataset."""
+    ref = stage(Dataset(b"0123456789"), str(tmp_path))
+    empty = stage(Dataset(b""), str(tmp_path))
+
+    args, kwargs = resolve_arguments([ref, 1], {"same": ref, "empty": empty}, datasets.local_path)
+
+    assert isinstance(args[0], mmap.mmap) and args[0][2:5] == b"234"
+    assert kwargs["same"] is args[0]
+    assert kwargs["empty"] == b""
+    with pytest.raises(TypeError):
+        args[0][0] = 1
+
+
+def test_locator_prefers_input_channels(tmp_path):
+    """Test that datasets are read from their channel, or downloaded once without one."""
+    s3 = FakeS3()
+    attached = DatasetRef(hashlib.sha256(b"attached").hexdigest(), "bytes", 8, "")
+    detached = DatasetRef(hashlib.sha256(b"detached").hexdigest(), "bytes", 8, "")
+    s3.objects[("bucket", detached.key)] = b"detached"
+    channel_dir = tmp_path / "input" / attached.channel
+    channel_dir.mkdir(parents=True)
+    (channel_dir / "data.bin").write_bytes(b"attached")
+
+    locate = DatasetLocator(s3, "bucket", str(tmp_path / "work"), str(tmp_path / "input"))
+    assert locate(attached) == str(channel_dir / "data.bin")
+    for _ in range(2):
+        with open(locate(detached), "rb") as f:
+            assert f.read() == b"detached"
+    assert locate.downloads == 1
+    assert s3.calls["download_file"] == 1
+
+
+def test_array_datasets(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    array = numpy.arange(1000, dtype=numpy.float64).reshape(10, 100)
+
+    (args, _) = wrap_large_arguments([array, numpy.array([1])], {}, array.nbytes)
+    assert isinstance(args[0], Dataset) and args[0].format == "npy"
+    ref = stage(args[0], str(tmp_path))
+    assert ref.key.endswith("/data.npy")
+
+    (mapped,), _ = resolve_arguments([ref], {}, datasets.local_path)
+    assert isinstance(mapped, numpy.memmap)
+    assert numpy.array_equal(mapped, array)
+    assert not mapped.flags.writeable
@@ -17,35 +17,103 @@
 """Unit tests for AWS batch executor braket execution file."""
 
 import os
+import runpy
 import sys
 from unittest import mock
 
-import cloudpickle
-from anyio import Path
+import pytest
 
+import covalent_braket_plugin
+from covalent_braket_plugin import codec
+from tests.fake_aws import FakeS3
 
-def test_execution(mocker, tmp_path: Path):
+EXEC_SCRIPT = os.path.join(os.path.dirname(covalent_braket_plugin.__file__), "exec.py")
+MOCK_BUCKET = "mock_s3_bucket"
+
+
+@pytest.fixture
+def s3(mocker):
+    """Hand the job an in-memory S3 client instead of a real one."""
+    s3 = FakeS3()
     boto3_mock = mock.MagicMock()
-    sys.modules["boto3"] = boto3_mock
+    boto3_mock.client.return_value = s3
+    mocker.patch.dict(sys.modules, {"boto3": boto3_mock})
+    return s3
 
+
+def test_execution(mocker, s3, tmp_path):
     def mock_function(x):
         return x
 
-    tmp_pickle_file = tmp_path / "mock_file.pkl"
+    s3.objects[(MOCK_BUCKET, "mock_file.pkl")] = codec.dumps((mock_function, [1], {}))
 
     mocker.patch.dict(
         os.environ,
         {
-            "SM_HP_S3_BUCKET_NAME": "mock_s3_bucket",
+            "SM_HP_S3_BUCKET_NAME": MOCK_BUCKET,
             "SM_HP_RESULT_FILENAME": "result_file.pkl",
             "SM_HP_COVALENT_TASK_FUNC_FILENAME": "mock_file.pkl",
-            "SM_HP_WORKDIR": str(tmp_pickle_file.parent),
+            "SM_HP_WORKDIR": str(tmp_path),
+        },
+    )
+
+    runpy.run_path(EXEC_SCRIPT)
+
+    assert codec.loads(s3.objects[(MOCK_BUCKET, "result_file.pkl")]) == 1
+
+
+def test_execution_with_separate_arguments(mocker, s3, tmp_path):
+    """Test that the function and its arguments are assembled from separate objects."""
+
+    def mock_function(x, y):
+        return x + y
+
+    s3.objects[(MOCK_BUCKET, "objects/func.pkl")] = codec.dumps(mock_function)
+    s3.objects[(MOCK_BUCKET, "objects/args.pkl")] = codec.dumps(([1], {"y": 2}))
+
+    mocker.patch.dict(
+        os.environ,
+        {
+            "SM_HP_S3_BUCKET_NAME": MOCK_BUCKET,
+            "SM_HP_RESULT_FILENAME": "result_file.pkl",
+            "SM_HP_COVALENT_TASK_FUNC_FILENAME": "objects/func.pkl",
+            "SM_HP_COVALENT_TASK_ARGS_FILENAME": "objects/args.pkl",
+            "SM_HP_WORKDIR": str(tmp_path),
+        },
+    )
+
+    runpy.run_path(EXEC_SCRIPT)
+
+    assert codec.loads(s3.objects[(MOCK_BUCKET, "result_file.pkl")]) == 3
+    assert s3.calls["upload_fileobj"] == 1
+    # Payloads and the result are transferred without files.
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_execution_with_compression(mocker, s3, tmp_path):
+    """Test that compressed payloads are decoded and the result is encoded with the given codec."""
+    pytest.importorskip("lz4")
+
+    def mock_function(values):
+        return [value * 2 for value in values]
+
+    s3.objects[(MOCK_BUCKET, "objects/func.pkl")] = codec.dumps(mock_function, "lz4")
+    s3.objects[(MOCK_BUCKET, "objects/args.pkl")] = codec.dumps(([list(range(1000))], {}), "lz4")
+
+    mocker.patch.dict(
+        os.environ,
+        {
+            "SM_HP_S3_BUCKET_NAME": MOCK_BUCKET,
+            "SM_HP_RESULT_FILENAME": "result_file.pkl",
+            "SM_HP_COVALENT_TASK_FUNC_FILENAME": "objects/func.pkl",
+            "SM_HP_COVALENT_TASK_ARGS_FILENAME": "objects/args.pkl",
+            "SM_HP_COVALENT_RESULT_CODEC": "lz4",
+            "SM_HP_WORKDIR": str(tmp_path),
         },
     )
 
-    with open(str(tmp_pickle_file), "wb") as f:
-        x = 1
-        positional_args = [x]
-        cloudpickle.dump((mock_function, positional_args, {}), f)
+    runpy.run_path(EXEC_SCRIPT)
 
-    import covalent_braket_plugin.exec
+    data = s3.objects[(MOCK_BUCKET, "result_file.pkl")]
+    assert data.startswith(codec.MAGIC)
+    assert codec.loads(data) == list(range(0, 2000, 2))
@@ -0,0 +1,125 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the shared caller identity cache."""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from covalent_braket_plugin.identity import IdentityCache
+
+KEY = IdentityCache.make_key("profile", "us-east-1")
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(4) as executor:
+        yield executor
+
+
+class Validate:
+    """Stand-in for a credentials validation counting its calls."""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return {"Account": str(self.calls)}
+
+
+@pytest.mark.asyncio
+async def test_identity_is_cached(executor):
+    """Test that an identity is reused until it expires."""
+    cache, validate = IdentityCache(), Validate()
+
+    assert await cache.get(KEY, validate, executor.submit, ttl=0) == {"Account": "1"}
+    assert await cache.get(KEY, validate, executor.submit) == {"Account": "2"}
+    assert await cache.get(KEY, validate, executor.submit) == {"Account": "2"}
+    assert (validate.calls, cache.hits, cache.misses) == (2, 1, 2)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_call(executor):
+    """Test that concurrent lookups of an uncached identity issue a single call."""
+    cache, validate = IdentityCache(), Validate()
+    validate.release.clear()
+
+    lookups = [asyncio.ensure_future(cache.get(KEY, validate, executor.submit)) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    # A cancelled lookup does not cancel the call the others wait for.
+    lookups[0].cancel()
+    validate.release.set()
+
+    results = await asyncio.gather(*lookups[1:])
+    assert results == [{"Account": "1"}] * 4
+    assert validate.calls == 1
+    assert cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached(executor):
+    """Test that a failed validation is raised to every waiter and retried next time."""
+    cache, validate = IdentityCache(), Validate(RuntimeError("invalid credentials"))
+
+    with pytest.raises(RuntimeError):
+        await cache.get(KEY, validate, executor.submit)
+    assert len(cache) == 0
+
+    validate.error = None
+    assert await cache.get(KEY, validate, executor.submit) == {"Account": "2"}
+
+
+@pytest.mark.asyncio
+async def test_invalidate(executor):
+    """Test that an invalidated identity is validated again."""
+    cache, validate = IdentityCache(), Validate()
+    other = IdentityCache.make_key("other")
+
+    await cache.get(KEY, validate, executor.submit)
+    await cache.get(other, validate, executor.submit)
+    assert cache.invalidate(KEY)
+    assert not cache.invalidate(KEY)
+
+    assert await cache.get(KEY, validate, executor.submit) == {"Account": "3"}
+    assert await cache.get(other, validate, executor.submit) == {"Account": "2"}
+
+
+@pytest.mark.asyncio
+async def test_credentials_file_change(executor, tmp_path):
+    """Test that rewriting the credentials file invalidates the identity."""
+    credentials = tmp_path / "credentials"
+    credentials.write_text("[default]\n")
+    key = IdentityCache.make_key(credentials_file=str(credentials))
+    cache, validate = IdentityCache(), Validate()
+
+    await cache.get(key, validate, executor.submit)
+    await cache.get(key, validate, executor.submit)
+    assert validate.calls == 1
+
+    stat = os.stat(credentials)
+    os.utime(credentials, (stat.st_atime, stat.st_mtime + 10))
+    assert await cache.get(key, validate, executor.submit) == {"Account": "2"}
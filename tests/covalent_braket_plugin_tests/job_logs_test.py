@@ -0,0 +1,205 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the retrieval of job logs."""
+
+import asyncio
+
+import pytest
+
+from covalent_braket_plugin.admission import TokenBucket
+from covalent_braket_plugin.job_logs import (
+    LOG_GROUP_NAME,
+    JobLogReader,
+    LogBuffer,
+    LogTailer,
+    defer,
+    fetch_job_logs,
+    pop_tailer,
+    start_tailer,
+    wait_for_deferred,
+)
+from tests.fake_aws import FakeLogs
+
+
+@pytest.fixture
+def logs():
+    logs = FakeLogs(page_size=3, streams_page_size=1)
+    for i in range(7):
+        logs.log("covalent-job/algo-1", f"first {i}")
+    for i in range(2):
+        logs.log("covalent-job/algo-2", f"second {i}")
+    logs.log("covalent-other/algo-1", "other")
+    logs.log("covalent-job-1/algo-1", "other node")
+    return logs
+
+
+def call_of(client):
+    async def call(service, operation, **kwargs):
+        return getattr(client, operation)(**kwargs)
+
+    return call
+
+
+@pytest.mark.asyncio
+async def test_fetch_pages_through_every_stream(logs):
+    """Test that every page of every stream of the job is read, in order."""
+    buffer = LogBuffer()
+
+    tokens = await fetch_job_logs(call_of(logs), ["covalent-job"], buffer)
+
+    expected = [f"first {i}" for i in range(7)] + [f"second {i}" for i in range(2)]
+    assert buffer.getvalue() == "".join(f"{line}\n" for line in expected)
+    assert set(tokens) == {"covalent-job/algo-1", "covalent-job/algo-2"}
+    assert logs.calls["describe_log_streams"] == 2
+    # Three full pages and the empty page marking the end, then one page and the end.
+    assert logs.calls["get_log_events"] == 4 + 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_reads_every_job_in_order(logs):
+    """Test that the streams of several jobs are read one job after another."""
+    logs.log("covalent-job-resume-1/algo-1", "resumed")
+    buffer = LogBuffer()
+
+    await fetch_job_logs(call_of(logs), ["covalent-job", "covalent-job-resume-1"], buffer)
+
+    assert buffer.getvalue().endswith("second 1\nresumed\n")
+    assert "other" not in buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_fetch_resumes_from_tokens(logs):
+    """Test that a fetch resuming from earlier tokens only reads new events."""
+    tokens = await fetch_job_logs(call_of(logs), ["covalent-job"], LogBuffer())
+    logs.log("covalent-job/algo-1", "late")
+
+    buffer = LogBuffer()
+    await fetch_job_logs(call_of(logs), ["covalent-job"], buffer, LOG_GROUP_NAME, tokens)
+
+    assert buffer.getvalue() == "late\n"
+
+
+@pytest.mark.asyncio
+async def test_fetch_stops_at_cap(logs):
+    """Test that reading stops once the cap is reached and the truncation is noted."""
+    lines = []
+    buffer = LogBuffer(max_lines=4, sink=lines.append)
+
+    await fetch_job_logs(call_of(logs), ["covalent-job"], buffer)
+
+    assert buffer.truncated
+    assert buffer.lines == 4
+    assert lines[:4] == [f"first {i}\n" for i in range(4)]
+    assert lines[4].startswith("[log truncated after 4 lines")
+    assert buffer.getvalue() == "".join(lines)
+    assert logs.calls["get_log_events"] == 2
+
+
+def test_buffer_byte_cap():
+    """Test that the byte cap counts encoded bytes, newlines included."""
+    buffer = LogBuffer(max_bytes=10)
+
+    assert buffer.write("ééé")
+    assert not buffer.write("abc")
+    assert buffer.bytes == 7
+    assert buffer.getvalue().startswith("ééé\n[log truncated")
+
+
+def test_buffer_without_keeping_lines():
+    """Test that lines streamed to a sink need not be kept in memory."""
+    lines = []
+    buffer = LogBuffer(sink=lines.append, keep=False)
+
+    buffer.write("line")
+
+    assert lines == ["line\n"]
+    assert buffer.getvalue() == ""
+
+
+@pytest.mark.asyncio
+async def test_deferred_fetch(mocker):
+    """Test that deferred fetches run in the background and only log their errors."""
+    warning = mocker.patch("covalent_braket_plugin.job_logs.app_log.warning")
+    done = []
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        done.append(True)
+
+    async def fail():
+        raise RuntimeError("no logs")
+
+    defer(fetch(), "job")
+    defer(fail(), "failing job")
+    assert not done
+
+    await wait_for_deferred()
+
+    assert done == [True]
+    warning.assert_called_once()
+    assert "failing job" in warning.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_tailer_reads_while_job_runs(logs):
+    """Test that a tailer reads new lines as they are logged and leaves only the tail."""
+    lines = []
+    reader = JobLogReader(call_of(logs), ["covalent-job"], LogBuffer(sink=lines.append))
+    budget = TokenBucket(rate=1000, burst=1)
+    start_tailer("covalent-job", LogTailer(reader, 0.01, budget))
+
+    while reader.reads < 1:
+        await asyncio.sleep(0.01)
+    assert len(lines) == 9
+    logs.log("covalent-job/algo-1", "late")
+    while reader.reads < 2:
+        await asyncio.sleep(0.01)
+    assert lines[-1] == "late\n"
+
+    tailer = pop_tailer("covalent-job")
+    assert pop_tailer("covalent-job") is None
+    assert await tailer.stop() is reader
+
+    logs.log("covalent-job/algo-2", "final")
+    calls = logs.calls["get_log_events"]
+    await reader.read()
+
+    assert lines[-1] == "final\n"
+    assert reader.buffer.getvalue() == "".join(lines)
+    # The final read only resumes each stream from its token.
+    assert logs.calls["get_log_events"] - calls == 2 + 1
+
+
+@pytest.mark.asyncio
+async def test_tailer_survives_read_errors():
+    """Test that a failed read is retried at the next interval."""
+    failures = []
+
+    async def call(service, operation, **kwargs):
+        if not failures:
+            failures.append(operation)
+            raise RuntimeError("throttled")
+        return {"logStreams": []}
+
+    reader = JobLogReader(call, ["covalent-job"], LogBuffer())
+    tailer = LogTailer(reader, 0.01)
+    tailer.start()
+    while reader.reads < 1:
+        await asyncio.sleep(0.01)
+    await tailer.stop()
+
+    assert failures == ["describe_log_streams"]
@@ -0,0 +1,64 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the journal of submitted jobs."""
+
+import os
+
+import pytest
+
+from covalent_braket_plugin.journal import JobJournal
+
+
+def test_journal(tmp_path):
+    journal = JobJournal(str(tmp_path / "jobs"))
+
+    assert journal.get("covalent-d-1") is None
+    journal.record("covalent-d-1")
+    assert journal.get("covalent-d-1") == {}
+    journal.record("covalent-d-1", job_arn="arn")
+    assert journal.get("covalent-d-1") == {"job_arn": "arn"}
+
+    journal.remove("covalent-d-1")
+    journal.remove("covalent-d-1")
+    assert journal.get("covalent-d-1") is None
+
+
+def test_failed_write_keeps_previous_entry(tmp_path):
+    journal = JobJournal(str(tmp_path))
+    journal.record("job", job_arn="arn")
+
+    with pytest.raises(TypeError):
+        journal.record("job", job_arn=object())
+
+    assert journal.get("job") == {"job_arn": "arn"}
+    assert os.listdir(str(tmp_path)) == ["job.json"]
+
+
+def test_entries(tmp_path):
+    journal = JobJournal(str(tmp_path / "jobs"))
+    assert journal.entries() == {}
+
+    journal.record("covalent-d-1", job_arn="arn-1")
+    journal.record("covalent-d-2")
+    journal.record("covalent-e-1", job_arn="arn-3")
+    (tmp_path / "jobs" / "partial.tmp").write_text("{")
+
+    assert journal.entries("covalent-d-") == {
+        "covalent-d-1": {"job_arn": "arn-1"},
+        "covalent-d-2": {},
+    }
+    assert len(journal.entries()) == 3
@@ -0,0 +1,98 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the local execution of electrons bound for simulators."""
+
+import os
+
+import pytest
+
+from covalent_braket_plugin import codec, local
+
+SV1 = "arn:aws:braket:::device/quantum-simulator/amazon/sv1"
+DM1 = "arn:aws:braket:::device/quantum-simulator/amazon/dm1"
+TN1 = "arn:aws:braket:::device/quantum-simulator/amazon/tn1"
+QPU = "arn:aws:braket:us-east-1::device/qpu/ionq/Aria-1"
+
+
+def test_runs_locally():
+    assert local.runs_locally("local", QPU)
+    assert local.runs_locally("auto", SV1)
+    assert local.runs_locally("auto", "local:braket/braket_dm")
+    assert not local.runs_locally("auto", QPU)
+    assert not local.runs_locally("jobs", SV1)
+
+
+@pytest.mark.parametrize(
+    "device, simulator",
+    [
+        (SV1, "local:braket/braket_sv"),
+        (DM1, "local:braket/braket_dm"),
+        (TN1, "local:braket/braket_sv"),
+        ("local:braket/braket_dm", "local:braket/braket_dm"),
+    ],
+)
+def test_local_simulator(device, simulator):
+    assert local.local_simulator(device) == simulator
+
+
+def test_job_environment():
+    environment = local.job_environment(DM1, "bucket", "job-d-1", "/results/job-d-1")
+
+    assert environment["AMZN_BRAKET_DEVICE_ARN"] == "local:braket/braket_dm"
+    assert environment["AMZN_BRAKET_OUT_S3_BUCKET"] == "bucket"
+    # The README example splits the task results URI at the bucket name.
+    assert (
+        environment["AMZN_BRAKET_TASK_RESULTS_S3_URI"].split("bucket")[1] == "/jobs/job-d-1/tasks"
+    )
+    assert environment["AMZN_BRAKET_JOB_RESULTS_DIR"] == "/results/job-d-1/results"
+
+
+def test_run_task(tmp_path):
+    """Test that a task sees the job's environment only while it runs and its output is captured."""
+    environment = local.job_environment(SV1, "bucket", "job", str(tmp_path))
+
+    def task(x):
+        print("running")
+        return x, os.environ["AMZN_BRAKET_DEVICE_ARN"]
+
+    record, result = local.decode_outcome(
+        local.run_task(codec.dumps((task, [2], {})), environment)
+    )
+
+    assert record["status"] == "COMPLETED"
+    assert record["stdout"] == "running\n"
+    assert result == (2, "local:braket/braket_sv")
+    assert "AMZN_BRAKET_DEVICE_ARN" not in os.environ
+    assert os.path.isdir(environment["AMZN_BRAKET_CHECKPOINT_DIR"])
+
+
+def test_run_task_failures(tmp_path):
+    environment = local.job_environment(SV1, "bucket", "job", str(tmp_path))
+
+    record, _ = local.decode_outcome(
+        local.run_task(codec.dumps((lambda: 1 / 0, [], {})), environment)
+    )
+    assert record["status"] == "FAILED"
+    assert "ZeroDivisionError" in record["error"]
+
+    # Results that cannot be pickled fail the task instead of the pool process.
+    record, result = local.decode_outcome(
+        local.run_task(codec.dumps((lambda: (_ for _ in ()), [], {})), environment)
+    )
+    assert record["status"] == "FAILED"
+    assert "Failed to encode the result" in record["error"]
+    assert result is None
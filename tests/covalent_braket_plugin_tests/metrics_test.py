@@ -0,0 +1,211 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the span timing, counters and metrics sinks."""
+
+import asyncio
+import io
+from unittest.mock import MagicMock
+
+import botocore.session
+import pytest
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+
+from covalent_braket_plugin import metrics
+from covalent_braket_plugin.metrics import (
+    InMemorySink,
+    OpenTelemetrySink,
+    PrometheusSink,
+    Span,
+    get_sink,
+)
+from covalent_braket_plugin.thread_pools import BlockingCallPool
+
+
+def test_nothing_is_recorded_without_scope():
+    sink = InMemorySink()
+    with metrics.span("upload"):
+        metrics.increment("aws_calls")
+    assert metrics.current() is None
+    assert list(sink.spans) == [] and not sink.counters
+
+
+def test_spans_and_counters_carry_the_scope_tags():
+    """Test that tags added to a scope apply from then on and errors are recorded."""
+    sink = InMemorySink()
+    with metrics.instrument(sink, dispatch_id="d", node_id=1):
+        with metrics.span("submit"):
+            pass
+        metrics.tag(job_arn="arn")
+        with pytest.raises(ValueError):
+            with metrics.span("poll", strategy="fixed"):
+                raise ValueError()
+        metrics.increment("aws_calls", 2, service="braket")
+    assert metrics.current() is None
+
+    submit, poll = sink.spans
+    assert (submit.name, submit.attributes, submit.error) == (
+        "submit",
+        {"dispatch_id": "d", "node_id": 1},
+        None,
+    )
+    assert poll.attributes == {
+        "dispatch_id": "d",
+        "node_id": 1,
+        "job_arn": "arn",
+        "strategy": "fixed",
+    }
+    assert poll.error == "ValueError"
+    assert sink.counter("aws_calls", service="braket") == 2
+    assert sink.counter("aws_calls", job_arn="other") == 0
+
+
+@pytest.mark.asyncio
+async def test_scope_reaches_tasks_and_thread_pools():
+    """Test that tasks and pool threads record into the scope of their caller."""
+    sink = InMemorySink()
+    pool = BlockingCallPool("test-metrics", 2)
+
+    def blocking():
+        metrics.increment("calls", where="thread")
+
+    async def child():
+        metrics.increment("calls", where="task")
+
+    try:
+        with metrics.instrument(sink, node_id=7):
+            await pool.run(blocking)
+            await asyncio.gather(child())
+            await metrics.detached(asyncio.ensure_future, child())
+    finally:
+        pool.shutdown()
+
+    assert sink.counter("calls", node_id=7, where="thread") == 1
+    assert sink.counter("calls", node_id=7, where="task") == 1
+    # Detached tasks keep the sink but not the tags.
+    assert sink.counters[("calls", (("where", "task"),))] == 1
+
+
+def test_prometheus_sink():
+    """Test the text rendering of span histograms and counters without per-job labels."""
+    sink = PrometheusSink(buckets=(0.1, 1.0))
+    sink.record_span(Span("upload", 0, 0.05, {"node_id": 1, "job_arn": "a"}))
+    sink.record_span(Span("upload", 0, 0.5, {"node_id": 2}))
+    sink.record_span(Span("aws_call", 0, 2.0, {"service": "s3", "operation": 'Get"Object'}))
+    sink.increment("aws_calls", 3, {"service": "braket", "node_id": 1})
+
+    text = sink.render()
+
+    metric = "covalent_braket_span_duration_seconds"
+    assert f'{metric}_bucket{{span="upload",le="0.1"}} 1' in text
+    assert f'{metric}_bucket{{span="upload",le="1.0"}} 2' in text
+    assert f'{metric}_bucket{{span="upload",le="+Inf"}} 2' in text
+    assert f'{metric}_count{{span="upload"}} 2' in text
+    assert f'{metric}_sum{{operation="Get\\"Object",service="s3",span="aws_call"}} 2.0' in text
+    assert "# TYPE covalent_braket_aws_calls_total counter" in text
+    assert 'covalent_braket_aws_calls_total{service="braket"} 3' in text
+    assert "node_id" not in text and "job_arn" not in text
+    assert PrometheusSink().render() == ""
+
+
+def test_opentelemetry_sink():
+    """Test that spans and counters are forwarded to a tracer and a meter."""
+    tracer, meter = MagicMock(), MagicMock()
+    sink = OpenTelemetrySink(tracer, meter)
+
+    sink.record_span(Span("poll", 10.0, 2.5, {"node_id": 1, "tags": ["a"]}, "TimeoutError"))
+    sink.increment("aws_calls", 1, {"service": "braket"})
+    sink.increment("aws_calls", 2, {"service": "s3"})
+
+    tracer.start_span.assert_called_once_with(
+        "poll",
+        attributes={"node_id": 1, "tags": "['a']", "error.type": "TimeoutError"},
+        start_time=10_000_000_000,
+    )
+    tracer.start_span().end.assert_called_once_with(end_time=12_500_000_000)
+    meter.create_counter.assert_called_once_with("covalent_braket.aws_calls")
+    meter.create_counter().add.assert_called_with(2, {"service": "s3"})
+
+
+def test_opentelemetry_sink_with_global_providers():
+    pytest.importorskip("opentelemetry")
+    sink = OpenTelemetrySink()
+    sink.record_span(Span("poll", 10.0, 2.5, {}))
+    sink.increment("aws_calls", 1, {})
+
+
+def test_get_sink():
+    assert get_sink("") is None
+    assert get_sink("memory") is get_sink("memory")
+    assert isinstance(get_sink("prometheus"), PrometheusSink)
+    sink = InMemorySink()
+    assert get_sink(sink) is sink
+    with pytest.raises(ValueError, match="Unknown metrics sink"):
+        get_sink("statsd")
+
+
+@pytest.fixture
+def s3_client():
+    session = botocore.session.get_session()
+    client = session.create_client(
+        "s3",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+    metrics.install_hooks(client)
+    return client
+
+
+def test_aws_calls_are_recorded(s3_client):
+    """Test that calls of hooked clients are timed and counted in the caller's scope."""
+    sink = InMemorySink()
+    with Stubber(s3_client) as stubber:
+        stubber.add_response(
+            "put_object",
+            {"ResponseMetadata": {"RetryAttempts": 2}},
+            {"Bucket": "bucket", "Key": "key", "Body": b"12345"},
+        )
+        stubber.add_client_error("head_object", "404")
+        stubber.add_response("list_buckets", {"Buckets": []})
+
+        with metrics.instrument(sink, node_id=3):
+            s3_client.put_object(Bucket="bucket", Key="key", Body=b"12345")
+            with pytest.raises(ClientError):
+                s3_client.head_object(Bucket="bucket", Key="missing")
+        # Calls outside a scope are not recorded.
+        s3_client.list_buckets()
+
+    put, head = sink.spans
+    assert (put.name, put.attributes, put.error) == (
+        "aws_call",
+        {"node_id": 3, "service": "s3", "operation": "PutObject"},
+        None,
+    )
+    assert head.error == "404"
+    assert sink.counter("aws_calls", node_id=3) == 2
+    assert sink.counter("aws_retries", operation="PutObject") == 2
+    assert sink.counter("aws_errors", operation="HeadObject", error="404") == 1
+    assert sink.counter("bytes_transferred", direction="sent") == 5
+
+
+def test_remaining_size():
+    fileobj = io.BytesIO(b"0123456789")
+    fileobj.seek(4)
+    assert metrics.remaining_size(fileobj) == 6
+    assert fileobj.tell() == 4
+    assert metrics.remaining_size(object()) == 0
@@ -0,0 +1,129 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the content-addressed object store."""
+
+from unittest.mock import MagicMock
+
+import cloudpickle
+import pytest
+from botocore.exceptions import ClientError
+
+from covalent_braket_plugin import codec
+from covalent_braket_plugin.object_store import ObjectStore, load_object, object_key
+from covalent_braket_plugin.transfer import TransferSettings
+from tests.fake_aws import FakeS3
+
+MOCK_BUCKET = "mock_bucket"
+
+
+def test_object_key_is_content_derived():
+    """Test that keys only depend on the content."""
+    assert object_key(b"abc") == object_key(b"abc")
+    assert object_key(b"abc") != object_key(b"abd")
+    assert object_key(b"abc").startswith("objects/")
+
+
+def test_put_uploads_once(tmp_path):
+    """Test that identical objects are uploaded once and then served from the index."""
+    s3 = FakeS3()
+    store = ObjectStore(s3, MOCK_BUCKET, str(tmp_path))
+
+    key = store.put(b"payload")
+    assert store.put(b"payload") == key
+
+    assert s3.objects[(MOCK_BUCKET, key)] == b"payload"
+    assert (store.puts, store.heads, store.bytes_uploaded) == (1, 1, len(b"payload"))
+
+
+def test_put_checks_bucket_when_index_is_empty(tmp_path):
+    """Test that an object uploaded by another process is found with a HEAD request."""
+    s3 = FakeS3()
+    ObjectStore(s3, MOCK_BUCKET, str(tmp_path / "first")).put(b"payload")
+
+    store = ObjectStore(s3, MOCK_BUCKET, str(tmp_path / "second"))
+    store.put(b"payload")
+    store.put(b"payload")
+
+    assert (store.puts, store.heads) == (0, 1)
+    assert s3.calls["upload_fileobj"] == 1
+
+
+def test_put_reraises_unexpected_errors(tmp_path):
+    """Test that errors other than a missing key are not mistaken for a cache miss."""
+    s3 = MagicMock()
+    s3.head_object.side_effect = ClientError({"Error": {"Code": "403"}}, "HeadObject")
+    store = ObjectStore(s3, MOCK_BUCKET, str(tmp_path))
+
+    with pytest.raises(ClientError):
+        store.put(b"payload")
+    s3.upload_fileobj.assert_not_called()
+
+
+@pytest.mark.parametrize("spool_threshold", [0, 1024 * 1024])
+def test_put_object(tmp_path, spool_threshold):
+    """Test that encoded objects are stored under the key of their encoding, spooled or not."""
+    s3 = FakeS3()
+    store = ObjectStore(
+        s3, MOCK_BUCKET, str(tmp_path), spool_threshold=spool_threshold, spool_dir=str(tmp_path)
+    )
+    obj = {"shots": list(range(1000))}
+
+    key = store.put_object(obj)
+
+    assert key == object_key(codec.dumps(obj))
+    assert codec.loads(s3.objects[(MOCK_BUCKET, key)]) == obj
+    assert store.bytes_uploaded == len(s3.objects[(MOCK_BUCKET, key)])
+    assert store.put_object(obj) == key
+    assert store.puts == 1
+
+
+def test_load_object():
+    """Test that objects are unpickled from the response stream."""
+    s3 = FakeS3()
+    s3.objects[(MOCK_BUCKET, "result.pkl")] = cloudpickle.dumps([1, 2, 3])
+
+    assert load_object(s3, MOCK_BUCKET, "result.pkl") == [1, 2, 3]
+    assert s3.calls == {"get_object": 1}
+
+
+def test_load_large_object_in_ranges():
+    """Test that objects above the multipart threshold are downloaded with a managed transfer."""
+    s3 = FakeS3()
+    s3.objects[(MOCK_BUCKET, "result.pkl")] = cloudpickle.dumps(list(range(10_000)))
+    s3.download_fileobj = MagicMock(wraps=s3.download_fileobj)
+    transfer = TransferSettings(multipart_threshold=1024, checksum_algorithm="CRC32C")
+
+    assert load_object(s3, MOCK_BUCKET, "result.pkl", transfer) == list(range(10_000))
+
+    assert s3.calls == {"get_object": 1, "download_fileobj": 1}
+    kwargs = s3.download_fileobj.call_args.kwargs
+    assert kwargs["ExtraArgs"] == {"ChecksumMode": "ENABLED"}
+    assert kwargs["Config"].max_concurrency == 1
+
+
+def test_put_object_with_codec(tmp_path):
+    """Test that objects are compressed with the store's codec and decoded by load_object."""
+    if "zstd" not in codec.available_codecs():
+        pytest.skip("zstandard is not installed")
+    s3 = FakeS3()
+    store = ObjectStore(s3, MOCK_BUCKET, str(tmp_path), codec="zstd")
+    obj = [0] * 100_000
+
+    key = store.put_object(obj)
+
+    assert store.bytes_uploaded < len(cloudpickle.dumps(obj)) / 10
+    assert load_object(s3, MOCK_BUCKET, key) == obj
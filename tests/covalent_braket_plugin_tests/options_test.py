@@ -0,0 +1,54 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the per-electron options."""
+
+from functools import partial
+
+from covalent._workflow.transport import TransportableObject
+from covalent.executor.utils.wrappers import wrapper_fn
+
+from covalent_braket_plugin.options import electron_options, get_options
+
+
+def test_default_options():
+    assert get_options(abs) == {"result_cache": True, "local": True}
+
+
+def test_options_of_wrapped_electron():
+    """Test that the options are read from the function Covalent passes to executors."""
+
+    @electron_options(result_cache=False)
+    def sample(shots):
+        return shots
+
+    wrapped = partial(wrapper_fn, TransportableObject(sample), [], [])
+
+    assert get_options(sample) == {"result_cache": False, "local": True}
+    assert get_options(wrapped) == {"result_cache": False, "local": True}
+
+
+def test_options_of_undeserializable_electron():
+    """Test that a function that cannot be deserialized gets the default options."""
+
+    class Broken:
+        def get_deserialized(self):
+            raise ImportError("missing module")
+
+    assert get_options(partial(wrapper_fn, Broken(), [], [])) == {
+        "result_cache": True,
+        "local": True,
+    }
@@ -0,0 +1,336 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the shared Braket job status poller."""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pytest
+from botocore.exceptions import ClientError
+
+from covalent_braket_plugin import metrics
+from covalent_braket_plugin.admission import TokenBucket
+from covalent_braket_plugin.poller import JobStatusPoller, get_poller
+from covalent_braket_plugin.polling import FixedPollingStrategy
+from covalent_braket_plugin.thread_pools import BlockingCallPool
+
+
+class MockBraket:
+    """Braket client stand-in. get_job walks through each job's list of statuses."""
+
+    def __init__(
+        self,
+        jobs: Dict[str, List[str]],
+        search_supported: bool = True,
+        errors: Dict[str, List[str]] = None,
+    ):
+        self.jobs = jobs
+        self.errors = errors or {}
+        self.search_supported = search_supported
+        self.search_calls = 0
+        self.get_job_calls = 0
+        self.created_after = None
+
+    def search_jobs(self, filters):
+        if not self.search_supported:
+            raise ClientError({"Error": {"Code": "ValidationException"}}, "SearchJobs")
+        self.search_calls += 1
+        status = filters[0]["values"][0]
+        self.created_after = filters[1]["values"][0]
+        jobs = [
+            {"jobArn": job_arn, "status": statuses[0]}
+            for job_arn, statuses in self.jobs.items()
+            if statuses[0] == status
+        ]
+        return {"jobs": jobs}
+
+    def get_job(self, jobArn):
+        self.get_job_calls += 1
+        if self.errors.get(jobArn):
+            raise ClientError({"Error": {"Code": self.errors[jobArn].pop(0)}}, "GetJob")
+        statuses = self.jobs[jobArn]
+        return {"status": statuses.pop(0) if len(statuses) > 1 else statuses[0]}
+
+
+@pytest.mark.asyncio
+async def test_search_calls_independent_of_job_count():
+    """Test that a refresh costs the same number of calls for any number of jobs."""
+    braket = MockBraket({str(i): ["COMPLETED"] for i in range(100)})
+    poller = JobStatusPoller(lambda: braket)
+    strategy = FixedPollingStrategy(0.01)
+
+    statuses = await asyncio.gather(*(poller.wait(str(i), strategy) for i in range(100)))
+
+    assert statuses == ["COMPLETED"] * 100
+    assert braket.search_calls == 5
+    assert braket.get_job_calls == 0
+    assert len(poller) == 0
+
+
+@pytest.mark.asyncio
+async def test_refresh_resolves_only_terminal_jobs():
+    """Test that jobs stay tracked until they reach a terminal state."""
+    braket = MockBraket({"done": ["FAILED"], "running": ["RUNNING"], "queued": ["QUEUED"]})
+    poller = JobStatusPoller(lambda: braket)
+    strategy = FixedPollingStrategy(60)
+    done = poller.watch("done", strategy)
+    running = poller.watch("running", strategy)
+    queued = poller.watch("queued", strategy)
+
+    await poller.refresh()
+
+    assert done.result() == "FAILED"
+    assert not running.done() and not queued.done()
+    assert poller.status("running") == "RUNNING"
+    assert poller.status("queued") == "QUEUED"
+    poller.unwatch("running")
+    poller.unwatch("queued")
+    assert running.cancelled()
+    poller._task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_search_starts_at_creation_time():
+    """Test that the search covers jobs created long before they were watched."""
+    braket = MockBraket({"old": ["RUNNING"]})
+    poller = JobStatusPoller(lambda: braket)
+    created_at = datetime(2024, 1, 1, 1, 0, 0, tzinfo=timezone.utc).timestamp()
+    poller.watch("old", FixedPollingStrategy(60), created_at=created_at)
+
+    await poller.refresh()
+
+    assert braket.created_after == "2024-01-01T00:55:00Z"
+    assert poller.status("old") == "RUNNING"
+    poller.unwatch("old")
+    poller._task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_jobs_missing_from_search_use_get_job():
+    """Test that jobs the search does not return are checked with get_job."""
+    braket = MockBraket({"found": ["RUNNING"], "missing": ["CANCELLING", "CANCELLED"]})
+    poller = JobStatusPoller(lambda: braket)
+    poller.watch("found", FixedPollingStrategy(60))
+    missing = poller.watch("missing", FixedPollingStrategy(60))
+
+    await poller.refresh()
+    assert poller.status("missing") == "CANCELLING"
+    # Found by the search once it is cancelled.
+    await poller.refresh()
+
+    assert missing.result() == "CANCELLED"
+    assert braket.get_job_calls == 1
+    poller.unwatch("found")
+    poller._task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_fallback_to_rate_limited_get_job():
+    """Test that get_job is used, a bounded number of times per refresh, without search."""
+    braket = MockBraket({str(i): ["RUNNING", "COMPLETED"] for i in range(5)}, False)
+    poller = JobStatusPoller(lambda: braket, max_get_job_calls=2)
+    futures = [poller.watch(str(i), FixedPollingStrategy(60)) for i in range(5)]
+
+    await poller.refresh()
+    assert not poller.use_search
+    assert braket.get_job_calls == 2
+
+    await poller.refresh()
+    await poller.refresh()
+    assert braket.get_job_calls == 6
+    assert [future.done() for future in futures] == [True, False, False, False, False]
+
+    poller._task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_fallback_polls_due_jobs_only():
+    """Test that jobs are only checked with get_job once their strategy asks for it."""
+    braket = MockBraket({"fast": ["RUNNING", "RUNNING", "COMPLETED"], "slow": ["RUNNING"]}, False)
+    poller = JobStatusPoller(lambda: braket)
+    poller.watch("slow", FixedPollingStrategy(60))
+
+    assert await poller.wait("fast", FixedPollingStrategy(0.01)) == "COMPLETED"
+
+    assert braket.get_job_calls == 3
+    assert poller.status("slow") is None
+    poller.unwatch("slow")
+    poller._task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_throttled_get_job_backs_off(monkeypatch):
+    """Test that a job whose get_job call is throttled is checked again after a backoff."""
+    monkeypatch.setattr("covalent_braket_plugin.poller._RETRY_BACKOFF", 0.1)
+    errors = {"1": ["ThrottlingException"] * 3}
+    braket = MockBraket({"1": ["COMPLETED"]}, False, errors)
+    poller = JobStatusPoller(lambda: braket)
+
+    started = time.monotonic()
+    assert await poller.wait("1", FixedPollingStrategy(0.01)) == "COMPLETED"
+
+    # Backoffs of at least 0.05, 0.1 and 0.2 seconds.
+    assert time.monotonic() - started >= 0.35
+    assert braket.get_job_calls == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_get_job_raises_to_waiters():
+    """Test that an error that is not retried resolves the job instead of polling it again."""
+    braket = MockBraket({"1": ["RUNNING"]}, False, {"1": ["ExpiredTokenException"]})
+    poller = JobStatusPoller(lambda: braket)
+
+    with pytest.raises(ClientError, match="ExpiredTokenException"):
+        await asyncio.wait_for(poller.wait("1", FixedPollingStrategy(0.01)), 1)
+
+    assert braket.get_job_calls == 1
+    assert len(poller) == 0
+
+
+@pytest.mark.asyncio
+async def test_max_polls():
+    """Test that a job that never finishes stops being polled after the cap."""
+    braket = MockBraket({"1": ["QUEUED"]})
+    poller = JobStatusPoller(lambda: braket)
+
+    with pytest.raises(TimeoutError):
+        await poller.wait("1", FixedPollingStrategy(0.01, max_polls=3))
+
+    assert braket.search_calls == 3 * 5
+    assert len(poller) == 0
+
+
+@pytest.mark.asyncio
+async def test_wait_cancellation_keeps_shared_future():
+    """Test that cancelling one waiter does not cancel the job for others."""
+    braket = MockBraket({"1": ["RUNNING"]})
+    poller = JobStatusPoller(lambda: braket)
+
+    waiter = asyncio.create_task(poller.wait("1", FixedPollingStrategy(60)))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert not poller.watch("1").done()
+    poller.unwatch("1")
+    poller._task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_get_poller_is_shared_per_identity():
+    """Test that executors of the same identity share a poller."""
+    poller = get_poller(("profile", "us-east-1", None), lambda: None)
+
+    assert get_poller(("profile", "us-east-1", None), lambda: None) is poller
+    assert get_poller(("profile", "us-west-2", None), lambda: None) is not poller
+
+
+@pytest.mark.asyncio
+async def test_refresh_runs_on_given_pool():
+    """Test that Braket calls run on the given pool instead of the loop's default executor."""
+    threads = set()
+
+    class RecordingBraket(MockBraket):
+        def search_jobs(self, filters):
+            threads.add(threading.current_thread().name)
+            return super().search_jobs(filters)
+
+    pool = BlockingCallPool("poller-pool", 1)
+    poller = JobStatusPoller(lambda: RecordingBraket({"1": ["COMPLETED"]}), executor=pool)
+
+    assert await poller.wait("1", FixedPollingStrategy(0.01)) == "COMPLETED"
+    assert all(name.startswith("poller-pool") for name in threads)
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_refresh_issues_calls_with_given_coroutine():
+    """Test that a coroutine function such as a transport's issues the calls, page by page."""
+    braket = MockBraket({str(i): ["COMPLETED"] for i in range(3)})
+    calls = []
+
+    async def call(service, operation, **kwargs):
+        calls.append((service, operation, kwargs.get("nextToken")))
+        response = getattr(braket, operation)(kwargs["filters"])
+        if kwargs["filters"][0]["values"] == ["COMPLETED"] and "nextToken" not in kwargs:
+            # The jobs are returned on a second page.
+            return {"jobs": [], "nextToken": "page-2"}
+        return response
+
+    def get_client():
+        raise AssertionError("The client must not be used")
+
+    poller = JobStatusPoller(get_client, call=call)
+    statuses = await asyncio.gather(
+        *(poller.wait(str(i), FixedPollingStrategy(0.01)) for i in range(3))
+    )
+
+    assert statuses == ["COMPLETED"] * 3
+    assert ("braket", "search_jobs", "page-2") in calls
+    assert poller.api_calls == len(calls) == 6
+
+
+@pytest.mark.asyncio
+async def test_background_refreshes_take_budget_tokens():
+    """Test that every background refresh takes a token from the shared budget."""
+    braket = MockBraket({"1": ["RUNNING", "RUNNING", "COMPLETED"]}, search_supported=False)
+    budget = TokenBucket(rate=1000, burst=1)
+    acquired = []
+    original_acquire = budget.acquire
+
+    async def acquire():
+        acquired.append(True)
+        await original_acquire()
+
+    budget.acquire = acquire
+    poller = JobStatusPoller(lambda: braket, budget=budget)
+
+    assert await poller.wait("1", FixedPollingStrategy(0.01)) == "COMPLETED"
+    assert len(acquired) == braket.get_job_calls == 3
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_record_phase_spans():
+    """Test that the queue time, runtime and polling lag of a job go to the watcher's scope."""
+    braket = MockBraket({"job": ["COMPLETED"]}, search_supported=False)
+    braket.get_job = lambda jobArn: {
+        "status": "COMPLETED",
+        "createdAt": datetime(2024, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+        "startedAt": datetime(2024, 1, 1, 0, 0, 30, tzinfo=timezone.utc),
+        "endedAt": datetime(2024, 1, 1, 0, 2, 0, tzinfo=timezone.utc),
+    }
+    poller = JobStatusPoller(lambda: braket)
+    sink = metrics.InMemorySink()
+
+    with metrics.instrument(sink, node_id=1):
+        metrics.tag(job_arn="job")
+        assert await poller.wait("job", FixedPollingStrategy(0.01)) == "COMPLETED"
+
+    spans = {span.name: span for span in sink.spans}
+    assert spans["job_queue"].duration == 30
+    assert spans["job_runtime"].duration == 90
+    assert spans["job_runtime"].attributes == {
+        "node_id": 1,
+        "job_arn": "job",
+        "status": "COMPLETED",
+    }
+    assert spans["job_poll_lag"].duration > 0
+    assert poller._timestamps == {}
@@ -0,0 +1,121 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the job polling strategies."""
+
+from typing import List, Tuple
+
+import pytest
+
+from covalent_braket_plugin.polling import (
+    AdaptivePollingStrategy,
+    FixedPollingStrategy,
+    PollingStrategy,
+)
+
+
+def simulate(strategy: PollingStrategy, timeline: List[Tuple[str, float]]) -> Tuple[int, float]:
+    """Poll a simulated job and report the number of status checks and the detection latency.
+
+    Args:
+        strategy: Strategy under test.
+        timeline: Consecutive (status, seconds spent in that status) pairs. The job completes
+            at the end of the timeline.
+
+    Returns:
+        Number of status checks and seconds between completion and its detection.
+    """
+    end = sum(duration for _, duration in timeline)
+
+    def status_at(t):
+        for status, duration in timeline:
+            if t < duration:
+                return status
+            t -= duration
+        return "COMPLETED"
+
+    now, polls, polls_in_status = 0.0, 0, 0
+    status, status_since = None, 0.0
+    while True:
+        now += strategy.next_interval(status, now - status_since, polls_in_status)
+        polls += 1
+        observed = status_at(now)
+        if observed == "COMPLETED":
+            return polls, now - end
+        if observed != status:
+            status, status_since, polls_in_status = observed, now, 0
+        polls_in_status += 1
+
+
+SHORT_JOB = [("QUEUED", 2), ("RUNNING", 3)]
+QPU_JOB = [("QUEUED", 4 * 3600), ("RUNNING", 600)]
+
+
+def test_fixed_strategy():
+    """Test that the fixed strategy always waits the same interval."""
+    strategy = FixedPollingStrategy(10)
+    assert strategy.next_interval(None, 0, 0) == 10
+    assert strategy.next_interval("QUEUED", 1000, 100) == 10
+
+
+def test_adaptive_detects_short_jobs_faster():
+    """Test that a short job is detected sooner than with fixed 10 second polling."""
+    _, fixed_latency = simulate(FixedPollingStrategy(10), SHORT_JOB)
+    _, adaptive_latency = simulate(AdaptivePollingStrategy(jitter=0), SHORT_JOB)
+
+    assert fixed_latency == pytest.approx(5)
+    assert adaptive_latency < 2
+    assert adaptive_latency < fixed_latency
+
+
+def test_adaptive_backs_off_while_queued():
+    """Test that a long queued QPU job costs far fewer status checks than fixed polling."""
+    fixed_polls, _ = simulate(FixedPollingStrategy(10), QPU_JOB)
+    adaptive_polls, adaptive_latency = simulate(AdaptivePollingStrategy(jitter=0), QPU_JOB)
+
+    assert fixed_polls == 1500
+    assert adaptive_polls < fixed_polls / 4
+    assert adaptive_latency <= 10
+
+
+def test_adaptive_tightens_near_expected_runtime():
+    """Test that a known runtime lets completion be detected within the minimum interval."""
+    timeline = [("QUEUED", 30), ("RUNNING", 300)]
+    strategy = AdaptivePollingStrategy(jitter=0, max_interval=60, expected_runtime=300)
+    polls, latency = simulate(strategy, timeline)
+    _, unaware_latency = simulate(AdaptivePollingStrategy(jitter=0, max_interval=60), timeline)
+
+    assert latency <= strategy.min_interval
+    assert latency < unaware_latency
+    assert polls < 30
+
+
+def test_adaptive_intervals_are_bounded():
+    """Test the interval bounds for each job state."""
+    strategy = AdaptivePollingStrategy(jitter=0)
+
+    assert strategy.next_interval(None, 0, 0) == strategy.min_interval
+    assert strategy.next_interval("QUEUED", 0, 1000) == strategy.queued_max_interval
+    assert strategy.next_interval("RUNNING", 0, 1000) == strategy.max_interval
+
+
+def test_adaptive_jitter():
+    """Test that jitter spreads intervals within the configured range."""
+    strategy = AdaptivePollingStrategy(min_interval=10, jitter=0.5)
+    intervals = {strategy.next_interval(None, 0, 0) for _ in range(50)}
+
+    assert len(intervals) > 1
+    assert all(5 <= interval <= 15 for interval in intervals)
@@ -0,0 +1,106 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the reuse of task results."""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from covalent_braket_plugin.result_cache import (
+    LocalResultStore,
+    cache_key,
+    get_s3_entry,
+    put_s3_entry,
+    s3_key,
+)
+from covalent_braket_plugin.transports import Boto3Transport
+from tests.fake_aws import FakeS3
+
+
+def square(x):
+    return x * x
+
+
+def test_cache_key():
+    """Test that keys depend on the task and on the context it runs in."""
+    key = cache_key(square, [2], {}, quantum_device="sv1")
+    assert key == cache_key(square, [2], {}, quantum_device="sv1")
+    assert key != cache_key(square, [3], {}, quantum_device="sv1")
+    assert key != cache_key(square, [2], {"y": 1}, quantum_device="sv1")
+    assert key != cache_key(abs, [2], {}, quantum_device="sv1")
+    assert key != cache_key(square, [2], {}, quantum_device="dm1")
+
+
+def test_local_store(tmp_path):
+    store = LocalResultStore(str(tmp_path / "results"))
+
+    assert store.get("a") is None
+    store.put("a", (4, "out", ""))
+    assert store.get("a") == (4, "out", "")
+    assert os.listdir(store.directory) == ["a.pkl"]
+
+
+def test_local_store_ttl(tmp_path):
+    store = LocalResultStore(str(tmp_path), ttl=60)
+    store.put("a", (1, "", ""))
+    store.put("b", (2, "", ""))
+    old = time.time() - 120
+    os.utime(store._path("a"), (old, old))
+
+    assert store.get("a") is None
+    assert not os.path.exists(store._path("a"))
+    assert store.get("b") == (2, "", "")
+
+
+def test_local_store_evicts_oldest_entries(tmp_path):
+    """Test that the oldest entries are evicted once the store exceeds its size limit."""
+    store = LocalResultStore(str(tmp_path))
+    for i, key in enumerate("abc"):
+        store.put(key, (b"x" * 1000, "", ""))
+        os.utime(store._path(key), (1000 + i, 1000 + i))
+    store.max_bytes = 2 * os.path.getsize(store._path("a"))
+
+    store.put("d", (b"x" * 1000, "", ""))
+
+    assert sorted(os.listdir(str(tmp_path))) == ["c.pkl", "d.pkl"]
+
+
+class _Transport(Boto3Transport):
+    def __init__(self, s3):
+        async def run_blocking(function, transfer=False):
+            return function()
+
+        super().__init__(lambda service: s3, run_blocking)
+
+
+@pytest.mark.asyncio
+async def test_s3_entries():
+    s3 = FakeS3()
+    transport = _Transport(s3)
+
+    assert await get_s3_entry(transport, "bucket", "a") is None
+    await put_s3_entry(transport, "bucket", "a", (4, "out", "err"))
+
+    assert ("bucket", s3_key("a")) in s3.objects
+    assert await get_s3_entry(transport, "bucket", "a", ttl=60) == (4, "out", "err")
+
+    written_at = datetime.now(timezone.utc) - timedelta(seconds=120)
+    s3.head_object = lambda **kwargs: {"LastModified": written_at}
+    assert await get_s3_entry(transport, "bucket", "a", ttl=60) is None
+    assert await get_s3_entry(transport, "bucket", "a") == (4, "out", "err")
@@ -0,0 +1,102 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the cold-start optimized entry point of the job container."""
+
+import sys
+
+import pytest
+
+from covalent_braket_plugin import codec
+from covalent_braket_plugin.runner import (
+    TIMINGS_MARKER,
+    PhaseTimer,
+    WarmUp,
+    format_timings,
+    main,
+    parse_module_list,
+    parse_timings,
+)
+from tests.fake_aws import FakeS3
+
+MOCK_BUCKET = "mock_bucket"
+
+
+def test_timings_round_trip():
+    """Test that reported timings are parsed back and other lines are ignored."""
+    timer = PhaseTimer()
+    with timer.phase("download"):
+        pass
+    with timer.phase("download"):
+        pass
+
+    line = format_timings(timer.timings)
+    assert parse_timings(line) == pytest.approx(timer.timings, abs=1e-5)
+    assert parse_timings("line 0") is None
+    assert parse_timings(TIMINGS_MARKER + "not json") is None
+    assert parse_timings(TIMINGS_MARKER + "[1, 2]") is None
+
+
+def test_parse_module_list():
+    assert parse_module_list("") == []
+    assert parse_module_list(None) == []
+    assert parse_module_list(" pennylane, braket.aws ,") == ["pennylane", "braket.aws"]
+    assert parse_module_list(["pennylane"]) == ["pennylane"]
+
+
+def test_warm_up(mocker, capsys):
+    """Test that modules are imported in the background and failures are only reported."""
+    mocker.patch.dict(sys.modules)
+    sys.modules.pop("colorsys", None)
+
+    warm_up = WarmUp(["colorsys", "covalent_missing_module"]).start()
+    warm_up.wait()
+
+    assert "colorsys" in sys.modules
+    assert list(warm_up.errors) == ["covalent_missing_module"]
+    assert "Failed to pre-import covalent_missing_module" in capsys.readouterr().err
+    # Waiting again, or on a warm-up without modules, returns at once.
+    warm_up.wait()
+    WarmUp([]).start().wait()
+
+
+def test_main_reports_phase_timings(tmp_path, capsys):
+    """Test that a task runs and the timings of its phases are printed as one log line."""
+    s3 = FakeS3()
+    s3.objects[(MOCK_BUCKET, "func.pkl")] = codec.dumps(divmod)
+    s3.objects[(MOCK_BUCKET, "args.pkl")] = codec.dumps(([7, 2], {}))
+    environ = {
+        "SM_HP_S3_BUCKET_NAME": MOCK_BUCKET,
+        "SM_HP_RESULT_FILENAME": "result.pkl",
+        "SM_HP_COVALENT_TASK_FUNC_FILENAME": "func.pkl",
+        "SM_HP_COVALENT_TASK_ARGS_FILENAME": "args.pkl",
+        "SM_HP_COVALENT_PREFETCH_MODULES": "json",
+        "SM_HP_WORKDIR": str(tmp_path),
+    }
+
+    timer = main(environ, s3)
+
+    assert codec.loads(s3.objects[(MOCK_BUCKET, "result.pkl")]) == (3, 1)
+    assert list(timer.timings) == [
+        "import",
+        "download",
+        "warm_up",
+        "unpickle",
+        "execute",
+        "upload",
+    ]
+    lines = capsys.readouterr().out.splitlines()
+    assert parse_timings(lines[-1]) == pytest.approx(timer.timings, abs=1e-5)
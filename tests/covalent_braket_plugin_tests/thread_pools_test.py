@@ -0,0 +1,107 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the dedicated thread pools."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from covalent_braket_plugin.thread_pools import BlockingCallPool, get_pool, shutdown_pools
+
+
+@pytest.fixture
+def pool():
+    pool = BlockingCallPool("test-pool", 2)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_calls_run_on_named_threads(pool):
+    """Test that calls run on the pool's own threads."""
+    name = await pool.run(lambda: threading.current_thread().name)
+    assert name.startswith("test-pool")
+
+
+@pytest.mark.asyncio
+async def test_saturation_is_measured(pool):
+    """Test that calls arriving while every thread is busy are counted and their wait timed."""
+    await asyncio.gather(*(pool.run(lambda: time.sleep(0.05)) for _ in range(6)))
+
+    metrics = pool.metrics()
+    assert metrics["submitted"] == 6
+    assert metrics["saturated"] == 4
+    assert metrics["peak_active"] == 2
+    assert metrics["peak_queued"] >= 4
+    assert metrics["active"] == 0
+    assert metrics["queued"] == 0
+    assert metrics["max_queue_wait"] >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_max_queue_applies_backpressure():
+    """Test that calls beyond the pool size and queue limit wait outside the pool."""
+    pool = BlockingCallPool("bounded-pool", 1, max_queue=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    calls = [asyncio.ensure_future(pool.run(block)) for _ in range(4)]
+    await asyncio.sleep(0.05)
+    assert started.is_set()
+    # One call runs, one is queued in the pool and two wait on the event loop.
+    assert pool.metrics()["submitted"] == 2
+
+    release.set()
+    await asyncio.gather(*calls)
+    assert pool.metrics()["submitted"] == 4
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_pending_calls():
+    """Test that shutting down can drop the calls that have not started yet."""
+    pool = BlockingCallPool("shutdown-pool", 1)
+    release = threading.Event()
+    running = pool.submit(lambda: release.wait(5))
+    pending = pool.submit(lambda: "never")
+
+    pool.shutdown(wait=False, cancel_pending=True)
+    release.set()
+
+    assert running.result(5) is True
+    assert pending.cancelled()
+    assert pool.metrics()["queued"] == 0
+    with pytest.raises(RuntimeError):
+        pool.submit(lambda: None)
+
+
+def test_get_pool_is_shared_and_recreated_after_shutdown():
+    """Test that pools are shared process-wide until they are shut down."""
+    pool = get_pool("shared-pool", 2)
+    assert get_pool("shared-pool", 2) is pool
+    assert get_pool("shared-pool", 3) is not pool
+
+    shutdown_pools()
+
+    assert pool.is_shutdown
+    assert get_pool("shared-pool", 2) is not pool
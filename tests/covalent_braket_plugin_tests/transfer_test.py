@@ -0,0 +1,93 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the settings of managed S3 transfers."""
+
+import io
+from unittest.mock import MagicMock
+
+import pytest
+
+from covalent_braket_plugin.transfer import MIB, TransferSettings
+
+GIB = 1024 * MIB
+
+
+def test_adaptive_part_size():
+    """Test that parts grow with the object so that every thread gets a few of them."""
+    settings = TransferSettings(max_concurrency=10)
+
+    assert settings.part_size_for(None) == 8 * MIB
+    assert settings.part_size_for(10 * MIB) == 8 * MIB
+    assert settings.part_size_for(GIB) == 26 * MIB
+    assert settings.part_size_for(100 * GIB) == 2560 * MIB
+
+
+def test_fixed_part_size_respects_part_limit():
+    """Test that a fixed part size is only raised to stay within 10,000 parts."""
+    settings = TransferSettings(part_size=16 * MIB)
+
+    assert settings.part_size_for(GIB) == 16 * MIB
+    assert settings.part_size_for(1024 * GIB) == 105 * MIB
+
+
+def test_config_for_small_object():
+    """Test that a small object is not transferred with more threads than it has parts."""
+    config = TransferSettings(max_concurrency=10, multipart_threshold=4 * MIB).config_for(20 * MIB)
+
+    assert config.multipart_threshold == 4 * MIB
+    assert config.multipart_chunksize == 8 * MIB
+    assert config.max_concurrency == 3
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [({"part_size": MIB}, "part size"), ({"checksum_algorithm": "MD5"}, "checksum")],
+)
+def test_invalid_settings(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        TransferSettings(**kwargs)
+
+
+def test_hyperparameters_round_trip():
+    """Test that the job runtime rebuilds the settings passed as hyperparameters."""
+    settings = TransferSettings(
+        part_size=64 * MIB, max_concurrency=4, multipart_threshold=GIB, checksum_algorithm="crc32c"
+    )
+    hyperparameters = settings.to_hyperparameters()
+
+    rebuilt = TransferSettings.from_hyperparameters(hyperparameters.get)
+
+    assert vars(rebuilt) == vars(settings)
+    assert "COVALENT_TRANSFER_CHECKSUM" not in TransferSettings().to_hyperparameters()
+    assert vars(TransferSettings.from_hyperparameters({}.get)) == vars(TransferSettings())
+
+
+def test_transfers_pass_settings():
+    """Test that uploads request checksums and downloads validate them."""
+    s3 = MagicMock()
+    settings = TransferSettings(checksum_algorithm="SHA256")
+    fileobj = io.BytesIO(b"payload")
+
+    settings.upload_fileobj(s3, fileobj, "bucket", "key", GIB)
+    settings.download_fileobj(s3, "bucket", "key", fileobj)
+
+    upload = s3.upload_fileobj.call_args.kwargs
+    assert upload["ExtraArgs"] == {"ChecksumAlgorithm": "SHA256"}
+    assert upload["Config"].multipart_chunksize == 26 * MIB
+    download = s3.download_fileobj.call_args.kwargs
+    assert download["ExtraArgs"] == {"ChecksumMode": "ENABLED"}
+    assert TransferSettings().upload_args() is None
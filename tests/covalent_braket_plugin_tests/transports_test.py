@@ -0,0 +1,257 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the AWS call transports."""
+
+import asyncio
+import builtins
+import io
+import os
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from covalent_braket_plugin import codec
+from covalent_braket_plugin.object_store import ObjectStore
+from covalent_braket_plugin.transfer import TransferSettings
+from covalent_braket_plugin.transports import (
+    AioBotocoreTransport,
+    Boto3Transport,
+    close_transports,
+    get_aiobotocore_transport,
+)
+from tests.fake_aws import FakeAioSession, FakeS3
+
+BUCKET = "bucket"
+
+
+class FakeBraket:
+    def create_job(self, **kwargs):
+        return {"jobArn": kwargs["jobName"]}
+
+
+@pytest.fixture
+def s3():
+    return FakeS3()
+
+
+@pytest.fixture
+def session(s3):
+    return FakeAioSession({"s3": s3, "braket": FakeBraket()})
+
+
+@pytest.fixture
+def store(s3, tmp_path):
+    return ObjectStore(s3, BUCKET, str(tmp_path / "index"), spool_dir=str(tmp_path))
+
+
+async def run_blocking(function, transfer=False):
+    return function()
+
+
+@pytest.mark.asyncio
+async def test_boto3_transport(s3, store):
+    """Test that the boto3 transport calls the clients through the blocking-call runner."""
+    transfers = []
+
+    async def run_blocking(function, transfer=False):
+        transfers.append(transfer)
+        return function()
+
+    transport = Boto3Transport({"s3": s3, "braket": FakeBraket()}.get, run_blocking)
+
+    assert await transport.call("braket", "create_job", jobName="job") == {"jobArn": "job"}
+    key = await transport.put_object(store, [1, 2, 3])
+    assert await transport.load_object(BUCKET, key) == [1, 2, 3]
+    assert transfers == [False, True, True]
+
+
+def _expired(*args, **kwargs):
+    raise ClientError({"Error": {"Code": "ExpiredTokenException"}}, "Operation")
+
+
+class ExpiringBraket(FakeBraket):
+    """Braket client whose next `failures` calls fail with expired credentials."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+
+    def create_job(self, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            _expired()
+        return super().create_job(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_boto3_transport_renews_expired_clients(s3, store):
+    """Test that calls failing with expired credentials are issued again with new clients."""
+    clients = {"s3": s3, "braket": ExpiringBraket(failures=1)}
+
+    def evict():
+        clients.update(s3=FakeS3(), braket=ExpiringBraket())
+
+    transport = Boto3Transport(clients.get, run_blocking, on_expired_credentials=evict)
+
+    assert await transport.call("braket", "create_job", jobName="job") == {"jobArn": "job"}
+
+    store.s3.head_object = _expired
+    key = await transport.put_object(store, [1, 2, 3])
+    assert store.s3 is clients["s3"]
+    assert (BUCKET, key) in clients["s3"].objects
+
+
+@pytest.mark.asyncio
+async def test_boto3_transport_raises_other_errors(s3):
+    """Test that errors other than expired credentials are raised without retrying."""
+    evicted = []
+    transport = Boto3Transport(
+        {"s3": s3}.get, run_blocking, on_expired_credentials=lambda: evicted.append(True)
+    )
+
+    with pytest.raises(ClientError, match="404"):
+        await transport.load_object(BUCKET, "missing")
+    assert evicted == []
+
+
+@pytest.mark.asyncio
+async def test_aiobotocore_transport_calls(session):
+    """Test that calls are awaited on clients created once per service."""
+    transport = AioBotocoreTransport(session=session, run_blocking=run_blocking)
+
+    responses = await asyncio.gather(
+        *(transport.call("braket", "create_job", jobName=f"job-{i}") for i in range(5))
+    )
+
+    assert [response["jobArn"] for response in responses] == [f"job-{i}" for i in range(5)]
+    assert session.clients_created == 1
+    assert session.calls["create_job"] == 5
+
+    await transport.close()
+    assert session.clients_closed == 1
+
+
+@pytest.mark.asyncio
+async def test_aiobotocore_transport_transfers(s3, session, store, tmp_path):
+    """Test that objects are stored once and read back from the response stream."""
+    transport = AioBotocoreTransport(
+        session=session, run_blocking=run_blocking, spool_threshold=16
+    )
+
+    key = await transport.put_object(store, list(range(100)))
+    assert await transport.put_object(store, list(range(100))) == key
+    assert session.calls == {"head_object": 1, "put_object": 1}
+    assert store.puts == 1
+
+    assert await transport.load_object(BUCKET, key) == list(range(100))
+
+    filename = tmp_path / "result.pkl"
+    await transport.download_file(BUCKET, key, str(filename))
+    assert codec.loads(filename.read_bytes()) == list(range(100))
+    assert s3.calls["get_object"] == 2
+
+
+@pytest.mark.asyncio
+async def test_aiobotocore_transport_renews_expired_clients():
+    """Test that a call failing with expired credentials is issued again on a new client."""
+    braket = ExpiringBraket(failures=1)
+    session = FakeAioSession({"braket": braket})
+    transport = AioBotocoreTransport(session=session, run_blocking=run_blocking)
+
+    assert await transport.call("braket", "create_job", jobName="job") == {"jobArn": "job"}
+    assert session.clients_created == 2
+
+    braket.failures = 2
+    with pytest.raises(ClientError, match="ExpiredTokenException"):
+        await transport.call("braket", "create_job", jobName="job")
+    await transport.close()
+    assert session.clients_closed == 3
+
+
+@pytest.mark.asyncio
+async def test_aiobotocore_transport_uploads_in_parts(s3, session, mocker):
+    """Test that large uploads are read off the event loop and sent in parts."""
+    mocker.patch.object(TransferSettings, "part_size_for", return_value=1024)
+    reads = []
+
+    async def run_blocking(function, transfer=False):
+        reads.append(transfer)
+        return function()
+
+    transport = AioBotocoreTransport(session=session, run_blocking=run_blocking)
+    data = os.urandom(2500)
+
+    await transport.upload_fileobj(io.BytesIO(data), BUCKET, "large")
+    await transport.upload_fileobj(io.BytesIO(b"small"), BUCKET, "small")
+
+    assert s3.objects[(BUCKET, "large")] == data
+    assert s3.objects[(BUCKET, "small")] == b"small"
+    assert session.calls["upload_part"] == 3
+    assert session.calls["put_object"] == 1
+    assert reads == [True] * 5
+
+
+@pytest.mark.asyncio
+async def test_aiobotocore_transport_aborts_failed_upload(s3, session, mocker):
+    """Test that a multipart upload that fails is aborted."""
+    mocker.patch.object(TransferSettings, "part_size_for", return_value=1024)
+    s3.complete_multipart_upload = MagicMock(side_effect=ClientError({"Error": {}}, "Complete"))
+    transport = AioBotocoreTransport(session=session, run_blocking=run_blocking)
+
+    with pytest.raises(ClientError):
+        await transport.upload_fileobj(io.BytesIO(os.urandom(2048)), BUCKET, "large")
+
+    assert session.calls["abort_multipart_upload"] == 1
+    assert (BUCKET, "large") not in s3.objects
+
+
+@pytest.mark.asyncio
+async def test_aiobotocore_transport_errors(session):
+    """Test that client errors are raised unchanged."""
+    transport = AioBotocoreTransport(session=session, run_blocking=run_blocking)
+
+    with pytest.raises(ClientError, match="404"):
+        await transport.load_object(BUCKET, "missing")
+
+
+@pytest.mark.asyncio
+async def test_aiobotocore_transport_is_shared_per_identity():
+    """Test that executors of the same identity share a transport on the running loop."""
+    first = get_aiobotocore_transport(("profile", "region", ""), profile="profile")
+    assert get_aiobotocore_transport(("profile", "region", ""), profile="profile") is first
+    assert get_aiobotocore_transport(("other", "region", "")) is not first
+
+    await close_transports()
+    assert get_aiobotocore_transport(("profile", "region", "")) is not first
+    await close_transports()
+
+
+@pytest.mark.asyncio
+async def test_aiobotocore_transport_requires_package(mocker):
+    """Test that a missing aiobotocore package is reported when the first client is created."""
+    real_import = builtins.__import__
+
+    def fake_import(name, *args, **kwargs):
+        if name.startswith("aiobotocore"):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    mocker.patch("builtins.__import__", side_effect=fake_import)
+    transport = AioBotocoreTransport()
+
+    with pytest.raises(ImportError, match=r"pip install covalent-braket-plugin\[aiobotocore\]"):
+        await transport.call("braket", "get_job", jobArn="arn")
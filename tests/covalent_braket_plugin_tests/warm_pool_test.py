@@ -0,0 +1,153 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the registry of persistent worker jobs."""
+
+import asyncio
+
+import pytest
+
+from covalent_braket_plugin import warm_pool
+from covalent_braket_plugin.warm_pool import WarmPool, Worker, get_warm_pool
+
+
+class Launcher:
+    def __init__(self, idle_timeout=300, max_tasks=0):
+        self.idle_timeout = idle_timeout
+        self.max_tasks = max_tasks
+        self.workers = []
+
+    async def __call__(self):
+        await asyncio.sleep(0.01)
+        worker = Worker(
+            f"job-{len(self.workers)}",
+            f"workers/{len(self.workers)}",
+            asyncio.get_running_loop().create_future(),
+            self.idle_timeout,
+            self.max_tasks,
+        )
+        self.workers.append(worker)
+        return worker
+
+
+async def run_task(pool, launch, size, duration=0.01):
+    worker = await pool.acquire("key", launch, size)
+    assert worker.in_flight == 1
+    await asyncio.sleep(duration)
+    worker.release()
+    return worker
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tasks_launch_up_to_pool_size():
+    """Test that busy workers get no more tasks, and tasks beyond the pool size wait."""
+    pool = WarmPool()
+    launch = Launcher()
+
+    workers = await asyncio.gather(*(run_task(pool, launch, 3) for _ in range(10)))
+
+    assert len(launch.workers) == 3
+    assert sorted(worker.tasks_assigned for worker in launch.workers) == [3, 3, 4]
+    assert {id(worker) for worker in workers} == {id(worker) for worker in launch.workers}
+    assert all(worker.in_flight == 0 for worker in launch.workers)
+
+
+@pytest.mark.asyncio
+async def test_idle_worker_is_reused():
+    """Test that a task is assigned to an idle worker instead of launching another."""
+    pool = WarmPool()
+    launch = Launcher()
+
+    first = await run_task(pool, launch, 10)
+    second = await run_task(pool, launch, 10)
+
+    assert first is second
+    assert len(launch.workers) == 1
+
+
+@pytest.mark.asyncio
+async def test_max_tasks_launches_more_workers():
+    """Test that a worker receives at most its maximum number of tasks."""
+    pool = WarmPool()
+    launch = Launcher(max_tasks=2)
+
+    workers = await asyncio.gather(*(run_task(pool, launch, 1) for _ in range(5)))
+
+    assert len(launch.workers) == 3
+    assert [worker.tasks_assigned for worker in launch.workers] == [2, 2, 1]
+    assert len({id(worker) for worker in workers}) == 3
+
+
+@pytest.mark.asyncio
+async def test_keys_do_not_share_workers():
+    """Test that workers are only reused for tasks of the same key."""
+    pool = WarmPool()
+    launch = Launcher()
+
+    first = await pool.acquire("sv1", launch)
+    second = await pool.acquire("tn1", launch)
+
+    assert first is not second
+
+
+@pytest.mark.asyncio
+async def test_idle_stopped_and_retired_workers_are_skipped(monkeypatch):
+    """Test that tasks are not routed to workers that stopped or are about to."""
+    pool = WarmPool()
+    launch = Launcher(idle_timeout=100)
+    worker = await run_task(pool, launch, 1)
+
+    # Close to the idle timeout, an idle worker is no longer used.
+    monkeypatch.setattr(warm_pool.time, "monotonic", lambda: worker._last_active + 80)
+    assert not worker.accepts_tasks()
+    monkeypatch.undo()
+
+    assert await run_task(pool, launch, 1) is worker
+    pool.retire(worker)
+    replacement = await run_task(pool, launch, 1)
+    assert replacement is not worker
+
+    replacement.future.set_result("COMPLETED")
+    assert await run_task(pool, launch, 1) is launch.workers[2]
+    assert pool.workers("key") == [launch.workers[2]]
+
+
+@pytest.mark.asyncio
+async def test_failed_launch_is_reported_to_every_waiter():
+    """Test that every task waiting for a launch sees its error, and later tasks retry."""
+    pool = WarmPool()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("create_job failed")
+
+    results = await asyncio.gather(
+        *(pool.acquire("key", fail) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    results = await asyncio.gather(
+        *(pool.acquire("key", fail, 3) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    assert await pool.acquire("key", Launcher()) is not None
+
+
+@pytest.mark.asyncio
+async def test_get_warm_pool_is_shared():
+    """Test that executors on the same event loop share a pool."""
+    assert get_warm_pool() is get_warm_pool()
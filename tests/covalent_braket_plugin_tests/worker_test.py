@@ -0,0 +1,195 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the job runtime's task runner and persistent worker."""
+
+import time
+
+import pytest
+
+from covalent_braket_plugin import codec
+from covalent_braket_plugin.transfer import MIB, TransferSettings
+from covalent_braket_plugin.worker import (
+    done_key,
+    fetch_objects,
+    get_document,
+    put_document,
+    run_batch,
+    run_task,
+    serve,
+    task_key,
+)
+from tests.fake_aws import FakeS3
+
+MOCK_BUCKET = "mock_bucket"
+PREFIX = "workers/worker-1"
+
+
+def submit(s3, task_id, function, args, kwargs=None):
+    s3.objects[(MOCK_BUCKET, f"objects/func-{task_id}.pkl")] = codec.dumps(function)
+    s3.objects[(MOCK_BUCKET, f"objects/args-{task_id}.pkl")] = codec.dumps((args, kwargs or {}))
+    put_document(
+        s3,
+        MOCK_BUCKET,
+        task_key(PREFIX, task_id),
+        {
+            "func_filename": f"objects/func-{task_id}.pkl",
+            "args_filename": f"objects/args-{task_id}.pkl",
+            "result_filename": f"result-{task_id}.pkl",
+        },
+    )
+
+
+def result(s3, task_id):
+    return codec.loads(s3.objects[(MOCK_BUCKET, f"result-{task_id}.pkl")])
+
+
+def test_run_task_legacy_payload(tmp_path):
+    """Test that single (function, args, kwargs) payloads of older executors still run."""
+    s3 = FakeS3()
+    s3.objects[(MOCK_BUCKET, "func.pkl")] = codec.dumps((lambda x, y: x * y, [3], {"y": 4}))
+
+    run_task(s3, MOCK_BUCKET, str(tmp_path), "func.pkl", None, "result.pkl")
+
+    assert codec.loads(s3.objects[(MOCK_BUCKET, "result.pkl")]) == 12
+
+
+def test_run_task_in_memory(tmp_path):
+    """Test that payloads and results are transferred without files and every phase is timed."""
+    s3 = FakeS3()
+    submit(s3, "1", pow, [2, 10])
+    waited = []
+
+    timer = run_task(
+        s3,
+        MOCK_BUCKET,
+        str(tmp_path),
+        "objects/func-1.pkl",
+        "objects/args-1.pkl",
+        "result.pkl",
+        wait_for_warm_up=lambda: waited.append(True),
+    )
+
+    assert codec.loads(s3.objects[(MOCK_BUCKET, "result.pkl")]) == 1024
+    assert waited == [True]
+    assert list(timer.timings) == ["download", "warm_up", "unpickle", "execute", "upload"]
+    assert s3.calls["download_fileobj"] == 2
+    assert s3.calls["download_file"] == s3.calls["upload_file"] == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_fetch_objects_sizes_parts(tmp_path, mocker):
+    """Test that downloads get parts sized for each object unless the part size is fixed."""
+    s3 = FakeS3()
+    s3.objects[(MOCK_BUCKET, "small")] = b"x" * 10
+    s3.objects[(MOCK_BUCKET, "large")] = b"x" * 1000
+    config_for = mocker.spy(TransferSettings, "config_for")
+
+    payloads = fetch_objects(s3, MOCK_BUCKET, ["small", "large"], str(tmp_path))
+    assert [payload.read() for payload in payloads] == [b"x" * 10, b"x" * 1000]
+    assert sorted(call.args[1] for call in config_for.call_args_list) == [10, 1000]
+
+    config_for.reset_mock()
+    fetch_objects(s3, MOCK_BUCKET, ["large"], str(tmp_path), TransferSettings(part_size=MIB * 16))
+    assert config_for.call_args.args[1] is None
+    assert s3.calls["head_object"] == 2
+
+
+def test_serve_runs_tasks_until_idle(tmp_path):
+    """Test that a worker runs every submitted task, records its output and stops when idle."""
+    s3 = FakeS3()
+
+    def shout(word):
+        print(word.upper())
+        return len(word)
+
+    submit(s3, "1", shout, ["hello"])
+    submit(s3, "2", shout, ["braket"])
+
+    start = time.monotonic()
+    assert serve(s3, MOCK_BUCKET, PREFIX, str(tmp_path), idle_timeout=0.1, poll_interval=0.01) == 2
+
+    assert time.monotonic() - start >= 0.1
+    assert result(s3, "1") == 5
+    assert result(s3, "2") == 6
+    record = get_document(s3, MOCK_BUCKET, done_key(PREFIX, "1"))
+    timings = record.pop("timings")
+    assert record == {"status": "COMPLETED", "stdout": "HELLO\n", "stderr": ""}
+    assert set(timings) == {"download", "unpickle", "execute", "upload"}
+    # Picked-up tasks are removed from the queue.
+    assert get_document(s3, MOCK_BUCKET, task_key(PREFIX, "1")) is None
+
+
+def test_serve_isolates_failures(tmp_path):
+    """Test that a failing task is recorded without stopping the worker."""
+    s3 = FakeS3()
+
+    def divide(x):
+        return 1 / x
+
+    submit(s3, "1", divide, [0])
+    submit(s3, "2", divide, [4])
+
+    assert serve(s3, MOCK_BUCKET, PREFIX, str(tmp_path), idle_timeout=0, poll_interval=0) == 2
+
+    record = get_document(s3, MOCK_BUCKET, done_key(PREFIX, "1"))
+    assert record["status"] == "FAILED"
+    assert "ZeroDivisionError" in record["error"]
+    assert (MOCK_BUCKET, "result-1.pkl") not in s3.objects
+    assert result(s3, "2") == 0.25
+
+
+def test_serve_stops_after_max_tasks(tmp_path):
+    """Test that a worker stops once it ran its maximum number of tasks."""
+    s3 = FakeS3()
+    for task_id in "123":
+        submit(s3, task_id, abs, [-int(task_id)])
+
+    assert serve(s3, MOCK_BUCKET, PREFIX, str(tmp_path), idle_timeout=60, max_tasks=2) == 2
+
+    assert result(s3, "1") == 1
+    assert result(s3, "2") == 2
+    assert get_document(s3, MOCK_BUCKET, task_key(PREFIX, "3")) is not None
+
+
+@pytest.mark.parametrize("parallelism", [1, 4])
+def test_run_batch(tmp_path, parallelism):
+    """Test that a bundle's outcomes keep each task's result, error and output apart."""
+    s3 = FakeS3()
+
+    def task(x):
+        print(f"task {x}")
+        time.sleep(0.1)
+        return 10 / x
+
+    s3.objects[(MOCK_BUCKET, "bundle.pkl")] = codec.dumps([(task, [x], {}) for x in [1, 0, 2, 5]])
+
+    start = time.monotonic()
+    run_batch(s3, MOCK_BUCKET, str(tmp_path), "bundle.pkl", "result.pkl", parallelism=parallelism)
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= 0.4 if parallelism == 1 else elapsed < 0.3
+
+    outcomes = codec.loads(s3.objects[(MOCK_BUCKET, "result.pkl")])
+    assert [outcome["status"] for outcome in outcomes] == [
+        "COMPLETED",
+        "FAILED",
+        "COMPLETED",
+        "COMPLETED",
+    ]
+    assert [outcome.get("result") for outcome in outcomes] == [10, None, 5, 2]
+    assert "ZeroDivisionError" in outcomes[1]["error"]
+    assert [outcome["stdout"] for outcome in outcomes] == [f"task {x}\n" for x in [1, 0, 2, 5]]
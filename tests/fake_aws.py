@@ -0,0 +1,509 @@
+# Copyright 2021 Agnostiq Inc.
+#
+# This file is part of Covalent.
+#
+# Licensed under the Apache License 2.0 (the "License"). A copy of the
+# License may be obtained with this software package or at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Use of this file is prohibited except in compliance with the License.
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process stand-ins for the AWS services used by the Braket executor."""
+
+import io
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from covalent_braket_plugin import runner, worker
+
+
+class _FakeClient:
+    """Base of the fakes, counting calls and delaying each by a fixed latency."""
+
+    def __init__(self, latency: float = 0.0):
+        self.calls = Counter()
+        self.latency = latency
+
+    def _called(self, operation_name: str) -> None:
+        self.calls[operation_name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class FakeS3(_FakeClient):
+    """In-memory S3 client supporting the calls made by the executor and the job runtime.
+
+    Attributes:
+        objects: Stored objects keyed by (bucket, key).
+        calls: Number of calls made per operation.
+        latency: Number of seconds every call takes.
+        bytes_uploaded: Total number of bytes written.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.bytes_uploaded = 0
+        self._uploads: Dict[str, Dict[int, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def _put(self, bucket: str, key: str, data: bytes) -> None:
+        with self._lock:
+            self.objects[(bucket, key)] = data
+            self.bytes_uploaded += len(data)
+
+    def _get(self, operation_name: str, bucket: str, key: str) -> bytes:
+        try:
+            return self.objects[(bucket, key)]
+        except KeyError:
+            raise ClientError(
+                {"Error": {"Code": "404", "Message": "Not Found"}}, operation_name
+            ) from None
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, **kwargs):
+        self._called("upload_fileobj")
+        self._put(Bucket, Key, Fileobj.read())
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        self._called("upload_file")
+        with open(Filename, "rb") as f:
+            self._put(Bucket, Key, f.read())
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._called("put_object")
+        self._put(Bucket, Key, Body if isinstance(Body, bytes) else Body.read())
+        return {}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self._called("create_multipart_upload")
+        upload_id = f"upload-{len(self._uploads)}"
+        self._uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        self._called("upload_part")
+        self._uploads[UploadId][PartNumber] = Body if isinstance(Body, bytes) else Body.read()
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self._called("complete_multipart_upload")
+        parts = self._uploads.pop(UploadId)
+        data = b"".join(parts[part["PartNumber"]] for part in MultipartUpload["Parts"])
+        self._put(Bucket, Key, data)
+        return {}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self._called("abort_multipart_upload")
+        self._uploads.pop(UploadId, None)
+        return {}
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        self._called("download_file")
+        with open(Filename, "wb") as f:
+            f.write(self._get("HeadObject", Bucket, Key))
+
+    def download_fileobj(self, Bucket, Key, Fileobj, **kwargs):
+        self._called("download_fileobj")
+        Fileobj.write(self._get("HeadObject", Bucket, Key))
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self._called("get_object")
+        data = self._get("GetObject", Bucket, Key)
+        return {"Body": io.BytesIO(data), "ContentLength": len(data)}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self._called("head_object")
+        return {"ContentLength": len(self._get("HeadObject", Bucket, Key))}
+
+    def list_objects_v2(self, Bucket, Prefix="", **kwargs):
+        self._called("list_objects_v2")
+        with self._lock:
+            keys = sorted(key for bucket, key in self.objects if bucket == Bucket)
+        contents = [{"Key": key} for key in keys if key.startswith(Prefix)]
+        return {"Contents": contents, "KeyCount": len(contents)}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self._called("delete_object")
+        with self._lock:
+            self.objects.pop((Bucket, Key), None)
+        return {}
+
+
+class FakeLogs(_FakeClient):
+    """In-memory CloudWatch Logs client holding the log streams of fake Braket jobs.
+
+    Log streams and their events are paginated like CloudWatch does: ``get_log_events`` returns
+    the token it was passed once the end of a stream is reached.
+
+    Attributes:
+        streams: Log messages keyed by log stream name.
+        calls: Number of calls made per operation.
+        latency: Number of seconds every call takes.
+        page_size: Maximum number of events returned per ``get_log_events`` call.
+        streams_page_size: Maximum number of streams returned per ``describe_log_streams`` call.
+    """
+
+    def __init__(self, page_size: int = 10000, streams_page_size: int = 50, latency: float = 0.0):
+        super().__init__(latency)
+        self.streams: Dict[str, List[str]] = {}
+        self.page_size = page_size
+        self.streams_page_size = streams_page_size
+        self._lock = threading.Lock()
+
+    def log(self, stream_name: str, message: str) -> None:
+        with self._lock:
+            self.streams.setdefault(stream_name, []).append(message)
+
+    def describe_log_streams(
+        self, logGroupName, logStreamNamePrefix="", nextToken=None, limit=None, **kwargs
+    ):
+        self._called("describe_log_streams")
+        with self._lock:
+            names = sorted(name for name in self.streams if name.startswith(logStreamNamePrefix))
+        start = int(nextToken) if nextToken else 0
+        end = start + min(limit or self.streams_page_size, self.streams_page_size)
+        response = {"logStreams": [{"logStreamName": name} for name in names[start:end]]}
+        if end < len(names):
+            response["nextToken"] = str(end)
+        return response
+
+    def get_log_events(
+        self,
+        logGroupName,
+        logStreamName,
+        nextToken=None,
+        startFromHead=False,
+        limit=None,
+        **kwargs,
+    ):
+        self._called("get_log_events")
+        with self._lock:
+            messages = list(self.streams.get(logStreamName, []))
+        start = int(nextToken[2:]) if nextToken else 0
+        end = min(len(messages), start + min(limit or self.page_size, self.page_size))
+        return {
+            "events": [{"timestamp": 0, "message": message} for message in messages[start:end]],
+            "nextForwardToken": f"f/{end}",
+            "nextBackwardToken": f"b/{start}",
+        }
+
+
+class FakeBraket(_FakeClient):
+    """In-memory Braket client whose hybrid jobs run the job runtime in threads.
+
+    Jobs run :func:`~covalent_braket_plugin.worker.run_task`, or for batch and worker jobs
+    :func:`~covalent_braket_plugin.worker.run_batch` and
+    :func:`~covalent_braket_plugin.worker.serve`, against a :class:`FakeS3`, with the
+    hyperparameters passed to ``create_job``. With ``run_entry_point``, they run the job
+    container's entry point, :func:`~covalent_braket_plugin.runner.main`, instead. The objects
+    of the job's input data channels are copied to ``input/<channel>/`` in its working
+    directory before it runs. If a
+    :class:`FakeLogs` is given, each job writes its final status to a log stream named after the
+    job.
+
+    Attributes:
+        jobs: Job descriptions keyed by job ARN.
+        quantum_tasks: Quantum task descriptions keyed by task ARN. Tests add tasks of a job
+            with :meth:`add_quantum_task`, jobs do not create any.
+        calls: Number of calls made per operation.
+        latency: Number of seconds every call takes.
+        job_duration: Number of seconds every job takes to start, on top of running its task.
+        create_job_rate: Number of ``create_job`` calls accepted per second, beyond which calls
+            are rejected with a ``ThrottlingException``, or 0 for no limit.
+        job_slots: Number of jobs running at once, further jobs stay queued, or 0 for a thread
+            per job.
+        run_entry_point: Whether jobs run the job container's entry point.
+        throttle_create_job: Number of upcoming ``create_job`` calls rejected with a
+            ``ThrottlingException``.
+        max_running: Highest number of jobs running at once so far.
+    """
+
+    def __init__(
+        self,
+        s3: FakeS3,
+        work_dir: str,
+        logs: Optional[FakeLogs] = None,
+        worker_poll_interval: float = 0.01,
+        latency: float = 0.0,
+        job_duration: float = 0.0,
+        create_job_rate: float = 0.0,
+        job_slots: int = 0,
+        run_entry_point: bool = False,
+    ):
+        super().__init__(latency)
+        self.s3 = s3
+        self.work_dir = work_dir
+        self.logs = logs
+        self.worker_poll_interval = worker_poll_interval
+        self.job_duration = job_duration
+        self.create_job_rate = create_job_rate
+        self.job_slots = job_slots
+        self.run_entry_point = run_entry_point
+        self.jobs: Dict[str, Dict] = {}
+        self.quantum_tasks: Dict[str, Dict] = {}
+        self.throttle_create_job = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+        self._accepted_at: List[float] = []
+        self._slots = ThreadPoolExecutor(job_slots, "fake-braket-job") if job_slots else None
+
+    def _rate_exceeded(self) -> bool:
+        if not self.create_job_rate:
+            return False
+        # Sliding window of one second.
+        now = time.monotonic()
+        self._accepted_at = [t for t in self._accepted_at if now - t < 1.0]
+        if len(self._accepted_at) >= self.create_job_rate:
+            return True
+        self._accepted_at.append(now)
+        return False
+
+    def create_job(self, jobName, hyperParameters, **kwargs):
+        self._called("create_job")
+        job_arn = f"arn:aws:braket:us-east-1:000000000000:job/{jobName}"
+        job = {
+            "jobArn": job_arn,
+            "jobName": jobName,
+            "status": "QUEUED" if self._slots else "RUNNING",
+            "createdAt": datetime.now(timezone.utc),
+            "checkpointConfig": kwargs.get("checkpointConfig"),
+            "inputDataConfig": kwargs.get("inputDataConfig", []),
+        }
+        with self._lock:
+            if self.throttle_create_job or self._rate_exceeded():
+                self.throttle_create_job = max(0, self.throttle_create_job - 1)
+                raise ClientError(
+                    {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+                    "CreateJob",
+                )
+            self.jobs[job_arn] = job
+        if self._slots:
+            self._slots.submit(self._run, job, hyperParameters)
+        else:
+            threading.Thread(target=self._run, args=(job, hyperParameters), daemon=True).start()
+        return {"jobArn": job_arn}
+
+    def cancel_job(self, jobArn, **kwargs):
+        self._called("cancel_job")
+        with self._lock:
+            job = self.jobs[jobArn]
+            if job["status"] in ("QUEUED", "RUNNING"):
+                job["status"] = "CANCELLING"
+            return {"jobArn": jobArn, "cancellationStatus": "CANCELLING"}
+
+    def add_quantum_task(self, job_arn: str, status: str = "QUEUED") -> str:
+        """Add a quantum task of a job.
+
+        Returns:
+            ARN of the task.
+        """
+        task_arn = f"arn:aws:braket:us-east-1:000000000000:quantum-task/{len(self.quantum_tasks)}"
+        with self._lock:
+            self.quantum_tasks[task_arn] = {
+                "quantumTaskArn": task_arn,
+                "jobArn": job_arn,
+                "status": status,
+            }
+        return task_arn
+
+    def search_quantum_tasks(self, filters, nextToken=None, maxResults=100, **kwargs):
+        self._called("search_quantum_tasks")
+        with self._lock:
+            tasks = [
+                dict(task)
+                for task in self.quantum_tasks.values()
+                if all(task.get(f["name"]) in f["values"] for f in filters)
+            ]
+        start = int(nextToken or 0)
+        response = {"quantumTasks": tasks[start : start + maxResults]}
+        if start + maxResults < len(tasks):
+            response["nextToken"] = str(start + maxResults)
+        return response
+
+    def cancel_quantum_task(self, quantumTaskArn, clientToken, **kwargs):
+        self._called("cancel_quantum_task")
+        with self._lock:
+            task = self.quantum_tasks[quantumTaskArn]
+            if task["status"] in ("CREATED", "QUEUED", "RUNNING"):
+                task["status"] = "CANCELLING"
+            return {"quantumTaskArn": quantumTaskArn, "cancellationStatus": "CANCELLING"}
+
+    def _start(self, job: Dict) -> bool:
+        with self._lock:
+            if job["status"] == "CANCELLING":
+                job["status"] = "CANCELLED"
+                return False
+            job["status"] = "RUNNING"
+            running = sum(job["status"] == "RUNNING" for job in self.jobs.values())
+            self.max_running = max(self.max_running, running)
+            return True
+
+    def _copy_input_data(self, job: Dict, input_dir: str) -> None:
+        for channel in job["inputDataConfig"]:
+            uri = channel["dataSource"]["s3DataSource"]["s3Uri"]
+            bucket, key = uri[len("s3://") :].split("/", 1)
+            channel_dir = os.path.join(input_dir, channel["channelName"])
+            os.makedirs(channel_dir, exist_ok=True)
+            with open(os.path.join(channel_dir, os.path.basename(key)), "wb") as f:
+                f.write(self.s3._get("GetObject", bucket, key))
+
+    def _run_entry_point(
+        self, hyperparameters: Dict[str, str], work_dir: str, input_dir: str
+    ) -> None:
+        environ = {f"SM_HP_{name}": str(value) for name, value in hyperparameters.items()}
+        environ["SM_HP_WORKDIR"] = work_dir
+        environ["AMZN_BRAKET_INPUT_DIR"] = input_dir
+        runner.main(environ, self.s3)
+
+    def _run(self, job: Dict, hyperparameters: Dict[str, str]) -> None:
+        if not self._start(job):
+            return
+        if self.job_duration:
+            time.sleep(self.job_duration)
+        work_dir = os.path.join(self.work_dir, job["jobName"])
+        os.makedirs(work_dir, exist_ok=True)
+        input_dir = os.path.join(work_dir, "input")
+        bucket = hyperparameters["S3_BUCKET_NAME"]
+        try:
+            self._copy_input_data(job, input_dir)
+            if self.run_entry_point:
+                self._run_entry_point(hyperparameters, work_dir, input_dir)
+            elif "COVALENT_WORKER_PREFIX" in hyperparameters:
+                worker.serve(
+                    self.s3,
+                    bucket,
+                    hyperparameters["COVALENT_WORKER_PREFIX"],
+                    work_dir,
+                    idle_timeout=float(hyperparameters["COVALENT_WORKER_IDLE_TIMEOUT"]),
+                    max_tasks=int(hyperparameters["COVALENT_WORKER_MAX_TASKS"]),
+                    poll_interval=self.worker_poll_interval,
+                )
+            elif "COVALENT_BATCH_FILENAME" in hyperparameters:
+                worker.run_batch(
+                    self.s3,
+                    bucket,
+                    work_dir,
+                    hyperparameters["COVALENT_BATCH_FILENAME"],
+                    hyperparameters["RESULT_FILENAME"],
+                    hyperparameters.get("COVALENT_RESULT_CODEC", "none"),
+                    parallelism=int(hyperparameters["COVALENT_BATCH_PARALLELISM"]),
+                    input_dir=input_dir,
+                )
+            else:
+                worker.run_task(
+                    self.s3,
+                    bucket,
+                    work_dir,
+                    hyperparameters["COVALENT_TASK_FUNC_FILENAME"],
+                    hyperparameters.get("COVALENT_TASK_ARGS_FILENAME"),
+                    hyperparameters["RESULT_FILENAME"],
+                    hyperparameters.get("COVALENT_RESULT_CODEC", "none"),
+                    input_dir=input_dir,
+                )
+            status, reason = "COMPLETED", None
+        except Exception as error:
+            status, reason = "FAILED", repr(error)
+        if self.logs is not None:
+            self.logs.log(f"{job['jobName']}/algo-1", f"Job {status}")
+        with self._lock:
+            job["status"] = "CANCELLED" if job["status"] == "CANCELLING" else status
+            if reason:
+                job["failureReason"] = reason
+
+    def get_job(self, jobArn, **kwargs):
+        self._called("get_job")
+        with self._lock:
+            if jobArn not in self.jobs:
+                raise ClientError(
+                    {"Error": {"Code": "ResourceNotFoundException", "Message": "Not found"}},
+                    "GetJob",
+                )
+            return dict(self.jobs[jobArn])
+
+    def search_jobs(self, filters, **kwargs):
+        self._called("search_jobs")
+        status = filters[0]["values"][0]
+        created_after = datetime.strptime(filters[1]["values"][0], "%Y-%m-%dT%H:%M:%SZ")
+        created_after = created_after.replace(tzinfo=timezone.utc)
+        with self._lock:
+            jobs = [
+                dict(job)
+                for job in self.jobs.values()
+                if job["status"] == status and job["createdAt"] >= created_after
+            ]
+        return {"jobs": jobs}
+
+
+class _FakeAioBody:
+    """Async wrapper of a response stream, like aiobotocore's StreamingBody."""
+
+    def __init__(self, body):
+        self._body = body
+
+    async def read(self, amt: Optional[int] = None) -> bytes:
+        return self._body.read(amt)
+
+    def close(self) -> None:
+        self._body.close()
+
+
+class _FakeAioClient:
+    """Async wrapper of a fake client, like an aiobotocore client."""
+
+    def __init__(self, client, calls: Counter):
+        self._client = client
+        self._calls = calls
+
+    def __getattr__(self, operation_name: str):
+        method = getattr(self._client, operation_name)
+
+        async def call(**kwargs):
+            self._calls[operation_name] += 1
+            response = method(**kwargs)
+            if "Body" in response:
+                response = dict(response, Body=_FakeAioBody(response["Body"]))
+            return response
+
+        return call
+
+
+class FakeAioSession:
+    """Stand-in for an aiobotocore session whose clients wrap the in-process fakes.
+
+    Attributes:
+        calls: Number of async calls made per operation.
+        clients_created: Number of clients created.
+        clients_closed: Number of clients closed.
+    """
+
+    def __init__(self, clients: Dict[str, object]):
+        self._clients = clients
+        self.calls = Counter()
+        self.clients_created = 0
+        self.clients_closed = 0
+
+    def create_client(self, service_name: str, **kwargs):
+        session = self
+
+        class _Context:
+            async def __aenter__(self):
+                session.clients_created += 1
+                return _FakeAioClient(session._clients[service_name], session.calls)
+
+            async def __aexit__(self, *exc_info):
+                session.clients_closed += 1
+
+        return _Context()